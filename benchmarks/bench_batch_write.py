@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: importação registro a registro vs escrita em lote
+
+Uso:
+    python benchmarks/bench_batch_write.py --records 500 --latency-ms 80
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Credenciais fictícias: o servidor falso não valida app_key/app_secret
+os.environ.setdefault("OMIE_APP_KEY", "bench")
+os.environ.setdefault("OMIE_APP_SECRET", "bench")
+# Sem limitador por padrão para medir apenas o custo das chamadas (--rate-limit ativa)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fake_omie_server import FakeOmieServer
+from src.config import config
+from src.client.omie_client import OmieClient
+from src.client.omie_batch import OmieBatchWriter
+from src.client.http_transport import omie_transport
+
+CNPJ_VALIDO = "11.222.333/0001-81"
+
+
+def make_records(total: int):
+    return [
+        {
+            "razao_social": f"Cliente Bench {i}",
+            "nome_fantasia": f"Bench {i}",
+            "cnpj_cpf": CNPJ_VALIDO,
+            "codigo_cliente_integracao": f"BENCH{i:06d}"
+        }
+        for i in range(total)
+    ]
+
+
+async def main(total: int, latency_ms: float, concurrency: int, lot_size: int):
+    with FakeOmieServer(latency_ms=latency_ms) as server:
+        client = OmieClient()
+        client.base_url = server.base_url
+        records = make_records(total)
+
+        start = time.perf_counter()
+        for record in records:
+            await client.incluir_cliente(record)
+        elapsed = time.perf_counter() - start
+        print(f"{'sequencial':<12} chamadas={total:5d}  total={elapsed:6.2f}s  rps={total / elapsed:8.1f}")
+
+        writer = OmieBatchWriter(client, concurrency=concurrency)
+        for label, use_lots in (("unitario", False), ("lote", True)):
+            before = server.requests
+            result = await writer.write("cliente", records, lot_size=lot_size, use_lots=use_lots)
+            summary = result.to_dict()
+            print(f"{label:<12} chamadas={server.requests - before:5d}  "
+                  f"total={summary['tempo_segundos']:6.2f}s  rps={summary['registros_por_segundo']:8.1f}  "
+                  f"ok={summary['sucesso']}")
+
+        await omie_transport.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=80.0,
+                        help="latência artificial do servidor falso")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--lot-size", type=int, default=50)
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="ativa o limitador adaptativo durante o benchmark")
+    args = parser.parse_args()
+
+    if args.rate_limit:
+        config.rate_limit_enabled = True
+
+    asyncio.run(main(args.records, args.latency_ms, args.concurrency, args.lot_size))
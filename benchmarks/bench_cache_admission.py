@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Taxa de acerto do cache com LRU puro vs. políticas + admissão TinyLFU
+
+Reproduz um trace de consultas (JSONL, uma por linha:
+{"tool": ..., "params": {...}, "size_bytes": ..., "latency_ms": ...}, como o
+trace gravado pelo servidor em CACHE_TRACE_PATH) contra
+o IntelligentCache em cada configuração e informa a taxa de acerto e a
+fração da latência upstream evitada. Sem --trace, gera um trace sintético:
+consultas pequenas e quentes de cadastros (Zipf) intercaladas com dumps
+grandes e raros de contas a receber.
+
+Uso:
+    python benchmarks/bench_cache_admission.py --requests 20000 --cache-mb 16
+    python benchmarks/bench_cache_admission.py --trace trace.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.policy import PolicyRegistry
+from src.cache.sizing import RAW_BYTES_EXPANSION
+from src.client.omie_response import OmieResponse
+
+# Consultas pequenas: (ferramenta, tamanho em bytes, latência em ms)
+LOOKUPS = [
+    ("consultar_categorias", 6 * 1024, 180),
+    ("consultar_departamentos", 3 * 1024, 150),
+    ("consultar_cliente_por_codigo", 4 * 1024, 220),
+]
+DUMP = ("consultar_contas_receber", 1536 * 1024, 2500)
+
+
+def synthetic_trace(requests: int, keys: int, dump_ratio: float, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    weights = [1 / (rank ** 1.1) for rank in range(1, keys + 1)]
+    trace = []
+    for _ in range(requests):
+        if rng.random() < dump_ratio:
+            tool, size, latency = DUMP
+            # Dumps por período: quase nunca repetidos
+            params = {"pagina": 1, "periodo": rng.randrange(requests)}
+        else:
+            item = rng.choices(range(keys), weights)[0]
+            tool, size, latency = LOOKUPS[item % len(LOOKUPS)]
+            params = {"codigo": item}
+        trace.append({"tool": tool, "params": params, "size_bytes": size, "latency_ms": latency})
+    return trace
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(cache: IntelligentCache, trace: List[Dict[str, Any]]) -> Dict[str, float]:
+    hits = 0
+    saved = total = 0.0
+    for request in trace:
+        latency = request.get("latency_ms", 100) / 1000
+        total += latency
+        if await cache.get(request["tool"], request["params"]) is not None:
+            hits += 1
+            saved += latency
+            continue
+        # Falta: "chama" o Omie e grava uma resposta do tamanho registrado no trace
+        cache.record_latency(request["tool"], latency)
+        raw_size = int(request.get("size_bytes", 1024) / RAW_BYTES_EXPANSION)
+        await cache.set(request["tool"], request["params"], OmieResponse({"ok": True}, raw_size=raw_size))
+    return {
+        "hit_rate": hits / len(trace) * 100,
+        "latency_saved": saved / total * 100 if total else 0,
+        "evictions": cache.evictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--trace", help="Trace JSONL; sem ele usa um trace sintético")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=3000)
+    parser.add_argument("--dump-ratio", type=float, default=0.02)
+    parser.add_argument("--cache-mb", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(
+        args.requests, args.keys, args.dump_ratio, args.seed
+    )
+    print(f"{len(trace):,} consultas, cache de {args.cache_mb}MB")
+
+    configs = {
+        "lru": dict(admission="lru"),
+        "lru+políticas": dict(admission="lru", policies=PolicyRegistry(from_endpoints=True)),
+        "tinylfu+políticas": dict(admission="tinylfu", policies=PolicyRegistry(from_endpoints=True)),
+    }
+    for name, options in configs.items():
+        cache = IntelligentCache(max_size_mb=args.cache_mb, default_ttl=3600, **options)
+        result = asyncio.run(replay(cache, trace))
+        print(f"  {name:<18} acerto={result['hit_rate']:5.1f}%  "
+              f"latência evitada={result['latency_saved']:5.1f}%  "
+              f"despejos={result['evictions']:,}")
+
+
+if __name__ == "__main__":
+    main()
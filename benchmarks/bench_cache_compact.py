@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Memória por registro de listagens Omie: dicts vs. colunas (src/cache/compact.py)
+
+Decodifica respostas sintéticas de contas a receber (como o OmieClient faz)
+e mede com tracemalloc a memória residente da lista de dicts e da forma em
+colunas, além do custo de compactar, remontar tudo e recortar uma página.
+
+Uso:
+    python benchmarks/bench_cache_compact.py --records 1000 10000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.compact import compact_payload, expand_payload
+from src.cache.sizing import deep_size
+
+STATUS = ["A VENCER", "RECEBIDO", "ATRASADO", "CANCELADO"]
+CIDADES = ["SAO PAULO (SP)", "CAMPINAS (SP)", "RIO DE JANEIRO (RJ)", "BELO HORIZONTE (MG)", "CURITIBA (PR)"]
+CATEGORIAS = [f"1.01.{i:02d}" for i in range(1, 25)]
+
+
+def make_body(records: int, seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    contas = []
+    for i in range(records):
+        vencimento = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025"
+        contas.append({
+            "codigo_lancamento_omie": 4_000_000_000 + i,
+            "codigo_lancamento_integracao": f"CR{i:08d}",
+            "codigo_cliente_fornecedor": 1_000_000 + rng.randrange(400),
+            "data_vencimento": vencimento,
+            "data_previsao": vencimento,
+            "data_emissao": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025",
+            "valor_documento": round(rng.uniform(50, 50_000), 2),
+            "valor_pis": 0.0,
+            "valor_cofins": 0.0,
+            "valor_csll": 0.0,
+            "valor_ir": 0.0,
+            "valor_iss": 0.0,
+            "valor_inss": 0.0,
+            "codigo_categoria": rng.choice(CATEGORIAS),
+            "id_conta_corrente": 8_000_000 + rng.randrange(5),
+            "numero_documento": f"NF-{rng.randrange(100_000):06d}",
+            "numero_parcela": f"{rng.randint(1, 12):03d}/012",
+            "status_titulo": rng.choice(STATUS),
+            "tipo_documento": "NF",
+            "observacao": "",
+            "cidade": rng.choice(CIDADES),
+            "retem_pis": "N",
+            "retem_cofins": "N",
+            "retem_csll": "N",
+            "retem_ir": "N",
+            "retem_iss": "N",
+            "retem_inss": "N",
+            "bloqueado": "N",
+            "baixa_bloqueada": "N",
+            "importado_api": "S",
+            "info": {
+                "cImpAPI": "S",
+                "dInc": "01/07/2025",
+                "hInc": "10:00:00",
+                "uInc": "WEBSERVICE",
+            },
+            "categorias": [{"codigo_categoria": rng.choice(CATEGORIAS), "percentual": 100}],
+        })
+    return json.dumps({
+        "pagina": 1,
+        "total_de_paginas": 1,
+        "registros": records,
+        "total_de_registros": records,
+        "conta_receber_cadastro": contas,
+    }, ensure_ascii=False).encode("utf-8")
+
+
+def resident(build):
+    """Memória que permanece alocada pelo objeto criado por build()"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    for records in args.records:
+        body = make_body(records)
+        plain, plain_bytes = resident(lambda: json.loads(body))
+        compact, compact_bytes = resident(lambda: compact_payload(json.loads(body)))
+
+        start = time.perf_counter()
+        compact_payload(plain)
+        compact_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        expanded = expand_payload(compact)
+        expand_ms = (time.perf_counter() - start) * 1000
+        assert expanded == plain
+
+        start = time.perf_counter()
+        compact["conta_receber_cadastro"][records // 2:records // 2 + 50]
+        page_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n{records:,} registros  corpo HTTP={len(body) / records:,.0f} B/registro")
+        print(f"  dicts    {plain_bytes / records:>8,.0f} B/registro  (deep_size {deep_size(plain) / records:,.0f})")
+        print(f"  colunas  {compact_bytes / records:>8,.0f} B/registro  (deep_size {deep_size(compact) / records:,.0f})"
+              f"  redução={plain_bytes / compact_bytes:.1f}x")
+        print(f"  compactar={compact_ms:,.1f} ms  remontar tudo={expand_ms:,.1f} ms  página de 50={page_ms:,.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Disputa pelo cache: IntelligentCache (um lock) vs. ShardedIntelligentCache
+
+Cada thread roda seu próprio loop asyncio (como um handler do servidor HTTP
+chamando o cache) com várias tarefas concorrentes fazendo get/set em uma
+distribuição Zipf de chaves. Mede a vazão, as disputas e o tempo de espera
+pelo lock e confere se o tamanho contabilizado bate com a soma das entradas.
+
+No CPython com GIL a espera vem quase toda de threads suspensas pelo GIL
+enquanto seguram um lock: a próxima thread faz centenas de operações na sua
+fatia de tempo e acaba caindo no mesmo shard. Os shards só reduzem a disputa
+de fato em builds sem GIL ou com seções críticas mais longas (persistência).
+
+Uso:
+    python benchmarks/bench_cache_contention.py --threads 1 4 8 --shards 8
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.sharded import ShardedIntelligentCache
+
+
+class TimedLock:
+    """RLock que conta as disputas e acumula o tempo gasto esperando por ele"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.contended = 0
+        self.waited = 0.0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self.contended += 1
+            started = time.perf_counter()
+            self._lock.acquire()
+            self.waited += time.perf_counter() - started
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def instrument(cache):
+    shards = cache.shards if isinstance(cache, ShardedIntelligentCache) else [cache]
+    for shard in shards:
+        shard._lock = TimedLock()
+    return shards
+
+
+def run(cache, threads: int, tasks: int, operations: int, keys: int):
+    shards = instrument(cache)
+    weights = [1 / (rank + 1) for rank in range(keys)]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        sequence = rng.choices(range(keys), weights, k=tasks * operations)
+
+        async def task(offset):
+            for i in range(offset, len(sequence), tasks):
+                params = {"pagina": sequence[i]}
+                if await cache.get("consultar_clientes", params) is None:
+                    await cache.set("consultar_clientes", params, {"codigo": sequence[i], "nome": "x" * 300})
+                if i % 8 == 0:
+                    # Cede o loop como uma chamada real ao Omie cederia
+                    await asyncio.sleep(0)
+
+        async def main():
+            await asyncio.gather(*(task(n) for n in range(tasks)))
+
+        asyncio.run(main())
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    consistent = all(
+        shard.current_size == sum(entry.size_bytes for entry in shard.cache.values()) for shard in shards
+    )
+    return {
+        "ops": threads * tasks * operations / elapsed,
+        "contended": sum(shard._lock.contended for shard in shards),
+        "wait_ms": sum(shard._lock.waited for shard in shards) * 1000,
+        "hit_rate": cache.get_stats()["hit_rate_percent"],
+        "consistent": consistent,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--tasks", type=int, default=16, help="tarefas asyncio por thread")
+    parser.add_argument("--operations", type=int, default=500, help="consultas por tarefa")
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=1)
+    args = parser.parse_args()
+
+    print(f"{'threads':>7}  {'cache':<10} {'ops/s':>10} {'disputas':>9} {'espera lock':>12} {'hit rate':>9}  tamanho")
+    for threads in args.threads:
+        for name, factory in (
+            ("único", lambda: IntelligentCache(max_size_mb=args.size_mb, default_ttl=300)),
+            (f"{args.shards} shards", lambda: ShardedIntelligentCache(
+                shards=args.shards, max_size_mb=args.size_mb, default_ttl=300)),
+        ):
+            result = run(factory(), threads, args.tasks, args.operations, args.keys)
+            print(f"{threads:>7}  {name:<10} {result['ops']:>10,.0f} {result['contended']:>9,}"
+                  f" {result['wait_ms']:>9,.1f} ms"
+                  f" {result['hit_rate']:>8.1f}%  {'ok' if result['consistent'] else 'DIVERGENTE'}")
+
+
+if __name__ == "__main__":
+    main()
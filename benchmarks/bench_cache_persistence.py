@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Reinício do IntelligentCache: tempo de carga do índice persistido versus
+desserializar tudo com pickle (formato anterior)
+
+Uso:
+    python benchmarks/bench_cache_persistence.py --entries 2000 --records 50
+"""
+
+import argparse
+import asyncio
+import pickle
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.intelligent_cache import IntelligentCache
+
+
+def make_value(i: int, records: int):
+    return {
+        "pagina": 1,
+        "clientes_cadastro": [
+            {"codigo_cliente_omie": i * 1000 + j, "razao_social": f"Empresa {i}-{j}", "cidade": "SAO PAULO (SP)"}
+            for j in range(records)
+        ],
+    }
+
+
+async def fill(cache: IntelligentCache, entries: int, records: int):
+    for i in range(entries):
+        await cache.set("consultar_clientes", {"pagina": i}, make_value(i, records))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "cache.db")
+        pkl_path = Path(tmp) / "cache.pkl"
+
+        cache = IntelligentCache(max_size_mb=1024, default_ttl=3600, persistence_file=db_path)
+        asyncio.run(fill(cache, args.entries, args.records))
+
+        start = time.perf_counter()
+        cache.close()
+        flush_elapsed = time.perf_counter() - start
+
+        with open(pkl_path, "wb") as f:
+            pickle.dump({"cache": {k: asdict(e) for k, e in cache.cache.items()}}, f)
+
+        start = time.perf_counter()
+        restarted = IntelligentCache(max_size_mb=1024, default_ttl=3600, persistence_file=db_path)
+        index_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(restarted.get("consultar_clientes", {"pagina": args.entries // 2}))
+        first_get = time.perf_counter() - start
+        restarted.close()
+
+        start = time.perf_counter()
+        with open(pkl_path, "rb") as f:
+            pickle.load(f)
+        pickle_elapsed = time.perf_counter() - start
+
+        size_mb = Path(db_path).stat().st_size / 1024 / 1024
+        print(f"{args.entries:,} entradas ({size_mb:.1f}MB em disco)")
+        print(f"  flush final          {flush_elapsed * 1000:8.1f} ms")
+        print(f"  reinício (índice)    {index_elapsed * 1000:8.1f} ms")
+        print(f"  primeiro get         {first_get * 1000:8.2f} ms")
+        print(f"  pickle.load anterior {pickle_elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
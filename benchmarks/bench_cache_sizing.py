@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Precisão e custo das estratégias de tamanho do cache (src/cache/sizing.py)
+
+Mede, para respostas Omie sintéticas de vários tamanhos, o tempo por
+estimativa e o erro relativo ao tamanho em memória medido pelo walker
+completo ("deep"). Ajuda a escolher `tool_sizing` por ferramenta.
+
+Uso:
+    python benchmarks/bench_cache_sizing.py --records 50 500 5000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.sizing import SIZING_STRATEGIES, deep_size
+from src.client.omie_response import OmieResponse
+
+
+def make_response(records: int) -> OmieResponse:
+    data = {
+        "pagina": 1,
+        "total_de_paginas": 1,
+        "registros": records,
+        "total_de_registros": records,
+        "clientes_cadastro": [
+            {
+                "codigo_cliente_omie": 1000 + i,
+                "codigo_cliente_integracao": f"INT{i:06d}",
+                "razao_social": f"Empresa Exemplo {i} Ltda",
+                "nome_fantasia": f"Exemplo {i}",
+                "cnpj_cpf": f"{i:02d}.345.678/0001-{i % 100:02d}",
+                "cidade": "SAO PAULO (SP)",
+                "estado": "SP",
+                "email": f"contato{i}@exemplo.com.br",
+                "inativo": "N",
+                "tags": [{"tag": "Cliente"}],
+            }
+            for i in range(records)
+        ],
+    }
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    # Mesma construção do OmieClient: dict decodificado + tamanho do corpo
+    return OmieResponse(json.loads(body), raw_size=len(body))
+
+
+def measure(sizer, value, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = sizer(value)
+    return size, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--records", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for records in args.records:
+        value = make_response(records)
+        reference = deep_size(value)
+        print(f"\n{records:,} registros  memória={reference / 1024:,.0f}KB  "
+              f"corpo HTTP={value.raw_size / 1024:,.0f}KB  "
+              f"expansão={reference / value.raw_size:.2f}x")
+
+        for name, sizer in SIZING_STRATEGIES.items():
+            size, elapsed = measure(sizer, value, args.repeat)
+            error = (size - reference) / reference * 100
+            print(f"  {name:<8} {elapsed * 1e6:>10,.1f} µs  "
+                  f"estimativa={size / 1024:>9,.0f}KB  erro={error:+6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
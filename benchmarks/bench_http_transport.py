@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transporte compartilhado (pool keep-alive) vs AsyncClient por chamada
+
+Uso:
+    python benchmarks/bench_http_transport.py --requests 500 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Credenciais fictícias: o servidor falso não valida app_key/app_secret
+os.environ.setdefault("OMIE_APP_KEY", "bench")
+os.environ.setdefault("OMIE_APP_SECRET", "bench")
+
+from fake_omie_server import FakeOmieServer
+from src.client.http_transport import OmieTransport, TransportSettings
+
+PAYLOAD = {
+    "call": "ListarCategorias",
+    "app_key": "bench",
+    "app_secret": "bench",
+    "param": [{"pagina": 1, "registros_por_pagina": 20}]
+}
+
+
+async def _run(label, send, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await send()
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{label:<12} total={elapsed:6.2f}s  rps={total / elapsed:8.1f}  "
+          f"p50={statistics.median(latencies):6.2f}ms  "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1]:6.2f}ms")
+
+
+async def main(total: int, concurrency: int, latency_ms: float):
+    with FakeOmieServer(latency_ms=latency_ms) as server:
+        url = f"{server.base_url}/geral/categorias/"
+
+        async def per_call():
+            async with httpx.AsyncClient(timeout=30) as client:
+                return await client.post(url, json=PAYLOAD)
+
+        transport = OmieTransport(TransportSettings(max_connections_per_host=concurrency))
+
+        async def pooled():
+            return await transport.post(url, json=PAYLOAD)
+
+        await _run("por-chamada", per_call, total, concurrency)
+        await _run("pool", pooled, total, concurrency)
+
+        print(f"métricas do pool: {transport.get_pool_metrics()}")
+        await transport.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="latência artificial do servidor falso")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.requests, args.concurrency, args.latency_ms))
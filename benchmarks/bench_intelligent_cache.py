@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do IntelligentCache: set/get/evict de 10k a 1M entradas
+
+Uso:
+    python benchmarks/bench_intelligent_cache.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache.intelligent_cache import IntelligentCache
+
+VALUE = {"codigo": 1, "descricao": "Categoria de teste", "conta_inativa": "N"}
+
+
+async def run(entries: int):
+    # Limite em ~metade do volume inserido para forçar despejos durante o preenchimento
+    probe = IntelligentCache(max_size_mb=1, default_ttl=600)
+    entry_size = probe._calculate_size(VALUE)
+    max_mb = max(1, int(entries * entry_size / 2 / 1024 / 1024))
+    cache = IntelligentCache(max_size_mb=max_mb, default_ttl=600)
+
+    start = time.perf_counter()
+    for i in range(entries):
+        await cache.set("consultar_categorias", {"pagina": i}, VALUE)
+    set_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = 0
+    for i in range(entries):
+        if await cache.get("consultar_categorias", {"pagina": i}) is not None:
+            hits += 1
+    get_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cache.get_hot_entries(10)
+    hot_elapsed = time.perf_counter() - start
+
+    print(f"{entries:>9,} entradas  set={entries / set_elapsed:>10,.0f} ops/s  "
+          f"get={entries / get_elapsed:>10,.0f} ops/s  "
+          f"hits={hits:>9,}  despejos={cache.evictions:>9,}  "
+          f"hot={hot_elapsed * 1000:6.1f}ms  limite={max_mb}MB")
+
+
+async def main(sizes):
+    for entries in sizes:
+        await run(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.sizes))
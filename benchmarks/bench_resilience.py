@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Latência de cauda com upstream degradado: sem proteção, com hedge e com circuito
+
+Simula um endpoint com latência log-normal (mediana ~--median-ms) em que uma
+fração das requisições (--slow-fraction) fica presa até o timeout. Mede
+p50/p95/p99 das chamadas com e sem hedge (limitado a 10% de requisições
+extras), depois de um aquecimento que alimenta o p95. Em seguida simula o endpoint fora do ar (todas as requisições
+esperam o timeout) e compara o tempo total de N chamadas com e sem o
+circuit breaker.
+
+Uso:
+    python benchmarks/bench_resilience.py --requests 400 --slow-fraction 0.03
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.circuit_breaker import CircuitOpenError, UpstreamGuard
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def make_upstream(rng, median_ms, slow_fraction, timeout):
+    async def request():
+        if rng.random() < slow_fraction:
+            await asyncio.sleep(timeout)
+            raise Exception("Timeout na requisição")
+        await asyncio.sleep(rng.lognormvariate(0, 0.35) * median_ms / 1000)
+        return "ok"
+    return request
+
+
+async def degraded(args, hedge: bool):
+    rng = random.Random(args.seed)
+    upstream = make_upstream(rng, args.median_ms, args.slow_fraction, args.timeout)
+    guard = UpstreamGuard("bench", hedge_enabled=hedge, hedge_ratio=0.1, min_calls=10**9)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(measure=True):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await guard.call("geral/clientes/", upstream)
+            except Exception:
+                pass
+            if measure:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    # Aquecimento: o hedge só atua com amostras de latência suficientes
+    await asyncio.gather(*(one(measure=False) for _ in range(args.warmup)))
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    return latencies, guard
+
+
+async def outage(args, breaker: bool):
+    async def down():
+        await asyncio.sleep(args.timeout)
+        raise Exception("Timeout na requisição")
+
+    guard = UpstreamGuard("bench", min_calls=5, window=10, open_seconds=60)
+    started = time.perf_counter()
+    rejected = 0
+    for _ in range(args.outage_calls):
+        try:
+            await (guard.call("geral/clientes/", down) if breaker else down())
+        except CircuitOpenError:
+            rejected += 1
+        except Exception:
+            pass
+    return time.perf_counter() - started, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=40)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    parser.add_argument("--timeout", type=float, default=1.0, help="timeout simulado (s)")
+    parser.add_argument("--outage-calls", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'modo':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'média ms':>9}  hedges")
+    for name, hedge in (("sem hedge", False), ("com hedge", True)):
+        latencies, guard = asyncio.run(degraded(args, hedge))
+        print(f"{name:<12} {percentile(latencies, 0.5):>8.0f} {percentile(latencies, 0.95):>8.0f}"
+              f" {percentile(latencies, 0.99):>8.0f} {statistics.mean(latencies):>9.0f}"
+              f"  {guard.hedges} ({guard.hedge_wins} venceram)")
+
+    print(f"\nUpstream fora do ar, {args.outage_calls} chamadas em sequência:")
+    for name, breaker in (("sem circuito", False), ("com circuito", True)):
+        elapsed, rejected = asyncio.run(outage(args, breaker))
+        print(f"{name:<12} {elapsed:>6.1f}s  recusadas na hora: {rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Servidor Omie falso para benchmarks locais
+Responde chamadas JSON no formato da API Omie usando apenas a biblioteca padrão
+"""
+
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, Optional
+
+
+def default_handler(call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+    """Resposta padrão: listagens paginadas sintéticas e inclusões bem-sucedidas"""
+    if call.startswith("Listar"):
+        pagina = int(param.get("pagina", 1))
+        por_pagina = int(param.get("registros_por_pagina", 50))
+        return {
+            "pagina": pagina,
+            "total_de_paginas": 10,
+            "registros": por_pagina,
+            "total_de_registros": por_pagina * 10,
+            "registros_cadastro": [
+                {"codigo": (pagina - 1) * por_pagina + i, "descricao": f"Registro {i}"}
+                for i in range(por_pagina)
+            ]
+        }
+
+    return {"codigo_status": "0", "descricao_status": f"{call} executado com sucesso"}
+
+
+class FakeOmieServer:
+    """Servidor HTTP em thread que simula a API Omie"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0,
+                 handler: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None):
+        self.latency_ms = latency_ms
+        self.handler = handler or default_handler
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                with server._lock:
+                    server.requests += 1
+
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+
+                call = body.get("call", "")
+                param = (body.get("param") or [{}])[0]
+                try:
+                    result = server.handler(call, param)
+                    status = 200
+                except Exception as e:
+                    result = {"faultstring": str(e), "faultcode": "SOAP-ENV:Client-5001"}
+                    status = 500
+
+                payload = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start(self) -> "FakeOmieServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -12,8 +12,16 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from fastmcp import FastMCP
 import httpx
+import os
 from pathlib import Path
 
+# Sketches de latência gravados pelos servidores (Redis compartilhado)
+try:
+    from src.utils.metrics_registry import MetricsRegistry, create_sketch_store, GROUP_FIELDS
+    LATENCY_AVAILABLE = True
+except ImportError:
+    LATENCY_AVAILABLE = False
+
 # Servidor de Monitoramento
 monitoring = FastMCP("Omie Monitoring Dashboard 📊")
 
@@ -32,6 +40,9 @@ CONFIG = {
 # Armazenamento em memória para métricas históricas
 metrics_history: List[Dict[str, Any]] = []
 
+# Leitor dos sketches (sem registros próprios: só funde o que os servidores gravaram)
+latency_reader = None
+
 @monitoring.tool
 async def get_system_metrics() -> str:
     """
@@ -263,6 +274,60 @@ async def get_metrics_history(hours: int = 1) -> str:
             "timestamp": datetime.now().isoformat()
         }, indent=2)
 
+def get_latency_reader():
+    """Registro leitor ligado ao armazenamento de sketches (METRICS_SKETCH_URL ou CACHE_SHARED_URL)"""
+    global latency_reader
+    if latency_reader is None and LATENCY_AVAILABLE:
+        url = os.getenv("METRICS_SKETCH_URL", os.getenv("CACHE_SHARED_URL", ""))
+        store = create_sketch_store(url) if url and url != "local" else None
+        if store is None:
+            return None
+        latency_reader = MetricsRegistry(process_id="monitoring-dashboard")
+        latency_reader.stores.append(store)
+    return latency_reader
+
+@monitoring.tool
+async def get_api_latency(minutes: int = 15, group_by: str = "endpoint", endpoint: str = "") -> str:
+    """
+    Percentis de latência das chamadas ao Omie, fundidos de todos os processos
+    
+    Args:
+        minutes: Período em minutos (até 2h por minuto; acima disso por hora)
+        group_by: Agrupamento: endpoint, call (empresa/endpoint/call), company ou total
+        endpoint: Filtrar um endpoint (ex: geral/clientes)
+        
+    Returns:
+        str: p50/p95/p99, média, máximo e erros por grupo em formato JSON
+    """
+    try:
+        if group_by not in (GROUP_FIELDS if LATENCY_AVAILABLE else ()):
+            return json.dumps({
+                "error": f"Agrupamento inválido: {group_by}",
+                "valid": list(GROUP_FIELDS) if LATENCY_AVAILABLE else []
+            }, indent=2, ensure_ascii=False)
+        
+        reader = get_latency_reader()
+        if reader is None:
+            return json.dumps({
+                "status": "unavailable",
+                "message": "Configure METRICS_SKETCH_URL (ou CACHE_SHARED_URL) com o Redis dos servidores",
+                "timestamp": datetime.now().isoformat()
+            }, indent=2, ensure_ascii=False)
+        
+        report = await reader.report(minutes=minutes, group_by=group_by, endpoint=endpoint or None)
+        
+        # Alerta quando o p95 de algum grupo passa do threshold de tempo de resposta
+        threshold = CONFIG["alert_thresholds"]["response_time_ms"]
+        report["slow"] = [row for row in report["series"] if (row.get("p95") or 0) > threshold]
+        report["timestamp"] = datetime.now().isoformat()
+        return json.dumps(report, indent=2, ensure_ascii=False)
+        
+    except Exception as e:
+        return json.dumps({
+            "error": f"Erro ao buscar latências: {str(e)}",
+            "timestamp": datetime.now().isoformat()
+        }, indent=2)
+
 async def check_alerts(cpu: float, memory: float, disk: float) -> List[Dict[str, Any]]:
     """
     Verifica condições de alerta baseadas nos thresholds configurados
@@ -379,6 +444,16 @@ async def dashboard_data() -> str:
             "timestamp": datetime.now().isoformat()
         }, indent=2)
 
+@monitoring.resource("monitoring://latency")
+async def api_latency() -> str:
+    """
+    p50/p95/p99 por endpoint Omie nos últimos 15 minutos
+    
+    Returns:
+        str: Latências em formato JSON
+    """
+    return await get_api_latency(15, "endpoint")
+
 @monitoring.resource("monitoring://alerts")
 async def active_alerts() -> str:
     """
@@ -428,6 +503,7 @@ Analise o desempenho do sistema Omie FastMCP nas últimas {period_hours} horas.
 2. Use health_check_complete() para status atual
 3. Use monitoring://dashboard para visão geral
 4. Use monitoring://alerts para alertas ativos
+5. Use get_api_latency(group_by="endpoint") para p95/p99 da API Omie
 
 🔍 ANÁLISE REQUERIDA:
 1. Identifique tendências de CPU, memória e disco
@@ -451,9 +527,11 @@ if __name__ == "__main__":
     print("   - health_check_complete: Health check completo")
     print("   - get_metrics_history: Histórico de métricas")
     print("   - configure_alerts: Configurar alertas")
+    print("   - get_api_latency: Percentis de latência da API Omie")
     print("📂 Recursos disponíveis:")
     print("   - monitoring://dashboard: Dados dashboard")
     print("   - monitoring://alerts: Alertas ativos")
+    print("   - monitoring://latency: p50/p95/p99 por endpoint")
     print("📝 Prompts disponíveis:")
     print("   - performance-analysis: Análise de performance")
     print()
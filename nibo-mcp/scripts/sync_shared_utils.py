@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Sincroniza os utilitários compartilhados com o Omie MCP
+Copia src/utils/{rate_limiter,retry,circuit_breaker}.py da raiz do
+repositório para src/utils/shared/ do Nibo, trocando os imports
+'src.utils.*' por relativos, para que o Nibo rode sozinho (com o próprio
+requirements.txt) sem depender do checkout do Omie.
+
+    python scripts/sync_shared_utils.py          # atualiza as cópias
+    python scripts/sync_shared_utils.py --check  # só verifica (CI)
+"""
+import re
+import sys
+from pathlib import Path
+
+NIBO_ROOT = Path(__file__).resolve().parents[1]
+REPO_ROOT = NIBO_ROOT.parent
+SOURCE_DIR = REPO_ROOT / "src" / "utils"
+TARGET_DIR = NIBO_ROOT / "src" / "utils" / "shared"
+MODULES = ("rate_limiter", "retry", "circuit_breaker")
+
+HEADER = "# Cópia de src/utils/{name}.py do Omie MCP: não editar aqui, rode scripts/sync_shared_utils.py\n"
+_SHARED_IMPORT = re.compile(r"\bfrom src\.utils\.(" + "|".join(MODULES) + r") import\b")
+
+
+def vendored_source(name: str, source_dir: Path = SOURCE_DIR) -> str:
+    """Conteúdo esperado da cópia do módulo compartilhado 'name'"""
+    source = (source_dir / f"{name}.py").read_text(encoding="utf-8")
+    return HEADER.format(name=name) + _SHARED_IMPORT.sub(r"from .\1 import", source)
+
+
+def stale_modules(target_dir: Path = TARGET_DIR) -> list:
+    """Módulos cuja cópia difere da origem (ou não existe)"""
+    stale = []
+    for name in MODULES:
+        target = target_dir / f"{name}.py"
+        if not target.exists() or target.read_text(encoding="utf-8") != vendored_source(name):
+            stale.append(name)
+    return stale
+
+
+def main() -> int:
+    if not SOURCE_DIR.exists():
+        print(f"❌ Utilitários compartilhados não encontrados: {SOURCE_DIR}")
+        return 1
+
+    stale = stale_modules()
+    if "--check" in sys.argv[1:]:
+        if stale:
+            print(f"❌ Cópias desatualizadas em {TARGET_DIR}: {', '.join(stale)}")
+            print("   Rode: python scripts/sync_shared_utils.py")
+            return 1
+        print("✅ Utilitários compartilhados sincronizados")
+        return 0
+
+    for name in stale:
+        (TARGET_DIR / f"{name}.py").write_text(vendored_source(name), encoding="utf-8")
+        print(f"📦 {name}.py atualizado")
+    print("✅ Utilitários compartilhados sincronizados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,30 @@ from .config import NiboConfig
 
 logger = logging.getLogger("nibo-client")
 
+try:
+    from ..utils.rate_limiter import nibo_rate_limiter
+    RATE_LIMITER_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Limitador adaptativo indisponível: {e}")
+    nibo_rate_limiter = None
+    RATE_LIMITER_AVAILABLE = False
+
+try:
+    from ..utils.retry import nibo_retry, SAFE_HTTP_METHODS
+    RETRY_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Retentativas indisponíveis: {e}")
+    nibo_retry = None
+    RETRY_AVAILABLE = False
+
+try:
+    from ..utils.circuit_breaker import nibo_guard
+    CIRCUIT_BREAKER_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Circuit breaker indisponível: {e}")
+    nibo_guard = None
+    CIRCUIT_BREAKER_AVAILABLE = False
+
 class NiboClient:
     def __init__(self, config: Optional[NiboConfig] = None):
         self.config = config or NiboConfig()
@@ -35,27 +59,50 @@ class NiboClient:
             params = {}
         params["apitoken"] = self.config.api_token
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=json_data,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Erro na API Nibo: {response.status} - {error_text}")
-                        raise Exception(f"Erro na API: {response.status} - {error_text}")
+        # Cada empresa tem seu próprio bucket
+        tenant = self.config.current_company_key or "default"
+        
+        async def send():
+            try:
+                if RATE_LIMITER_AVAILABLE:
+                    await nibo_rate_limiter.acquire(tenant, endpoint, method)
+                
+                async with aiohttp.ClientSession() as session:
+                    async with session.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        json=json_data,
+                        timeout=aiohttp.ClientTimeout(total=30)
+                    ) as response:
                         
-        except aiohttp.ClientError as e:
-            logger.error(f"Erro de conexão: {e}")
-            raise Exception(f"Erro de conexão com a API Nibo: {e}")
+                        if response.status == 200:
+                            return await response.json()
+                        else:
+                            error_text = await response.text()
+                            if RATE_LIMITER_AVAILABLE:
+                                nibo_rate_limiter.observe(tenant, endpoint, method,
+                                                          response.status, error_text)
+                            logger.error(f"Erro na API Nibo: {response.status} - {error_text}")
+                            raise Exception(f"Erro na API: {response.status} - {error_text}")
+                            
+            except aiohttp.ClientError as e:
+                logger.error(f"Erro de conexão: {e}")
+                raise Exception(f"Erro de conexão com a API Nibo: {e}")
+        
+        safe_method = method.upper() in SAFE_HTTP_METHODS if RETRY_AVAILABLE else method.upper() == "GET"
+        
+        async def attempt():
+            if not CIRCUIT_BREAKER_AVAILABLE:
+                return await send()
+            # Circuito aberto falha na hora; GETs lentos ganham uma requisição hedge
+            return await nibo_guard.call(endpoint, send, idempotent=safe_method)
+        
+        if not RETRY_AVAILABLE:
+            return await attempt()
+        # Só métodos seguros (GET) são repetidos; POST/PUT/DELETE falham na primeira tentativa
+        return await nibo_retry.call(attempt, idempotent=safe_method, name=f"{method} {endpoint}")
     
     # ========================================================================
     # MÉTODOS DE CONSULTA
@@ -0,0 +1,11 @@
+"""
+Circuit breaker e hedge compartilhados com o Omie MCP
+Reexporta a cópia em shared/circuit_breaker.py e cria o guarda do Nibo
+"""
+from .shared.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, UpstreamGuard, create_upstream_guard
+)
+
+# Circuitos por endpoint do Nibo (variáveis NIBO_BREAKER_* e NIBO_HEDGE_*).
+# GETs do Nibo são REST sem detecção de requisição repetida: hedge ligado por padrão
+nibo_guard = create_upstream_guard("NIBO", "nibo", slow_call_seconds=15, hedge_enabled=True)
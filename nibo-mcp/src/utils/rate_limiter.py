@@ -0,0 +1,15 @@
+"""
+Limitador adaptativo compartilhado com o Omie MCP
+Reexporta a cópia em shared/rate_limiter.py e cria o limitador do Nibo
+"""
+import os
+
+from .shared.rate_limiter import AdaptiveRateLimiter, is_throttle_fault, endpoint_key
+
+# Limitador compartilhado por todas as empresas Nibo do processo
+nibo_rate_limiter = AdaptiveRateLimiter(
+    tenant_rate=float(os.getenv("NIBO_RATE_PER_SECOND", "5")),
+    tenant_burst=int(os.getenv("NIBO_RATE_BURST", "10")),
+    call_rate=float(os.getenv("NIBO_CALL_RATE_PER_SECOND", "3")),
+    call_burst=int(os.getenv("NIBO_CALL_RATE_BURST", "6"))
+)
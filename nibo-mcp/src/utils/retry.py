@@ -0,0 +1,11 @@
+"""
+Retentativas compartilhadas com o Omie MCP
+Reexporta a cópia em shared/retry.py e cria o orquestrador do Nibo
+"""
+from .shared.retry import (
+    RetryOrchestrator, RetryBudget, classify_failure, create_retry_orchestrator,
+    SAFE_HTTP_METHODS, THROTTLED
+)
+
+# Orquestrador compartilhado por todas as empresas Nibo do processo (variáveis NIBO_RETRY_*)
+nibo_retry = create_retry_orchestrator("NIBO")
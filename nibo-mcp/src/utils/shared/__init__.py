@@ -0,0 +1,5 @@
+"""
+Utilitários de resiliência compartilhados com o Omie MCP (limitador
+adaptativo, retentativas e circuit breaker), copiados de src/utils/ da raiz
+do repositório por scripts/sync_shared_utils.py
+"""
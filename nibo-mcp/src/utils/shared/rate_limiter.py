@@ -0,0 +1,299 @@
+# Cópia de src/utils/rate_limiter.py do Omie MCP: não editar aqui, rode scripts/sync_shared_utils.py
+"""
+Rate Limiter para evitar erro 529 Overloaded da API Anthropic
+e limitador adaptativo por app_key/método para as APIs Omie e Nibo
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Segmentos variáveis de caminhos REST (ids numéricos, UUIDs) viram uma só chave
+_PATH_ID = re.compile(
+    r"/(?:\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(?=/|$)", re.IGNORECASE
+)
+
+
+def endpoint_key(endpoint: str) -> str:
+    """Endpoint normalizado: '/schedules/123/' e '/schedules/456/' compartilham bucket e circuito"""
+    return _PATH_ID.sub("/{id}", endpoint.strip().strip("/")) or "/"
+
+class RateLimiter:
+    """
+    Rate Limiter para controlar requisições e evitar sobrecarga da API
+    """
+    
+    def __init__(self, requests_per_minute: int = 20, min_delay: float = 1.0):
+        self.requests_per_minute = requests_per_minute
+        self.min_delay = min_delay
+        self.request_times = deque()
+        self.last_request_time = 0
+        
+    async def wait_if_needed(self):
+        """
+        Aguarda se necessário para respeitar rate limits
+        """
+        current_time = time.time()
+        
+        # Limpar requisições antigas (mais de 1 minuto)
+        cutoff_time = current_time - 60
+        while self.request_times and self.request_times[0] <= cutoff_time:
+            self.request_times.popleft()
+        
+        # Verificar se excedeu limite por minuto
+        if len(self.request_times) >= self.requests_per_minute:
+            wait_time = 60 - (current_time - self.request_times[0])
+            if wait_time > 0:
+                logger.info(f"Rate limit atingido. Aguardando {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+        
+        # Verificar delay mínimo entre requisições
+        time_since_last = current_time - self.last_request_time
+        if time_since_last < self.min_delay:
+            wait_time = self.min_delay - time_since_last
+            logger.debug(f"Aguardando delay mínimo: {wait_time:.1f}s")
+            await asyncio.sleep(wait_time)
+        
+        # Registrar nova requisição
+        self.request_times.append(time.time())
+        self.last_request_time = time.time()
+
+class ExponentialBackoff:
+    """
+    Backoff exponencial para retry em caso de erro 529
+    """
+    
+    def __init__(self, initial_delay: float = 1.0, max_delay: float = 60.0, multiplier: float = 2.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.current_delay = initial_delay
+        
+    async def wait(self):
+        """
+        Aguarda com backoff exponencial
+        """
+        await asyncio.sleep(self.current_delay)
+        self.current_delay = min(self.current_delay * self.multiplier, self.max_delay)
+        
+    def reset(self):
+        """
+        Reset do delay para valor inicial
+        """
+        self.current_delay = self.initial_delay
+
+async def handle_api_request(func, *args, max_retries: int = 3, **kwargs):
+    """
+    Wrapper para requisições da API com limite global e retentativas
+    (classificação, jitter e orçamento em src/utils/retry.py)
+    """
+    # Import tardio: src/utils/retry.py importa este módulo
+    from .retry import api_retry
+    
+    async def attempt():
+        await global_rate_limiter.wait_if_needed()
+        return await func(*args, **kwargs)
+    
+    return await api_retry.call(attempt, name=getattr(func, "__name__", ""),
+                                max_attempts=max_retries + 1)
+
+# Marcadores de throttling retornados pelo Omie ("consumo redundante", REDUNDANT, etc.)
+THROTTLE_MARKERS = ("redundant", "consumo redundante", "too many requests", "bloqueada por consumo")
+THROTTLE_STATUS_CODES = (425, 429)
+
+
+def is_throttle_fault(status_code: Optional[int] = None, message: str = "") -> bool:
+    """Verifica se a resposta indica que o limite da API foi excedido"""
+    if status_code in THROTTLE_STATUS_CODES:
+        return True
+    message = (message or "").lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """
+    Token bucket com taxa ajustável.
+
+    A reposição é calculada sob demanda (O(1) por acquire) e um asyncio.Lock
+    garante que os aguardando sejam atendidos na ordem de chegada.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: Optional[float] = None):
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 8
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.penalized_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Estatísticas
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.penalties = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Lock criado em outro event loop não pode ser reaproveitado
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    async def acquire(self):
+        """Consome um token, aguardando a reposição se necessário"""
+        async with self._get_lock():
+            now = time.monotonic()
+            self._refill(now)
+
+            if self.tokens < 1:
+                wait_time = (1 - self.tokens) / self.rate
+                self.waited_seconds += wait_time
+                await asyncio.sleep(wait_time)
+                self._refill(time.monotonic())
+
+            self.tokens -= 1
+            self.acquired += 1
+
+    def penalize(self, factor: float):
+        """Reduz a taxa e esvazia o bucket após um fault de throttling"""
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, 0.0)
+        self.penalized_at = now
+        self.penalties += 1
+
+    def recover(self, quiet_period: float, factor: float):
+        """Aumenta a taxa em degraus a cada período sem faults"""
+        if self.penalized_at is None:
+            return
+
+        now = time.monotonic()
+        if now - self.penalized_at < quiet_period:
+            return
+
+        self._refill(now)
+        self.rate = min(self.base_rate, self.rate * factor)
+        self.penalized_at = None if self.rate >= self.base_rate else now
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "base_rate": self.base_rate,
+            "tokens": round(self.tokens, 2),
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 2),
+            "penalties": self.penalties,
+            "throttled": self.rate < self.base_rate
+        }
+
+
+class AdaptiveRateLimiter:
+    """
+    Limitador por empresa (app_key) e por método (endpoint/call).
+
+    Cada empresa tem seu próprio bucket, de modo que o tráfego de uma
+    empresa não consome a cota das demais. Faults de throttling reduzem a
+    taxa dos buckets envolvidos; após `quiet_period` segundos sem faults a
+    taxa volta a subir gradualmente até o valor base.
+    """
+
+    def __init__(self, tenant_rate: float = 4.0, tenant_burst: int = 8,
+                 call_rate: float = 2.0, call_burst: int = 4,
+                 penalty_factor: float = 0.5, recovery_factor: float = 1.5,
+                 quiet_period: float = 60.0):
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.call_rate = call_rate
+        self.call_burst = call_burst
+        self.penalty_factor = penalty_factor
+        self.recovery_factor = recovery_factor
+        self.quiet_period = quiet_period
+
+        self._tenants: Dict[str, TokenBucket] = {}
+        self._calls: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+        # Estatísticas
+        self.throttle_faults = 0
+
+    def _tenant_bucket(self, tenant: str) -> TokenBucket:
+        bucket = self._tenants.get(tenant)
+        if bucket is None:
+            bucket = TokenBucket(self.tenant_rate, self.tenant_burst)
+            self._tenants[tenant] = bucket
+        return bucket
+
+    def _call_bucket(self, tenant: str, endpoint: str, call: str) -> TokenBucket:
+        # Caminhos com id (Nibo: clients/{id}) compartilham o bucket do método
+        key = (tenant, endpoint_key(endpoint), call)
+        bucket = self._calls.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.call_rate, self.call_burst)
+            self._calls[key] = bucket
+        return bucket
+
+    async def acquire(self, tenant: str, endpoint: str, call: str = ""):
+        """Aguarda a vez da requisição no bucket do método e no da empresa"""
+        call_bucket = self._call_bucket(tenant, endpoint, call)
+        tenant_bucket = self._tenant_bucket(tenant)
+
+        call_bucket.recover(self.quiet_period, self.recovery_factor)
+        tenant_bucket.recover(self.quiet_period, self.recovery_factor)
+
+        await call_bucket.acquire()
+        await tenant_bucket.acquire()
+
+    def observe(self, tenant: str, endpoint: str, call: str = "",
+                status_code: Optional[int] = None, message: str = "") -> bool:
+        """Registra a resposta; retorna True se foi um fault de throttling"""
+        if not is_throttle_fault(status_code, message):
+            return False
+
+        self.throttle_faults += 1
+        self._call_bucket(tenant, endpoint, call).penalize(self.penalty_factor)
+        # A empresa inteira desacelera menos que o método que causou o fault
+        self._tenant_bucket(tenant).penalize((1 + self.penalty_factor) / 2)
+
+        logger.warning(f"Throttling detectado em {endpoint} {call} - taxa reduzida")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado dos buckets por empresa e por método"""
+        return {
+            "throttle_faults": self.throttle_faults,
+            "tenants": {
+                # Apenas o prefixo da app_key para não expor credenciais
+                tenant[:6]: bucket.get_stats() for tenant, bucket in self._tenants.items()
+            },
+            "calls": {
+                f"{tenant[:6]}|{endpoint}|{call}": bucket.get_stats()
+                for (tenant, endpoint, call), bucket in self._calls.items()
+            }
+        }
+
+
+# Rate limiter global
+global_rate_limiter = RateLimiter(requests_per_minute=15, min_delay=2.0)
+
+# Limitador adaptativo compartilhado pelos clientes Omie
+omie_rate_limiter = AdaptiveRateLimiter(
+    tenant_rate=float(os.getenv("OMIE_RATE_PER_SECOND", "4")),
+    tenant_burst=int(os.getenv("OMIE_RATE_BURST", "8")),
+    call_rate=float(os.getenv("OMIE_CALL_RATE_PER_SECOND", "2")),
+    call_burst=int(os.getenv("OMIE_CALL_RATE_BURST", "4"))
+)
\ No newline at end of file
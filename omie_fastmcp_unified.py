@@ -11,6 +11,8 @@ import os
 import sys
 import json
 import random
+import time
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -28,6 +30,67 @@ except ImportError:
         print("Erro: Não foi possível importar OmieClient")
         sys.exit(1)
 
+# Import do transporte HTTP compartilhado (pool keep-alive)
+try:
+    from src.client.http_transport import omie_transport
+    TRANSPORT_AVAILABLE = True
+except ImportError:
+    omie_transport = None
+    TRANSPORT_AVAILABLE = False
+
+# Import da coalescência de requisições (single-flight)
+try:
+    from src.client.single_flight import omie_single_flight
+    SINGLE_FLIGHT_AVAILABLE = True
+except ImportError:
+    omie_single_flight = None
+    SINGLE_FLIGHT_AVAILABLE = False
+
+# Import do limitador adaptativo por app_key/método, das retentativas e dos circuitos
+try:
+    from src.utils.rate_limiter import omie_rate_limiter
+    from src.utils.retry import omie_retry
+    from src.utils.circuit_breaker import omie_guard, ucm_guard
+    RATE_LIMITER_AVAILABLE = True
+except ImportError:
+    omie_rate_limiter = None
+    omie_retry = None
+    omie_guard = ucm_guard = None
+    RATE_LIMITER_AVAILABLE = False
+
+# Import do registro de latências (sketches por empresa/endpoint/call)
+try:
+    from src.utils.metrics_registry import omie_latency, create_sketch_store, PostgresSketchStore
+    from src.config import config
+    LATENCY_AVAILABLE = True
+except ImportError:
+    omie_latency = None
+    LATENCY_AVAILABLE = False
+
+# Import da escrita em lote
+try:
+    from src.client.omie_batch import OmieBatchWriter, BATCH_SPECS
+    BATCH_AVAILABLE = True
+except ImportError:
+    BATCH_AVAILABLE = False
+
+# Import da sincronização incremental (snapshot local de cadastros)
+try:
+    from src.sync.delta_sync import create_sync_engine, SYNC_ENTITIES
+    from src.cache.dependencies import omie_cache_invalidator
+    from src.config import config
+    SYNC_AVAILABLE = True
+except ImportError:
+    SYNC_AVAILABLE = False
+
+# Import do paginador concorrente
+try:
+    from src.client.paginator import OmiePaginator
+    from src.client.omie_endpoints import find_call
+    PAGINATOR_AVAILABLE = True
+except ImportError:
+    PAGINATOR_AVAILABLE = False
+
 # Import do sistema de database
 try:
     from src.database.database_manager import (
@@ -44,24 +107,50 @@ except ImportError:
 
 # Import do sistema de cache
 try:
-    from src.cache.intelligent_cache import IntelligentCache, cache_manager
+    from src.cache.intelligent_cache import IntelligentCache, Uncached, cache_manager
+    from src.cache.shared_tier import create_shared_tier, company_namespace
+    from src.cache.dependencies import omie_cache_invalidator, read_tags
+    from src.cache.policy import omie_cache_policies
+    from src.cache.record_sets import RecordSetCache
+    from src.cache.sharded import ShardedIntelligentCache
+    from src.cache.preload import AccessTrace, CachePreloader, plan_preload
+    from src.config import config
     CACHE_AVAILABLE = True
     print("✅ Sistema de cache inteligente carregado")
 except ImportError:
     print("⚠️  Sistema de cache não disponível - executando sem cache")
     CACHE_AVAILABLE = False
 
+@asynccontextmanager
+async def server_lifespan(server):
+    """Ciclo de vida do servidor: o encerramento roda no loop que atendeu as chamadas"""
+    try:
+        yield
+    finally:
+        # Pool HTTP, cache, Redis, write-behind e sketches foram criados neste loop
+        await shutdown_system()
+
 # Criar instância FastMCP unificada
-mcp = FastMCP("Omie ERP - Servidor Unificado 🚀 (42 Ferramentas)")
+mcp = FastMCP("Omie ERP - Servidor Unificado 🚀 (42 Ferramentas)", lifespan=server_lifespan)
 
 # Instâncias globais
 omie_client = None
 omie_db = None
 cache_instance = None
+omie_paginator = None
+omie_sync = None
+omie_record_sets = None
+omie_access_trace = None
+omie_preloader = None
 
 async def initialize_system():
     """Inicializa cliente Omie, sistema de database e cache"""
-    global omie_client, omie_db, cache_instance
+    global omie_client, omie_db, cache_instance, omie_paginator, omie_sync, omie_record_sets
+    global omie_access_trace, omie_preloader
+    
+    # Inicializar pool de conexões compartilhado
+    if TRANSPORT_AVAILABLE:
+        await omie_transport.start()
     
     # Inicializar cliente Omie
     try:
@@ -71,6 +160,22 @@ async def initialize_system():
     except Exception as e:
         raise Exception(f"Erro ao inicializar cliente Omie: {e}")
     
+    if PAGINATOR_AVAILABLE:
+        omie_paginator = OmiePaginator(omie_client)
+    
+    # Inicializar snapshot local de cadastros (OMIE_SNAPSHOT_ENABLED=false desativa snapshot e sincronização)
+    if SYNC_AVAILABLE and config.omie_snapshot_enabled:
+        try:
+            omie_sync = create_sync_engine(omie_client, omie_paginator)
+            # Escritas e webhooks marcam as entidades afetadas como obsoletas
+            omie_cache_invalidator.register(omie_sync)
+            if not omie_sync.store.count("clientes"):
+                print("ℹ️  Snapshot de cadastros vazio - use a tool sincronizar_cadastros")
+            print("✅ Snapshot de cadastros inicializado")
+        except Exception as e:
+            print(f"⚠️  Snapshot de cadastros não disponível: {e}")
+            omie_sync = None
+    
     # Inicializar sistema de database se disponível
     if DATABASE_AVAILABLE and OmieIntegrationDatabase:
         try:
@@ -81,6 +186,20 @@ async def initialize_system():
             print(f"⚠️  Database não disponível: {e}")
             omie_db = None
     
+    # Gravação periódica dos sketches de latência (Redis e/ou PostgreSQL)
+    if LATENCY_AVAILABLE:
+        try:
+            store = create_sketch_store(config.metrics_sketch_url)
+            if store is not None:
+                omie_latency.stores.append(store)
+        except Exception as e:
+            print(f"⚠️  Sketches de latência no Redis não disponíveis: {e}")
+        if omie_db and omie_db.db_manager.pg_pool:
+            omie_latency.stores.append(PostgresSketchStore(omie_db.db_manager.pg_pool))
+        if omie_latency.start(config.metrics_snapshot_interval):
+            stores = ", ".join(type(store).__name__ for store in omie_latency.stores)
+            print(f"✅ Sketches de latência gravados a cada {config.metrics_snapshot_interval:g}s ({stores})")
+    
     # Inicializar sistema de cache se disponível
     if CACHE_AVAILABLE and IntelligentCache:
         try:
@@ -88,16 +207,104 @@ async def initialize_system():
             cache_dir = Path("cache")
             cache_dir.mkdir(exist_ok=True)
             
-            cache_instance = IntelligentCache(
+            # L2 compartilhado entre processos, com namespace por empresa (app_key)
+            try:
+                shared_tier = create_shared_tier(
+                    config.cache_shared_url, company_namespace(config.omie_app_key)
+                )
+            except Exception as e:
+                print(f"⚠️  Cache L2 compartilhado não disponível: {e}")
+                shared_tier = None
+            
+            cache_options = dict(
                 max_size_mb=100,
                 default_ttl=600,  # 10 minutos
-                persistence_file="cache/omie_unified_cache.pkl"
+                persistence_file="cache/omie_unified_cache.db",
+                stale_grace=config.cache_stale_grace,
+                shared_tier=shared_tier,
+                default_company=company_namespace(config.omie_app_key),
+                policies=omie_cache_policies,
+                admission=config.cache_admission,
+                negative_ttls={
+                    "empty": config.cache_negative_ttl_empty,
+                    "invalid": config.cache_negative_ttl_invalid
+                }
             )
-            print("✅ Sistema de cache inicializado (100MB, TTL dinâmico)")
+            # Shards dividem lock e limite de memória entre chamadas simultâneas
+            if config.cache_shards > 1:
+                cache_instance = ShardedIntelligentCache(shards=config.cache_shards, **cache_options)
+            else:
+                cache_instance = IntelligentCache(**cache_options)
+            # Escritas via cliente Omie e webhooks invalidam as consultas dependentes
+            omie_cache_invalidator.register(cache_instance)
+            if shared_tier:
+                await cache_instance.start_shared_tier()
+                print(f"✅ Cache L2 compartilhado ativo ({type(shared_tier.backend).__name__})")
+            if config.cache_warmer_interval > 0:
+                cache_instance.start_warmer(config.cache_warmer_interval, config.cache_warmer_top_n)
+            if omie_paginator is not None:
+                # Listagens em cache como conjunto completo; páginas são recortadas dele
+                omie_record_sets = RecordSetCache(cache_instance, omie_paginator)
+            if config.cache_trace_path:
+                # Consultas observadas viram o plano de aquecimento da próxima inicialização
+                omie_access_trace = AccessTrace(config.cache_trace_path)
+                omie_preloader = CachePreloader(preload_fetch)
+                if config.cache_preload_budget > 0:
+                    plan = plan_preload(omie_access_trace.records, config.cache_preload_budget,
+                                        config.cache_preload_concurrency)
+                    if omie_preloader.start(plan):
+                        print(f"🔥 Aquecendo cache: {len(plan.items)} consultas, "
+                              f"{plan.calls} chamadas, concorrência {plan.concurrency}")
+            print("✅ Sistema de cache inicializado (100MB, TTL dinâmico, stale-while-revalidate)")
         except Exception as e:
             print(f"⚠️  Cache não disponível: {e}")
             cache_instance = None
 
+async def shutdown_system():
+    """Libera recursos de longa duração (pool HTTP, database); a próxima chamada reinicializa"""
+    global omie_client, omie_db, cache_instance, omie_paginator, omie_sync, omie_record_sets
+    global omie_access_trace, omie_preloader
+    
+    if omie_preloader:
+        omie_preloader.stop()
+    if omie_access_trace:
+        omie_access_trace.flush()
+    
+    if omie_sync:
+        omie_cache_invalidator.unregister(omie_sync)
+    
+    if cache_instance:
+        # Grava entradas pendentes e encerra o aquecedor
+        omie_cache_invalidator.unregister(cache_instance)
+        cache_instance.close()
+        if cache_instance.shared_tier:
+            await cache_instance.shared_tier.close()
+    
+    if LATENCY_AVAILABLE:
+        # Grava a janela corrente antes de fechar o pool do PostgreSQL
+        await omie_latency.stop()
+        omie_latency.stores.clear()
+    
+    if TRANSPORT_AVAILABLE:
+        await omie_transport.close()
+    
+    if omie_db:
+        try:
+            await omie_db.close()
+        except Exception as e:
+            print(f"⚠️  Erro ao fechar database: {e}")
+    
+    omie_client = omie_db = cache_instance = omie_paginator = omie_sync = omie_record_sets = None
+    omie_access_trace = omie_preloader = None
+
+def snapshot_disponivel(entidade: str) -> bool:
+    """Indica se a entidade pode ser lida do snapshot (dispara atualização se desatualizado)"""
+    if omie_sync is None or not omie_sync.has_snapshot(entidade):
+        return False
+    omie_sync.refresh_in_background(entidade)
+    # Alterada no Omie desde a última sincronização: ler da API até o delta concluir
+    return not omie_sync.is_stale(entidade)
+
 async def get_omie_client():
     """Obtém cliente Omie inicializado"""
     global omie_client
@@ -105,6 +312,19 @@ async def get_omie_client():
         await initialize_system()
     return omie_client
 
+async def listar_todas_paginas(endpoint: str, call: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Busca todas as páginas de uma listagem Omie (paginação concorrente)"""
+    client = await get_omie_client()
+    
+    if not PAGINATOR_AVAILABLE or omie_paginator is None:
+        return await client._make_request(endpoint, call, params)
+    
+    # Na busca completa usar o maior tamanho de página aceito pelo Omie
+    spec = find_call(endpoint, call)
+    page_size_key = spec.page_size_key if spec is not None and spec.paginated else "registros_por_pagina"
+    params = {**params, page_size_key: 500}
+    return await omie_paginator.collect(endpoint, call, params)
+
 async def cached_api_call(tool_name: str, params: Dict[str, Any], 
                          api_call_func, ttl: int = None) -> Any:
     """Wrapper para chamadas API com cache inteligente"""
@@ -112,23 +332,65 @@ async def cached_api_call(tool_name: str, params: Dict[str, Any],
     if not CACHE_AVAILABLE or not cache_instance:
         return await api_call_func(params)
     
-    # Tentar recuperar do cache
-    cached_result = await cache_instance.get(tool_name, params)
-    if cached_result is not None:
-        # Adicionar flag de cache na resposta
-        if isinstance(cached_result, dict):
-            cached_result["_from_cache"] = True
-        return cached_result
-    
-    # Executar chamada API
-    result = await api_call_func(params)
+    async def loader():
+        result = await api_call_func(params)
+        # Armazenar no cache apenas respostas de sucesso (as demais são devolvidas sem nova chamada)
+        return result if result and isinstance(result, dict) else Uncached(result)
     
-    # Armazenar no cache se sucesso
-    if result and isinstance(result, dict):
-        await cache_instance.set(tool_name, params, result, ttl)
+    # Entradas vencidas são servidas enquanto uma única recarga roda em segundo plano
+    started = time.perf_counter()
+    result, origem = await cache_instance.get_or_refresh(
+        tool_name, params, loader, ttl, tags=read_tags(tool_name)
+    )
+    if omie_access_trace is not None:
+        omie_access_trace.record(tool_name, params, (time.perf_counter() - started) * 1000, origem,
+                                 size_bytes=getattr(result, "raw_size", 0))
+    if not isinstance(result, dict):
+        return result
     
+    return _mark_origin(result, origem)
+
+def _mark_origin(result: Dict[str, Any], origem: str) -> Dict[str, Any]:
+    # Cópia rasa: as tools filtram o resultado sem alterar a entrada do cache
+    result = dict(result)
+    if origem != "miss":
+        result["_from_cache"] = True
+        result["_stale"] = origem == "stale"
     return result
 
+async def cached_list_page(tool_name: str, params: Dict[str, Any],
+                           api_call_func, ttl: int = None) -> Any:
+    """Página de uma listagem recortada do conjunto completo em cache (qualquer tamanho de página)"""
+    if omie_record_sets is None or not omie_record_sets.supports(tool_name):
+        return await cached_api_call(tool_name, params, api_call_func, ttl)
+    
+    started = time.perf_counter()
+    page, origem = await omie_record_sets.get_page(tool_name, params, ttl)
+    if omie_access_trace is not None:
+        # O conjunto inteiro é a unidade de recarga: parâmetros sem paginação
+        omie_access_trace.record(
+            tool_name, omie_record_sets.record_set_params(tool_name, params),
+            (time.perf_counter() - started) * 1000, origem,
+            calls=omie_record_sets.fetch_calls(tool_name, page), record_set=True
+        )
+    return _mark_origin(page, origem)
+
+async def preload_fetch(item) -> str:
+    """Busca uma consulta do plano de aquecimento pelo cache; retorna a origem"""
+    if item.record_set and omie_record_sets is not None and omie_record_sets.supports(item.tool):
+        _, origem = await omie_record_sets.get_page(item.tool, item.params)
+        return origem
+    
+    client = await get_omie_client()
+    
+    async def loader():
+        return await client.call_endpoint(item.tool, item.params)
+    
+    _, origem = await cache_instance.get_or_refresh(
+        item.tool, item.params, loader, tags=read_tags(item.tool)
+    )
+    return origem
+
 def format_response(status: str, data: Any, **kwargs) -> str:
     """Formata resposta padrão das tools com informações de rastreamento"""
     response = {
@@ -180,8 +442,9 @@ async def consultar_categorias(
         async def api_call(params):
             return await client.consultar_categorias(params)
         
-        # Usar cache com TTL de 15 minutos para categorias (dados relativamente estáticos)
-        result = await cached_api_call("consultar_categorias", param, api_call, ttl=900)
+        # Usar cache com TTL de 15 minutos para categorias (dados relativamente estáticos);
+        # a listagem completa fica em cache e a página pedida é recortada dela
+        result = await cached_list_page("consultar_categorias", param, api_call, ttl=900)
         
         # Aplicar filtros se necessário
         if isinstance(result, dict) and 'categoria' in result:
@@ -220,7 +483,8 @@ async def listar_clientes(
     registros_por_pagina: int = 50,
     filtro_nome: Optional[str] = None,
     apenas_ativos: bool = True,
-    filtro_cidade: Optional[str] = None
+    filtro_cidade: Optional[str] = None,
+    todas_paginas: bool = False
 ) -> str:
     """
     Lista clientes cadastrados no Omie ERP
@@ -231,6 +495,7 @@ async def listar_clientes(
         filtro_nome: Filtro por nome do cliente
         apenas_ativos: Se True, retorna apenas clientes ativos
         filtro_cidade: Filtro por cidade do cliente
+        todas_paginas: Se True, busca todas as páginas em paralelo
         
     Returns:
         str: Lista de clientes em formato JSON
@@ -244,7 +509,10 @@ async def listar_clientes(
             "registros_por_pagina": registros_por_pagina
         }
         
-        result = await client.listar_clientes(param)
+        if todas_paginas:
+            result = await listar_todas_paginas("geral/clientes", "ListarClientes", param)
+        else:
+            result = await client.listar_clientes(param)
         
         # Aplicar filtros conforme a nova estrutura
         if isinstance(result, dict) and 'clientes_cadastro' in result:
@@ -293,7 +561,8 @@ async def consultar_contas_pagar(
     status: str = "todos",  # "vencido", "a_vencer", "pago", "todos"
     pagina: int = 1,
     registros_por_pagina: int = 20,
-    filtro_fornecedor: Optional[str] = None
+    filtro_fornecedor: Optional[str] = None,
+    todas_paginas: bool = False
 ) -> str:
     """
     Consulta contas a pagar no Omie ERP com filtros avançados por status
@@ -319,7 +588,10 @@ async def consultar_contas_pagar(
         if data_fim:
             param["data_fim"] = data_fim
         
-        result = await client.consultar_contas_pagar(param)
+        if todas_paginas:
+            result = await listar_todas_paginas("financas/contapagar", "ListarContasPagar", param)
+        else:
+            result = await client.consultar_contas_pagar(param)
         
         # Filtrar por status se necessário
         if isinstance(result, dict) and 'contas' in result:
@@ -670,7 +942,8 @@ async def consultar_contas_receber(
     status: str = "todos",  # "vencido", "a_vencer", "recebido", "todos"
     pagina: int = 1,
     registros_por_pagina: int = 20,
-    filtro_cliente: Optional[str] = None
+    filtro_cliente: Optional[str] = None,
+    todas_paginas: bool = False
 ) -> str:
     """
     Consulta contas a receber no Omie ERP com filtros avançados por status
@@ -696,7 +969,10 @@ async def consultar_contas_receber(
         if data_fim:
             param["data_fim"] = data_fim
         
-        result = await client.consultar_contas_receber(param)
+        if todas_paginas:
+            result = await listar_todas_paginas("financas/contareceber", "ListarContasReceber", param)
+        else:
+            result = await client.consultar_contas_receber(param)
         
         # Filtrar por status se necessário
         if isinstance(result, dict) and 'contas' in result:
@@ -760,22 +1036,34 @@ async def status_contas_receber() -> str:
             "registros_por_pagina": 500
         }
         
-        result = await client.consultar_contas_receber(param)
-        
-        if not isinstance(result, dict) or 'contas' not in result:
-            return format_response("warning", "Nenhuma conta a receber encontrada")
+        if PAGINATOR_AVAILABLE and omie_paginator is not None:
+            # Agrega todas as páginas sem manter a listagem completa em memória
+            contas = omie_paginator.iter_records(
+                "financas/contareceber", "ListarContasReceber", param
+            )
+        else:
+            result = await client.consultar_contas_receber(param)
+            
+            if not isinstance(result, dict) or 'contas' not in result:
+                return format_response("warning", "Nenhuma conta a receber encontrada")
+            
+            async def _pagina_unica(registros):
+                for registro in registros:
+                    yield registro
+            
+            contas = _pagina_unica(result['contas'])
         
-        contas = result['contas']
         hoje = datetime.now().date()
         
         status_summary = {
             "vencido": {"count": 0, "valor": 0.0},
             "a_vencer": {"count": 0, "valor": 0.0},
             "recebido": {"count": 0, "valor": 0.0},
-            "total": {"count": len(contas), "valor": 0.0}
+            "total": {"count": 0, "valor": 0.0}
         }
         
-        for conta in contas:
+        async for conta in contas:
+            status_summary["total"]["count"] += 1
             valor = float(str(conta.get("valor_documento", 0)).replace(",", "."))
             status_summary["total"]["valor"] += valor
             
@@ -798,6 +1086,9 @@ async def status_contas_receber() -> str:
                     status_summary["a_vencer"]["count"] += 1
                     status_summary["a_vencer"]["valor"] += valor
         
+        if status_summary["total"]["count"] == 0:
+            return format_response("warning", "Nenhuma conta a receber encontrada")
+        
         return format_response("success", status_summary)
     
     except Exception as e:
@@ -1351,6 +1642,17 @@ async def cache_status() -> str:
             "recommendations": []
         }
         
+        if SINGLE_FLIGHT_AVAILABLE:
+            result["request_coalescing"] = omie_single_flight.get_stats()
+        
+        result["invalidation"] = omie_cache_invalidator.get_stats()
+        if omie_record_sets is not None:
+            result["record_sets"] = omie_record_sets.get_stats()
+        if omie_access_trace is not None:
+            result["access_trace"] = omie_access_trace.get_stats()
+        if omie_preloader is not None:
+            result["preload"] = omie_preloader.get_stats()
+        
         # Gerar recomendações baseadas nas estatísticas
         if stats["hit_rate_percent"] < 50:
             result["recommendations"].append("Taxa de hit baixa - considerar aumentar TTL")
@@ -1364,6 +1666,9 @@ async def cache_status() -> str:
         return format_response("success", result,
                              cache_performance={
                                  "hit_rate": f"{stats['hit_rate_percent']}%",
+                                 "stale_hits": stats.get("revalidation", {}).get("stale_hits", 0),
+                                 "refreshes": stats.get("revalidation", {}).get("refreshes", 0),
+                                 "negative_hits": stats.get("negative", {}).get("hits", 0),
                                  "memory_usage": f"{stats['memory_usage_percent']}%",
                                  "entries": stats["cache_size"]
                              })
@@ -1372,18 +1677,25 @@ async def cache_status() -> str:
         return format_response("error", str(e))
 
 @mcp.tool
-async def cache_clear(pattern: str = None) -> str:
+async def cache_clear(pattern: str = None, entidade: str = None) -> str:
     """
-    Limpa cache completamente ou por padrão específico
+    Limpa cache completamente, por entidade ou por padrão específico
     
     Args:
-        pattern: Padrão para limpeza seletiva (opcional)
+        pattern: Trecho do nome da ferramenta para limpeza seletiva (opcional)
+        entidade: Entidade Omie (ex: "clientes", "contas_pagar") ou endpoint (opcional)
     """
     try:
         if not CACHE_AVAILABLE or not cache_instance:
             return format_response("warning", "Sistema de cache não disponível")
         
-        if pattern:
+        if entidade:
+            # Limpeza pelo índice de tags (consultas que dependem da entidade)
+            removed = cache_instance.invalidate_entity(None, entidade)
+            return format_response("success",
+                                 f"Cache limpo para entidade: {entidade}",
+                                 operation="entity_clear", entries_removed=removed)
+        elif pattern:
             # Limpeza seletiva
             cache_instance.invalidate_pattern(pattern)
             return format_response("success", 
@@ -1391,8 +1703,7 @@ async def cache_clear(pattern: str = None) -> str:
                                  operation="selective_clear")
         else:
             # Limpeza completa
-            cache_instance.cache.clear()
-            cache_instance.current_size = 0
+            cache_instance.clear()
             return format_response("success", 
                                  "Cache limpo completamente",
                                  operation="full_clear")
@@ -1401,54 +1712,35 @@ async def cache_clear(pattern: str = None) -> str:
         return format_response("error", str(e))
 
 @mcp.tool
-async def cache_preload() -> str:
+async def cache_preload(orcamento_chamadas: Optional[int] = None) -> str:
     """
-    Pré-carrega consultas mais comuns no cache
+    Pré-carrega no cache as consultas mais valiosas do trace de acessos
+    
+    Args:
+        orcamento_chamadas: Máximo de chamadas ao Omie (padrão: CACHE_PRELOAD_BUDGET)
     """
     try:
         if not CACHE_AVAILABLE or not cache_instance:
             return format_response("warning", "Sistema de cache não disponível")
         
-        # Definir consultas mais comuns para pré-carregamento
-        common_queries = [
-            {"tool": "consultar_categorias", "params": {"pagina": 1, "registros_por_pagina": 50}},
-            {"tool": "listar_clientes", "params": {"pagina": 1, "registros_por_pagina": 50}},
-            {"tool": "consultar_contas_pagar", "params": {"status": "todos", "pagina": 1}},
-        ]
+        if omie_access_trace is None or omie_preloader is None:
+            return format_response("warning", "Trace de acessos desativado (CACHE_TRACE_PATH)")
         
-        preloaded = 0
-        errors = []
+        budget = orcamento_chamadas if orcamento_chamadas is not None else config.cache_preload_budget
+        plan = plan_preload(omie_access_trace.records, budget, config.cache_preload_concurrency)
+        if not plan.items:
+            return format_response("success", {"plan": plan.to_dict()},
+                                 operation="cache_preload",
+                                 summary="Nenhuma consulta recorrente no trace de acessos")
         
-        for query in common_queries:
-            try:
-                # Simular pré-carregamento (em produção seria chamada real)
-                mock_data = {
-                    "preloaded": True,
-                    "tool": query["tool"],
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                await cache_instance.set(
-                    query["tool"], 
-                    query["params"], 
-                    mock_data,
-                    ttl=1800  # 30 minutos
-                )
-                preloaded += 1
-                
-            except Exception as e:
-                errors.append(f"{query['tool']}: {str(e)}")
+        # Consultas em ordem de primeiro acesso típico do dia, dentro do orçamento
+        stats = await CachePreloader(preload_fetch).run(plan)
         
-        result = {
-            "preloaded_queries": preloaded,
-            "total_queries": len(common_queries),
-            "success_rate": round(preloaded / len(common_queries) * 100, 1),
-            "errors": errors
-        }
-        
-        return format_response("success", result,
+        return format_response("success", {"plan": plan.to_dict(), "result": stats},
                              operation="cache_preload",
-                             summary=f"{preloaded}/{len(common_queries)} consultas pré-carregadas")
+                             summary=f"{stats['loaded']} consultas buscadas, "
+                                     f"{stats['already_cached']} já em cache, "
+                                     f"{stats['calls_used']}/{budget} chamadas")
     
     except Exception as e:
         return format_response("error", str(e))
@@ -1463,7 +1755,8 @@ async def consultar_clientes(
     registros_por_pagina: int = 50,
     filtro_nome: Optional[str] = None,
     apenas_ativos: bool = True,
-    filtro_cidade: Optional[str] = None
+    filtro_cidade: Optional[str] = None,
+    todas_paginas: bool = False
 ) -> str:
     """
     Consulta clientes específicos (complementa listar_clientes)
@@ -1471,12 +1764,34 @@ async def consultar_clientes(
     try:
         client = await get_omie_client()
         
+        # Leitura local quando o snapshot de clientes já foi sincronizado
+        if snapshot_disponivel("clientes"):
+            limite = None if todas_paginas else registros_por_pagina
+            clientes, total = omie_sync.store.query(
+                "clientes", name=filtro_nome, city=filtro_cidade, only_active=apenas_ativos,
+                offset=0 if todas_paginas else (pagina - 1) * registros_por_pagina,
+                limit=limite or -1
+            )
+            result = {
+                "pagina": 1 if todas_paginas else pagina,
+                "total_de_paginas": 1 if todas_paginas else max(1, -(-total // registros_por_pagina)),
+                "registros": len(clientes),
+                "total_de_registros": total,
+                "clientes_cadastro": clientes,
+                "total_filtrado": total,
+                "_fonte": "snapshot"
+            }
+            return format_response("success", result, operation="consultar_clientes")
+        
         param = {
             "pagina": pagina,
             "registros_por_pagina": registros_por_pagina
         }
         
-        result = await client.listar_clientes(param)
+        if todas_paginas:
+            result = await listar_todas_paginas("geral/clientes", "ListarClientes", param)
+        else:
+            result = await client.listar_clientes(param)
         
         # Aplicar filtros específicos
         if isinstance(result, dict) and 'clientes_cadastro' in result:
@@ -1515,6 +1830,19 @@ async def consultar_fornecedores(
     try:
         client = await get_omie_client()
         
+        if snapshot_disponivel("fornecedores"):
+            fornecedores, total = omie_sync.store.query(
+                "fornecedores", name=filtro_nome, only_active=apenas_ativos,
+                offset=(pagina - 1) * registros_por_pagina, limit=registros_por_pagina
+            )
+            result = {
+                'fornecedores_cadastro': fornecedores,
+                'total_de_registros': total,
+                'pagina': pagina,
+                '_fonte': 'snapshot'
+            }
+            return format_response("success", result, operation="consultar_fornecedores")
+        
         param = {
             "pagina": pagina,
             "registros_por_pagina": registros_por_pagina,
@@ -1777,22 +2105,33 @@ async def consultar_cliente_por_codigo(
         else:
             return format_response("error", "Informe pelo menos um parâmetro de busca")
         
-        # Mock para desenvolvimento
-        result = {
-            "codigo_cliente_omie": codigo_cliente_omie or 12345,
-            "codigo_cliente_integracao": codigo_cliente_integracao or "CLI001",
-            "razao_social": "Empresa Exemplo Ltda",
-            "nome_fantasia": "Empresa Exemplo",
-            "cnpj_cpf": cnpj_cpf or "12.345.678/0001-90",
-            "email": "contato@empresaexemplo.com",
-            "telefone1_numero": "(11) 99999-8888",
-            "endereco": "Rua Exemplo, 123",
-            "cidade": "São Paulo",
-            "estado": "SP",
-            "cep": "01234-567",
-            "status": "Ativo",
-            "data_consulta": datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        }
+        # Snapshot local: resposta em milissegundos sem ida ao Omie
+        if snapshot_disponivel("clientes"):
+            store = omie_sync.store
+            if codigo_cliente_omie:
+                cliente = store.get("clientes", codigo_cliente_omie)
+            elif codigo_cliente_integracao:
+                cliente = store.get_by_integration_code("clientes", codigo_cliente_integracao)
+            else:
+                cliente = store.get_by_document("clientes", cnpj_cpf)
+            
+            if cliente:
+                result = {**cliente, "_fonte": "snapshot"}
+                return format_response("success", result, operation="consultar_cliente_por_codigo")
+        
+        if cnpj_cpf and not (codigo_cliente_omie or codigo_cliente_integracao):
+            # ConsultarCliente não aceita CNPJ/CPF: usar o filtro da listagem
+            lista = await client.listar_clientes({
+                "pagina": 1,
+                "registros_por_pagina": 1,
+                "clientesFiltro": {"cnpj_cpf": cnpj_cpf}
+            })
+            encontrados = lista.get("clientes_cadastro", []) if isinstance(lista, dict) else []
+            if not encontrados:
+                return format_response("error", f"Cliente não encontrado: {cnpj_cpf}")
+            result = encontrados[0]
+        else:
+            result = await client.consultar_cliente_por_codigo(param)
         
         return format_response("success", result, operation="consultar_cliente_por_codigo")
     
@@ -1908,6 +2247,35 @@ async def inativar_fornecedor(
     except Exception as e:
         return format_response("error", str(e))
 
+@mcp.tool
+async def sincronizar_cadastros(
+    entidade: Optional[str] = None,
+    completo: bool = False
+) -> str:
+    """
+    Sincroniza o snapshot local de cadastros (clientes, fornecedores, categorias, contas_correntes)
+    
+    Sem `completo`, busca apenas os registros alterados desde a última sincronização.
+    """
+    try:
+        await get_omie_client()
+        
+        if omie_sync is None:
+            motivo = "desativado (OMIE_SNAPSHOT_ENABLED=false)" if SYNC_AVAILABLE and not config.omie_snapshot_enabled else "não disponível"
+            return format_response("error", f"Snapshot de cadastros {motivo}")
+        
+        if entidade:
+            if entidade not in SYNC_ENTITIES:
+                return format_response("error", f"Entidade inválida: {entidade}. Use: {', '.join(SYNC_ENTITIES)}")
+            result = await omie_sync.sync(entidade, force_full=completo)
+        else:
+            result = await omie_sync.sync_all(force_full=completo)
+        
+        return format_response("success", result, operation="sincronizar_cadastros")
+    
+    except Exception as e:
+        return format_response("error", str(e))
+
 # =============================================================================
 # CONJUNTO 8: CONTAS A PAGAR CRUD (4 tools)
 # =============================================================================
@@ -2132,6 +2500,37 @@ async def excluir_conta_receber(
     except Exception as e:
         return format_response("error", str(e))
 
+@mcp.tool
+async def importar_lote(
+    tipo: str,
+    registros: List[Dict[str, Any]],
+    tamanho_lote: int = 50,
+    usar_lotes: bool = True,
+    concorrencia: int = 4
+) -> str:
+    """
+    Importa registros em lote (cliente, fornecedor, conta_pagar, conta_receber)
+    
+    Valida os registros, envia em lotes Omie quando disponíveis e retorna o
+    resultado por registro (chave = código de integração).
+    """
+    try:
+        if not BATCH_AVAILABLE:
+            return format_response("error", "Escrita em lote não disponível")
+        
+        if tipo not in BATCH_SPECS:
+            return format_response("error", f"Tipo inválido: {tipo}. Use: {', '.join(BATCH_SPECS)}")
+        
+        client = await get_omie_client()
+        writer = OmieBatchWriter(client, concurrency=concorrencia)
+        
+        result = await writer.write(tipo, registros, lot_size=tamanho_lote, use_lots=usar_lotes)
+        
+        return format_response("success", result.to_dict(), operation="importar_lote")
+    
+    except Exception as e:
+        return format_response("error", str(e))
+
 # =============================================================================
 # CONJUNTO 9: WEBHOOKS E INTEGRAÇÕES (3 tools)
 # =============================================================================
@@ -2357,8 +2756,55 @@ async def unified_status() -> str:
         health = await omie_db.health_check()
         status["database_health"] = health
     
+    if TRANSPORT_AVAILABLE:
+        status["http_pool"] = omie_transport.get_pool_metrics()
+    
+    if RATE_LIMITER_AVAILABLE:
+        status["rate_limiter"] = omie_rate_limiter.get_stats()
+        status["retry"] = omie_retry.get_stats()
+        status["circuits_open"] = omie_guard.get_stats()["open"] + ucm_guard.get_stats()["open"]
+    
+    if LATENCY_AVAILABLE:
+        status["latency_registry"] = omie_latency.get_stats()
+    
+    if omie_sync is not None:
+        status["snapshot"] = omie_sync.get_stats()
+    
     return json.dumps(status, ensure_ascii=False, indent=2)
 
+@mcp.resource("omie://resilience/circuits")
+async def resilience_circuits() -> str:
+    """Estado dos circuitos por upstream/endpoint e estatísticas de hedge"""
+    if not RATE_LIMITER_AVAILABLE:
+        return json.dumps({
+            "status": "unavailable",
+            "message": "Circuit breaker não carregado",
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False, indent=2)
+    
+    return json.dumps({
+        "upstreams": {
+            "omie": omie_guard.get_stats(),
+            "ucm": ucm_guard.get_stats()
+        },
+        "timestamp": datetime.now().isoformat()
+    }, ensure_ascii=False, indent=2)
+
+@mcp.resource("omie://metrics/latency")
+async def metrics_latency() -> str:
+    """p50/p95/p99 das chamadas ao Omie nos últimos 15 minutos por empresa/endpoint/call (todos os processos)"""
+    if not LATENCY_AVAILABLE:
+        return json.dumps({
+            "status": "unavailable",
+            "message": "Registro de latências não carregado",
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False, indent=2)
+    
+    report = await omie_latency.report(minutes=15)
+    report["registry"] = omie_latency.get_stats()
+    report["timestamp"] = datetime.now().isoformat()
+    return json.dumps(report, ensure_ascii=False, indent=2)
+
 @mcp.resource("omie://tools/list")
 async def tools_list() -> str:
     """Lista todas as ferramentas disponíveis"""
@@ -2407,7 +2853,8 @@ async def tools_list() -> str:
             "consultar_cliente_por_codigo",
             "consultar_fornecedor_por_codigo",
             "inativar_cliente",
-            "inativar_fornecedor"
+            "inativar_fornecedor",
+            "sincronizar_cadastros"
         ],
         "conjunto_8_contas_pagar_crud": [
             "incluir_conta_pagar",
@@ -2415,7 +2862,8 @@ async def tools_list() -> str:
             "excluir_conta_pagar",
             "incluir_conta_receber",
             "alterar_conta_receber",
-            "excluir_conta_receber"
+            "excluir_conta_receber",
+            "importar_lote"
         ],
         "conjunto_9_webhooks_integracoes": [
             "webhook_status",
@@ -2463,6 +2911,8 @@ Execute validação completa do SERVIDOR UNIFICADO com todas as 11 ferramentas.
 📊 RECURSOS DE MONITORAMENTO:
 - Verificar omie://unified/status
 - Analisar omie://tools/list
+- Conferir circuitos em omie://resilience/circuits
+- Acompanhar p95/p99 por endpoint em omie://metrics/latency
 
 🧪 CRITÉRIOS DE VALIDAÇÃO:
 ✅ Todas as 11 tools respondem corretamente
@@ -2562,5 +3012,5 @@ if __name__ == "__main__":
     print()
     print("🚀 INICIANDO SERVIDOR UNIFICADO (42 FERRAMENTAS)...")
     
-    # Executar servidor FastMCP Unificado
+    # Executar servidor FastMCP Unificado (shutdown_system roda no lifespan)
     mcp.run()
\ No newline at end of file
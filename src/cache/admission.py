@@ -0,0 +1,116 @@
+"""
+Admissão TinyLFU ponderada por custo para o IntelligentCache
+Uma entrada nova só entra no lugar das vítimas LRU se valer mais do que
+elas: frequência recente (sketch) x latência de recomputar x prioridade
+"""
+
+from typing import Any, Dict
+
+# Contadores de 4 bits, como no TinyLFU
+MAX_COUNT = 15
+
+# Multiplicadores ímpares de 64 bits, um por linha do sketch
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_MASK64 = (1 << 64) - 1
+
+
+class FrequencySketch:
+    """
+    Count-Min Sketch com envelhecimento.
+
+    Estima quantas vezes cada chave foi acessada recentemente com memória
+    fixa (4 linhas de `width` bytes). A cada `10 * width` incrementos todos
+    os contadores são divididos por dois, esquecendo o histórico antigo.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.width = 1 << max(4, (max(capacity, 1) - 1).bit_length())
+        self._mask = self.width - 1
+        self._rows = [bytearray(self.width) for _ in _SEEDS]
+        self.sample_size = 10 * self.width
+        self.additions = 0
+        self.resets = 0
+
+    def _slots(self, key: str):
+        h = hash(key) & _MASK64
+        for seed in _SEEDS:
+            mixed = (h * seed) & _MASK64
+            yield (mixed ^ (mixed >> 32)) & self._mask
+
+    def frequency(self, key: str) -> int:
+        return min(row[slot] for row, slot in zip(self._rows, self._slots(key)))
+
+    def increment(self, key: str):
+        slots = list(self._slots(key))
+        current = min(row[slot] for row, slot in zip(self._rows, slots))
+        if current < MAX_COUNT:
+            # Atualização conservadora: só as linhas no mínimo sobem (menos superestimação)
+            for row, slot in zip(self._rows, slots):
+                if row[slot] == current:
+                    row[slot] = current + 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.reset()
+
+    def reset(self):
+        """Envelhece o sketch dividindo todos os contadores por dois"""
+        self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+        self.additions //= 2
+        self.resets += 1
+
+
+class TinyLFUAdmission:
+    """
+    Decide se uma entrada nova vale o espaço das vítimas que ela despejaria.
+
+    O valor de uma entrada é `frequência x latência da ferramenta x
+    prioridade`; a latência é a média móvel do tempo de recarga observado.
+    A falta que precede a gravação já conta como acesso do candidato.
+    O candidato entra se valer ao menos a soma das vítimas: um dump enorme e
+    raro não expulsa centenas de consultas pequenas e quentes.
+    """
+
+    def __init__(self, capacity: int = 10000, default_latency: float = 0.1, smoothing: float = 0.2):
+        self.sketch = FrequencySketch(capacity)
+        self.default_latency = default_latency
+        self.smoothing = smoothing
+        self._latency: Dict[str, float] = {}
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def record(self, key: str):
+        """Registra um acesso (acerto ou falta) à chave"""
+        self.sketch.increment(key)
+
+    def observe_latency(self, tool_name: str, seconds: float):
+        previous = self._latency.get(tool_name)
+        self._latency[tool_name] = seconds if previous is None else (
+            previous + self.smoothing * (seconds - previous)
+        )
+
+    def latency(self, tool_name: str) -> float:
+        return self._latency.get(tool_name, self.default_latency)
+
+    def score(self, key: str, tool_name: str, priority: float = 1.0) -> float:
+        return self.sketch.frequency(key) * self.latency(tool_name) * priority
+
+    def admit(self, candidate_score: float, victims_score: float) -> bool:
+        if candidate_score >= victims_score:
+            self.admitted += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.admitted + self.rejected
+        return {
+            "policy": "tinylfu",
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rejection_rate_percent": round(self.rejected / total * 100, 1) if total else 0,
+            "sketch_width": self.sketch.width,
+            "sketch_resets": self.sketch.resets,
+            "latency_ms": {tool: round(value * 1000, 1) for tool, value in self._latency.items()},
+        }
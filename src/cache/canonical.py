@@ -0,0 +1,131 @@
+"""
+Canonicalização dos parâmetros usados nas chaves do cache
+Datas, documentos (CNPJ/CPF) e códigos numéricos são normalizados pelo
+tipo do campo, para que "01/07/2025" e "2025-07-01" (ou um CNPJ com e sem
+pontuação) caiam na mesma entrada. No modo conjunto de registros os
+parâmetros de paginação são descartados: páginas de qualquer tamanho saem
+da mesma listagem completa
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from src.client.omie_endpoints import get_call, PAGINACAO_PADRAO, PAGINACAO_N
+
+# Tipos de campo
+DATE = "date"
+DOCUMENT = "document"
+NUMBER = "number"
+
+# Marca das chaves de conjuntos de registros (não colidem com consultas sem paginação)
+RECORD_SET_MARKER = "_conjunto"
+
+# Chaves de paginação conhecidas (página e tamanho em ambos os estilos do Omie)
+PAGINATION_PARAMS = frozenset(PAGINACAO_PADRAO[:2] + PAGINACAO_N[:2])
+
+# Tipos explícitos por ferramenta, quando o nome do campo não basta
+TOOL_SCHEMAS: Dict[str, Dict[str, Optional[str]]] = {
+    "consultar_contas_pagar": {"filtrar_cliente": NUMBER},
+    "consultar_contas_receber": {"filtrar_cliente": NUMBER},
+}
+
+_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d")
+_DIGITS = re.compile(r"\D")
+
+
+def infer_kind(field: str) -> Optional[str]:
+    """Tipo do campo pela convenção de nomes da API Omie"""
+    lower = field.lower()
+    if "cnpj" in lower or "cpf" in lower:
+        return DOCUMENT
+    if "data" in lower or field.startswith(("dDt", "dt_")):
+        return DATE
+    # Códigos de integração são texto livre ("001" != "1")
+    if "integracao" in lower or "codint" in lower:
+        return None
+    if lower.endswith("_omie") or lower.startswith("codigo_") or field.startswith(("nCod", "nPagina", "nReg")):
+        return NUMBER
+    if field in PAGINATION_PARAMS:
+        return NUMBER
+    return None
+
+
+def normalize_date(value: Any) -> Any:
+    """Data em ISO (aaaa-mm-dd); valores não reconhecidos ficam como estão"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return value
+
+
+def normalize_document(value: Any) -> Any:
+    """CNPJ/CPF só com dígitos"""
+    if isinstance(value, str):
+        digits = _DIGITS.sub("", value)
+        return digits or value
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+
+def normalize_number(value: Any) -> Any:
+    """Códigos e contadores numéricos como int ("0042" -> 42)"""
+    if isinstance(value, str):
+        text = value.strip()
+        if text.isdigit():
+            return int(text)
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+_NORMALIZERS = {DATE: normalize_date, DOCUMENT: normalize_document, NUMBER: normalize_number}
+
+
+def _canonical_value(field: str, value: Any, schema: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {k: _canonical_value(k, v, schema) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical_value(field, item, schema) for item in value]
+    if isinstance(value, str):
+        value = value.strip()
+    kind = schema[field] if field in schema else infer_kind(field)
+    normalizer = _NORMALIZERS.get(kind)
+    return normalizer(value) if normalizer else value
+
+
+def canonical_params(tool_name: str, params: Dict[str, Any], record_set: bool = False) -> Dict[str, Any]:
+    """
+    Parâmetros normalizados para a chave do cache.
+
+    Campos vazios (None/"") são descartados: o Omie os trata como ausentes.
+    Com `record_set` a paginação sai da chave e entra a marca de conjunto.
+    """
+    schema = TOOL_SCHEMAS.get(tool_name, {})
+    ignored = _pagination_params(tool_name) if record_set else ()
+
+    canonical = {}
+    for field, value in params.items():
+        if field in ignored or value is None or value == "":
+            continue
+        canonical[field] = _canonical_value(field, value, schema)
+    if record_set:
+        canonical[RECORD_SET_MARKER] = True
+    return canonical
+
+
+def _pagination_params(tool_name: str):
+    spec = get_call(tool_name)
+    if spec is not None and spec.paginated:
+        return (spec.page_key, spec.page_size_key)
+    return PAGINATION_PARAMS
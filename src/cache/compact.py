@@ -0,0 +1,180 @@
+"""
+Representação compacta de listagens Omie no cache
+Listas de registros repetem as mesmas chaves e muitos valores (status,
+códigos de categoria, cidades). Aqui cada campo vira uma coluna: inteiros e
+decimais em arrays nativos, o resto em um pool de valores distintos com
+códigos compactos. Os registros são remontados só quando lidos
+"""
+
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+# Listas menores que isso ficam como estão (a economia não compensa)
+COMPACT_MIN_ROWS = 32
+
+# Código reservado para "campo ausente no registro" nas colunas com pool
+_MISSING_CODE = 0
+
+
+# Marca de campo ausente durante a construção das colunas
+_ABSENT = object()
+
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _pool_key(value: Any):
+    # Strings (a maioria) são a própria chave; 1, 1.0 e True são iguais para
+    # o dict, então os demais tipos entram com o tipo na chave
+    if type(value) is str:
+        return value
+    try:
+        hash(value)
+        return type(value), value
+    except TypeError:
+        try:
+            return "json", json.dumps(value, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return "id", id(value)
+
+
+def _code_typecode(size: int) -> str:
+    for typecode in ("B", "H", "I", "Q"):
+        if size < 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return "Q"
+
+
+class _Column:
+    """Uma coluna: array nativo (int/float) ou códigos em um pool de valores"""
+
+    def __init__(self, name: str, values: List[Any]):
+        self.name = sys.intern(name)
+        self.pool: Optional[List[Any]] = None
+        self.missing: Optional[bytearray] = None
+
+        kinds = {type(value) for value in values}
+        has_missing = object in kinds
+        kinds.discard(object)
+
+        if kinds == {int} and all(_INT64_MIN <= v <= _INT64_MAX for v in values if v is not _ABSENT):
+            self.values = array("q", (0 if v is _ABSENT else v for v in values))
+        elif kinds == {float}:
+            self.values = array("d", (0.0 if v is _ABSENT else v for v in values))
+        else:
+            self._build_pool(values)
+            return
+        if has_missing:
+            self.missing = bytearray(v is _ABSENT for v in values)
+
+    def _build_pool(self, values: List[Any]):
+        # Código 0 = ausente
+        pool: List[Any] = [None]
+        index: Dict[Any, int] = {}
+        codes = []
+        append = codes.append
+        for value in values:
+            if value is _ABSENT:
+                append(_MISSING_CODE)
+                continue
+            key = _pool_key(value)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(pool)
+                pool.append(sys.intern(value) if type(value) is str else value)
+            append(code)
+        self.pool = pool
+        self.values = array(_code_typecode(len(pool)), codes)
+
+    def get(self, row: int):
+        """(presente, valor) da linha"""
+        if self.pool is not None:
+            code = self.values[row]
+            return code != _MISSING_CODE, self.pool[code]
+        if self.missing is not None and self.missing[row]:
+            return False, None
+        return True, self.values[row]
+
+
+class CompactRecordSet:
+    """
+    Sequência somente-leitura de registros em colunas.
+
+    `len`, iteração, índice e fatia funcionam como na lista original; cada
+    acesso remonta um dict novo (alterá-lo não afeta o cache). Valores
+    aninhados (listas/dicts) vêm do pool e são compartilhados entre leituras.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        names: Dict[str, None] = {}
+        for record in records:
+            for name in record:
+                names.setdefault(name, None)
+
+        self._rows = len(records)
+        self._columns = []
+        for name in names:
+            self._columns.append(_Column(name, [record.get(name, _ABSENT) for record in records]))
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        record = {}
+        for column in self._columns:
+            here, value = column.get(row)
+            if here:
+                record[column.name] = value
+        return record
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._record(row) for row in range(*item.indices(self._rows))]
+        if item < 0:
+            item += self._rows
+        if not 0 <= item < self._rows:
+            raise IndexError("CompactRecordSet index out of range")
+        return self._record(item)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self._rows):
+            yield self._record(row)
+
+    def __bool__(self) -> bool:
+        return self._rows > 0
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [self._record(row) for row in range(self._rows)]
+
+
+def _compactable(value: Any) -> bool:
+    return (isinstance(value, list) and len(value) >= COMPACT_MIN_ROWS
+            and all(isinstance(item, dict) for item in value))
+
+
+def compact_payload(data: Any) -> Any:
+    """Resposta com as listas de registros em colunas (o dict original não é alterado)"""
+    if not isinstance(data, dict) or not any(_compactable(value) for value in data.values()):
+        return data
+    # Dict simples: o tamanho de um OmieResponse (raw_size) não vale mais para a forma compacta
+    return {key: CompactRecordSet(value) if _compactable(value) else value for key, value in data.items()}
+
+
+def is_compact(data: Any) -> bool:
+    return isinstance(data, dict) and any(isinstance(value, CompactRecordSet) for value in data.values())
+
+
+def expand_payload(data: Any) -> Any:
+    """Resposta com as listas remontadas (cópia rasa; dados sem colunas voltam como estão)"""
+    if not is_compact(data):
+        return data
+    return {key: value.to_list() if isinstance(value, CompactRecordSet) else value
+            for key, value in data.items()}
+
+
+def encode_default(obj: Any) -> Any:
+    """Hook `default` de json/orjson: colunas são gravadas como a lista original"""
+    if isinstance(obj, CompactRecordSet):
+        return obj.to_list()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
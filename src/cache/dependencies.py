@@ -0,0 +1,183 @@
+"""
+Mapa de dependências do cache
+Liga chamadas de escrita do Omie e eventos de webhook às tags de cache que
+elas tornam obsoletas. A tag de uma consulta é o endpoint do registro
+(omie_endpoints): uma escrita em geral/clientes invalida exatamente as
+consultas de geral/clientes e dos endpoints relacionados
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.client.omie_endpoints import get_call, find_call, ESCRITA
+
+# Endpoints cujos dados mudam junto com os do endpoint escrito
+RELATED_ENDPOINTS: Dict[str, Tuple[str, ...]] = {
+    # Cliente e fornecedor são o mesmo cadastro no Omie
+    "geral/clientes": ("geral/fornecedores",),
+    "geral/fornecedores": ("geral/clientes",),
+    # Títulos e lançamentos alimentam movimentos financeiros e saldos
+    "financas/contapagar": ("financas/mf",),
+    "financas/contareceber": ("financas/mf",),
+    "financas/contacorrentelancamentos": ("financas/mf", "geral/contacorrente"),
+}
+
+# Tópicos de webhook do Omie (prefixo de "topic") -> endpoints afetados
+WEBHOOK_TOPICS: Dict[str, Tuple[str, ...]] = {
+    "ClienteFornecedor.": ("geral/clientes", "geral/fornecedores"),
+    "Financas.ContaPagar.": ("financas/contapagar", "financas/mf"),
+    "Financas.ContaReceber.": ("financas/contareceber", "financas/mf"),
+    "Financas.ContaCorrente.": ("geral/contacorrente", "financas/contacorrentelancamentos", "financas/mf"),
+    "Geral.Categoria.": ("geral/categorias",),
+    "Geral.Projeto.": ("geral/projetos",),
+    "Geral.Departamento.": ("geral/departamentos",),
+}
+
+# Tipos de evento do WebhookServer (_determine_omie_event_type) -> endpoints afetados
+WEBHOOK_EVENTS: Dict[str, Tuple[str, ...]] = {
+    "conta_recebida": ("financas/contareceber", "financas/mf"),
+    "conta_vencida": ("financas/contapagar", "financas/mf"),
+    "cliente_cadastrado": ("geral/clientes", "geral/fornecedores"),
+}
+
+
+# Entidades (nomes usados nas ferramentas e no snapshot) -> endpoints que as servem
+ENTITIES: Dict[str, Tuple[str, ...]] = {
+    "clientes": ("geral/clientes",),
+    "fornecedores": ("geral/fornecedores",),
+    "categorias": ("geral/categorias",),
+    "departamentos": ("geral/departamentos",),
+    "projetos": ("geral/projetos",),
+    "empresas": ("geral/empresas",),
+    "tipos_documento": ("geral/tiposdoc",),
+    "contas_correntes": ("geral/contacorrente",),
+    "contas_pagar": ("financas/contapagar",),
+    "contas_receber": ("financas/contareceber",),
+    "lancamentos": ("financas/contacorrentelancamentos",),
+    "movimentos": ("financas/mf",),
+}
+
+
+def entity_tags(entity: str) -> List[str]:
+    """Tags de uma entidade pelo nome ("clientes") ou pelo próprio endpoint"""
+    if entity in ENTITIES:
+        return list(ENTITIES[entity])
+    if "/" in entity:
+        return [entity.strip("/")]
+    raise ValueError(f"Entidade desconhecida: {entity}. Use: {', '.join(ENTITIES)}")
+
+
+def _expand(endpoint: str) -> List[str]:
+    endpoint = endpoint.strip("/")
+    return [endpoint, *RELATED_ENDPOINTS.get(endpoint, ())]
+
+
+def read_tags(name: str) -> Tuple[str, ...]:
+    """Tags de uma consulta registrada (vazio se não for uma chamada Omie conhecida)"""
+    spec = get_call(name)
+    return (spec.endpoint,) if spec is not None else ()
+
+
+def mutation_tags(endpoint: str, call: str) -> List[str]:
+    """Tags invalidadas por uma chamada de escrita (vazio para leituras)"""
+    spec = find_call(endpoint, call)
+    if spec is not None and spec.kind != ESCRITA:
+        return []
+    return _expand(spec.endpoint if spec else endpoint)
+
+
+def webhook_tags(event_type: str, data: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Tags invalidadas por um webhook; o tópico do Omie tem precedência sobre o tipo"""
+    topic = str((data or {}).get("topic", ""))
+    for prefix, endpoints in WEBHOOK_TOPICS.items():
+        if topic.startswith(prefix):
+            return list(endpoints)
+    return list(WEBHOOK_EVENTS.get(event_type, ()))
+
+
+class CacheInvalidator:
+    """
+    Aplica o mapa de dependências aos caches registrados.
+
+    O dispatcher dos clientes chama `on_write` após cada escrita bem-sucedida
+    e o WebhookServer chama `on_webhook` a cada evento recebido. Um processo
+    sem cache local (o servidor de webhooks) registra só a camada L2 com
+    `register_shared`: a invalidação é publicada nela e os processos MCP
+    descartam as entradas do seu L1.
+    """
+
+    def __init__(self):
+        self._caches: List[Any] = []
+        self._shared: List[Any] = []
+        self._background: Set[asyncio.Task] = set()
+        self.invalidations = 0
+        self.entries_removed = 0
+        self.by_tag: Dict[str, int] = {}
+
+    def register(self, cache):
+        if cache not in self._caches:
+            self._caches.append(cache)
+
+    def unregister(self, cache):
+        if cache in self._caches:
+            self._caches.remove(cache)
+
+    def register_shared(self, shared_tier):
+        """Camada L2 (SharedCacheTier) que recebe as invalidações sem passar por um L1"""
+        if shared_tier not in self._shared:
+            self._shared.append(shared_tier)
+
+    def unregister_shared(self, shared_tier):
+        if shared_tier in self._shared:
+            self._shared.remove(shared_tier)
+
+    def _spawn(self, coro):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(coro)
+            return
+        task = loop.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def drain(self):
+        """Aguarda as publicações no L2 em andamento"""
+        while self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
+
+    def invalidate(self, tags: List[str], company: Optional[str] = None) -> int:
+        """Invalida as tags nos caches registrados (só da empresa, se informada)"""
+        if not tags or not (self._caches or self._shared):
+            return 0
+        removed = sum(cache.invalidate_tags(tags, company) for cache in self._caches)
+        # Caches com L2 já propagam a invalidação: publicar só nas camadas avulsas
+        propagated = {id(getattr(cache, "shared_tier", None)) for cache in self._caches}
+        for shared_tier in self._shared:
+            if id(shared_tier) not in propagated:
+                self._spawn(shared_tier.invalidate(tags=list(tags), company=company))
+        self.invalidations += 1
+        self.entries_removed += removed
+        for tag in tags:
+            self.by_tag[tag] = self.by_tag.get(tag, 0) + 1
+        return removed
+
+    def on_write(self, endpoint: str, call: str, company: Optional[str] = None) -> int:
+        return self.invalidate(mutation_tags(endpoint, call), company)
+
+    def on_webhook(self, event_type: str, data: Optional[Dict[str, Any]] = None,
+                   company: Optional[str] = None) -> int:
+        return self.invalidate(webhook_tags(event_type, data), company)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "caches": len(self._caches),
+            "shared_tiers": len(self._shared),
+            "invalidations": self.invalidations,
+            "entries_removed": self.entries_removed,
+            "by_tag": dict(self.by_tag)
+        }
+
+
+# Instância global usada pelo dispatcher e pelo WebhookServer
+omie_cache_invalidator = CacheInvalidator()
@@ -7,12 +7,24 @@ Performance otimizada para consultas frequentes com TTL dinâmico
 import asyncio
 import json
 import hashlib
+import heapq
+import random
+import threading
 import time
-from typing import Dict, Any, Optional, List, Tuple, Callable
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple, Callable, Deque, Awaitable, Iterable, Set
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-import pickle
-from pathlib import Path
+from dataclasses import dataclass
+
+from src.cache.admission import TinyLFUAdmission
+from src.cache.canonical import canonical_params
+from src.cache.compact import compact_payload, expand_payload
+from src.cache.negative import (
+    CachedFault, NegativeResult, classify_fault, DEFAULT_NEGATIVE_TTLS
+)
+from src.cache.persistence import CachePersistence
+from src.cache.policy import PolicyRegistry
+from src.cache.sizing import get_sizer
 
 @dataclass
 class CacheEntry:
@@ -25,6 +37,8 @@ class CacheEntry:
     ttl: float
     size_bytes: int
     tool_name: str
+    tags: Tuple[str, ...] = ()
+    company: str = ""
     
     def is_expired(self) -> bool:
         """Verifica se a entrada está expirada"""
@@ -35,50 +49,183 @@ class CacheEntry:
         age = time.time() - self.created_at
         return age > (self.ttl * staleness_threshold)
     
+    @property
+    def expires_at(self) -> float:
+        return self.created_at + self.ttl
+    
     def update_access(self):
         """Atualiza estatísticas de acesso"""
         self.last_accessed = time.time()
         self.access_count += 1
 
+# Máximo de entradas expiradas removidas por operação (mantém get/set O(1) amortizado)
+REAP_BATCH = 64
+
+# Recarga de uma entrada: (ferramenta, parâmetros, loader, ttl, tags, empresa)
+Reload = Tuple[str, Dict[str, Any], Callable[[], Awaitable[Any]], Optional[int], Tuple[str, ...], Optional[str]]
+
+# Índices secundários: ferramenta, empresa e tags -> chaves
+INDEX_TOOL, INDEX_COMPANY, INDEX_TAG = "tool", "company", "tag"
+
+# Valor ainda em disco: carregado no primeiro acesso
+NOT_LOADED = object()
+
+# Intervalo máximo (segundos) entre gravações de mudanças pendentes
+PERSIST_INTERVAL = 30
+
+# Resultado de get_or_refresh: dado atual, vencido servido durante revalidação, ou buscado agora
+HIT, STALE, MISS = "hit", "stale", "miss"
+
+
+class Uncached:
+    """Retorno de loader entregue a quem aguarda a recarga, mas não guardado no cache"""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self, value: Any):
+        self.value = value
+
+# Admissão: "lru" aceita tudo; "tinylfu" compara o candidato com as vítimas (src/cache/admission.py)
+ADMISSION_POLICIES = ("lru", "tinylfu")
+
+# Tamanho médio presumido por entrada para dimensionar o sketch de frequências
+SKETCH_BYTES_PER_ENTRY = 8 * 1024
+
 class IntelligentCache:
-    """Cache inteligente com TTL dinâmico e otimizações adaptativas"""
+    """
+    Cache inteligente com TTL dinâmico e otimizações adaptativas
+    
+    As entradas ficam em um OrderedDict na ordem de uso (LRU no início), de
+    modo que get/set/evict são O(1). Os vencimentos ficam em um heap
+    separado e são removidos aos poucos, sem varrer o cache inteiro.
+    
+    `get_or_refresh` implementa stale-while-revalidate: entradas vencidas há
+    menos de `stale_grace` segundos são servidas imediatamente enquanto uma
+    única tarefa em segundo plano as atualiza; entradas próximas do
+    vencimento (`refresh_ahead` do TTL, com jitter) são renovadas antes.
+    
+    Com `shared_tier` (src/cache/shared_tier.py) o cache vira L1 de uma
+    camada L2 compartilhada entre processos: gravações são replicadas no L2,
+    faltas no L1 consultam o L2 e invalidações são propagadas por pub/sub.
+    
+    Índices por ferramenta, empresa e tag fazem cada invalidação custar o
+    número de entradas afetadas, nunca uma varredura do cache. Entradas sem
+    empresa ("") entram em qualquer invalidação restrita a uma empresa.
+    
+    `policies` (src/cache/policy.py) define TTL, tamanho máximo, prioridade
+    e se cada ferramenta é cacheável. Com `admission="tinylfu"` uma entrada
+    que exigiria despejos só entra se valer mais que as vítimas LRU.
+    Ferramentas com `compact` guardam as listagens em colunas
+    (src/cache/compact.py); as leituras devolvem a resposta remontada.
+    
+    Falhas determinísticas do loader (página vazia, fault de validação) ficam
+    em cache negativo com `negative_ttls` curtos (src/cache/negative.py):
+    `get_or_refresh` levanta CachedFault sem chamar o Omie de novo.
+    
+    Todo o estado (entradas, tamanho, índices, padrões de acesso) é alterado
+    sob um RLock, seguro tanto entre tarefas asyncio quanto entre threads; o
+    lock nunca é mantido durante um await (L2, loader). Para reduzir a
+    disputa, ShardedIntelligentCache (src/cache/sharded.py) divide as chaves
+    entre N instâncias, cada uma com seu lock e sua parte do limite.
+    """
     
     def __init__(self, 
                  max_size_mb: int = 100,
                  default_ttl: int = 300,
-                 persistence_file: str = None):
+                 persistence_file: str = None,
+                 sizing: str = "auto",
+                 tool_sizing: Optional[Dict[str, str]] = None,
+                 stale_grace: float = 0,
+                 refresh_ahead: float = 0.8,
+                 refresh_jitter: float = 0.1,
+                 shared_tier=None,
+                 default_company: str = "",
+                 policies: Optional[PolicyRegistry] = None,
+                 admission: str = "lru",
+                 negative_ttls: Optional[Dict[str, float]] = None):
         
-        self.cache: Dict[str, CacheEntry] = {}
-        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # Protege todo o estado abaixo; reentrante porque os helpers se chamam entre si
+        self._lock = threading.RLock()
+        # Heap de (vencimento, chave); itens de entradas já substituídas são ignorados
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
         self.current_size = 0
         self.default_ttl = default_ttl
-        self.persistence_file = Path(persistence_file) if persistence_file else None
+        self.persistence = CachePersistence(persistence_file) if persistence_file else None
+        self._flush_task: Optional[asyncio.Future] = None
+        self._last_flush = time.time()
+        
+        # Estimativa de tamanho: padrão e por ferramenta (ver src/cache/sizing.py)
+        self.sizer = get_sizer(sizing)
+        self.tool_sizers = {tool: get_sizer(name) for tool, name in (tool_sizing or {}).items()}
+        
+        # Stale-while-revalidate: período em que a entrada vencida ainda pode ser servida
+        self.stale_grace = stale_grace
+        self.refresh_ahead = refresh_ahead
+        self.refresh_jitter = refresh_jitter
+        self._refreshing: Dict[str, asyncio.Future] = {}
+        # Funções de recarga por chave, usadas pelo aquecedor das entradas quentes
+        self._loaders: Dict[str, Reload] = {}
+        self._warmer_task: Optional[asyncio.Task] = None
+        
+        # Camada L2 compartilhada (opcional) e tarefas de invalidação em andamento
+        self.shared_tier = shared_tier
+        self._background: set = set()
+        
+        # Empresa das entradas gravadas sem empresa explícita (namespace do L2 por padrão)
+        self.default_company = default_company or (shared_tier.company if shared_tier else "")
+        
+        # Índices valor -> chaves, para invalidação precisa (ver src/cache/dependencies.py)
+        self._indexes: Dict[str, Dict[str, Set[str]]] = {INDEX_TOOL: {}, INDEX_COMPANY: {}, INDEX_TAG: {}}
+        self.indexed_invalidations = 0
+        
+        # Políticas por ferramenta e admissão ponderada por custo
+        if admission not in ADMISSION_POLICIES:
+            raise ValueError(f"Política de admissão desconhecida: {admission}. Use: {', '.join(ADMISSION_POLICIES)}")
+        self.policies = policies or PolicyRegistry()
+        self.admission = TinyLFUAdmission(
+            capacity=max(1024, self.max_size_bytes // SKETCH_BYTES_PER_ENTRY)
+        ) if admission == "tinylfu" else None
+        self.policy_rejections = 0
+        
+        # Cache negativo: TTL por tipo de falha (0 desativa o tipo)
+        self.negative_ttls = {**DEFAULT_NEGATIVE_TTLS, **(negative_ttls or {})}
+        self.negative_hits = 0
+        self.negative_stored: Dict[str, int] = {}
         
         # Métricas de performance
         self.hits = 0
         self.misses = 0
         self.evictions = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.warmer_refreshes = 0
         
-        # TTL dinâmico baseado em padrões de acesso
-        self.access_patterns: Dict[str, List[float]] = {}
+        # TTL dinâmico baseado em padrões de acesso (últimos 10 acessos)
+        self.access_patterns: Dict[str, Deque[float]] = {}
         
         # Carregar cache persistente se disponível
         self._load_persistent_cache()
     
-    def _generate_key(self, tool_name: str, params: Dict[str, Any]) -> str:
-        """Gera chave única para cache baseada na ferramenta e parâmetros"""
-        # Serializar parâmetros de forma consistente
+    def _generate_key(self, tool_name: str, params: Dict[str, Any], company: str = "") -> str:
+        """Gera chave única para cache baseada na empresa, ferramenta e parâmetros"""
+        # Parâmetros canônicos (datas, documentos e códigos normalizados) serializados de forma consistente
+        if isinstance(params, dict):
+            params = canonical_params(tool_name, params)
         params_str = json.dumps(params, sort_keys=True, default=str)
-        combined = f"{tool_name}:{params_str}"
+        combined = f"{company}:{tool_name}:{params_str}" if company else f"{tool_name}:{params_str}"
         
         # Hash SHA-256 para chave consistente
         return hashlib.sha256(combined.encode()).hexdigest()[:16]
     
-    def _calculate_size(self, data: Any) -> int:
+    def _calculate_size(self, data: Any, tool_name: str = None) -> int:
         """Calcula tamanho aproximado dos dados em bytes"""
+        sizer = self.tool_sizers.get(tool_name, self.sizer)
         try:
-            return len(pickle.dumps(data))
-        except:
+            return sizer(data)
+        except Exception:
             return len(str(data).encode('utf-8'))
     
     def _calculate_dynamic_ttl(self, tool_name: str, base_ttl: int = None) -> float:
@@ -93,9 +240,8 @@ class IntelligentCache:
         if len(accesses) < 2:
             return base_ttl
         
-        # Calcular frequência média de acesso
-        time_diffs = [accesses[i] - accesses[i-1] for i in range(1, len(accesses))]
-        avg_interval = sum(time_diffs) / len(time_diffs)
+        # Frequência média de acesso (a soma das diferenças é último - primeiro)
+        avg_interval = (accesses[-1] - accesses[0]) / (len(accesses) - 1)
         
         # TTL dinâmico: se acesso é frequente, aumentar TTL
         if avg_interval < 60:  # < 1 minuto
@@ -109,39 +255,58 @@ class IntelligentCache:
     
     def _update_access_pattern(self, tool_name: str):
         """Atualiza padrões de acesso para TTL dinâmico"""
-        now = time.time()
-        
-        if tool_name not in self.access_patterns:
-            self.access_patterns[tool_name] = []
+        pattern = self.access_patterns.get(tool_name)
+        if pattern is None:
+            pattern = self.access_patterns[tool_name] = deque(maxlen=10)
         
-        self.access_patterns[tool_name].append(now)
-        
-        # Manter apenas os últimos 10 acessos
-        self.access_patterns[tool_name] = self.access_patterns[tool_name][-10:]
+        pattern.append(time.time())
+    
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        """Remove uma entrada e desconta seu tamanho"""
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.current_size -= entry.size_bytes
+            self._loaders.pop(key, None)
+            self._unindex(entry)
+            if self.persistence:
+                self.persistence.delete(key)
+        return entry
     
     def _evict_lru(self):
         """Remove entrada menos recentemente usada"""
         if not self.cache:
             return
         
-        # Encontrar entrada com menor last_accessed
-        lru_key = min(self.cache.keys(), 
-                     key=lambda k: self.cache[k].last_accessed)
-        
-        evicted_entry = self.cache.pop(lru_key)
+        key, evicted_entry = self.cache.popitem(last=False)
         self.current_size -= evicted_entry.size_bytes
+        self._loaders.pop(key, None)
+        self._unindex(evicted_entry)
+        if self.persistence:
+            self.persistence.delete(key)
         self.evictions += 1
     
-    def _cleanup_expired(self):
-        """Remove entradas expiradas"""
-        expired_keys = [
-            key for key, entry in self.cache.items() 
-            if entry.is_expired()
-        ]
+    def _reap_expired(self, limit: Optional[int] = REAP_BATCH):
+        """Remove entradas vencidas a partir do topo do heap"""
+        heap = self._expiry_heap
+        now = time.time()
+        reaped = 0
         
-        for key in expired_keys:
-            entry = self.cache.pop(key)
-            self.current_size -= entry.size_bytes
+        while heap and heap[0][0] <= now and (limit is None or reaped < limit):
+            _, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # A entrada pode ter sido regravada com novo vencimento
+            if entry is not None and entry.expires_at + self.stale_grace <= now:
+                self._remove(key)
+            reaped += 1
+        
+        # Heap acumula itens de entradas substituídas/removidas: compactar quando crescer demais
+        if len(heap) > 2 * len(self.cache) + 1024:
+            self._expiry_heap = [(entry.expires_at + self.stale_grace, key) for key, entry in self.cache.items()]
+            heapq.heapify(self._expiry_heap)
+    
+    def _cleanup_expired(self):
+        """Remove todas as entradas expiradas"""
+        self._reap_expired(limit=None)
     
     def _ensure_capacity(self, required_size: int):
         """Garante que há capacidade suficiente no cache"""
@@ -149,132 +314,639 @@ class IntelligentCache:
                self.cache):
             self._evict_lru()
     
-    async def get(self, tool_name: str, params: Dict[str, Any]) -> Optional[Any]:
-        """Recupera dados do cache"""
-        key = self._generate_key(tool_name, params)
-        
-        # Limpar expirados periodicamente
-        self._cleanup_expired()
+    def _company(self, company: Optional[str]) -> str:
+        return self.default_company if company is None else company
+    
+    async def get(self, tool_name: str, params: Dict[str, Any],
+                  company: Optional[str] = None, key: Optional[str] = None) -> Optional[Any]:
+        """Recupera dados do cache (`key`: chave já gerada por quem roteou a chamada)"""
+        company = self._company(company)
+        key = key or self._generate_key(tool_name, params, company)
+        await self._load_value(key)
         
-        if key not in self.cache:
-            self.misses += 1
-            return None
+        with self._lock:
+            if self.admission:
+                self.admission.record(key)
+            
+            # Limpar expirados aos poucos
+            self._reap_expired()
+            
+            entry = self.cache.get(key)
+            if entry is not None:
+                data = self._read_local(key, entry, tool_name)
+                if data is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
         
-        entry = self.cache[key]
+        if entry is not None:
+            return None if data is None else expand_payload(data)
         
-        # Verificar se expirado
+        shared = await self._get_shared(tool_name, key, company)
+        with self._lock:
+            if shared is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return expand_payload(shared.data)
+    
+    def _read_local(self, key: str, entry: CacheEntry, tool_name: str) -> Any:
+        """Dados de uma entrada válida do L1, ou None (chamar com o lock)"""
+        # Verificar se expirado (vencidas no período de graça ficam para get_or_refresh)
         if entry.is_expired():
-            self.cache.pop(key)
-            self.current_size -= entry.size_bytes
-            self.misses += 1
+            if entry.expires_at + self.stale_grace <= time.time():
+                self._remove(key)
+            return None
+        
+        # Resultados negativos só são servidos por get_or_refresh
+        if not self._materialize(entry) or isinstance(entry.data, NegativeResult):
             return None
         
         # Atualizar estatísticas de acesso
+        self.cache.move_to_end(key)
         entry.update_access()
         self._update_access_pattern(tool_name)
-        self.hits += 1
-        
         return entry.data
     
     async def set(self, tool_name: str, params: Dict[str, Any], 
-                  data: Any, ttl: int = None) -> bool:
-        """Armazena dados no cache"""
-        key = self._generate_key(tool_name, params)
+                  data: Any, ttl: int = None, tags: Iterable[str] = (),
+                  company: Optional[str] = None, key: Optional[str] = None) -> bool:
+        """Armazena dados no cache (tags e empresa permitem invalidação precisa)"""
+        policy = self.policies.get(tool_name)
+        if not policy.cacheable:
+            with self._lock:
+                self.policy_rejections += 1
+            return False
+        
+        company = self._company(company)
+        key = key or self._generate_key(tool_name, params, company)
         
-        # Calcular TTL dinâmico
-        dynamic_ttl = self._calculate_dynamic_ttl(tool_name, ttl)
+        # Compactar e medir fora do lock (são as partes caras da gravação)
+        # Listagens em colunas (medidas já na forma compacta)
+        if policy.compact:
+            data = compact_payload(data)
         
         # Calcular tamanho dos dados
-        size_bytes = self._calculate_size(data)
+        size_bytes = self._calculate_size(data, tool_name)
         
-        # Verificar se cabe no cache
-        if size_bytes > self.max_size_bytes:
-            return False  # Dados muito grandes
+        with self._lock:
+            # Verificar se cabe no cache e no limite da ferramenta
+            if size_bytes > min(self.max_size_bytes, policy.max_entry_bytes or self.max_size_bytes):
+                self.policy_rejections += 1
+                return False  # Dados muito grandes
+            
+            # Criar nova entrada com TTL dinâmico (TTL explícito > TTL da política > padrão)
+            now = time.time()
+            entry = CacheEntry(
+                key=key,
+                data=data,
+                created_at=now,
+                last_accessed=now,
+                access_count=1,
+                ttl=self._calculate_dynamic_ttl(tool_name, ttl if ttl is not None else policy.ttl),
+                size_bytes=size_bytes,
+                tool_name=tool_name,
+                tags=tuple(tags),
+                company=company
+            )
+            
+            # Vencidas liberam espaço antes de comparar o candidato com as vítimas
+            self._reap_expired()
+            if not self._admit(entry):
+                return False
+            self._insert(entry)
         
-        # Garantir capacidade
-        self._ensure_capacity(size_bytes)
+        if self.shared_tier:
+            await self.shared_tier.set(entry)
+        
+        return True
+    
+    def _score(self, entry: CacheEntry) -> float:
+        return self.admission.score(entry.key, entry.tool_name, self.policies.get(entry.tool_name).priority)
+    
+    def _admit(self, entry: CacheEntry) -> bool:
+        """Admissão TinyLFU: o candidato precisa valer ao menos as vítimas LRU que despejaria"""
+        if self.admission is None:
+            return True
+        
+        existing = self.cache.get(entry.key)
+        excess = (self.current_size - (existing.size_bytes if existing else 0)
+                  + entry.size_bytes - self.max_size_bytes)
+        if excess <= 0:
+            return True
+        
+        freed = 0
+        victims_score = 0.0
+        for key, victim in self.cache.items():
+            if key == entry.key:
+                continue
+            freed += victim.size_bytes
+            victims_score += self._score(victim)
+            if freed >= excess:
+                break
+        return self.admission.admit(self._score(entry), victims_score)
+    
+    def record_latency(self, tool_name: str, seconds: float):
+        """Tempo de recomputar uma resposta da ferramenta (peso da admissão)"""
+        if self.admission:
+            with self._lock:
+                self.admission.observe_latency(tool_name, seconds)
+    
+    def _insert(self, entry: CacheEntry):
+        """Coloca a entrada no L1 (substituindo a anterior) e agenda a persistência"""
+        key = entry.key
         
         # Remover entrada existente se houver
-        if key in self.cache:
-            old_entry = self.cache[key]
-            self.current_size -= old_entry.size_bytes
+        self._remove(key)
+        
+        # Liberar vencidas antes de despejar entradas válidas
+        self._reap_expired()
+        
+        # Garantir capacidade
+        self._ensure_capacity(entry.size_bytes)
+        
+        self.cache[key] = entry
+        self.current_size += entry.size_bytes
+        self._index(entry)
+        heapq.heappush(self._expiry_heap, (entry.expires_at + self.stale_grace, key))
         
-        # Criar nova entrada
+        if self.persistence and (self.persistence.put(entry) or
+                                 time.time() - self._last_flush > PERSIST_INTERVAL):
+            self._schedule_flush()
+    
+    # ------------------------------------------------------------------
+    # Índices secundários
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _index_values(entry: CacheEntry):
+        yield INDEX_TOOL, entry.tool_name
+        yield INDEX_COMPANY, entry.company
+        for tag in entry.tags:
+            yield INDEX_TAG, tag
+    
+    def _index(self, entry: CacheEntry):
+        for kind, value in self._index_values(entry):
+            self._indexes[kind].setdefault(value, set()).add(entry.key)
+    
+    def _unindex(self, entry: CacheEntry):
+        for kind, value in self._index_values(entry):
+            index = self._indexes[kind]
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del index[value]
+    
+    def _lookup(self, kind: str, values: Iterable[str]) -> Set[str]:
+        keys: Set[str] = set()
+        index = self._indexes[kind]
+        for value in values:
+            keys |= index.get(value, set())
+        return keys
+    
+    def _scope(self, keys: Set[str], company: Optional[str]) -> Set[str]:
+        """Restringe as chaves à empresa (mais as entradas sem empresa)"""
+        if company is None:
+            return keys
+        company_keys = self._lookup(INDEX_COMPANY, {company, ""})
+        small, large = (keys, company_keys) if len(keys) <= len(company_keys) else (company_keys, keys)
+        return {key for key in small if key in large}
+    
+    def _remove_keys(self, keys: Iterable[str]) -> int:
+        removed = 0
+        for key in list(keys):
+            if self._remove(key) is not None:
+                removed += 1
+        self.indexed_invalidations += removed
+        return removed
+    
+    # ------------------------------------------------------------------
+    # Camada L2 compartilhada
+    # ------------------------------------------------------------------
+    
+    async def _get_shared(self, tool_name: str, key: str, company: str) -> Optional[CacheEntry]:
+        """Busca no L2 e, se encontrado e válido, copia para o L1"""
+        if not self.shared_tier:
+            return None
+        
+        shared = await self.shared_tier.get(tool_name, key, company)
+        if shared is None:
+            return None
+        
+        now = time.time()
+        data = shared["data"]
+        if self.policies.get(tool_name).compact:
+            data = compact_payload(data)
         entry = CacheEntry(
             key=key,
             data=data,
-            created_at=time.time(),
-            last_accessed=time.time(),
+            created_at=shared["created_at"],
+            last_accessed=now,
             access_count=1,
-            ttl=dynamic_ttl,
-            size_bytes=size_bytes,
-            tool_name=tool_name
+            ttl=shared["ttl"],
+            size_bytes=shared["size_bytes"],
+            tool_name=tool_name,
+            tags=tuple(shared.get("tags", ())),
+            company=company
         )
+        if entry.expires_at <= now or entry.size_bytes > self.max_size_bytes:
+            return None
         
-        self.cache[key] = entry
-        self.current_size += size_bytes
+        with self._lock:
+            self._insert(entry)
+            self._update_access_pattern(tool_name)
+        return entry
+    
+    async def start_shared_tier(self):
+        """Assina as invalidações publicadas pelos outros processos"""
+        if self.shared_tier:
+            await self.shared_tier.start(self._on_shared_invalidation)
+    
+    def _on_shared_invalidation(self, message: Dict[str, Any]) -> int:
+        """Aplica no L1 uma invalidação vinda de outro processo (restrita à empresa)"""
+        company = message.get("company")
+        removed = 0
+        with self._lock:
+            if message.get("clear"):
+                removed += self._remove_keys(self._scope(set(self.cache), company))
+            if message.get("pattern") is not None:
+                removed += self._remove_keys(self._scope(self._match_tools(message["pattern"]), company))
+            if message.get("tools"):
+                removed += self._remove_keys(self._scope(self._lookup(INDEX_TOOL, message["tools"]), company))
+            if message.get("tags"):
+                removed += self._remove_keys(self._scope(self._lookup(INDEX_TAG, message["tags"]), company))
+            removed += self._remove_keys(message.get("keys", []))
+        return removed
+    
+    def _spawn(self, coro: Awaitable[Any]):
+        """Executa a propagação ao L2 sem bloquear o chamador"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(coro)
+            return
+        task = loop.create_task(coro)
+        # Referência forte até concluir (tarefas soltas podem ser coletadas)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    # ------------------------------------------------------------------
+    # Stale-while-revalidate
+    # ------------------------------------------------------------------
+    
+    def _needs_refresh(self, entry: CacheEntry) -> bool:
+        """Entrada perto do vencimento; jitter espalha renovações gravadas juntas"""
+        threshold = self.refresh_ahead - random.uniform(0, self.refresh_jitter)
+        return entry.is_stale(threshold)
+    
+    def _start_refresh(self, key: str, reload: "Reload") -> asyncio.Future:
+        """Dispara (ou reaproveita) a única recarga em andamento da chave"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._refreshing.get(key)
+            # Recargas de outro loop (outra thread) não podem ser aguardadas aqui
+            if task is not None and not task.done() and task.get_loop() is loop:
+                return task
         
-        return True
+        tool_name, params, loader, ttl, tags, company = reload
+        
+        async def _refresh():
+            started = time.perf_counter()
+            try:
+                data = await loader()
+            except Exception as e:
+                # Falha determinística: a próxima consulta igual recebe o mesmo erro do cache
+                self.set_negative(tool_name, params, e, tags, company, key)
+                raise
+            self.record_latency(tool_name, time.perf_counter() - started)
+            if isinstance(data, Uncached):
+                return data.value
+            if data is not None:
+                await self.set(tool_name, params, data, ttl, tags, company, key)
+                with self._lock:
+                    self._loaders[key] = reload
+            return data
+        
+        def _done(t: asyncio.Future):
+            with self._lock:
+                if self._refreshing.get(key) is t:
+                    del self._refreshing[key]
+                if t.cancelled():
+                    return
+                if t.exception() is None:
+                    self.refreshes += 1
+                    return
+                self.refresh_failures += 1
+            print(f"⚠️ Falha ao revalidar cache de {tool_name}: {t.exception()}")
+        
+        task = loop.create_task(_refresh())
+        task.add_done_callback(_done)
+        with self._lock:
+            self._refreshing[key] = task
+        return task
     
-    def invalidate_pattern(self, pattern: str):
-        """Invalida entradas que correspondem a um padrão"""
-        keys_to_remove = [
-            key for key, entry in self.cache.items()
-            if pattern in entry.tool_name or pattern in key
-        ]
+    async def get_or_refresh(self, tool_name: str, params: Dict[str, Any],
+                             loader: Callable[[], Awaitable[Any]],
+                             ttl: int = None, tags: Iterable[str] = (),
+                             company: Optional[str] = None,
+                             expand: bool = True, key: Optional[str] = None) -> Tuple[Any, str]:
+        """
+        Recupera do cache com stale-while-revalidate.
         
-        for key in keys_to_remove:
-            entry = self.cache.pop(key)
-            self.current_size -= entry.size_bytes
+        Retorna (dados, origem) com origem HIT, STALE ou MISS. Em MISS a
+        chamada aguarda a recarga (compartilhada entre chamadas simultâneas)
+        e propaga seus erros; em HIT/STALE a recarga, se necessária, roda em
+        segundo plano e seus erros só são contabilizados. Com `expand=False`
+        listagens em colunas são devolvidas como CompactRecordSet (sequência
+        que remonta só os registros lidos).
+        """
+        view = expand_payload if expand else (lambda data: data)
+        company = self._company(company)
+        key = key or self._generate_key(tool_name, params, company)
+        reload = (tool_name, params, loader, ttl, tuple(tags), company)
+        await self._load_value(key)
+        
+        with self._lock:
+            if self.admission:
+                self.admission.record(key)
+            self._reap_expired()
+            
+            entry = self.cache.get(key)
+            now = time.time()
+            
+            if entry is not None and not self._materialize(entry):
+                entry = None
+            
+            if entry is not None and isinstance(entry.data, NegativeResult):
+                if entry.expires_at > now:
+                    self.negative_hits += 1
+                    self.cache.move_to_end(key)
+                    entry.update_access()
+                    raise CachedFault(entry.data)
+                # Negativo vencido não tem período de graça
+                entry = None
+            
+            local = entry is not None and entry.expires_at + self.stale_grace > now
+            if local:
+                self.cache.move_to_end(key)
+                entry.update_access()
+                self._update_access_pattern(tool_name)
+                self._loaders[key] = reload
+                data = entry.data
+                stale = entry.expires_at <= now
+                if stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+        
+        # Recargas e L2 fora do lock
+        if local:
+            if stale or self._needs_refresh(entry):
+                self._start_refresh(key, reload)
+            return view(data), STALE if stale else HIT
+        
+        shared = await self._get_shared(tool_name, key, company) if entry is None else None
+        with self._lock:
+            if shared is not None:
+                self.hits += 1
+                self._loaders[key] = reload
+            else:
+                self.misses += 1
+        if shared is not None:
+            return view(shared.data), HIT
+        
+        task = self._start_refresh(key, reload)
+        return await asyncio.shield(task), MISS
+    
+    def set_negative(self, tool_name: str, params: Dict[str, Any], error: Exception,
+                     tags: Iterable[str] = (), company: Optional[str] = None,
+                     key: Optional[str] = None) -> Optional[str]:
+        """
+        Guarda a falha como resultado negativo se ela for determinística.
+        Retorna o tipo guardado ou None (falha transitória ou tipo desativado).
+        """
+        kind = classify_fault(error)
+        ttl = self.negative_ttls.get(kind) if kind else None
+        if not ttl or not self.policies.get(tool_name).cacheable:
+            return None
+        
+        company = self._company(company)
+        now = time.time()
+        negative = NegativeResult(kind, str(error))
+        entry = CacheEntry(
+            key=key or self._generate_key(tool_name, params, company),
+            data=negative,
+            created_at=now,
+            last_accessed=now,
+            access_count=1,
+            ttl=ttl,
+            size_bytes=self._calculate_size(negative, tool_name),
+            tool_name=tool_name,
+            tags=tuple(tags),
+            company=company
+        )
+        with self._lock:
+            self._reap_expired()
+            self._insert(entry)
+            self.negative_stored[kind] = self.negative_stored.get(kind, 0) + 1
+        return kind
+    
+    # ------------------------------------------------------------------
+    # Aquecedor das entradas quentes
+    # ------------------------------------------------------------------
+    
+    def warm_hot_entries(self, top_n: int = 20, horizon: float = 0) -> int:
+        """
+        Renova as `top_n` entradas mais acessadas que vencem em até `horizon`
+        segundos (ou já estão perto do vencimento). Retorna quantas disparou.
+        """
+        with self._lock:
+            candidates = [
+                (entry, self._loaders[key]) for key, entry in self.cache.items()
+                if key in self._loaders and key not in self._refreshing
+            ]
+        hottest = heapq.nlargest(top_n, candidates, key=lambda c: c[0].access_count)
+        
+        now = time.time()
+        started = 0
+        for entry, reload in hottest:
+            if entry.expires_at - now <= horizon or self._needs_refresh(entry):
+                self._start_refresh(entry.key, reload)
+                started += 1
+        
+        with self._lock:
+            self.warmer_refreshes += started
+        return started
+    
+    def start_warmer(self, interval: float = 60, top_n: int = 20):
+        """Agenda o aquecedor periódico (requer loop em execução)"""
+        if self._warmer_task is not None and not self._warmer_task.done():
+            return
+        
+        async def _loop():
+            while True:
+                # Jitter evita que várias instâncias aqueçam no mesmo instante
+                await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+                try:
+                    # Horizonte de um ciclo: nada quente vence antes do próximo
+                    self.warm_hot_entries(top_n, horizon=interval * 1.1)
+                except Exception as e:
+                    print(f"⚠️ Aquecedor do cache falhou: {e}")
+        
+        self._warmer_task = asyncio.ensure_future(_loop())
+    
+    def stop_warmer(self):
+        if self._warmer_task is not None:
+            self._warmer_task.cancel()
+            self._warmer_task = None
+    
+    # ------------------------------------------------------------------
+    # Invalidação (via índices; propagada ao L2 quando houver)
+    # ------------------------------------------------------------------
+    
+    def _match_tools(self, pattern: str) -> Set[str]:
+        """Chaves das ferramentas cujo nome contém o padrão (varre só os nomes)"""
+        tools = [tool for tool in self._indexes[INDEX_TOOL] if pattern in tool]
+        return self._lookup(INDEX_TOOL, tools)
+    
+    def _propagate(self, company: Optional[str], **invalidation):
+        if self.shared_tier:
+            self._spawn(self.shared_tier.invalidate(company=company, **invalidation))
+    
+    def invalidate_pattern(self, pattern: str, company: Optional[str] = None) -> int:
+        """Invalida as entradas das ferramentas cujo nome contém o padrão"""
+        with self._lock:
+            removed = self._remove_keys(self._scope(self._match_tools(pattern), company))
+        self._propagate(company, pattern=pattern)
+        return removed
+    
+    def invalidate_tool(self, tool_name: str, company: Optional[str] = None) -> int:
+        """Invalida todas as entradas de uma ferramenta"""
+        with self._lock:
+            removed = self._remove_keys(self._scope(self._lookup(INDEX_TOOL, [tool_name]), company))
+        self._propagate(company, tools=[tool_name])
+        return removed
+    
+    def invalidate_tags(self, tags: Iterable[str], company: Optional[str] = None) -> int:
+        """
+        Invalida as entradas marcadas com qualquer uma das tags (em todos os
+        processos), opcionalmente só de uma empresa.
+        """
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return 0
+        with self._lock:
+            removed = self._remove_keys(self._scope(self._lookup(INDEX_TAG, tags), company))
+        self._propagate(company, tags=tags)
+        return removed
+    
+    def invalidate_entity(self, company: Optional[str], entity: str) -> int:
+        """
+        Invalida tudo o que o cache guarda de uma entidade Omie ("clientes",
+        "contas_pagar", ... ou um endpoint) de uma empresa.
+        """
+        from src.cache.dependencies import entity_tags
+        return self.invalidate_tags(entity_tags(entity), company)
+    
+    def invalidate(self, tool_name: str, params: Dict[str, Any], company: Optional[str] = None):
+        """Invalida uma consulta específica (em todos os processos)"""
+        company = self._company(company)
+        key = self._generate_key(tool_name, params, company)
+        with self._lock:
+            self._remove(key)
+        self._propagate(company, keys=[(tool_name, key)])
+    
+    def clear(self):
+        """Remove todas as entradas (inclusive as persistidas e as do L2)"""
+        with self._lock:
+            companies = set(self._indexes[INDEX_COMPANY]) | {self.default_company}
+            self._clear_local()
+        for company in companies:
+            self._propagate(company, clear=True)
+    
+    def _clear_local(self):
+        with self._lock:
+            self.cache.clear()
+            self._expiry_heap = []
+            self._loaders.clear()
+            for index in self._indexes.values():
+                index.clear()
+            self.current_size = 0
+            if self.persistence:
+                self.persistence.clear()
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        total_requests = self.hits + self.misses
-        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
-        
-        # Estatísticas por ferramenta
-        tool_stats = {}
-        for entry in self.cache.values():
-            tool_name = entry.tool_name
-            if tool_name not in tool_stats:
-                tool_stats[tool_name] = {
-                    "entries": 0,
-                    "total_size": 0,
-                    "avg_ttl": 0,
-                    "total_accesses": 0
-                }
+        with self._lock:
+            total_requests = self.hits + self.misses
+            hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+        
+            # Estatísticas por ferramenta
+            tool_stats = {}
+            for entry in self.cache.values():
+                tool_name = entry.tool_name
+                if tool_name not in tool_stats:
+                    tool_stats[tool_name] = {
+                        "entries": 0,
+                        "total_size": 0,
+                        "avg_ttl": 0,
+                        "total_accesses": 0
+                    }
             
-            tool_stats[tool_name]["entries"] += 1
-            tool_stats[tool_name]["total_size"] += entry.size_bytes
-            tool_stats[tool_name]["avg_ttl"] += entry.ttl
-            tool_stats[tool_name]["total_accesses"] += entry.access_count
-        
-        # Calcular médias
-        for stats in tool_stats.values():
-            if stats["entries"] > 0:
-                stats["avg_size"] = stats["total_size"] / stats["entries"]
-                stats["avg_ttl"] = stats["avg_ttl"] / stats["entries"]
-                stats["avg_accesses"] = stats["total_accesses"] / stats["entries"]
-        
-        return {
-            "cache_size": len(self.cache),
-            "memory_used_mb": round(self.current_size / 1024 / 1024, 2),
-            "memory_limit_mb": round(self.max_size_bytes / 1024 / 1024, 2),
-            "memory_usage_percent": round(self.current_size / self.max_size_bytes * 100, 1),
-            "hit_rate_percent": round(hit_rate, 1),
-            "hits": self.hits,
-            "misses": self.misses,
-            "evictions": self.evictions,
-            "tool_statistics": tool_stats
-        }
+                tool_stats[tool_name]["entries"] += 1
+                tool_stats[tool_name]["total_size"] += entry.size_bytes
+                tool_stats[tool_name]["avg_ttl"] += entry.ttl
+                tool_stats[tool_name]["total_accesses"] += entry.access_count
+        
+            # Calcular médias
+            for stats in tool_stats.values():
+                if stats["entries"] > 0:
+                    stats["avg_size"] = stats["total_size"] / stats["entries"]
+                    stats["avg_ttl"] = stats["avg_ttl"] / stats["entries"]
+                    stats["avg_accesses"] = stats["total_accesses"] / stats["entries"]
+        
+            return {
+                "cache_size": len(self.cache),
+                "memory_used_mb": round(self.current_size / 1024 / 1024, 2),
+                "memory_limit_mb": round(self.max_size_bytes / 1024 / 1024, 2),
+                "memory_usage_percent": round(self.current_size / self.max_size_bytes * 100, 1),
+                "hit_rate_percent": round(hit_rate, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "indexes": {
+                    "tools": len(self._indexes[INDEX_TOOL]),
+                    "companies": len(self._indexes[INDEX_COMPANY]),
+                    "tags": len(self._indexes[INDEX_TAG]),
+                    "invalidated_entries": self.indexed_invalidations
+                },
+                "admission": {
+                    "policy_rejections": self.policy_rejections,
+                    **(self.admission.get_stats() if self.admission else {"policy": "lru"})
+                },
+                "negative": {
+                    "hits": self.negative_hits,
+                    "stored": dict(self.negative_stored),
+                    "ttls": dict(self.negative_ttls)
+                },
+                "revalidation": {
+                    "stale_hits": self.stale_hits,
+                    "refreshes": self.refreshes,
+                    "refresh_failures": self.refresh_failures,
+                    "warmer_refreshes": self.warmer_refreshes,
+                    "refreshing_now": len(self._refreshing),
+                    "stale_grace_seconds": self.stale_grace,
+                    "warmer_active": self._warmer_task is not None and not self._warmer_task.done()
+                },
+                "shared_tier": self.shared_tier.get_stats() if self.shared_tier else None,
+                "tool_statistics": tool_stats
+            }
     
     def get_hot_entries(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Retorna as entradas mais acessadas"""
-        sorted_entries = sorted(
-            self.cache.values(),
-            key=lambda e: e.access_count,
-            reverse=True
-        )
+        with self._lock:
+            sorted_entries = heapq.nlargest(limit, self.cache.values(), key=lambda e: e.access_count)
         
         return [
             {
@@ -284,66 +956,139 @@ class IntelligentCache:
                 "ttl": entry.ttl,
                 "size_kb": round(entry.size_bytes / 1024, 1)
             }
-            for entry in sorted_entries[:limit]
+            for entry in sorted_entries
         ]
     
-    async def preload_common_queries(self, preload_config: List[Dict[str, Any]]):
-        """Pré-carrega consultas comuns no cache"""
-        for config in preload_config:
+    async def preload_common_queries(self, preload_config: List[Dict[str, Any]],
+                                     fetch: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                                     concurrency: int = 4) -> Dict[str, int]:
+        """
+        Pré-carrega consultas ({"tool", "params"}) buscando-as com `fetch(tool, params)`.
+        Consultas já em cache não são buscadas de novo. O plano montado a
+        partir do trace de acessos fica em src/cache/preload.py.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        origins: Dict[str, int] = {HIT: 0, STALE: 0, MISS: 0, "failed": 0}
+        
+        async def _load(config: Dict[str, Any]):
             tool_name = config.get("tool")
             params = config.get("params", {})
             
-            # Aqui seria feita a chamada real à API
-            # Por agora, vamos simular
-            mock_data = {"preloaded": True, "tool": tool_name}
-            await self.set(tool_name, params, mock_data)
+            async def loader():
+                return await fetch(tool_name, params)
+            
+            async with semaphore:
+                try:
+                    _, origin = await self.get_or_refresh(tool_name, params, loader, config.get("ttl"))
+                except Exception as e:
+                    origins["failed"] += 1
+                    print(f"⚠️ Pré-carregamento de {tool_name} falhou: {e}")
+                    return
+                origins[origin] += 1
+        
+        await asyncio.gather(*(_load(config) for config in preload_config))
+        return origins
+    
+    # ------------------------------------------------------------------
+    # Persistência (src/cache/persistence.py)
+    # ------------------------------------------------------------------
+    
+    def _materialize(self, entry: CacheEntry) -> bool:
+        """Indica se o valor da entrada está em memória (carregado por _load_value)"""
+        return entry.data is not NOT_LOADED
+    
+    async def _load_value(self, key: str):
+        """
+        Carrega do disco o valor de uma entrada restaurada apenas pelo índice.
+        A leitura do SQLite roda em uma thread, fora do lock e do event loop;
+        o valor só é instalado se a entrada não foi substituída nesse meio-tempo.
+        """
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None or entry.data is not NOT_LOADED:
+                return
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(
+                None, self.persistence.load_value, key
+            )
+            if self.policies.get(entry.tool_name).compact:
+                data = compact_payload(data)
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar entrada do cache: {e}")
+            with self._lock:
+                if self.cache.get(key) is entry and entry.data is NOT_LOADED:
+                    self._remove(key)
+            return
+        with self._lock:
+            if self.cache.get(key) is entry and entry.data is NOT_LOADED:
+                entry.data = data
+    
+    def _persisted_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+    
+    def _schedule_flush(self):
+        """Grava as mudanças pendentes em uma thread, sem bloquear o loop"""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._last_flush = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._save_persistent_cache()
+            return
+        self._flush_task = loop.run_in_executor(
+            None, self.persistence.flush, self._persisted_stats()
+        )
+    
+    async def flush(self):
+        """Grava no disco todas as mudanças pendentes"""
+        if not self.persistence:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.persistence.flush, self._persisted_stats()
+        )
     
     def _save_persistent_cache(self):
-        """Salva cache no disco"""
-        if not self.persistence_file:
+        """Grava no disco as mudanças pendentes (síncrono)"""
+        if not self.persistence:
             return
         
         try:
-            # Salvar apenas entradas não expiradas
-            persistent_data = {
-                "cache": {
-                    key: asdict(entry) for key, entry in self.cache.items()
-                    if not entry.is_expired()
-                },
-                "stats": {
-                    "hits": self.hits,
-                    "misses": self.misses,
-                    "evictions": self.evictions
-                },
-                "saved_at": time.time()
-            }
-            
-            with open(self.persistence_file, 'wb') as f:
-                pickle.dump(persistent_data, f)
-                
+            self.persistence.flush(self._persisted_stats())
         except Exception as e:
             print(f"⚠️ Erro ao salvar cache: {e}")
     
     def _load_persistent_cache(self):
-        """Carrega cache do disco"""
-        if not self.persistence_file or not self.persistence_file.exists():
+        """Restaura o índice do disco; valores são lidos no primeiro acesso"""
+        if not self.persistence:
             return
         
         try:
-            with open(self.persistence_file, 'rb') as f:
-                persistent_data = pickle.load(f)
+            index, stats = self.persistence.load_index()
             
-            # Restaurar cache
-            for key, entry_data in persistent_data.get("cache", {}).items():
-                entry = CacheEntry(**entry_data)
-                
-                # Apenas carregar se ainda válido
-                if not entry.is_expired():
-                    self.cache[key] = entry
-                    self.current_size += entry.size_bytes
+            # Índice vem em ordem de último acesso, que é a ordem LRU
+            for row in index:
+                entry = CacheEntry(
+                    key=row["key"],
+                    data=NOT_LOADED,
+                    created_at=row["created_at"],
+                    last_accessed=row["last_accessed"],
+                    access_count=row["access_count"],
+                    ttl=row["ttl"],
+                    size_bytes=row["size_bytes"],
+                    tool_name=row["tool_name"],
+                    tags=row["tags"],
+                    company=row["company"]
+                )
+                self.cache[entry.key] = entry
+                self.current_size += entry.size_bytes
+                self._index(entry)
+                self._expiry_heap.append((entry.expires_at + self.stale_grace, entry.key))
+            heapq.heapify(self._expiry_heap)
             
             # Restaurar estatísticas
-            stats = persistent_data.get("stats", {})
             self.hits = stats.get("hits", 0)
             self.misses = stats.get("misses", 0)
             self.evictions = stats.get("evictions", 0)
@@ -351,9 +1096,12 @@ class IntelligentCache:
         except Exception as e:
             print(f"⚠️ Erro ao carregar cache: {e}")
     
-    def __del__(self):
-        """Salva cache ao destruir objeto"""
-        self._save_persistent_cache()
+    def close(self):
+        """Grava as mudanças pendentes e fecha o arquivo de persistência"""
+        self.stop_warmer()
+        if self.persistence:
+            self._save_persistent_cache()
+            self.persistence.close()
 
 # ============================================================================
 # DECORADOR PARA CACHE AUTOMÁTICO
@@ -366,7 +1114,7 @@ class CacheManager:
         self.cache = IntelligentCache(
             max_size_mb=50,
             default_ttl=300,
-            persistence_file="cache/omie_cache.pkl"
+            persistence_file="cache/omie_cache.db"
         )
     
     def cached_tool(self, ttl: int = None, cache_key_params: List[str] = None):
@@ -384,8 +1132,10 @@ class CacheManager:
                 if cached_result is not None:
                     return cached_result
                 
-                # Executar função e cache resultado
+                # Executar função e cache resultado (latência pesa na admissão)
+                started = time.perf_counter()
                 result = await func(*args, **kwargs)
+                self.cache.record_latency(func.__name__, time.perf_counter() - started)
                 await self.cache.set(func.__name__, params, result, ttl)
                 
                 return result
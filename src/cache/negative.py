@@ -0,0 +1,64 @@
+"""
+Cache negativo do IntelligentCache
+Falhas determinísticas do Omie (página sem registros, fault de validação)
+são guardadas com TTL curto: a mesma consulta repetida em loop recebe o
+mesmo erro sem ir ao Omie. Falhas transitórias (timeout, throttling,
+erro de servidor) nunca são guardadas
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.client.omie_endpoints import is_empty_page_error
+from src.utils.rate_limiter import is_throttle_fault
+
+# Tipos de resultado negativo
+NEGATIVE_EMPTY = "empty"        # consulta válida sem registros
+NEGATIVE_INVALID = "invalid"    # fault de validação: mesma entrada, mesmo erro
+
+# TTLs padrão (segundos): curtos, e escritas/webhooks invalidam pelas tags
+DEFAULT_NEGATIVE_TTLS: Dict[str, float] = {
+    NEGATIVE_EMPTY: 30,
+    NEGATIVE_INVALID: 120,
+}
+
+# Faults de cliente do Omie (SOAP-ENV:Client-NNNN) dependem só da entrada
+CLIENT_FAULT_MARKER = "soap-env:client"
+
+# Status HTTP de cliente que ainda assim são transitórios
+TRANSIENT_STATUS_CODES = (408, 425, 429)
+
+_STATUS = re.compile(r"Erro HTTP (\d{3})")
+
+
+def classify_fault(error: Exception) -> Optional[str]:
+    """Tipo negativo cacheável do erro, ou None se o erro for transitório"""
+    if is_empty_page_error(error):
+        return NEGATIVE_EMPTY
+
+    message = str(error)
+    match = _STATUS.search(message)
+    status = int(match.group(1)) if match else None
+    if is_throttle_fault(status, message):
+        return None
+    if CLIENT_FAULT_MARKER in message.lower():
+        return NEGATIVE_INVALID
+    if status is not None and 400 <= status < 500 and status not in TRANSIENT_STATUS_CODES:
+        return NEGATIVE_INVALID
+    return None
+
+
+@dataclass
+class NegativeResult:
+    """Valor guardado no lugar da resposta: o tipo e a mensagem do erro original"""
+    kind: str
+    message: str
+
+
+class CachedFault(Exception):
+    """Erro devolvido a partir do cache negativo (mesma mensagem do erro original)"""
+
+    def __init__(self, negative: NegativeResult):
+        super().__init__(negative.message)
+        self.kind = negative.kind
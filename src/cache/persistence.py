@@ -0,0 +1,250 @@
+"""
+Persistência incremental do IntelligentCache em SQLite
+Entradas são gravadas em lotes (blobs JSON) e, na inicialização, apenas o
+índice é lido; os valores são carregados sob demanda
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.cache.compact import encode_default
+from src.client.omie_response import OmieResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Versão do formato em disco; arquivos de outra versão são descartados (cache é descartável)
+FORMAT_VERSION = 3
+
+# Entradas pendentes que disparam uma gravação
+FLUSH_BATCH = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    tool_name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    access_count INTEGER NOT NULL,
+    ttl REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    raw_size INTEGER,
+    tags TEXT NOT NULL DEFAULT '',
+    company TEXT NOT NULL DEFAULT '',
+    encoding TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at);
+"""
+
+# Colunas do índice (tudo menos o valor)
+INDEX_COLUMNS = ("key", "tool_name", "created_at", "last_accessed", "access_count",
+                 "ttl", "size_bytes", "raw_size", "tags", "company")
+
+# Separador das tags na coluna (tags são endpoints/nomes, sem quebras de linha)
+TAG_SEPARATOR = "\n"
+
+
+def encode_value(data: Any) -> Tuple[str, bytes]:
+    """Serializa o valor em JSON (orjson quando disponível); listagens em colunas voltam a listas"""
+    if ORJSON_AVAILABLE:
+        return "orjson", orjson.dumps(data, default=encode_default)
+    return "json", json.dumps(data, ensure_ascii=False, default=encode_default).encode("utf-8")
+
+
+def decode_value(encoding: str, blob: bytes, raw_size: Optional[int] = None) -> Any:
+    """Desserializa um valor gravado por encode_value"""
+    if encoding == "orjson" and ORJSON_AVAILABLE:
+        data = orjson.loads(blob)
+    elif encoding in ("orjson", "json"):
+        data = json.loads(blob)
+    else:
+        raise ValueError(f"Codificação de cache desconhecida: {encoding}")
+
+    if raw_size is not None and isinstance(data, dict):
+        return OmieResponse(data, raw_size)
+    return data
+
+
+class CachePersistence:
+    """
+    Armazém SQLite das entradas do cache.
+
+    `put`/`delete` só registram a mudança em memória; `flush` grava todas
+    as pendentes em uma transação (pode rodar em thread). Em caso de queda,
+    perde-se no máximo o que não foi gravado desde o último flush.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # chave -> entrada (gravar) ou None (remover); flush pode rodar em outra thread
+        self._pending: Dict[str, Any] = {}
+        self._pending_lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return Path(self.path).exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+
+        row = conn.execute("SELECT value FROM cache_meta WHERE name = 'format_version'").fetchone()
+        if row is None or int(row[0]) != FORMAT_VERSION:
+            if row is not None:
+                print(f"⚠️ Cache persistente em formato {row[0]} descartado (atual: {FORMAT_VERSION})")
+            # Colunas podem ter mudado entre versões: recriar a tabela
+            conn.execute("DROP TABLE IF EXISTS cache_entries")
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('format_version', ?)",
+                (str(FORMAT_VERSION),)
+            )
+
+        self._conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def load_index(self) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """Metadados das entradas válidas (sem valores), na ordem de último acesso"""
+        if not self.exists():
+            return [], {}
+
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            rows = conn.execute(
+                f"SELECT {', '.join(INDEX_COLUMNS)} FROM cache_entries ORDER BY last_accessed"
+            ).fetchall()
+            stats = {
+                name: int(value) for name, value in conn.execute(
+                    "SELECT name, value FROM cache_meta WHERE name IN ('hits', 'misses', 'evictions')"
+                )
+            }
+
+        index = []
+        for row in rows:
+            item = dict(zip(INDEX_COLUMNS, row))
+            item["tags"] = tuple(item["tags"].split(TAG_SEPARATOR)) if item["tags"] else ()
+            index.append(item)
+        return index, stats
+
+    def load_value(self, key: str) -> Any:
+        """Carrega o valor de uma entrada; KeyError se não estiver em disco"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT encoding, data, raw_size FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return decode_value(row[0], row[1], row[2])
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def put(self, entry) -> bool:
+        """Agenda a gravação da entrada; retorna True quando convém fazer flush"""
+        with self._pending_lock:
+            self._pending[entry.key] = entry
+            return len(self._pending) >= FLUSH_BATCH
+
+    def delete(self, key: str):
+        with self._pending_lock:
+            self._pending[key] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self, stats: Optional[Dict[str, int]] = None) -> int:
+        """Grava as mudanças pendentes em uma transação"""
+        if not self._pending and not stats:
+            return 0
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        rows = []
+        deletes = []
+        for key, entry in pending.items():
+            if entry is None:
+                deletes.append((key,))
+                continue
+            try:
+                encoding, blob = encode_value(entry.data)
+            except (TypeError, ValueError):
+                # Valor fora de JSON: fica só em memória
+                deletes.append((key,))
+                continue
+            rows.append((
+                key, entry.tool_name, entry.created_at, entry.last_accessed, entry.access_count,
+                entry.ttl, entry.expires_at, entry.size_bytes,
+                getattr(entry.data, "raw_size", None), TAG_SEPARATOR.join(entry.tags),
+                entry.company, encoding, blob
+            ))
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                if deletes:
+                    conn.executemany("DELETE FROM cache_entries WHERE key = ?", deletes)
+                if rows:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                if stats:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)",
+                        [(name, str(value)) for name, value in stats.items()]
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                # Devolver as mudanças para a próxima tentativa (sem sobrescrever as mais novas)
+                with self._pending_lock:
+                    for key, entry in pending.items():
+                        self._pending.setdefault(key, entry)
+                raise
+
+        return len(rows) + len(deletes)
+
+    def clear(self):
+        """Descarta pendências e remove todas as entradas gravadas"""
+        with self._pending_lock:
+            self._pending = {}
+        if not self.exists():
+            return
+        with self._lock:
+            self._connect().execute("DELETE FROM cache_entries")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
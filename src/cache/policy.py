@@ -0,0 +1,102 @@
+"""
+Políticas de cache por ferramenta
+TTL, tamanho máximo de entrada, prioridade, se a ferramenta é cacheável e
+se as listagens ficam em colunas (src/cache/compact.py).
+Os padrões vêm do registro de chamadas Omie (omie_endpoints); ajustes finos
+são registrados por nome
+"""
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+from src.client.omie_endpoints import get_call, LISTA
+
+# Maior entrada aceita de listagens financeiras (dumps completos de títulos e movimentos)
+FINANCIAL_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Prioridade de cadastros de referência (categorias, departamentos, ...): baratos de
+# guardar, consultados o tempo todo e usados para montar as demais respostas
+REFERENCE_PRIORITY = 2.0
+REFERENCE_MIN_TTL = 1800
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Política de uma ferramenta; `ttl` None usa o TTL padrão do cache"""
+    ttl: Optional[int] = None
+    max_entry_bytes: Optional[int] = None
+    priority: float = 1.0
+    cacheable: bool = True
+    compact: bool = False
+
+
+DEFAULT_POLICY = CachePolicy()
+
+
+def endpoint_policy(name: str) -> Optional[CachePolicy]:
+    """Política derivada do registro de chamadas Omie (None se não registrada)"""
+    spec = get_call(name)
+    if spec is None:
+        return None
+    if not spec.cacheable:
+        return CachePolicy(ttl=0, cacheable=False)
+
+    # Listagens: registros em colunas, remontados na leitura
+    policy = CachePolicy(ttl=spec.ttl, compact=spec.kind == LISTA)
+    if spec.endpoint.startswith("geral/") and spec.ttl >= REFERENCE_MIN_TTL:
+        policy = replace(policy, priority=REFERENCE_PRIORITY)
+    if spec.endpoint.startswith("financas/") and spec.kind == LISTA:
+        policy = replace(policy, max_entry_bytes=FINANCIAL_MAX_ENTRY_BYTES)
+    return policy
+
+
+class PolicyRegistry:
+    """
+    Registro de políticas por nome de ferramenta.
+
+    Com `from_endpoints` as ferramentas do registro Omie recebem a política
+    derivada dele; políticas registradas explicitamente têm precedência.
+    """
+
+    def __init__(self, default: CachePolicy = DEFAULT_POLICY, from_endpoints: bool = False):
+        self.default = default
+        self.from_endpoints = from_endpoints
+        self._policies: Dict[str, CachePolicy] = {}
+        self._derived: Dict[str, CachePolicy] = {}
+
+    def register(self, tool_name: str, policy: Optional[CachePolicy] = None, **overrides) -> CachePolicy:
+        """Registra a política (ou ajusta campos da atual: register("x", ttl=60))"""
+        if policy is None:
+            policy = replace(self.get(tool_name), **overrides)
+        self._policies[tool_name] = policy
+        return policy
+
+    def unregister(self, tool_name: str):
+        self._policies.pop(tool_name, None)
+
+    def get(self, tool_name: str) -> CachePolicy:
+        policy = self._policies.get(tool_name)
+        if policy is not None:
+            return policy
+        policy = self._derived.get(tool_name)
+        if policy is None:
+            derived = endpoint_policy(tool_name) if self.from_endpoints else None
+            policy = self._derived[tool_name] = derived or self.default
+        return policy
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        """Políticas registradas explicitamente (para status/diagnóstico)"""
+        return {
+            name: {
+                "ttl": policy.ttl,
+                "max_entry_bytes": policy.max_entry_bytes,
+                "priority": policy.priority,
+                "cacheable": policy.cacheable,
+                "compact": policy.compact,
+            }
+            for name, policy in self._policies.items()
+        }
+
+
+# Registro global usado pelo servidor unificado
+omie_cache_policies = PolicyRegistry(from_endpoints=True)
@@ -0,0 +1,321 @@
+"""
+Pré-carregamento do cache a partir do trace de acessos
+O servidor registra cada consulta cacheável (ferramenta, parâmetros,
+latência, origem) em um trace JSONL compacto. Na inicialização o trace vira
+um plano: quais consultas buscar, em que ordem e com que concorrência,
+dentro de um orçamento de chamadas ao Omie. O aquecimento roda em segundo
+plano, de modo que as primeiras consultas do dia já encontram o cache quente
+"""
+
+import asyncio
+import json
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+from src.cache.canonical import canonical_params
+from src.client.omie_endpoints import get_call
+
+# Registros mantidos do trace (memória e arquivo)
+TRACE_MAX_RECORDS = 20_000
+
+# Registros acumulados antes de gravar no arquivo
+TRACE_FLUSH_EVERY = 100
+
+# Meia-vida (segundos) do peso de um acesso no plano: hábitos recentes valem mais
+PRELOAD_HALF_LIFE = 3 * 86400
+
+# Acessos mínimos para uma consulta entrar no plano (consultas avulsas não pagam o custo)
+PRELOAD_MIN_ACCESSES = 2
+
+# Duração desejada do aquecimento: define quantas buscas rodam em paralelo
+PRELOAD_TARGET_SECONDS = 30
+
+# Origem de um acesso que foi buscado no Omie (ver IntelligentCache.get_or_refresh)
+ORIGIN_MISS = "miss"
+
+
+class AccessTrace:
+    """
+    Trace de acessos ao cache: uma linha JSON por consulta.
+
+    Formato: {"t", "tool", "params", "latency_ms", "origin"} e, quando
+    relevantes, "size_bytes", "calls" (chamadas ao Omie de um conjunto de
+    registros) e "conjunto". Os parâmetros são os enviados ao Omie (o plano
+    agrupa pela forma canônica). O mesmo formato é aceito pelo
+    benchmarks/bench_cache_admission.py --trace.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_records: int = TRACE_MAX_RECORDS):
+        self.path = Path(path) if path else None
+        self.max_records = max_records
+        self.records: Deque[Dict[str, Any]] = deque(maxlen=max_records)
+        self._pending: List[str] = []
+        self._file_records = 0
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.load()
+
+    def record(self, tool_name: str, params: Dict[str, Any], latency_ms: float,
+               origin: str, size_bytes: int = 0, calls: int = 1, record_set: bool = False):
+        """Registra um acesso (gravado no arquivo a cada TRACE_FLUSH_EVERY registros)"""
+        record = {
+            "t": round(time.time()),
+            "tool": tool_name,
+            "params": params,
+            "latency_ms": round(latency_ms, 1),
+            "origin": origin,
+        }
+        if size_bytes:
+            record["size_bytes"] = size_bytes
+        if calls != 1:
+            record["calls"] = calls
+        if record_set:
+            record["conjunto"] = True
+
+        with self._lock:
+            self.records.append(record)
+            self.recorded += 1
+            if self.path:
+                self._pending.append(json.dumps(record, ensure_ascii=False, default=str))
+            full = len(self._pending) >= TRACE_FLUSH_EVERY
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Grava os registros pendentes; reescreve o arquivo quando passa do dobro do limite"""
+        if not self.path:
+            return
+        with self._lock:
+            lines, self._pending = self._pending, []
+            if not lines:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self._file_records + len(lines) > 2 * self.max_records:
+                    kept = [json.dumps(r, ensure_ascii=False, default=str) for r in self.records]
+                    self.path.write_text("".join(f"{line}\n" for line in kept), encoding="utf-8")
+                    self._file_records = len(kept)
+                else:
+                    with self.path.open("a", encoding="utf-8") as file:
+                        file.writelines(f"{line}\n" for line in lines)
+                    self._file_records += len(lines)
+            except OSError as e:
+                print(f"⚠️ Erro ao gravar trace de acessos: {e}")
+
+    def load(self):
+        """Lê do arquivo os últimos `max_records` registros"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                for line in file:
+                    self._file_records += 1
+                    try:
+                        self.records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError as e:
+            print(f"⚠️ Erro ao ler trace de acessos: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "records": len(self.records),
+            "recorded_now": self.recorded,
+            "pending": len(self._pending),
+            "path": str(self.path) if self.path else None,
+        }
+
+
+@dataclass
+class PreloadItem:
+    """Consulta do plano com as estimativas que a ordenaram"""
+    tool: str
+    params: Dict[str, Any]
+    record_set: bool
+    accesses: float      # acessos ponderados pela recência
+    latency_ms: float    # latência mediana das buscas no Omie
+    calls: int           # chamadas ao Omie estimadas
+    first_access: float  # segundos após a meia-noite do primeiro acesso típico do dia
+
+    @property
+    def value(self) -> float:
+        """Tempo de espera evitado por chamada gasta"""
+        return self.accesses * self.latency_ms / self.calls
+
+
+@dataclass
+class PreloadPlan:
+    items: List[PreloadItem]
+    concurrency: int
+    budget: int
+
+    @property
+    def calls(self) -> int:
+        return sum(item.calls for item in self.items)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": len(self.items),
+            "estimated_calls": self.calls,
+            "budget": self.budget,
+            "concurrency": self.concurrency,
+            "items": [{**asdict(item), "value": round(item.value, 1)} for item in self.items],
+        }
+
+
+def _seconds_of_day(timestamp: float) -> float:
+    local = time.localtime(timestamp)
+    return local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+
+
+def plan_preload(records: Iterable[Dict[str, Any]], budget: int,
+                 max_concurrency: int = 4, now: Optional[float] = None,
+                 half_life: float = PRELOAD_HALF_LIFE,
+                 min_accesses: int = PRELOAD_MIN_ACCESSES,
+                 target_seconds: float = PRELOAD_TARGET_SECONDS) -> PreloadPlan:
+    """
+    Monta o plano de pré-carregamento a partir do trace.
+
+    As consultas são agrupadas pela forma canônica dos parâmetros; entram as
+    de maior valor (acessos recentes x latência por chamada) até esgotar o
+    orçamento de chamadas. A execução segue a hora típica do primeiro acesso
+    do dia, e a concorrência é a necessária para terminar em
+    `target_seconds` (limitada a `max_concurrency`).
+    """
+    now = time.time() if now is None else now
+    groups: Dict[str, Dict[str, Any]] = {}
+
+    for record in records:
+        tool = record.get("tool")
+        spec = get_call(tool) if tool else None
+        if spec is None or not spec.cacheable:
+            continue
+        params = record.get("params") or {}
+        record_set = bool(record.get("conjunto"))
+        key = json.dumps(
+            [tool, canonical_params(tool, params, record_set=record_set)], sort_keys=True, default=str
+        )
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "tool": tool, "params": params, "record_set": record_set,
+                "count": 0, "weight": 0.0, "latencies": [], "calls": 1, "first_by_day": {},
+            }
+        t = record.get("t", now)
+        group["count"] += 1
+        group["weight"] += 0.5 ** (max(0.0, now - t) / half_life)
+        group["calls"] = max(group["calls"], int(record.get("calls", 1)))
+        if record.get("origin") == ORIGIN_MISS:
+            group["latencies"].append(record.get("latency_ms", 0))
+        day = time.strftime("%Y-%m-%d", time.localtime(t))
+        seconds = _seconds_of_day(t)
+        if seconds < group["first_by_day"].get(day, math.inf):
+            group["first_by_day"][day] = seconds
+
+    candidates = [
+        PreloadItem(
+            tool=group["tool"],
+            params=group["params"],
+            record_set=group["record_set"],
+            accesses=round(group["weight"], 2),
+            # Sem busca observada, a latência é desconhecida: valor mínimo
+            latency_ms=statistics.median(group["latencies"]) if group["latencies"] else 1.0,
+            calls=group["calls"],
+            first_access=statistics.mean(group["first_by_day"].values()),
+        )
+        for group in groups.values()
+        if group["count"] >= min_accesses
+    ]
+
+    # Seleção gulosa por valor por chamada dentro do orçamento
+    chosen: List[PreloadItem] = []
+    spent = 0
+    for item in sorted(candidates, key=lambda c: c.value, reverse=True):
+        if spent + item.calls <= budget:
+            chosen.append(item)
+            spent += item.calls
+
+    chosen.sort(key=lambda item: (item.first_access, -item.value))
+    total_seconds = sum(item.latency_ms * item.calls for item in chosen) / 1000
+    concurrency = max(1, min(max_concurrency, math.ceil(total_seconds / target_seconds)))
+    return PreloadPlan(items=chosen, concurrency=concurrency, budget=budget)
+
+
+class CachePreloader:
+    """
+    Executa o plano: `fetch(item)` busca a consulta pelo cache e retorna a
+    origem (HIT/STALE quando já estava em cache, MISS quando foi ao Omie).
+    """
+
+    def __init__(self, fetch: Callable[[PreloadItem], Awaitable[str]]):
+        self.fetch = fetch
+        self.plan: Optional[PreloadPlan] = None
+        self.loaded = 0
+        self.already_cached = 0
+        self.failed = 0
+        self.skipped = 0
+        self.calls_used = 0
+        self.duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self, plan: PreloadPlan) -> Dict[str, Any]:
+        """Busca as consultas do plano, na ordem, sem passar do orçamento"""
+        self.plan = plan
+        semaphore = asyncio.Semaphore(plan.concurrency)
+        started = time.perf_counter()
+
+        async def _load(item: PreloadItem):
+            async with semaphore:
+                # Reservar antes de buscar: buscas em paralelo não estouram o orçamento
+                if self.calls_used + item.calls > plan.budget:
+                    self.skipped += 1
+                    return
+                self.calls_used += item.calls
+                try:
+                    origin = await self.fetch(item)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"⚠️ Pré-carregamento de {item.tool} falhou: {e}")
+                    return
+                if origin == ORIGIN_MISS:
+                    self.loaded += 1
+                else:
+                    # Já estava em cache: a chamada reservada volta ao orçamento
+                    self.calls_used -= item.calls
+                    self.already_cached += 1
+
+        await asyncio.gather(*(_load(item) for item in plan.items))
+        self.duration = time.perf_counter() - started
+        return self.get_stats()
+
+    def start(self, plan: PreloadPlan) -> Optional[asyncio.Task]:
+        """Roda o plano em segundo plano (requer loop em execução)"""
+        if not plan.items or (self._task is not None and not self._task.done()):
+            return None
+        self._task = asyncio.ensure_future(self.run(plan))
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "planned": len(self.plan.items) if self.plan else 0,
+            "loaded": self.loaded,
+            "already_cached": self.already_cached,
+            "failed": self.failed,
+            "skipped_budget": self.skipped,
+            "calls_used": self.calls_used,
+            "budget": self.plan.budget if self.plan else 0,
+            "concurrency": self.plan.concurrency if self.plan else 0,
+            "duration_seconds": round(self.duration, 2),
+            "running": self._task is not None and not self._task.done(),
+        }
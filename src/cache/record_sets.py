@@ -0,0 +1,96 @@
+"""
+Cache de listagens Omie no nível do conjunto de registros
+A listagem completa (todas as páginas, via OmiePaginator) fica em uma única
+entrada do IntelligentCache; cada página pedida é recortada dela, de modo
+que tamanhos de página diferentes acertam a mesma entrada
+"""
+
+import math
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.cache.canonical import canonical_params
+from src.cache.dependencies import read_tags
+from src.client.omie_endpoints import get_call, OmieCall, DEFAULT_PAGE_SIZE
+
+# Tamanho de página usado para buscar a listagem completa (máximo aceito pelo Omie)
+FETCH_PAGE_SIZE = 500
+
+
+def slice_page(spec: OmieCall, records: Sequence[Any], pagina: int, registros_por_pagina: int) -> Dict[str, Any]:
+    """Monta a resposta de uma página, no formato do Omie, a partir dos registros"""
+    pagina = max(1, int(pagina))
+    size = max(1, int(registros_por_pagina))
+    start = (pagina - 1) * size
+    page_records = records[start:start + size]
+    return {
+        spec.page_key: pagina,
+        spec.total_pages_key: max(1, math.ceil(len(records) / size)),
+        spec.records_key: len(page_records),
+        spec.total_records_key: len(records),
+        spec.list_key: page_records,
+    }
+
+
+class RecordSetCache:
+    """
+    Páginas de listagens servidas a partir do conjunto de registros em cache.
+
+    A chave é a dos parâmetros canônicos sem paginação; a busca completa usa
+    `get_or_refresh` (stale-while-revalidate e uma única busca por chave).
+    """
+
+    def __init__(self, cache, paginator):
+        self.cache = cache
+        self.paginator = paginator
+        self.pages_served = 0
+        self.record_sets_loaded = 0
+
+    def supports(self, tool_name: str) -> bool:
+        spec = get_call(tool_name)
+        return spec is not None and spec.cacheable and spec.paginated and spec.list_key is not None
+
+    def record_set_params(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Parâmetros do conjunto de registros: os da consulta sem a paginação"""
+        spec = get_call(tool_name)
+        return {k: v for k, v in params.items() if k not in (spec.page_key, spec.page_size_key)}
+
+    def fetch_calls(self, tool_name: str, page: Dict[str, Any]) -> int:
+        """Chamadas ao Omie para buscar o conjunto inteiro, pelo total informado na página"""
+        total_key = get_call(tool_name).total_records_key
+        return max(1, math.ceil(page.get(total_key, 0) / FETCH_PAGE_SIZE))
+
+    async def load(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Busca todas as páginas da listagem (sem os parâmetros de paginação)"""
+        spec = get_call(tool_name)
+        fetch_params = self.record_set_params(tool_name, params)
+        fetch_params[spec.page_size_key] = FETCH_PAGE_SIZE
+        result = await self.paginator.collect(spec.endpoint, spec.call, fetch_params, list_key=spec.list_key)
+        self.record_sets_loaded += 1
+        return result
+
+    async def get_page(self, tool_name: str, params: Dict[str, Any], ttl: Optional[int] = None,
+                       company: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+        """Retorna (página, origem) com origem HIT, STALE ou MISS do conjunto de registros"""
+        spec = get_call(tool_name)
+        if not self.supports(tool_name):
+            raise ValueError(f"{tool_name} não é uma listagem paginada cacheável")
+
+        async def loader():
+            return await self.load(tool_name, params)
+
+        # Sem remontar a listagem: só os registros da página são lidos das colunas
+        record_set, origin = await self.cache.get_or_refresh(
+            tool_name, canonical_params(tool_name, params, record_set=True), loader,
+            ttl, tags=read_tags(tool_name), company=company, expand=False
+        )
+        self.pages_served += 1
+        return slice_page(
+            spec, record_set.get(spec.list_key) or [],
+            params.get(spec.page_key, 1), params.get(spec.page_size_key, DEFAULT_PAGE_SIZE)
+        ), origin
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pages_served": self.pages_served,
+            "record_sets_loaded": self.record_sets_loaded,
+        }
@@ -0,0 +1,260 @@
+"""
+Cache particionado em shards
+N instâncias de IntelligentCache, cada uma com seu lock, sua parte do limite
+de memória e seu arquivo de persistência. A chave gerada (hash SHA-256) escolhe
+o shard, então chamadas simultâneas de tarefas asyncio ou threads só disputam
+o lock quando caem no mesmo shard
+"""
+
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.cache.intelligent_cache import IntelligentCache, INDEX_COMPANY
+
+# Shards padrão: suficiente para as threads do servidor HTTP sem fragmentar o limite
+DEFAULT_SHARDS = 8
+
+
+def shard_path(persistence_file: Optional[str], index: int) -> Optional[str]:
+    """Arquivo de persistência do shard: cache.db -> cache.shard3.db"""
+    if not persistence_file:
+        return None
+    stem, dot, suffix = persistence_file.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{persistence_file}.shard{index}"
+    return f"{stem}.shard{index}.{suffix}"
+
+
+class ShardedIntelligentCache:
+    """
+    Mesma interface do IntelligentCache, com as entradas divididas em shards.
+
+    Leituras e gravações vão só para o shard da chave. Invalidações são
+    aplicadas em todos os shards localmente e propagadas ao L2 uma única vez;
+    invalidações recebidas do L2 são repassadas a todos os shards.
+    """
+
+    def __init__(self, shards: int = DEFAULT_SHARDS, max_size_mb: float = 100,
+                 persistence_file: str = None, shared_tier=None, **options):
+        if shards < 1:
+            raise ValueError("O cache precisa de ao menos 1 shard")
+        self.shared_tier = shared_tier
+        self.shards: List[IntelligentCache] = [
+            IntelligentCache(
+                max_size_mb=max_size_mb / shards,
+                persistence_file=shard_path(persistence_file, index),
+                shared_tier=shared_tier,
+                **options
+            )
+            for index in range(shards)
+        ]
+        self.default_company = self.shards[0].default_company
+        self.policies = self.shards[0].policies
+
+    # ------------------------------------------------------------------
+    # Roteamento
+    # ------------------------------------------------------------------
+
+    def _company(self, company: Optional[str]) -> str:
+        return self.default_company if company is None else company
+
+    def _route(self, tool_name: str, params: Dict[str, Any],
+               company: Optional[str]) -> Tuple[IntelligentCache, str]:
+        """(shard, chave): a chave canônica é gerada uma vez e repassada ao shard"""
+        key = self.shards[0]._generate_key(tool_name, params, self._company(company))
+        return self.shards[int(key[:8], 16) % len(self.shards)], key
+
+    def shard_for(self, tool_name: str, params: Dict[str, Any],
+                  company: Optional[str] = None) -> IntelligentCache:
+        """Shard responsável pela consulta"""
+        return self._route(tool_name, params, company)[0]
+
+    @property
+    def current_size(self) -> int:
+        return sum(shard.current_size for shard in self.shards)
+
+    @property
+    def max_size_bytes(self) -> int:
+        return sum(shard.max_size_bytes for shard in self.shards)
+
+    # ------------------------------------------------------------------
+    # Leitura e gravação (um shard por chave)
+    # ------------------------------------------------------------------
+
+    async def get(self, tool_name: str, params: Dict[str, Any],
+                  company: Optional[str] = None) -> Optional[Any]:
+        shard, key = self._route(tool_name, params, company)
+        return await shard.get(tool_name, params, company, key)
+
+    async def set(self, tool_name: str, params: Dict[str, Any],
+                  data: Any, ttl: int = None, tags: Iterable[str] = (),
+                  company: Optional[str] = None) -> bool:
+        shard, key = self._route(tool_name, params, company)
+        return await shard.set(tool_name, params, data, ttl, tags, company, key)
+
+    async def get_or_refresh(self, tool_name: str, params: Dict[str, Any],
+                             loader: Callable[[], Awaitable[Any]],
+                             ttl: int = None, tags: Iterable[str] = (),
+                             company: Optional[str] = None,
+                             expand: bool = True) -> Tuple[Any, str]:
+        shard, key = self._route(tool_name, params, company)
+        return await shard.get_or_refresh(tool_name, params, loader, ttl, tags, company, expand, key)
+
+    def set_negative(self, tool_name: str, params: Dict[str, Any], error: Exception,
+                     tags: Iterable[str] = (), company: Optional[str] = None) -> Optional[str]:
+        shard, key = self._route(tool_name, params, company)
+        return shard.set_negative(tool_name, params, error, tags, company, key)
+
+    def record_latency(self, tool_name: str, seconds: float):
+        """A latência é da ferramenta: todos os shards usam o mesmo peso"""
+        for shard in self.shards:
+            shard.record_latency(tool_name, seconds)
+
+    # ------------------------------------------------------------------
+    # Invalidação (todos os shards, uma única propagação ao L2)
+    # ------------------------------------------------------------------
+
+    def _invalidate_all(self, message: Dict[str, Any]) -> int:
+        return sum(shard._on_shared_invalidation(message) for shard in self.shards)
+
+    def _propagate(self, company: Optional[str], **invalidation):
+        self.shards[0]._propagate(company, **invalidation)
+
+    def invalidate_pattern(self, pattern: str, company: Optional[str] = None) -> int:
+        removed = self._invalidate_all({"company": company, "pattern": pattern})
+        self._propagate(company, pattern=pattern)
+        return removed
+
+    def invalidate_tool(self, tool_name: str, company: Optional[str] = None) -> int:
+        removed = self._invalidate_all({"company": company, "tools": [tool_name]})
+        self._propagate(company, tools=[tool_name])
+        return removed
+
+    def invalidate_tags(self, tags: Iterable[str], company: Optional[str] = None) -> int:
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return 0
+        removed = self._invalidate_all({"company": company, "tags": tags})
+        self._propagate(company, tags=tags)
+        return removed
+
+    def invalidate_entity(self, company: Optional[str], entity: str) -> int:
+        from src.cache.dependencies import entity_tags
+        return self.invalidate_tags(entity_tags(entity), company)
+
+    def invalidate(self, tool_name: str, params: Dict[str, Any], company: Optional[str] = None):
+        self.shard_for(tool_name, params, company).invalidate(tool_name, params, company)
+
+    def clear(self):
+        companies = {self.default_company}
+        for shard in self.shards:
+            with shard._lock:
+                companies |= set(shard._indexes[INDEX_COMPANY])
+                shard._clear_local()
+        for company in companies:
+            self._propagate(company, clear=True)
+
+    # ------------------------------------------------------------------
+    # Camada L2, aquecedor e persistência
+    # ------------------------------------------------------------------
+
+    async def start_shared_tier(self):
+        if self.shared_tier:
+            await self.shared_tier.start(self._invalidate_all)
+
+    def warm_hot_entries(self, top_n: int = 20, horizon: float = 0) -> int:
+        per_shard = math.ceil(top_n / len(self.shards))
+        return sum(shard.warm_hot_entries(per_shard, horizon) for shard in self.shards)
+
+    def start_warmer(self, interval: float = 60, top_n: int = 20):
+        per_shard = math.ceil(top_n / len(self.shards))
+        for shard in self.shards:
+            shard.start_warmer(interval, per_shard)
+
+    def stop_warmer(self):
+        for shard in self.shards:
+            shard.stop_warmer()
+
+    async def flush(self):
+        await asyncio.gather(*(shard.flush() for shard in self.shards))
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    # ------------------------------------------------------------------
+    # Estatísticas (somadas; mesmo formato do IntelligentCache)
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        per_shard = [shard.get_stats() for shard in self.shards]
+        hits = sum(stats["hits"] for stats in per_shard)
+        misses = sum(stats["misses"] for stats in per_shard)
+        total_requests = hits + misses
+        current_size, max_size = self.current_size, self.max_size_bytes
+
+        def total(section: str, field: str):
+            return sum(stats[section][field] for stats in per_shard)
+
+        tool_stats: Dict[str, Dict[str, Any]] = {}
+        for stats in per_shard:
+            for tool_name, tool in stats["tool_statistics"].items():
+                merged = tool_stats.setdefault(tool_name, {
+                    "entries": 0, "total_size": 0, "avg_ttl": 0, "total_accesses": 0
+                })
+                merged["entries"] += tool["entries"]
+                merged["total_size"] += tool["total_size"]
+                merged["avg_ttl"] += tool["avg_ttl"] * tool["entries"]
+                merged["total_accesses"] += tool["total_accesses"]
+        for merged in tool_stats.values():
+            merged["avg_size"] = merged["total_size"] / merged["entries"]
+            merged["avg_ttl"] = merged["avg_ttl"] / merged["entries"]
+            merged["avg_accesses"] = merged["total_accesses"] / merged["entries"]
+
+        negative_stored: Dict[str, int] = {}
+        for stats in per_shard:
+            for kind, count in stats["negative"]["stored"].items():
+                negative_stored[kind] = negative_stored.get(kind, 0) + count
+
+        first = per_shard[0]
+        return {
+            "cache_size": sum(stats["cache_size"] for stats in per_shard),
+            "memory_used_mb": round(current_size / 1024 / 1024, 2),
+            "memory_limit_mb": round(max_size / 1024 / 1024, 2),
+            "memory_usage_percent": round(current_size / max_size * 100, 1),
+            "hit_rate_percent": round(hits / total_requests * 100 if total_requests else 0, 1),
+            "hits": hits,
+            "misses": misses,
+            "evictions": sum(stats["evictions"] for stats in per_shard),
+            "indexes": {
+                field: total("indexes", field)
+                for field in ("tools", "companies", "tags", "invalidated_entries")
+            },
+            "admission": {
+                "policy": first["admission"]["policy"],
+                "policy_rejections": total("admission", "policy_rejections")
+            },
+            "negative": {
+                "hits": total("negative", "hits"),
+                "stored": negative_stored,
+                "ttls": first["negative"]["ttls"]
+            },
+            "revalidation": {
+                **{field: total("revalidation", field)
+                   for field in ("stale_hits", "refreshes", "refresh_failures",
+                                 "warmer_refreshes", "refreshing_now")},
+                "stale_grace_seconds": first["revalidation"]["stale_grace_seconds"],
+                "warmer_active": any(stats["revalidation"]["warmer_active"] for stats in per_shard)
+            },
+            "shared_tier": first["shared_tier"],
+            "shards": [
+                {"cache_size": stats["cache_size"], "memory_used_mb": stats["memory_used_mb"]}
+                for stats in per_shard
+            ],
+            "tool_statistics": tool_stats
+        }
+
+    def get_hot_entries(self, limit: int = 10) -> List[Dict[str, Any]]:
+        entries = [entry for shard in self.shards for entry in shard.get_hot_entries(limit)]
+        return sorted(entries, key=lambda e: e["access_count"], reverse=True)[:limit]
@@ -0,0 +1,351 @@
+"""
+Camada L2 compartilhada do IntelligentCache
+Vários processos MCP compartilham as respostas via Redis; invalidações são
+propagadas por pub/sub para que cada processo descarte sua cópia em L1
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.cache.persistence import encode_value, decode_value
+
+try:
+    import aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+InvalidationHandler = Callable[[Dict[str, Any]], None]
+
+
+def company_namespace(app_key: str) -> str:
+    """Identificador da empresa nas chaves (hash: a app_key não vai para o Redis)"""
+    return hashlib.sha256(app_key.encode("utf-8")).hexdigest()[:12]
+
+
+class LocalSharedBackend:
+    """
+    Backend em memória com a mesma interface do Redis usada pela camada L2.
+
+    Caches que compartilham a mesma instância se comportam como processos
+    ligados ao mesmo Redis (testes e execução sem Redis).
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._sets: Dict[str, set] = {}
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._data[key] = (value, time.time() + ttl)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(
+            (self._data.pop(key, None) or self._sets.pop(key, None)) is not None for key in keys
+        )
+
+    async def add_to_sets(self, set_keys: List[str], member: str, ttl: float):
+        for set_key in set_keys:
+            self._sets.setdefault(set_key, set()).add(member)
+
+    async def pop_sets(self, set_keys: List[str]) -> List[str]:
+        members = set()
+        for set_key in set_keys:
+            members |= self._sets.pop(set_key, set())
+        return list(members)
+
+    async def set_members(self, set_key: str) -> List[str]:
+        return list(self._sets.get(set_key, ()))
+
+    async def delete_matching(self, prefix: str, fragment: str = "") -> int:
+        """Remove chaves com o prefixo cujo segmento seguinte (ferramenta) contém o fragmento"""
+        keys = [key for key in list(self._data) + list(self._sets)
+                if key.startswith(prefix) and fragment in key[len(prefix):].rsplit(":", 1)[0]]
+        return await self.delete(*keys)
+
+    async def publish(self, channel: str, message: str):
+        for handler in list(self._subscribers.get(channel, [])):
+            handler(message)
+
+    async def subscribe(self, channel: str, handler: Callable[[str], None]):
+        self._subscribers.setdefault(channel, []).append(handler)
+
+    async def close(self):
+        self._subscribers.clear()
+
+
+class RedisSharedBackend:
+    """Backend Redis (aioredis, o mesmo cliente do DatabaseManager)"""
+
+    def __init__(self, url: str = "redis://localhost:6379"):
+        if not REDIS_AVAILABLE:
+            raise ImportError("aioredis não instalado - camada L2 em Redis indisponível")
+        # Valores binários (orjson): sem decode_responses
+        self.redis = aioredis.from_url(url, decode_responses=False)
+        self._listeners: List[asyncio.Task] = []
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str) -> int:
+        return await self.redis.delete(*keys) if keys else 0
+
+    async def add_to_sets(self, set_keys: List[str], member: str, ttl: float):
+        pipe = self.redis.pipeline()
+        for set_key in set_keys:
+            pipe.sadd(set_key, member)
+            # O conjunto vive ao menos tanto quanto a entrada mais longa
+            pipe.expire(set_key, max(1, int(ttl)) + 60)
+        await pipe.execute()
+
+    async def pop_sets(self, set_keys: List[str]) -> List[str]:
+        pipe = self.redis.pipeline()
+        for set_key in set_keys:
+            pipe.smembers(set_key)
+        pipe.delete(*set_keys)
+        results = await pipe.execute()
+        members = set()
+        for found in results[:-1]:
+            members |= {m.decode("utf-8") if isinstance(m, bytes) else m for m in found}
+        return list(members)
+
+    async def set_members(self, set_key: str) -> List[str]:
+        return [m.decode("utf-8") if isinstance(m, bytes) else m for m in await self.redis.smembers(set_key)]
+
+    async def delete_matching(self, prefix: str, fragment: str = "") -> int:
+        # A chave L1 (hash) não tem ":": o fragmento só casa com o nome da ferramenta
+        pattern = f"{prefix}*{fragment}*:*" if fragment else f"{prefix}*"
+        keys = [key async for key in self.redis.scan_iter(match=pattern, count=500)]
+        return await self.delete(*keys)
+
+    async def publish(self, channel: str, message: str):
+        await self.redis.publish(channel, message)
+
+    async def subscribe(self, channel: str, handler: Callable[[str], None]):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+
+        async def _listen():
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    data = message["data"]
+                    handler(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+        self._listeners.append(asyncio.ensure_future(_listen()))
+
+    async def close(self):
+        for task in self._listeners:
+            task.cancel()
+        await self.redis.close()
+
+
+class SharedCacheTier:
+    """
+    Camada L2: chaves `<prefixo>:<empresa>:<ferramenta>:<chave L1>`.
+
+    Os valores são um cabeçalho JSON (criação, TTL, tamanho, codificação)
+    seguido do blob orjson/json, para que o L1 de outro processo mantenha o
+    mesmo vencimento. Mensagens de invalidação levam o id do nó emissor e
+    são ignoradas por ele mesmo.
+
+    As empresas com entradas gravadas ficam no conjunto
+    `<prefixo>:companies`: invalidações sem empresa percorrem todas elas.
+    """
+
+    # Validade do registro de uma empresa no conjunto (renovado pela metade)
+    COMPANY_TTL = 86400
+
+    def __init__(self, backend, company: str = "default", prefix: str = "omie:cache"):
+        self.backend = backend
+        self.company = company
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidate"
+        self.node_id = uuid.uuid4().hex[:12]
+        self._handler: Optional[InvalidationHandler] = None
+        self._companies_key = f"{prefix}:companies"
+        self._registered: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+
+    def _key(self, tool_name: str, key: str, company: Optional[str] = None) -> str:
+        return f"{self._namespace(company)}{tool_name}:{key}"
+
+    def _tag_key(self, tag: str, company: Optional[str] = None) -> str:
+        # Fora do namespace das entradas: clear/padrão não alcançam os conjuntos por engano
+        return f"{self.prefix}:tags:{company or self.company}:{tag}"
+
+    def _namespace(self, company: Optional[str] = None) -> str:
+        return f"{self.prefix}:{company or self.company}:"
+
+    async def _register_company(self, company: str):
+        now = time.time()
+        if self._registered.get(company, 0) > now - self.COMPANY_TTL / 2:
+            return
+        await self.backend.add_to_sets([self._companies_key], company, self.COMPANY_TTL)
+        self._registered[company] = now
+
+    async def _companies(self) -> List[str]:
+        """Empresas com entradas no L2 (incluindo a do nó)"""
+        return sorted(set(await self.backend.set_members(self._companies_key)) | {self.company})
+
+    async def start(self, handler: InvalidationHandler):
+        """Assina o canal de invalidação"""
+        self._handler = handler
+        await self.backend.subscribe(self.channel, self._on_message)
+
+    def _on_message(self, message: str):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        # A restrição por empresa é aplicada pelo L1 (índice de empresas)
+        if payload.get("node") == self.node_id:
+            return
+        self.invalidations_received += 1
+        if self._handler:
+            self._handler(payload)
+
+    async def get(self, tool_name: str, key: str,
+                  company: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Entrada compartilhada: {data, created_at, ttl, size_bytes, tags} ou None"""
+        try:
+            blob = await self.backend.get(self._key(tool_name, key, company))
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Erro ao ler cache compartilhado: {e}")
+            return None
+
+        if blob is None:
+            self.misses += 1
+            return None
+
+        header, _, payload = blob.partition(b"\n")
+        envelope = json.loads(header)
+        envelope["data"] = decode_value(envelope.pop("encoding"), payload, envelope.pop("raw_size"))
+        self.hits += 1
+        return envelope
+
+    async def set(self, entry) -> bool:
+        remaining = entry.expires_at - time.time()
+        if remaining <= 0:
+            return False
+        try:
+            encoding, blob = encode_value(entry.data)
+        except (TypeError, ValueError):
+            return False
+
+        # Cabeçalho JSON em uma linha seguido do valor serializado
+        header = json.dumps({
+            "encoding": encoding,
+            "raw_size": getattr(entry.data, "raw_size", None),
+            "created_at": entry.created_at,
+            "ttl": entry.ttl,
+            "size_bytes": entry.size_bytes,
+            "tags": list(entry.tags),
+        }).encode("utf-8")
+        try:
+            company = getattr(entry, "company", None)
+            shared_key = self._key(entry.tool_name, entry.key, company)
+            await self.backend.set(shared_key, header + b"\n" + blob, remaining)
+            await self._register_company(company or self.company)
+            if entry.tags:
+                await self.backend.add_to_sets(
+                    [self._tag_key(tag, company) for tag in entry.tags], shared_key, remaining
+                )
+            return True
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Erro ao gravar cache compartilhado: {e}")
+            return False
+
+    async def invalidate(self, keys: Optional[List[Tuple[str, str]]] = None,
+                         pattern: Optional[str] = None, clear: bool = False,
+                         tags: Optional[List[str]] = None, tools: Optional[List[str]] = None,
+                         company: Optional[str] = None):
+        """
+        Remove do L2 e avisa os outros processos para descartarem do L1.
+        Restrita a `company` quando informada; sem empresa vale para todas
+        (como no L1), e a mensagem leva `company: null`.
+        """
+        try:
+            companies = [company] if company else await self._companies()
+            for namespace_company in companies:
+                await self._invalidate_namespace(namespace_company, keys, pattern, clear, tags, tools)
+
+            message = {"node": self.node_id, "company": company}
+            if clear:
+                message["clear"] = True
+            if pattern is not None:
+                message["pattern"] = pattern
+            if keys:
+                message["keys"] = [key for _, key in keys]
+            if tags:
+                message["tags"] = list(tags)
+            if tools:
+                message["tools"] = list(tools)
+            await self.backend.publish(self.channel, json.dumps(message))
+            self.invalidations_sent += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ Erro ao invalidar cache compartilhado: {e}")
+
+    async def _invalidate_namespace(self, company: str, keys, pattern, clear, tags, tools):
+        namespace = self._namespace(company)
+        if tags:
+            tagged = await self.backend.pop_sets([self._tag_key(tag, company) for tag in tags])
+            await self.backend.delete(*tagged)
+        if clear:
+            await self.backend.delete_matching(namespace)
+            await self.backend.delete_matching(self._tag_key("", company))
+        elif pattern is not None:
+            await self.backend.delete_matching(namespace, pattern)
+        for tool in tools or ():
+            await self.backend.delete_matching(f"{namespace}{tool}:")
+        if keys:
+            await self.backend.delete(*[self._key(tool, key, company) for tool, key in keys])
+
+    async def close(self):
+        await self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "company": self.company,
+            "node_id": self.node_id,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate_percent": round(self.hits / total * 100, 1) if total else 0,
+            "errors": self.errors,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+        }
+
+
+def create_shared_tier(url: str, company: str) -> Optional[SharedCacheTier]:
+    """`local` usa o backend em memória; `redis://...` o Redis; vazio desativa"""
+    if not url:
+        return None
+    backend = LocalSharedBackend() if url == "local" else RedisSharedBackend(url)
+    return SharedCacheTier(backend, company=company)
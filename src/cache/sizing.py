@@ -0,0 +1,124 @@
+"""
+Estratégias de estimativa de tamanho para o IntelligentCache
+Evitam serializar (pickle) cada valor só para medi-lo
+"""
+
+import pickle
+import sys
+from typing import Any, Callable, Dict, Optional
+
+# Tipos imutáveis de tamanho fixo: sys.getsizeof calculado uma vez por tipo
+_FIXED_SIZE_TYPES = (type(None), bool, float)
+_fixed_sizes: Dict[type, int] = {}
+
+# Listas maiores que isso são estimadas por amostragem na estratégia "sampled"
+SAMPLE_THRESHOLD = 64
+SAMPLE_SIZE = 16
+
+# Expansão média de JSON para objetos Python (dicts/str/int) em respostas Omie;
+# o benchmark benchmarks/bench_cache_sizing.py mede o valor real
+RAW_BYTES_EXPANSION = 3.5
+
+
+def _fixed_size(obj: Any) -> Optional[int]:
+    t = type(obj)
+    size = _fixed_sizes.get(t)
+    if size is None and t in _FIXED_SIZE_TYPES:
+        size = _fixed_sizes[t] = sys.getsizeof(obj)
+    return size
+
+
+def deep_size(obj: Any, sample_threshold: Optional[int] = None) -> int:
+    """
+    Tamanho em memória de obj e de tudo que ele referencia.
+
+    Percorre iterativamente dicts, listas, tuplas e conjuntos contando cada
+    objeto uma única vez. Com `sample_threshold`, listas longas são estimadas
+    a partir de uma amostra de elementos espaçados.
+    """
+    return _walk(obj, set(), sample_threshold)
+
+
+def _walk(obj: Any, seen: set, sample_threshold: Optional[int]) -> int:
+    total = 0
+    stack = [obj]
+
+    while stack:
+        current = stack.pop()
+
+        fixed = _fixed_size(current)
+        if fixed is not None:
+            total += fixed
+            continue
+
+        oid = id(current)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        total += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes, int)):
+            continue
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            count = len(current)
+            if sample_threshold is not None and count > sample_threshold:
+                # Amostra compartilha `seen`: chaves internadas entram uma vez só
+                step = count / SAMPLE_SIZE
+                sample = [current[int(i * step)] for i in range(SAMPLE_SIZE)]
+                sample_total = sum(_walk(item, seen, sample_threshold) for item in sample)
+                total += int(sample_total * count / SAMPLE_SIZE)
+            else:
+                stack.extend(current)
+        elif isinstance(current, (set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(current.__dict__)
+
+    return total
+
+
+def sampled_size(obj: Any) -> int:
+    """Tamanho aproximado amostrando listas longas de registros homogêneos"""
+    return deep_size(obj, sample_threshold=SAMPLE_THRESHOLD)
+
+
+def pickle_size(obj: Any) -> int:
+    """Tamanho serializado (estratégia original, mais cara)"""
+    try:
+        return len(pickle.dumps(obj))
+    except Exception:
+        return len(str(obj).encode("utf-8"))
+
+
+def raw_bytes_size(obj: Any) -> Optional[int]:
+    """Reaproveita o tamanho do corpo HTTP de respostas vindas do OmieClient"""
+    raw_size = getattr(obj, "raw_size", None)
+    if raw_size is None:
+        return None
+    return int(raw_size * RAW_BYTES_EXPANSION)
+
+
+def auto_size(obj: Any) -> int:
+    """Bytes da resposta HTTP quando disponíveis; senão estimativa amostrada"""
+    size = raw_bytes_size(obj)
+    return size if size is not None else sampled_size(obj)
+
+
+SIZING_STRATEGIES: Dict[str, Callable[[Any], int]] = {
+    "auto": auto_size,
+    "sampled": sampled_size,
+    "deep": deep_size,
+    "pickle": pickle_size,
+}
+
+
+def get_sizer(name: str) -> Callable[[Any], int]:
+    """Retorna a função de estimativa pelo nome"""
+    try:
+        return SIZING_STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Estratégia de tamanho desconhecida: {name}. Use: {', '.join(SIZING_STRATEGIES)}")
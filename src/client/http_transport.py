@@ -0,0 +1,270 @@
+"""
+Transporte HTTP compartilhado para a API Omie
+Pool de conexões keep-alive com HTTP/2 opcional e limite por host
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Mesmo logger de src/utils/logger.py, sem importar a configuração (que exige credenciais)
+logger = logging.getLogger("omie-mcp")
+
+
+@dataclass
+class TransportSettings:
+    """Parâmetros do pool de conexões"""
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    max_connections_per_host: int = 10
+    http2: bool = False
+    timeout: float = 30.0
+
+    @classmethod
+    def from_config(cls, cfg) -> "TransportSettings":
+        """Monta parâmetros a partir da configuração unificada"""
+        return cls(
+            max_connections=cfg.omie_pool_max_connections,
+            max_keepalive_connections=cfg.omie_pool_max_keepalive,
+            keepalive_expiry=cfg.omie_pool_keepalive_expiry,
+            max_connections_per_host=cfg.omie_pool_max_per_host,
+            http2=cfg.omie_http2,
+            timeout=cfg.omie_timeout
+        )
+
+
+def _settings_from_config() -> TransportSettings:
+    """Parâmetros da configuração unificada (padrões se ela exigir credenciais ausentes)"""
+    try:
+        from src.config import config
+    except ValueError as e:
+        # Clientes que recebem as credenciais no construtor (modules/omie_client.py)
+        logger.debug(f"Transporte Omie com parâmetros padrão: {e}")
+        return TransportSettings()
+    return TransportSettings.from_config(config)
+
+
+@dataclass
+class _LoopPool:
+    """Cliente httpx e limites por host de um event loop"""
+    client: httpx.AsyncClient
+    transport: httpx.AsyncHTTPTransport
+    http2: bool
+    host_slots: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class OmieTransport:
+    """
+    Cliente httpx de longa duração compartilhado por todos os clientes Omie.
+
+    Deve ser iniciado uma vez (initialize_system) e fechado no shutdown.
+    Caso seja usado antes do start, o pool é criado sob demanda. Conexões
+    ficam presas ao event loop que as abriu, então há um pool por loop;
+    pools de loops já encerrados são descartados (e fechados) no próximo
+    start. Sem `settings`, os parâmetros vêm da configuração no primeiro uso.
+    """
+
+    def __init__(self, settings: Optional[TransportSettings] = None):
+        self._settings = settings
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopPool]" = weakref.WeakKeyDictionary()
+        self._waiting: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._pool_warning_logged = False
+
+        # Métricas acumuladas
+        self.requests_total = 0
+        self.errors_total = 0
+        self.started_at: Optional[float] = None
+
+    @property
+    def settings(self) -> TransportSettings:
+        if self._settings is None:
+            self._settings = _settings_from_config()
+        return self._settings
+
+    def _current_pool(self) -> Optional[_LoopPool]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        pool = self._pools.get(loop)
+        return pool if pool is not None and not pool.client.is_closed else None
+
+    @property
+    def is_started(self) -> bool:
+        return self._current_pool() is not None
+
+    def _http2_available(self) -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    async def _close_pool(self, loop: asyncio.AbstractEventLoop, pool: _LoopPool):
+        """Fecha o cliente de um pool no loop dono (ou o melhor possível, se ele já terminou)"""
+        if pool.client.is_closed:
+            return
+        try:
+            if loop is asyncio.get_running_loop():
+                await pool.client.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(pool.client.aclose(), loop))
+            else:
+                # Loop encerrado: marca o cliente como fechado; os sockets são liberados com ele
+                await pool.client.aclose()
+        except Exception as e:
+            logger.debug(f"Pool do transporte Omie de outro event loop fechado com erro: {e}")
+
+    async def _discard_dead_pools(self):
+        for loop, pool in list(self._pools.items()):
+            if loop.is_closed():
+                del self._pools[loop]
+                await self._close_pool(loop, pool)
+
+    async def start(self) -> httpx.AsyncClient:
+        """Cria o pool de conexões do event loop corrente (idempotente)"""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is not None and not pool.client.is_closed:
+            return pool.client
+
+        await self._discard_dead_pools()
+        if pool is not None:
+            await self._close_pool(loop, pool)
+
+        settings = self.settings
+        http2 = settings.http2
+        if http2 and not self._http2_available():
+            logger.warning("HTTP/2 solicitado mas pacote 'h2' não instalado - usando HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry
+        )
+
+        # Transporte criado aqui para que o pool possa ser inspecionado nas métricas
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=settings.timeout,
+            follow_redirects=True
+        )
+        self._pools[loop] = _LoopPool(client=client, transport=transport, http2=http2)
+        self.started_at = self.started_at or time.time()
+
+        logger.info(
+            f"Transporte Omie iniciado (max={settings.max_connections}, "
+            f"keepalive={settings.max_keepalive_connections}, "
+            f"por_host={settings.max_connections_per_host}, http2={http2})"
+        )
+        return client
+
+    async def close(self):
+        """Fecha os pools e todas as conexões keep-alive"""
+        pools = list(self._pools.items())
+        self._pools.clear()
+        for loop, pool in pools:
+            await self._close_pool(loop, pool)
+        if pools:
+            logger.info("Transporte Omie encerrado")
+
+    def _host_slot(self, pool: _LoopPool, host: str) -> asyncio.Semaphore:
+        slot = pool.host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.settings.max_connections_per_host)
+            pool.host_slots[host] = slot
+        return slot
+
+    async def post(self, url: str, json: Any = None, headers: Optional[Dict[str, str]] = None,
+                   timeout: Optional[float] = None) -> httpx.Response:
+        """POST através do pool compartilhado respeitando o limite por host"""
+        client = await self.start()
+        host = urlsplit(url).netloc
+        slot = self._host_slot(self._pools[asyncio.get_running_loop()], host)
+
+        self._waiting[host] = self._waiting.get(host, 0) + 1
+        try:
+            await slot.acquire()
+        finally:
+            self._waiting[host] -= 1
+
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        self.requests_total += 1
+        try:
+            kwargs = {"json": json, "headers": headers}
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            return await client.post(url, **kwargs)
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self._in_flight[host] -= 1
+            slot.release()
+
+    def _pool_connections(self, pool: _LoopPool) -> Optional[list]:
+        """
+        Conexões do pool httpcore do transporte (None se a versão do httpx não
+        expuser o pool: as métricas ficam indisponíveis em vez de zeradas)
+        """
+        connection_pool = getattr(pool.transport, "_pool", None)
+        connections = getattr(connection_pool, "connections", None)
+        if connections is None:
+            if not self._pool_warning_logged:
+                logger.warning("Pool httpcore não inspecionável nesta versão do httpx - "
+                               "conexões abertas/ociosas indisponíveis")
+                self._pool_warning_logged = True
+            return None
+        return list(connections)
+
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Métricas do pool do loop corrente: conexões abertas, ociosas e requisições aguardando"""
+        pool = self._current_pool()
+        open_connections: Optional[int] = None
+        idle_connections: Optional[int] = None
+
+        connections = self._pool_connections(pool) if pool is not None else []
+        if connections is not None:
+            open_connections = idle_connections = 0
+            for connection in connections:
+                if connection.is_closed():
+                    continue
+                open_connections += 1
+                if connection.is_idle():
+                    idle_connections += 1
+
+        return {
+            "started": pool is not None,
+            "pools": len(self._pools),
+            "http2": pool.http2 if pool is not None else None,
+            "http2_requested": self.settings.http2,
+            "open_connections": open_connections,
+            "idle_connections": idle_connections,
+            "active_requests": sum(self._in_flight.values()),
+            "waiting_requests": sum(self._waiting.values()),
+            "per_host": {
+                host: {
+                    "active": self._in_flight.get(host, 0),
+                    "waiting": self._waiting.get(host, 0),
+                    "limit": self.settings.max_connections_per_host
+                }
+                for host in (pool.host_slots if pool is not None else ())
+            },
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0
+        }
+
+
+# Instância global do transporte (parâmetros lidos da configuração no primeiro uso)
+omie_transport = OmieTransport()
@@ -0,0 +1,341 @@
+"""
+Escrita em lote para a API Omie
+Valida registros, envia em lotes (chamadas *PorLote) e cai para chamadas
+unitárias com concorrência limitada quando o lote não existe ou falha.
+Retentativas pelo orquestrador compartilhado (src/utils/retry.py)
+"""
+
+import asyncio
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Iterable, Callable, Awaitable, Tuple
+
+from src.utils.logger import logger
+from src.utils.validators import OmieValidators
+from src.utils.retry import RetryOrchestrator, classify_failure, omie_retry
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Verifica se o erro é transitório (mesma classificação das demais chamadas Omie)"""
+    return classify_failure(error) is not None
+
+
+# Fault do Omie para inclusão com um código de integração já usado
+_DUPLICATE_FAULT = re.compile(r"j[áa] cadastrad[oa].*c[óo]digo de integra[çc][ãa]o", re.IGNORECASE)
+
+
+def is_duplicate_fault(error: Exception, key: str) -> bool:
+    """Fault de código de integração já cadastrado (para este registro, se o código vier na mensagem)"""
+    message = str(error)
+    if "soap-env:client" not in message.lower() or not _DUPLICATE_FAULT.search(message):
+        return False
+    codes = re.findall(r"\[([^\]]+)\]", message)
+    return not codes or key in codes
+
+
+def response_summary(response: Any) -> Dict[str, Any]:
+    """Campos simples da resposta (status e códigos gerados), sem listas nem objetos"""
+    if not isinstance(response, dict):
+        return {}
+    return {k: v for k, v in response.items() if not isinstance(v, (dict, list))}
+
+
+def lot_record_statuses(response: Any, id_key: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Status por registro na resposta de uma chamada *PorLote:
+    {código de integração: (codigo_status, descricao_status)}.
+
+    O Omie devolve a lista de status com nomes diferentes por endpoint, então
+    qualquer lista de objetos com o código de integração e codigo_status vale.
+    """
+    statuses: Dict[str, Tuple[str, str]] = {}
+    if not isinstance(response, dict):
+        return statuses
+    for value in response.values():
+        if not isinstance(value, list):
+            continue
+        for item in value:
+            if isinstance(item, dict) and item.get(id_key) and "codigo_status" in item:
+                statuses[str(item[id_key])] = (str(item["codigo_status"]), str(item.get("descricao_status", "")))
+    return statuses
+
+
+def _validar_cliente(record: Dict[str, Any]) -> List[str]:
+    errors = []
+    if not record.get("razao_social"):
+        errors.append("razao_social é obrigatório")
+
+    documento = record.get("cnpj_cpf", "")
+    if not (OmieValidators.validar_cnpj(documento) or OmieValidators.validar_cpf(documento)):
+        errors.append(f"cnpj_cpf inválido: {documento}")
+
+    if record.get("email") and not OmieValidators.validar_email(record["email"]):
+        errors.append(f"email inválido: {record['email']}")
+    if record.get("cep") and not OmieValidators.validar_cep(record["cep"]):
+        errors.append(f"cep inválido: {record['cep']}")
+    return errors
+
+
+def _validar_conta(record: Dict[str, Any]) -> List[str]:
+    errors = []
+    if not record.get("codigo_cliente_fornecedor"):
+        errors.append("codigo_cliente_fornecedor é obrigatório")
+    if not OmieValidators.validar_data(record.get("data_vencimento", "")):
+        errors.append(f"data_vencimento inválida: {record.get('data_vencimento')}")
+    if not OmieValidators.validar_valor(record.get("valor_documento")):
+        errors.append(f"valor_documento inválido: {record.get('valor_documento')}")
+    return errors
+
+
+@dataclass(frozen=True)
+class BatchSpec:
+    """Descrição de um tipo de registro gravável em lote"""
+    endpoint: str
+    single_call: str
+    id_key: str
+    validator: Callable[[Dict[str, Any]], List[str]]
+    lot_call: Optional[str] = None
+    lot_list_key: Optional[str] = None
+    lot_size: int = 50
+
+
+BATCH_SPECS: Dict[str, BatchSpec] = {
+    "cliente": BatchSpec(
+        endpoint="geral/clientes",
+        single_call="IncluirCliente",
+        id_key="codigo_cliente_integracao",
+        validator=_validar_cliente,
+        lot_call="UpsertClientesPorLote",
+        lot_list_key="clientes_cadastro"
+    ),
+    "fornecedor": BatchSpec(
+        endpoint="geral/fornecedores",
+        single_call="IncluirFornecedor",
+        id_key="codigo_cliente_integracao",
+        validator=_validar_cliente
+    ),
+    "conta_pagar": BatchSpec(
+        endpoint="financas/contapagar",
+        single_call="IncluirContaPagar",
+        id_key="codigo_lancamento_integracao",
+        validator=_validar_conta,
+        lot_call="IncluirContaPagarPorLote",
+        lot_list_key="conta_pagar_cadastro"
+    ),
+    "conta_receber": BatchSpec(
+        endpoint="financas/contareceber",
+        single_call="IncluirContaReceber",
+        id_key="codigo_lancamento_integracao",
+        validator=_validar_conta,
+        lot_call="IncluirContaReceberPorLote",
+        lot_list_key="conta_receber_cadastro"
+    ),
+}
+
+
+@dataclass
+class BatchResult:
+    """Resultado por registro de uma escrita em lote"""
+    tipo: str
+    results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    lots_sent: int = 0
+    single_calls: int = 0
+    retries: int = 0
+    elapsed_seconds: float = 0.0
+
+    def _count(self, status: str) -> int:
+        return sum(1 for r in self.results.values() if r["status"] == status)
+
+    @property
+    def succeeded(self) -> int:
+        return self._count("success")
+
+    @property
+    def failed(self) -> int:
+        return self._count("error")
+
+    @property
+    def invalid(self) -> int:
+        return self._count("invalid")
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = len(self.results)
+        return {
+            "tipo": self.tipo,
+            "total": total,
+            "sucesso": self.succeeded,
+            "falhas": self.failed,
+            "invalidos": self.invalid,
+            "lotes_enviados": self.lots_sent,
+            "chamadas_unitarias": self.single_calls,
+            "retentativas": self.retries,
+            "tempo_segundos": round(self.elapsed_seconds, 2),
+            "registros_por_segundo": round(total / self.elapsed_seconds, 1) if self.elapsed_seconds else 0,
+            "resultados": self.results
+        }
+
+
+class OmieBatchWriter:
+    """
+    Grava muitos registros no Omie.
+
+    Registros sem código de integração recebem um código gerado, de modo que
+    novas tentativas não dupliquem lançamentos: por isso as escritas daqui
+    são repetidas como idempotentes pelo orquestrador compartilhado (mesma
+    classificação de falhas, backoff e orçamento das demais chamadas).
+    Quando um lote falha, seus registros são reenviados um a um para isolar
+    os que têm problema. Se uma tentativa anterior pode ter gravado o
+    registro (timeout seguido de nova tentativa), o fault de código de
+    integração já cadastrado confirma a gravação em vez de ser um erro.
+    """
+
+    def __init__(self, client, concurrency: int = 4, retry: Optional[RetryOrchestrator] = None,
+                 max_attempts: Optional[int] = None):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.retry = retry or omie_retry
+        self.max_attempts = max_attempts
+
+    async def _call_with_retry(self, endpoint: str, call: str, param: Dict[str, Any],
+                               result: BatchResult) -> Tuple[Dict[str, Any], int]:
+        """Executa a chamada repetindo falhas transitórias (registros com código de integração)"""
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                result.retries += 1
+            return await self.client._make_request(endpoint, call, param)
+
+        try:
+            response = await self.retry.call(attempt, idempotent=True, name=f"{endpoint} {call}",
+                                             max_attempts=self.max_attempts)
+        except Exception as e:
+            e.attempts = attempts
+            raise
+        return response, attempts
+
+    async def _send_single(self, spec: BatchSpec, key: str, record: Dict[str, Any],
+                           result: BatchResult, resent: bool = False):
+        """Envio unitário; `resent`: o registro já foi enviado antes (num lote repetido)"""
+        result.single_calls += 1
+        try:
+            response, attempts = await self._call_with_retry(
+                spec.endpoint, spec.single_call, record, result
+            )
+            result.results[key] = {"status": "success", "mode": "single",
+                                   "attempts": attempts, **response_summary(response)}
+        except Exception as e:
+            attempts = getattr(e, "attempts", 1)
+            if (resent or attempts > 1) and is_duplicate_fault(e, key):
+                # Uma tentativa anterior gravou o registro e a resposta se perdeu
+                result.results[key] = {"status": "success", "mode": "single", "attempts": attempts,
+                                       "ja_cadastrado": True, "descricao_status": str(e)}
+                return
+            result.results[key] = {"status": "error", "mode": "single",
+                                   "attempts": attempts, "error": str(e)}
+
+    async def _send_lot(self, spec: BatchSpec, lot_number: int,
+                        lot: List[Tuple[str, Dict[str, Any]]], result: BatchResult):
+        param = {"lote": lot_number, spec.lot_list_key: [record for _, record in lot]}
+        result.lots_sent += 1
+        try:
+            response, attempts = await self._call_with_retry(
+                spec.endpoint, spec.lot_call, param, result
+            )
+        except Exception as e:
+            logger.warning(f"Lote {lot_number} de {spec.lot_call} falhou ({e}) - enviando registros um a um")
+            resent = getattr(e, "attempts", 1) > 1
+            for key, record in lot:
+                await self._send_single(spec, key, record, result, resent)
+            return
+
+        statuses = lot_record_statuses(response, spec.id_key)
+        envelope = response if isinstance(response, dict) else {}
+        # Registro sem status próprio segue o status do lote
+        lot_status = (str(envelope.get("codigo_status", "0")), str(envelope.get("descricao_status", "")))
+        rejected = []
+        for key, record in lot:
+            code, description = statuses.get(key, lot_status)
+            if code != "0":
+                rejected.append((key, record))
+                continue
+            result.results[key] = {"status": "success", "mode": "lote", "lote": lot_number,
+                                   "attempts": attempts, "codigo_status": code,
+                                   "descricao_status": description}
+
+        if rejected:
+            logger.warning(f"Lote {lot_number} de {spec.lot_call}: {len(rejected)} registro(s) recusado(s) "
+                           f"- reenviando um a um")
+        for key, record in rejected:
+            # A chamada unitária devolve o erro exato do registro (ou o grava, se foi recusa do lote)
+            await self._send_single(spec, key, record, result, resent=attempts > 1)
+
+    async def _run_bounded(self, jobs: Iterable[Callable[[], Awaitable[None]]]):
+        """Executa os jobs com no máximo `concurrency` em andamento"""
+        iterator = iter(jobs)
+
+        async def worker():
+            for job in iterator:
+                await job()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    def _prepare(self, tipo: str, spec: BatchSpec, records: Iterable[Dict[str, Any]],
+                 result: BatchResult):
+        """Valida e identifica os registros, gerando (chave, registro) dos válidos"""
+        run_id = uuid.uuid4().hex[:8]
+        for index, record in enumerate(records):
+            record = dict(record)
+            if not record.get(spec.id_key):
+                record[spec.id_key] = f"{tipo[:3].upper()}{run_id}{index:06d}"
+            key = str(record[spec.id_key])
+
+            errors = spec.validator(record)
+            if errors:
+                result.results[key] = {"status": "invalid", "attempts": 0, "error": "; ".join(errors)}
+                continue
+
+            yield key, record
+
+    async def write(self, tipo: str, records: Iterable[Dict[str, Any]],
+                    lot_size: Optional[int] = None, use_lots: bool = True) -> BatchResult:
+        """Grava os registros e retorna o resultado por registro"""
+        spec = BATCH_SPECS.get(tipo)
+        if spec is None:
+            raise ValueError(f"Tipo não suportado: {tipo}. Use: {', '.join(BATCH_SPECS)}")
+
+        result = BatchResult(tipo=tipo)
+        start = time.perf_counter()
+        prepared = self._prepare(tipo, spec, records, result)
+
+        if use_lots and spec.lot_call:
+            size = max(1, lot_size or spec.lot_size)
+
+            def lot_jobs():
+                lot, number = [], 0
+                for item in prepared:
+                    lot.append(item)
+                    if len(lot) == size:
+                        number += 1
+                        yield lambda lot=lot, number=number: self._send_lot(spec, number, lot, result)
+                        lot = []
+                if lot:
+                    yield lambda lot=lot, number=number + 1: self._send_lot(spec, number, lot, result)
+
+            await self._run_bounded(lot_jobs())
+        else:
+            await self._run_bounded(
+                (lambda key=key, record=record: self._send_single(spec, key, record, result))
+                for key, record in prepared
+            )
+
+        result.elapsed_seconds = time.perf_counter() - start
+        logger.info(
+            f"Lote {tipo}: {result.succeeded} ok, {result.failed} falhas, "
+            f"{result.invalid} inválidos em {result.elapsed_seconds:.1f}s"
+        )
+        return result
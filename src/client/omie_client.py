@@ -7,9 +7,17 @@ import httpx
 from typing import Dict, Any, Optional, List
 from src.config import config
 from src.utils.logger import logger
+from src.client.http_transport import omie_transport
+from src.client.omie_dispatcher import OmieDispatcher
+from src.client.omie_response import OmieResponse
 
-class OmieClient:
-    """Cliente HTTP para comunicação com a API Omie"""
+class OmieClient(OmieDispatcher):
+    """
+    Cliente HTTP para comunicação com a API Omie
+    
+    Os métodos de cada chamada (consultar_clientes, incluir_conta_pagar, ...)
+    vêm do registro em src/client/omie_endpoints.py.
+    """
     
     def __init__(self):
         self.base_url = config.omie_base_url
@@ -17,8 +25,8 @@ class OmieClient:
         self.headers = config.get_omie_headers()
         self.auth = config.get_omie_auth()
     
-    async def _make_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Fazer requisição para a API Omie"""
+    async def _send_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Enviar requisição HTTP para a API Omie"""
         # Garantir que o endpoint termine com /
         if not endpoint.endswith('/'):
             endpoint += '/'
@@ -33,15 +41,18 @@ class OmieClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                logger.debug(f"POST {url} - {call}")
-                response = await client.post(url, json=payload, headers=self.headers)
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.debug(f"Resposta: {result}")
-                
-                return result
+            logger.debug(f"POST {url} - {call}")
+            response = await omie_transport.post(url, json=payload, headers=self.headers,
+                                                 timeout=self.timeout)
+            response.raise_for_status()
+            
+            result = response.json()
+            logger.debug(f"Resposta: {result}")
+            
+            if isinstance(result, dict):
+                # Tamanho do corpo reaproveitado pelo cache para estimar memória
+                return OmieResponse(result, raw_size=len(response.content))
+            return result
                     
         except httpx.TimeoutException:
             logger.error(f"Timeout na requisição para {call}")
@@ -55,102 +66,6 @@ class OmieClient:
         except Exception as e:
             logger.error(f"Erro na requisição {call}: {str(e)}")
             raise Exception(f"Erro na requisição {call}: {str(e)}")
-    
-    # ============================================================================
-    # MÉTODOS DE CONSULTA
-    # ============================================================================
-    
-    async def consultar_categorias(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar categorias"""
-        return await self._make_request("geral/categorias", "ListarCategorias", param)
-    
-    async def listar_clientes(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Listar clientes"""
-        return await self._make_request("geral/clientes", "ListarClientes", param)
-    
-    async def consultar_departamentos(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar departamentos"""
-        return await self._make_request("geral/departamentos", "ListarDepartamentos", param)
-    
-    async def consultar_tipos_documento(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar tipos de documento"""
-        return await self._make_request("geral/tpdoc", "PesquisarTipoDocumento", param)
-    
-    async def consultar_contas_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a pagar"""
-        return await self._make_request("financas/contapagar", "ListarContasPagar", param)
-    
-    async def consultar_contas_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a receber"""
-        return await self._make_request("financas/contareceber", "ListarContasReceber", param)
-    
-    async def consultar_clientes(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar clientes"""
-        return await self._make_request("geral/clientes", "ListarClientes", param)
-    
-    async def consultar_fornecedores(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar fornecedores"""
-        return await self._make_request("geral/fornecedores", "ListarFornecedores", param)
-    
-    # ============================================================================
-    # MÉTODOS DE CRIAÇÃO
-    # ============================================================================
-    
-    async def incluir_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir cliente"""
-        return await self._make_request("geral/clientes", "IncluirCliente", param)
-    
-    async def incluir_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir fornecedor"""
-        return await self._make_request("geral/fornecedores", "IncluirFornecedor", param)
-    
-    async def incluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a pagar"""
-        return await self._make_request("financas/contapagar", "IncluirContaPagar", param)
-    
-    async def incluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a receber"""
-        return await self._make_request("financas/contareceber", "IncluirContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE ATUALIZAÇÃO
-    # ============================================================================
-    
-    async def alterar_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar cliente"""
-        return await self._make_request("geral/clientes", "AlterarCliente", param)
-    
-    async def alterar_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar fornecedor"""
-        return await self._make_request("geral/fornecedores", "AlterarFornecedor", param)
-    
-    async def alterar_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a pagar"""
-        return await self._make_request("financas/contapagar", "AlterarContaPagar", param)
-    
-    async def alterar_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a receber"""
-        return await self._make_request("financas/contareceber", "AlterarContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE EXCLUSÃO
-    # ============================================================================
-    
-    async def excluir_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir cliente"""
-        return await self._make_request("geral/clientes", "ExcluirCliente", param)
-    
-    async def excluir_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir fornecedor"""
-        return await self._make_request("geral/fornecedores", "ExcluirFornecedor", param)
-    
-    async def excluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a pagar"""
-        return await self._make_request("financas/contapagar", "ExcluirContaPagar", param)
-    
-    async def excluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a receber"""
-        return await self._make_request("financas/contareceber", "ExcluirContaReceber", param)
 
 # Instância global do cliente
 omie_client = OmieClient()
\ No newline at end of file
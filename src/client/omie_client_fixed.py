@@ -7,9 +7,16 @@ import httpx
 from typing import Dict, Any, Optional, List
 from src.config import config
 from src.utils.logger import logger
+from src.client.http_transport import omie_transport
+from src.client.omie_dispatcher import OmieDispatcher
 
-class OmieClientFixed:
-    """Cliente HTTP corrigido para comunicação com a API Omie"""
+class OmieClientFixed(OmieDispatcher):
+    """
+    Cliente HTTP corrigido para comunicação com a API Omie
+    
+    Apenas inclusões de clientes/fornecedores têm tratamento próprio; as demais
+    chamadas vêm do registro em src/client/omie_endpoints.py.
+    """
     
     def __init__(self):
         self.base_url = config.omie_base_url
@@ -17,7 +24,7 @@ class OmieClientFixed:
         self.headers = config.get_omie_headers()
         self.auth = config.get_omie_auth()
     
-    async def _make_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+    async def _send_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
         """Fazer requisição para a API Omie com correções para erro 500"""
         # Corrigir URL - remover barra dupla e garantir formato correto
         url = f"{self.base_url}/{endpoint.rstrip('/')}"
@@ -31,36 +38,36 @@ class OmieClientFixed:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.debug(f"🔗 POST {url}")
-                logger.debug(f"📤 Call: {call}")
-                logger.debug(f"📋 Payload: {json.dumps(payload, indent=2, ensure_ascii=False)}")
-                
-                response = await client.post(url, json=payload, headers=self.headers)
-                
-                # Log da resposta para debugging
-                logger.debug(f"📥 Status: {response.status_code}")
-                logger.debug(f"📥 Headers: {dict(response.headers)}")
-                
-                response_text = await response.aread()
-                logger.debug(f"📥 Response: {response_text.decode()}")
+            logger.debug(f"🔗 POST {url}")
+            logger.debug(f"📤 Call: {call}")
+            logger.debug(f"📋 Payload: {json.dumps(payload, indent=2, ensure_ascii=False)}")
+            
+            response = await omie_transport.post(url, json=payload, headers=self.headers,
+                                                 timeout=self.timeout)
+            
+            # Log da resposta para debugging
+            logger.debug(f"📥 Status: {response.status_code}")
+            logger.debug(f"📥 Headers: {dict(response.headers)}")
+            
+            response_text = await response.aread()
+            logger.debug(f"📥 Response: {response_text.decode()}")
+            
+            # Verificar se houve erro HTTP
+            if response.status_code != 200:
+                error_msg = f"Erro HTTP {response.status_code}: {response_text.decode()}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            
+            # Tentar decodificar JSON
+            try:
+                result = response.json()
+                logger.debug(f"✅ Resposta decodificada: {result}")
+                return result
+            except json.JSONDecodeError as e:
+                logger.error(f"❌ Erro ao decodificar JSON: {e}")
+                logger.error(f"❌ Resposta bruta: {response_text.decode()}")
+                raise Exception(f"Erro ao decodificar JSON: {e}")
                 
-                # Verificar se houve erro HTTP
-                if response.status_code != 200:
-                    error_msg = f"Erro HTTP {response.status_code}: {response_text.decode()}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                
-                # Tentar decodificar JSON
-                try:
-                    result = response.json()
-                    logger.debug(f"✅ Resposta decodificada: {result}")
-                    return result
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Erro ao decodificar JSON: {e}")
-                    logger.error(f"❌ Resposta bruta: {response_text.decode()}")
-                    raise Exception(f"Erro ao decodificar JSON: {e}")
-                    
         except httpx.TimeoutException:
             logger.error(f"⏱️ Timeout na requisição para {call}")
             raise Exception(f"Timeout na requisição para {call}")
@@ -71,38 +78,6 @@ class OmieClientFixed:
             logger.error(f"💥 Erro na requisição {call}: {str(e)}")
             raise Exception(f"Erro na requisição {call}: {str(e)}")
     
-    # ============================================================================
-    # MÉTODOS DE CONSULTA (FUNCIONAM)
-    # ============================================================================
-    
-    async def consultar_categorias(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar categorias"""
-        return await self._make_request("geral/categorias", "ListarCategorias", param)
-    
-    async def consultar_departamentos(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar departamentos"""
-        return await self._make_request("geral/departamentos", "ListarDepartamentos", param)
-    
-    async def consultar_tipos_documento(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar tipos de documento"""
-        return await self._make_request("geral/tpdoc", "PesquisarTipoDocumento", param)
-    
-    async def consultar_contas_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a pagar"""
-        return await self._make_request("financas/contapagar", "ListarContasPagar", param)
-    
-    async def consultar_contas_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a receber"""
-        return await self._make_request("financas/contareceber", "ListarContasReceber", param)
-    
-    async def consultar_clientes(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar clientes"""
-        return await self._make_request("geral/clientes", "ListarClientes", param)
-    
-    async def consultar_fornecedores(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar fornecedores"""
-        return await self._make_request("geral/fornecedores", "ListarFornecedores", param)
-    
     # ============================================================================
     # MÉTODOS DE CRIAÇÃO (CORRIGIDOS)
     # ============================================================================
@@ -123,54 +98,6 @@ class OmieClientFixed:
         
         return await self._make_request("geral/fornecedores", "IncluirFornecedor", dados_limpos)
     
-    async def incluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a pagar"""
-        return await self._make_request("financas/contapagar", "IncluirContaPagar", param)
-    
-    async def incluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a receber"""
-        return await self._make_request("financas/contareceber", "IncluirContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE ATUALIZAÇÃO
-    # ============================================================================
-    
-    async def alterar_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar cliente"""
-        return await self._make_request("geral/clientes", "AlterarCliente", param)
-    
-    async def alterar_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar fornecedor"""
-        return await self._make_request("geral/fornecedores", "AlterarFornecedor", param)
-    
-    async def alterar_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a pagar"""
-        return await self._make_request("financas/contapagar", "AlterarContaPagar", param)
-    
-    async def alterar_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a receber"""
-        return await self._make_request("financas/contareceber", "AlterarContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE EXCLUSÃO
-    # ============================================================================
-    
-    async def excluir_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir cliente"""
-        return await self._make_request("geral/clientes", "ExcluirCliente", param)
-    
-    async def excluir_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir fornecedor"""
-        return await self._make_request("geral/fornecedores", "ExcluirFornecedor", param)
-    
-    async def excluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a pagar"""
-        return await self._make_request("financas/contapagar", "ExcluirContaPagar", param)
-    
-    async def excluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a receber"""
-        return await self._make_request("financas/contareceber", "ExcluirContaReceber", param)
-    
     # ============================================================================
     # MÉTODOS DE LIMPEZA DE DADOS
     # ============================================================================
@@ -8,9 +8,15 @@ import httpx
 from typing import Dict, Any, Optional, List
 from src.client.ucm_credentials_client import ucm_client
 from src.utils.logger import logger
+from src.client.http_transport import omie_transport
+from src.client.omie_dispatcher import OmieDispatcher
 
-class OmieClientUCM:
-    """Cliente HTTP para comunicação com a API Omie via UCM"""
+class OmieClientUCM(OmieDispatcher):
+    """
+    Cliente HTTP para comunicação com a API Omie via UCM
+    
+    Os métodos de cada chamada vêm do registro em src/client/omie_endpoints.py.
+    """
     
     def __init__(self):
         self.timeout = 30
@@ -30,13 +36,17 @@ class OmieClientUCM:
             self._credentials = await ucm_client.get_credentials()
             logger.debug("🔄 Credenciais UCM carregadas")
     
-    async def _make_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+    async def _tenant_key(self) -> str:
+        await self._ensure_credentials()
+        return self._credentials["app_key"]
+    
+    async def _send_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
         """Fazer requisição para a API Omie usando credenciais UCM"""
         
         # Garantir credenciais
         await self._ensure_credentials()
         
-        url = f"{self._credentials['base_url']}/{endpoint}"
+        url = f"{self._credentials['base_url']}/{endpoint.strip('/')}/"
         
         payload = [
             {
@@ -48,18 +58,18 @@ class OmieClientUCM:
         ]
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.debug(f"POST {url} - {call}")
-                response = await client.post(url, json=payload, headers=self.headers)
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.debug(f"Resposta: {result}")
-                
-                if result and len(result) > 0:
-                    return result[0]
-                else:
-                    return {}
+            logger.debug(f"POST {url} - {call}")
+            response = await omie_transport.post(url, json=payload, headers=self.headers,
+                                                 timeout=self.timeout)
+            response.raise_for_status()
+            
+            result = response.json()
+            logger.debug(f"Resposta: {result}")
+            
+            if result and len(result) > 0:
+                return result[0]
+            else:
+                return {}
                     
         except httpx.TimeoutException:
             logger.error(f"Timeout na requisição para {call}")
@@ -81,110 +91,6 @@ class OmieClientUCM:
             logger.error(f"Erro na requisição {call}: {str(e)}")
             raise Exception(f"Erro na requisição {call}: {str(e)}")
     
-    # ============================================================================
-    # MÉTODOS DE CONSULTA
-    # ============================================================================
-    
-    async def consultar_categorias(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar categorias"""
-        return await self._make_request("geral/categorias/", "ListarCategorias", param)
-    
-    async def consultar_departamentos(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar departamentos"""
-        return await self._make_request("geral/departamentos/", "ListarDepartamentos", param)
-    
-    async def consultar_tipos_documento(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar tipos de documento"""
-        return await self._make_request("geral/tpdoc/", "PesquisarTipoDocumento", param)
-    
-    async def consultar_contas_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a pagar"""
-        return await self._make_request("financas/contapagar/", "ListarContasPagar", param)
-    
-    async def consultar_contas_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar contas a receber"""
-        return await self._make_request("financas/contareceber/", "ListarContasReceber", param)
-    
-    async def consultar_clientes(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar clientes"""
-        return await self._make_request("geral/clientes/", "ListarClientes", param)
-    
-    async def consultar_fornecedores(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar fornecedores"""
-        return await self._make_request("geral/fornecedores/", "ListarFornecedores", param)
-    
-    async def consultar_cliente_por_codigo(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar cliente por código"""
-        return await self._make_request("geral/clientes/", "ConsultarCliente", param)
-    
-    async def consultar_fornecedor_por_codigo(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Consultar fornecedor por código"""
-        return await self._make_request("geral/fornecedores/", "ConsultarFornecedor", param)
-    
-    async def buscar_dados_contato_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Buscar dados de contato do cliente"""
-        return await self._make_request("geral/clientes/", "ConsultarCliente", param)
-    
-    # ============================================================================
-    # MÉTODOS DE CRIAÇÃO
-    # ============================================================================
-    
-    async def incluir_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir cliente"""
-        return await self._make_request("geral/clientes/", "IncluirCliente", param)
-    
-    async def incluir_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir fornecedor"""
-        return await self._make_request("geral/fornecedores/", "IncluirFornecedor", param)
-    
-    async def incluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a pagar"""
-        return await self._make_request("financas/contapagar/", "IncluirContaPagar", param)
-    
-    async def incluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Incluir conta a receber"""
-        return await self._make_request("financas/contareceber/", "IncluirContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE ATUALIZAÇÃO
-    # ============================================================================
-    
-    async def alterar_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar cliente"""
-        return await self._make_request("geral/clientes/", "AlterarCliente", param)
-    
-    async def alterar_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar fornecedor"""
-        return await self._make_request("geral/fornecedores/", "AlterarFornecedor", param)
-    
-    async def alterar_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a pagar"""
-        return await self._make_request("financas/contapagar/", "AlterarContaPagar", param)
-    
-    async def alterar_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Alterar conta a receber"""
-        return await self._make_request("financas/contareceber/", "AlterarContaReceber", param)
-    
-    # ============================================================================
-    # MÉTODOS DE EXCLUSÃO
-    # ============================================================================
-    
-    async def excluir_cliente(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir cliente"""
-        return await self._make_request("geral/clientes/", "ExcluirCliente", param)
-    
-    async def excluir_fornecedor(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir fornecedor"""
-        return await self._make_request("geral/fornecedores/", "ExcluirFornecedor", param)
-    
-    async def excluir_conta_pagar(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a pagar"""
-        return await self._make_request("financas/contapagar/", "ExcluirContaPagar", param)
-    
-    async def excluir_conta_receber(self, param: Dict[str, Any]) -> Dict[str, Any]:
-        """Excluir conta a receber"""
-        return await self._make_request("financas/contareceber/", "ExcluirContaReceber", param)
-    
     # ============================================================================
     # MÉTODOS AUXILIARES UCM
     # ============================================================================
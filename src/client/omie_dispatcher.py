@@ -0,0 +1,169 @@
+"""
+Dispatcher único das chamadas Omie
+Gera os métodos dos clientes a partir do registro (omie_endpoints) e aplica
+coalescência, limite de taxa, circuit breaker e retentativas de forma uniforme
+a todas as chamadas, registrando a latência de cada envio.
+Importar o módulo só carrega o registro: os serviços compartilhados
+(configuração, cache, limitador, retentativas, circuitos, métricas) são
+resolvidos no primeiro envio ou injetados pelo cliente
+"""
+
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Optional
+
+from src.client.omie_endpoints import find_call, get_call
+from src.client.single_flight import is_mutating_call, make_flight_key
+
+_HTTP_STATUS = re.compile(r"HTTP (\d{3})")
+
+
+def _status_from_error(error: Exception) -> Optional[int]:
+    match = _HTTP_STATUS.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class DispatchServices:
+    """Serviços compartilhados usados a cada chamada Omie"""
+    invalidator: Any
+    single_flight: Any
+    rate_limiter: Any
+    retry: Any
+    guard: Any
+    latency: Any
+    company_namespace: Callable[[str], str]
+    rate_limit_enabled: bool = True
+
+    @classmethod
+    def from_globals(cls) -> "DispatchServices":
+        """Instâncias globais do processo (importadas só aqui)"""
+        from src.config import config
+        from src.cache.dependencies import omie_cache_invalidator
+        from src.cache.shared_tier import company_namespace
+        from src.client.single_flight import omie_single_flight
+        from src.utils.rate_limiter import omie_rate_limiter
+        from src.utils.retry import omie_retry
+        from src.utils.circuit_breaker import omie_guard
+        from src.utils.metrics_registry import omie_latency
+
+        return cls(
+            invalidator=omie_cache_invalidator,
+            single_flight=omie_single_flight,
+            rate_limiter=omie_rate_limiter,
+            retry=omie_retry,
+            guard=omie_guard,
+            latency=omie_latency,
+            company_namespace=company_namespace,
+            rate_limit_enabled=config.rate_limit_enabled
+        )
+
+
+_default_services: Optional[DispatchServices] = None
+
+
+def default_services() -> DispatchServices:
+    """Serviços globais, criados no primeiro uso"""
+    global _default_services
+    if _default_services is None:
+        _default_services = DispatchServices.from_globals()
+    return _default_services
+
+
+class OmieDispatcher(ABC):
+    """
+    Base dos clientes Omie.
+
+    Subclasses implementam `_send_request(endpoint, call, param)` (o envio
+    HTTP propriamente dito; sem ele a classe não pode ser instanciada) e,
+    se necessário, `_tenant_key()` (app_key da empresa). Métodos
+    como `consultar_clientes(param)` são resolvidos no registro na primeira
+    vez em que são acessados. `services` (DispatchServices) pode ser
+    atribuído ao cliente; sem ele valem as instâncias globais.
+    """
+
+    services: Optional[DispatchServices] = None
+
+    def _services(self) -> DispatchServices:
+        return self.services or default_services()
+
+    @abstractmethod
+    async def _send_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Envia a chamada ao Omie e devolve a resposta decodificada"""
+
+    async def _tenant_key(self) -> str:
+        return self.auth["app_key"]
+
+    async def _make_request(self, endpoint: str, call: str, param: Dict[str, Any]) -> Dict[str, Any]:
+        """Envia a chamada; leituras idênticas simultâneas são coalescidas"""
+        spec = find_call(endpoint, call)
+        idempotent = spec.idempotent if spec else not is_mutating_call(call)
+        tenant = await self._tenant_key()
+        services = self._services()
+
+        if not idempotent:
+            result = await self._limited_request(tenant, endpoint, call, param, idempotent=False)
+            # Escrita confirmada: descartar consultas em cache que ela tornou obsoletas
+            services.invalidator.on_write(endpoint, call, services.company_namespace(tenant))
+            return result
+
+        key = make_flight_key(tenant, endpoint, call, param)
+        return await services.single_flight.do(
+            key, lambda: self._limited_request(tenant, endpoint, call, param)
+        )
+
+    async def _limited_request(self, tenant: str, endpoint: str, call: str,
+                               param: Dict[str, Any], idempotent: bool = True) -> Dict[str, Any]:
+        services = self._services()
+        company = services.company_namespace(tenant)
+
+        async def send():
+            # Cada envio passa pelo limitador (retentativas e hedges respeitam a taxa reduzida)
+            if services.rate_limit_enabled:
+                await services.rate_limiter.acquire(tenant, endpoint, call)
+
+            started = time.perf_counter()
+            try:
+                result = await self._send_request(endpoint, call, param)
+            except Exception as e:
+                services.latency.record(company, endpoint, call, (time.perf_counter() - started) * 1000, ok=False)
+                # Faults de consumo redundante/429 reduzem a taxa desta app_key
+                services.rate_limiter.observe(tenant, endpoint, call, _status_from_error(e), str(e))
+                raise
+            services.latency.record(company, endpoint, call, (time.perf_counter() - started) * 1000)
+            return result
+
+        async def attempt():
+            # Circuito aberto falha na hora (sem esperar o timeout); só leituras são hedge
+            return await services.guard.call(endpoint, send, idempotent=idempotent)
+
+        # Escritas nunca são repetidas: falhas transitórias só se repetem em leituras
+        return await services.retry.call(attempt, idempotent=idempotent, name=f"{endpoint} {call}")
+
+    async def call_endpoint(self, name: str, param: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Executa uma chamada registrada pelo nome do método"""
+        spec = get_call(name)
+        if spec is None:
+            raise ValueError(f"Chamada Omie não registrada: {name}")
+        return await self._make_request(spec.endpoint, spec.call, spec.build_param(param))
+
+    def __getattr__(self, name: str):
+        # Atributos privados nunca são chamadas Omie (evita recursão em cópias/pickle)
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        spec = get_call(name)
+        if spec is None:
+            raise AttributeError(f"'{type(self).__name__}' não possui o método '{name}'")
+
+        async def method(param: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+            return await self.call_endpoint(spec.name, param)
+
+        method.__name__ = name
+        method.__doc__ = f"{spec.call} em {spec.endpoint}"
+
+        # Próximos acessos não passam pelo __getattr__
+        setattr(self, name, method)
+        return method
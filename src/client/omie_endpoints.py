@@ -0,0 +1,189 @@
+"""
+Registro declarativo das chamadas da API Omie
+Cada método dos clientes (consultar_clientes, incluir_conta_pagar, ...) é uma
+linha desta tabela; os objetos OmieCall são criados sob demanda no primeiro uso
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+# Estilos de paginação: (chave da página, chave do tamanho, chave do total de páginas,
+# chave dos registros na página, chave do total de registros)
+PAGINACAO_PADRAO = ("pagina", "registros_por_pagina", "total_de_paginas", "registros", "total_de_registros")
+PAGINACAO_N = ("nPagina", "nRegPorPagina", "nTotPaginas", "nRegistros", "nTotRegistros")
+
+# Tipos de chamada
+LISTA = "lista"          # paginada, idempotente, cacheável
+CONSULTA = "consulta"    # registro único, idempotente, cacheável
+ESCRITA = "escrita"      # altera dados: sem cache e sem coalescência
+
+DEFAULT_PAGE_SIZE = 50
+
+# Mensagem retornada pelo Omie quando a página solicitada não tem registros
+EMPTY_PAGE_MARKERS = ("Não existem registros para a página", "Nao existem registros")
+
+
+def is_empty_page_error(error: Exception) -> bool:
+    """Verifica se o erro é o aviso de página vazia do Omie"""
+    message = str(error)
+    return any(marker in message for marker in EMPTY_PAGE_MARKERS)
+
+
+@dataclass(frozen=True)
+class OmieCall:
+    """Descrição de uma chamada Omie"""
+    name: str
+    endpoint: str
+    call: str
+    kind: str
+    list_key: Optional[str] = None
+    ttl: int = 0
+    page_key: Optional[str] = None
+    page_size_key: Optional[str] = None
+    total_pages_key: Optional[str] = None
+    records_key: Optional[str] = None
+    total_records_key: Optional[str] = None
+    default_param: Optional[Tuple[Tuple[str, Any], ...]] = None
+
+    @property
+    def idempotent(self) -> bool:
+        return self.kind != ESCRITA
+
+    @property
+    def cacheable(self) -> bool:
+        return self.kind != ESCRITA and self.ttl > 0
+
+    @property
+    def paginated(self) -> bool:
+        return self.page_key is not None
+
+    def build_param(self, param: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Parâmetros da chamada, aplicando a paginação padrão quando omitidos"""
+        if param is not None:
+            return param
+        if self.default_param is not None:
+            return dict(self.default_param)
+        if self.paginated:
+            return {self.page_key: 1, self.page_size_key: DEFAULT_PAGE_SIZE}
+        return {}
+
+
+# nome do método -> (endpoint, call, tipo, chave da lista, ttl em segundos[, paginação])
+_TABLE: Dict[str, tuple] = {
+    # Cadastros gerais
+    "consultar_categorias": ("geral/categorias", "ListarCategorias", LISTA, "categoria_cadastro", 3600),
+    "consultar_departamentos": ("geral/departamentos", "ListarDepartamentos", LISTA, "departamentos", 3600),
+    "consultar_tipos_documento": ("geral/tiposdoc", "PesquisarTipoDocumento", CONSULTA, "tipo_documento_cadastro", 86400),
+    "consultar_empresas": ("geral/empresas", "ListarEmpresas", LISTA, "empresas_cadastro", 86400),
+    "consultar_projetos": ("geral/projetos", "ListarProjetos", LISTA, "cadastro", 3600),
+    "consultar_contas_correntes": ("geral/contacorrente", "ListarContasCorrentes", LISTA, "ListarContasCorrentes", 1800),
+    "listar_resumo_contas_correntes": ("geral/contacorrente", "ListarResumoContasCorrentes", LISTA, "conta_corrente_lista", 1800),
+
+    # Clientes e fornecedores
+    "consultar_clientes": ("geral/clientes", "ListarClientes", LISTA, "clientes_cadastro", 600),
+    "listar_clientes": ("geral/clientes", "ListarClientes", LISTA, "clientes_cadastro", 600),
+    "consultar_cliente_por_codigo": ("geral/clientes", "ConsultarCliente", CONSULTA, None, 600),
+    "buscar_dados_contato_cliente": ("geral/clientes", "ConsultarCliente", CONSULTA, None, 600),
+    "consultar_fornecedores": ("geral/fornecedores", "ListarFornecedores", LISTA, "fornecedor_cadastro", 600),
+    "consultar_fornecedor_por_codigo": ("geral/fornecedores", "ConsultarFornecedor", CONSULTA, None, 600),
+
+    # Financeiro
+    "consultar_contas_pagar": ("financas/contapagar", "ListarContasPagar", LISTA, "conta_pagar_cadastro", 300),
+    "consultar_contas_receber": ("financas/contareceber", "ListarContasReceber", LISTA, "conta_receber_cadastro", 300),
+    "consultar_lancamentos": ("financas/contacorrentelancamentos", "ListarLancCC", LISTA, "listaLancamentos", 300, PAGINACAO_N),
+    "consultar_movimentos": ("financas/mf", "ListarMovimentos", LISTA, "movimentos", 300, PAGINACAO_N),
+
+    # Inclusões
+    "incluir_cliente": ("geral/clientes", "IncluirCliente", ESCRITA, None, 0),
+    "incluir_fornecedor": ("geral/fornecedores", "IncluirFornecedor", ESCRITA, None, 0),
+    "incluir_conta_pagar": ("financas/contapagar", "IncluirContaPagar", ESCRITA, None, 0),
+    "incluir_conta_receber": ("financas/contareceber", "IncluirContaReceber", ESCRITA, None, 0),
+    "incluir_projeto": ("geral/projetos", "IncluirProjeto", ESCRITA, None, 0),
+    "incluir_lancamento": ("financas/contacorrentelancamentos", "IncluirLancCC", ESCRITA, None, 0),
+    "incluir_conta_corrente": ("geral/contacorrente", "IncluirContaCorrente", ESCRITA, None, 0),
+
+    # Inclusões em lote
+    "upsert_clientes_por_lote": ("geral/clientes", "UpsertClientesPorLote", ESCRITA, None, 0),
+    "incluir_contas_pagar_por_lote": ("financas/contapagar", "IncluirContaPagarPorLote", ESCRITA, None, 0),
+    "incluir_contas_receber_por_lote": ("financas/contareceber", "IncluirContaReceberPorLote", ESCRITA, None, 0),
+
+    # Alterações
+    "alterar_cliente": ("geral/clientes", "AlterarCliente", ESCRITA, None, 0),
+    "alterar_fornecedor": ("geral/fornecedores", "AlterarFornecedor", ESCRITA, None, 0),
+    "alterar_conta_pagar": ("financas/contapagar", "AlterarContaPagar", ESCRITA, None, 0),
+    "alterar_conta_receber": ("financas/contareceber", "AlterarContaReceber", ESCRITA, None, 0),
+
+    # Exclusões
+    "excluir_cliente": ("geral/clientes", "ExcluirCliente", ESCRITA, None, 0),
+    "excluir_fornecedor": ("geral/fornecedores", "ExcluirFornecedor", ESCRITA, None, 0),
+    "excluir_conta_pagar": ("financas/contapagar", "ExcluirContaPagar", ESCRITA, None, 0),
+    "excluir_conta_receber": ("financas/contareceber", "ExcluirContaReceber", ESCRITA, None, 0),
+}
+
+# Nomes usados pelo cliente legado (modules/omie_client.py)
+ALIASES: Dict[str, str] = {
+    "cadastrar_cliente_fornecedor": "incluir_cliente",
+    "criar_conta_pagar": "incluir_conta_pagar",
+    "atualizar_conta_pagar": "alterar_conta_pagar",
+    "criar_conta_receber": "incluir_conta_receber",
+    "atualizar_conta_receber": "alterar_conta_receber",
+}
+
+# Parâmetros padrão de chamadas que não seguem a paginação
+_DEFAULT_PARAMS: Dict[str, Dict[str, Any]] = {
+    "consultar_tipos_documento": {"codigo": ""},
+}
+
+_calls: Dict[str, OmieCall] = {}
+_names_by_endpoint_call: Optional[Dict[Tuple[str, str], str]] = None
+
+
+def _build(name: str) -> OmieCall:
+    endpoint, call, kind, list_key, ttl, *rest = _TABLE[name]
+    page_key = page_size_key = total_pages_key = records_key = total_records_key = None
+    if kind == LISTA:
+        page_key, page_size_key, total_pages_key, records_key, total_records_key = rest[0] if rest else PAGINACAO_PADRAO
+
+    default = _DEFAULT_PARAMS.get(name)
+    return OmieCall(
+        name=name,
+        endpoint=endpoint,
+        call=call,
+        kind=kind,
+        list_key=list_key,
+        ttl=ttl,
+        page_key=page_key,
+        page_size_key=page_size_key,
+        total_pages_key=total_pages_key,
+        records_key=records_key,
+        total_records_key=total_records_key,
+        default_param=tuple(default.items()) if default is not None else None
+    )
+
+
+def get_call(name: str) -> Optional[OmieCall]:
+    """Busca a chamada pelo nome do método (None se não registrada)"""
+    name = ALIASES.get(name, name)
+    spec = _calls.get(name)
+    if spec is None:
+        if name not in _TABLE:
+            return None
+        spec = _calls[name] = _build(name)
+    return spec
+
+
+def find_call(endpoint: str, call: str) -> Optional[OmieCall]:
+    """Busca a chamada pelo par (endpoint, call)"""
+    global _names_by_endpoint_call
+    if _names_by_endpoint_call is None:
+        _names_by_endpoint_call = {}
+        for name, row in _TABLE.items():
+            _names_by_endpoint_call.setdefault((row[0], row[1]), name)
+
+    name = _names_by_endpoint_call.get((endpoint.strip("/"), call))
+    return get_call(name) if name else None
+
+
+def registered_names() -> Tuple[str, ...]:
+    """Nomes de todos os métodos registrados (incluindo aliases)"""
+    return tuple(_TABLE) + tuple(ALIASES)
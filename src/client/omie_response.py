@@ -0,0 +1,20 @@
+"""
+Resposta da API Omie com metadados do transporte
+"""
+
+from typing import Any, Dict
+
+
+class OmieResponse(dict):
+    """
+    Dict da resposta JSON do Omie que também guarda o tamanho do corpo HTTP.
+
+    O cache usa `raw_size` para estimar o tamanho sem percorrer a resposta.
+    """
+
+    def __init__(self, data: Dict[str, Any], raw_size: int = 0):
+        super().__init__(data)
+        self.raw_size = raw_size
+
+    def copy(self) -> "OmieResponse":
+        return OmieResponse(self, self.raw_size)
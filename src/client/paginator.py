@@ -0,0 +1,191 @@
+"""
+Paginação automática e concorrente para chamadas "Listar*" do Omie
+Lê total_de_paginas na página 1 e busca as demais com fan-out limitado
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, AsyncIterator, List
+
+from src.utils.logger import logger
+from src.client.omie_endpoints import (
+    find_call, EMPTY_PAGE_MARKERS, PAGINACAO_PADRAO, is_empty_page_error
+)
+
+# Limite padrão de páginas simultâneas por endpoint
+DEFAULT_ENDPOINT_CONCURRENCY = 4
+
+# Limites específicos por endpoint (endpoints financeiros são mais sensíveis a throttling)
+ENDPOINT_CONCURRENCY: Dict[str, int] = {
+    "geral/clientes": 4,
+    "geral/categorias": 4,
+    "geral/departamentos": 2,
+    "financas/contapagar": 3,
+    "financas/contareceber": 3,
+    "financas/contacorrentelancamentos": 2,
+}
+
+def detect_list_key(page: Dict[str, Any]) -> Optional[str]:
+    """Descobre a chave que contém a lista de registros na resposta"""
+    for key, value in page.items():
+        if isinstance(value, list) and (not value or isinstance(value[0], dict)):
+            return key
+    return None
+
+
+class OmiePaginator:
+    """
+    Itera todas as páginas de uma listagem Omie.
+
+    A página 1 é buscada primeiro para descobrir o total de páginas; as
+    demais são buscadas em paralelo, com no máximo `fan_out` páginas à
+    frente do consumidor e respeitando o limite por endpoint.
+    """
+
+    def __init__(self, client, fan_out: int = 4,
+                 endpoint_limits: Optional[Dict[str, int]] = None):
+        self.client = client
+        self.fan_out = max(1, fan_out)
+        self.endpoint_limits = dict(ENDPOINT_CONCURRENCY)
+        if endpoint_limits:
+            self.endpoint_limits.update(endpoint_limits)
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+        # Estatísticas
+        self.pages_fetched = 0
+        self.records_yielded = 0
+
+    def _endpoint_slot(self, endpoint: str) -> asyncio.Semaphore:
+        endpoint = endpoint.strip("/")
+        slot = self._slots.get(endpoint)
+        if slot is None:
+            limit = self.endpoint_limits.get(endpoint, DEFAULT_ENDPOINT_CONCURRENCY)
+            slot = asyncio.Semaphore(limit)
+            self._slots[endpoint] = slot
+        return slot
+
+    async def fetch_page(self, endpoint: str, call: str, param: Dict[str, Any],
+                         pagina: int, page_key: str = "pagina") -> Dict[str, Any]:
+        """Busca uma única página respeitando o limite do endpoint"""
+        page_param = dict(param)
+        page_param[page_key] = pagina
+
+        async with self._endpoint_slot(endpoint):
+            result = await self.client._make_request(endpoint, call, page_param)
+
+        self.pages_fetched += 1
+        return result
+
+    async def iter_pages(self, endpoint: str, call: str, param: Dict[str, Any],
+                         page_key: Optional[str] = None,
+                         total_pages_key: Optional[str] = None,
+                         max_pages: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Gera as páginas em ordem, buscando as seguintes em paralelo"""
+        # Chaves de paginação variam por endpoint (pagina/nPagina); o registro sabe qual usar
+        spec = find_call(endpoint, call)
+        if spec is not None and spec.paginated:
+            page_key = page_key or spec.page_key
+            total_pages_key = total_pages_key or spec.total_pages_key
+        page_key = page_key or "pagina"
+        total_pages_key = total_pages_key or "total_de_paginas"
+
+        try:
+            first = await self.fetch_page(endpoint, call, param, 1, page_key)
+        except Exception as e:
+            if is_empty_page_error(e):
+                return
+            raise
+
+        total_pages = int(first.get(total_pages_key) or 1)
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+
+        yield first
+
+        pending: deque = deque()
+        next_page = 2
+
+        def schedule():
+            nonlocal next_page
+            pending.append(asyncio.ensure_future(
+                self.fetch_page(endpoint, call, param, next_page, page_key)
+            ))
+            next_page += 1
+
+        try:
+            while next_page <= total_pages and len(pending) < self.fan_out:
+                schedule()
+
+            while pending:
+                task = pending.popleft()
+                try:
+                    page = await task
+                except Exception as e:
+                    # Total informado pelo Omie pode mudar durante a paginação
+                    if is_empty_page_error(e):
+                        logger.debug(f"{call}: página vazia, encerrando paginação")
+                        break
+                    raise
+
+                if next_page <= total_pages:
+                    schedule()
+
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_records(self, endpoint: str, call: str, param: Dict[str, Any],
+                           list_key: Optional[str] = None,
+                           **page_options) -> AsyncIterator[Dict[str, Any]]:
+        """Gera os registros de todas as páginas sem manter as páginas em memória"""
+        async for page in self.iter_pages(endpoint, call, param, **page_options):
+            key = list_key or detect_list_key(page)
+            if not key:
+                continue
+            list_key = key
+
+            for record in page.get(key) or []:
+                self.records_yielded += 1
+                yield record
+
+    async def collect(self, endpoint: str, call: str, param: Dict[str, Any],
+                      list_key: Optional[str] = None,
+                      **page_options) -> Dict[str, Any]:
+        """Agrega todas as páginas em uma única resposta no formato Omie"""
+        # A resposta agregada mantém as chaves do endpoint (pagina/nPagina, lista do registro)
+        spec = find_call(endpoint, call)
+        if spec is not None and spec.paginated:
+            page_key, total_pages_key = spec.page_key, spec.total_pages_key
+            records_key, total_records_key = spec.records_key, spec.total_records_key
+        else:
+            page_key, _, total_pages_key, records_key, total_records_key = PAGINACAO_PADRAO
+        list_key = list_key or (spec.list_key if spec is not None else None)
+
+        records: List[Dict[str, Any]] = []
+        total_pages = 0
+
+        async for page in self.iter_pages(endpoint, call, param, **page_options):
+            total_pages += 1
+            list_key = list_key or detect_list_key(page)
+            if list_key:
+                records.extend(page.get(list_key) or [])
+
+        result = {
+            page_key: 1,
+            total_pages_key: total_pages,
+            records_key: len(records),
+            total_records_key: len(records),
+        }
+        if list_key:
+            result[list_key] = records
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de paginação"""
+        return {
+            "pages_fetched": self.pages_fetched,
+            "records_yielded": self.records_yielded,
+            "fan_out": self.fan_out,
+            "endpoint_limits": self.endpoint_limits
+        }
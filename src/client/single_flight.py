@@ -0,0 +1,105 @@
+"""
+Coalescência de requisições (single-flight) para a API Omie
+Chamadas idênticas simultâneas compartilham uma única requisição em andamento
+"""
+
+import asyncio
+import json
+from typing import Dict, Any, Callable, Awaitable
+
+from src.client.omie_response import OmieResponse
+
+# Prefixos de chamadas que alteram dados no Omie e nunca podem ser coalescidas
+MUTATING_CALL_PREFIXES = (
+    "Incluir", "Alterar", "Excluir", "Upsert", "Cancelar", "Lancar",
+    "Associar", "Desassociar", "Conciliar", "Estornar", "Baixar", "Importar"
+)
+
+
+def is_mutating_call(call: str) -> bool:
+    """Verifica se a chamada Omie altera dados"""
+    return call.startswith(MUTATING_CALL_PREFIXES)
+
+
+def make_flight_key(company: str, endpoint: str, call: str, param: Dict[str, Any]) -> str:
+    """Chave normalizada (empresa, endpoint, call, param)"""
+    normalized_param = json.dumps(param, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{company}|{endpoint.strip('/')}|{call}|{normalized_param}"
+
+
+def _detach(value: Any) -> Any:
+    """
+    Cópia rasa para quem recebe um resultado compartilhado.
+
+    As tools reatribuem listas do resultado (ex.: result['categoria'] = filtradas),
+    então cada chamador precisa do seu próprio dict/listas de primeiro nível.
+    """
+    if isinstance(value, dict):
+        detached = {k: list(v) if isinstance(v, list) else v for k, v in value.items()}
+        if isinstance(value, OmieResponse):
+            return OmieResponse(detached, value.raw_size)
+        return detached
+    return value
+
+
+class SingleFlight:
+    """Grupo de chamadas em andamento indexadas por chave"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        # Estatísticas
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa func uma única vez para chamadas concorrentes com a mesma chave"""
+        future = self._in_flight.get(key)
+
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return _detach(await asyncio.shield(future))
+            except asyncio.CancelledError:
+                # Líder cancelado: executar por conta própria
+                if future.cancelled():
+                    return await func()
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.executed += 1
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita aviso de exceção não consumida quando não há seguidores
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas de coalescência"""
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+            "coalesced_percent": round(self.coalesced / total * 100, 1) if total else 0
+        }
+
+
+# Instância global compartilhada pelos clientes Omie
+omie_single_flight = SingleFlight()
@@ -8,6 +8,7 @@ import httpx
 import asyncio
 from typing import Dict, Any, Optional
 from src.utils.logger import logger
+from src.utils.circuit_breaker import ucm_guard, CircuitOpenError
 
 class UCMCredentialsClient:
     """Cliente para Universal Credentials Manager"""
@@ -48,18 +49,26 @@ class UCMCredentialsClient:
         url = f"{self.ucm_url}{endpoint}"
         headers = self._get_headers()
         
-        try:
+        async def request():
             async with httpx.AsyncClient(timeout=10) as client:
                 if method == "GET":
                     response = await client.get(url, headers=headers)
-                elif method == "POST":
-                    response = await client.post(url, json=data, headers=headers)
                 else:
-                    raise ValueError(f"Método não suportado: {method}")
+                    response = await client.post(url, json=data, headers=headers)
                 
                 response.raise_for_status()
                 return response.json()
+        
+        try:
+            if method not in ("GET", "POST"):
+                raise ValueError(f"Método não suportado: {method}")
+            
+            # UCM fora do ar: o circuito abre e get_credentials cai direto no fallback local
+            return await ucm_guard.call(endpoint, request, idempotent=method == "GET")
                 
+        except CircuitOpenError as e:
+            logger.warning(f"⚠️ {e}")
+            raise Exception("UCM não disponível - circuito aberto")
         except httpx.ConnectError:
             logger.error(f"❌ Não foi possível conectar ao UCM em {self.ucm_url}")
             logger.error("💡 Certifique-se que o UCM está rodando: python src/api/server.py")
@@ -35,9 +35,42 @@ class Config:
         self.omie_base_url = "https://app.omie.com.br/api/v1"
         self.omie_timeout = 30
         
+        # Pool de conexões HTTP (transporte compartilhado)
+        self.omie_http2 = os.getenv("OMIE_HTTP2", "false").lower() == "true"
+        self.omie_pool_max_connections = int(os.getenv("OMIE_POOL_MAX_CONNECTIONS", "50"))
+        self.omie_pool_max_keepalive = int(os.getenv("OMIE_POOL_MAX_KEEPALIVE", "20"))
+        self.omie_pool_keepalive_expiry = float(os.getenv("OMIE_POOL_KEEPALIVE_EXPIRY", "30"))
+        self.omie_pool_max_per_host = int(os.getenv("OMIE_POOL_MAX_PER_HOST", "10"))
+        
         # Configurações de cache
         self.cache_enabled = os.getenv("CACHE_ENABLED", "true").lower() == "true"
         self.cache_ttl = int(os.getenv("CACHE_TTL", "300"))  # 5 minutos
+        self.cache_stale_grace = float(os.getenv("CACHE_STALE_GRACE", "300"))  # servir vencido enquanto revalida
+        self.cache_warmer_interval = float(os.getenv("CACHE_WARMER_INTERVAL", "60"))  # 0 desativa
+        self.cache_warmer_top_n = int(os.getenv("CACHE_WARMER_TOP_N", "20"))
+        # Camada L2 compartilhada entre processos: "redis://host:6379", "local" ou vazio (desativada)
+        self.cache_shared_url = os.getenv("CACHE_SHARED_URL", "")
+        self.cache_admission = os.getenv("CACHE_ADMISSION", "tinylfu")  # lru | tinylfu
+        # Shards do cache L1 (1 = instância única; >1 = lock e limite por shard)
+        self.cache_shards = int(os.getenv("CACHE_SHARDS", "1"))
+        # Cache negativo: página sem registros e faults de validação (0 desativa)
+        self.cache_negative_ttl_empty = float(os.getenv("CACHE_NEGATIVE_TTL_EMPTY", "30"))
+        self.cache_negative_ttl_invalid = float(os.getenv("CACHE_NEGATIVE_TTL_INVALID", "120"))
+        # Trace de acessos ("" desativa) e aquecimento na inicialização (orçamento em chamadas ao Omie; 0 desativa)
+        self.cache_trace_path = os.getenv("CACHE_TRACE_PATH", "cache/access_trace.jsonl")
+        self.cache_preload_budget = int(os.getenv("CACHE_PRELOAD_BUDGET", "60"))
+        self.cache_preload_concurrency = int(os.getenv("CACHE_PRELOAD_CONCURRENCY", "4"))
+        
+        # Sketches de latência por empresa/endpoint/call: destino da gravação periódica
+        # ("redis://...", "local" ou vazio = só em memória); por padrão o Redis do cache L2
+        self.metrics_sketch_url = os.getenv("METRICS_SKETCH_URL", self.cache_shared_url)
+        self.metrics_snapshot_interval = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "60"))
+        
+        # Snapshot local de cadastros (sincronização incremental)
+        self.omie_snapshot_enabled = os.getenv("OMIE_SNAPSHOT_ENABLED", "true").lower() == "true"
+        self.omie_snapshot_path = os.getenv("OMIE_SNAPSHOT_PATH", "cache/omie_snapshot.db")
+        self.omie_sync_interval = int(os.getenv("OMIE_SYNC_INTERVAL", "300"))  # 5 minutos
+        self.omie_full_resync_hours = int(os.getenv("OMIE_FULL_RESYNC_HOURS", "24"))
         
         # Configurações de rate limiting
         self.rate_limit_enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
@@ -90,8 +123,21 @@ class Config:
             "log_level": self.log_level,
             "omie_base_url": self.omie_base_url,
             "omie_timeout": self.omie_timeout,
+            "omie_http2": self.omie_http2,
+            "omie_pool_max_connections": self.omie_pool_max_connections,
+            "omie_pool_max_per_host": self.omie_pool_max_per_host,
             "cache_enabled": self.cache_enabled,
             "cache_ttl": self.cache_ttl,
+            "cache_stale_grace": self.cache_stale_grace,
+            "cache_warmer_interval": self.cache_warmer_interval,
+            "cache_shared_tier": bool(self.cache_shared_url),
+            "cache_admission": self.cache_admission,
+            "cache_negative_ttl_empty": self.cache_negative_ttl_empty,
+            "cache_negative_ttl_invalid": self.cache_negative_ttl_invalid,
+            "metrics_sketch_store": bool(self.metrics_sketch_url),
+            "metrics_snapshot_interval": self.metrics_snapshot_interval,
+            "omie_snapshot_enabled": self.omie_snapshot_enabled,
+            "omie_sync_interval": self.omie_sync_interval,
             "rate_limit_enabled": self.rate_limit_enabled,
             "rate_limit_requests": self.rate_limit_requests,
             "rate_limit_window": self.rate_limit_window,
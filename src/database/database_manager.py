@@ -10,11 +10,15 @@ import aioredis
 import json
 import uuid
 import logging
+import functools
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from src.database.write_buffer import ProcessMetricsWriter
+from src.utils import latency_histogram
+
 # =============================================================================
 # ENUMS E DATACLASSES
 # =============================================================================
@@ -92,6 +96,20 @@ class DatabaseManager:
                 'url': 'redis://localhost:6379',
                 'encoding': 'utf-8',
                 'decode_responses': True
+            },
+            # Gravação em lote de execuções e métricas (fora do caminho das tools)
+            'write_buffer': {
+                'enabled': True,
+                'max_rows': 10000,
+                'batch_rows': 500,
+                'flush_interval_ms': 200,
+                'max_wait_ms': 50
+            },
+            # Rollups e partições diárias de omie_api_metrics (ver metrics_rollups.sql)
+            'metrics': {
+                'rollup_interval_seconds': 60,
+                'raw_retention_days': 30,
+                'partitions_ahead_days': 3
             }
         }
     
@@ -153,8 +171,9 @@ class DatabaseManager:
 class ProcessController:
     """Controlador de processos de integração com rastreamento completo"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, writer: Optional[ProcessMetricsWriter] = None):
         self.db = db_manager
+        self.writer = writer
         self.logger = logging.getLogger(__name__)
     
     def _generate_execution_id(self, process_type: str) -> str:
@@ -182,6 +201,15 @@ class ProcessController:
         """
         execution_id = self._generate_execution_id(process_type)
         
+        if self.writer:
+            # Gravado em lote pelo flusher: a tool não espera o banco
+            if not await self.writer.process_started(
+                execution_id, process_type, ExecutionStatus.RUNNING.value,
+                input_params, omie_endpoint, user_context
+            ):
+                self.logger.warning(f"⚠️ Fila de gravação cheia: início de {execution_id} descartado")
+            return execution_id
+        
         try:
             # Inserir no PostgreSQL
             async with self.db.pg_pool.acquire() as conn:
@@ -264,6 +292,13 @@ class ProcessController:
         """
         status = ExecutionStatus.COMPLETED if success else ExecutionStatus.FAILED
         
+        if self.writer:
+            if not success:
+                self.logger.warning(f"❌ Processo falhou: {execution_id} - {error_message}")
+            return await self.writer.process_completed(
+                execution_id, status.value, response_data, error_message, error_code, status_code
+            )
+        
         try:
             # Atualizar PostgreSQL
             async with self.db.pg_pool.acquire() as conn:
@@ -318,6 +353,12 @@ class ProcessController:
     
     async def get_process_status(self, execution_id: str) -> Optional[Dict[str, Any]]:
         """Obtém status atual do processo"""
+        if self.writer:
+            # Ainda na fila de gravação
+            pending = self.writer.pending_process(execution_id)
+            if pending:
+                return pending
+        
         try:
             # Tentar cache primeiro
             cached = await self.db.redis.get(f"process:{execution_id}")
@@ -365,19 +406,26 @@ class ProcessController:
 class MetricsCollector:
     """Coletor de métricas de performance e uso"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, writer: Optional[ProcessMetricsWriter] = None):
         self.db = db_manager
+        self.writer = writer
         self.logger = logging.getLogger(__name__)
     
     async def record_api_metric(self, metric: APIMetric) -> bool:
         """Registra métrica de API"""
+        if self.writer:
+            # Enfileirada; False se descartada por falta de espaço na fila
+            return await self.writer.api_metric(metric)
+        
         try:
             async with self.db.pg_pool.acquire() as conn:
+                # process_execution_id é o UUID da execução, não o execution_id
                 await conn.execute("""
                     INSERT INTO omie_api_metrics 
                     (endpoint, response_time_ms, status_code, success,
                      request_size_bytes, response_size_bytes, process_execution_id)
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    VALUES ($1, $2, $3, $4, $5, $6,
+                            (SELECT id FROM process_executions WHERE execution_id = $7))
                 """,
                     metric.endpoint,
                     metric.response_time_ms,
@@ -407,43 +455,91 @@ class MetricsCollector:
             return False
     
     async def get_performance_summary(self, hours: int = 24) -> Dict[str, Any]:
-        """Obtém resumo de performance das últimas N horas"""
+        """
+        Obtém resumo de performance das últimas N horas
+        
+        Lê os rollups por hora (no máximo N+1 linhas por endpoint, qualquer
+        que seja o histórico) e calcula p50/p95/p99 somando os histogramas.
+        A hora corrente vai até o último rollup_api_metrics().
+        """
         try:
             async with self.db.pg_pool.acquire() as conn:
-                # Métricas gerais
-                summary = await conn.fetchrow("""
-                    SELECT 
-                        COUNT(*) as total_requests,
-                        COUNT(*) FILTER (WHERE success) as successful_requests,
-                        AVG(response_time_ms) as avg_response_time,
-                        PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY response_time_ms) as p95_response_time
-                    FROM omie_api_metrics 
-                    WHERE timestamp > NOW() - INTERVAL '%s hours'
-                """, hours)
-                
-                # Top endpoints
-                top_endpoints = await conn.fetch("""
+                rows = await conn.fetch("""
                     SELECT 
                         endpoint,
-                        COUNT(*) as requests,
-                        AVG(response_time_ms) as avg_time
-                    FROM omie_api_metrics 
-                    WHERE timestamp > NOW() - INTERVAL '%s hours'
+                        SUM(requests)::BIGINT as requests,
+                        SUM(successful_requests)::BIGINT as successful_requests,
+                        SUM(total_response_time_ms)::BIGINT as total_response_time_ms,
+                        MAX(max_response_time_ms) as max_response_time_ms,
+                        histogram_sum(latency_histogram) as latency_histogram
+                    FROM omie_api_metrics_1h 
+                    WHERE bucket_start >= date_trunc('hour', NOW() - make_interval(hours => $1))
                     GROUP BY endpoint
                     ORDER BY requests DESC
-                    LIMIT 10
                 """, hours)
-                
-                return {
-                    'summary': dict(summary) if summary else {},
-                    'top_endpoints': [dict(row) for row in top_endpoints],
-                    'period_hours': hours,
-                    'generated_at': datetime.now().isoformat()
-                }
+                rolled_up_until = await conn.fetchval(
+                    "SELECT watermark FROM metrics_rollup_state WHERE name = 'omie_api_metrics'"
+                )
+            
+            endpoints = [self._endpoint_summary(row) for row in rows]
+            total = sum(row['requests'] for row in rows)
+            
+            return {
+                'summary': {
+                    'total_requests': total,
+                    'successful_requests': sum(row['successful_requests'] for row in rows),
+                    'avg_response_time': round(sum(row['total_response_time_ms'] for row in rows) / total, 2) if total else None,
+                    **latency_histogram.quantiles(latency_histogram.merge(row['latency_histogram'] for row in rows))
+                },
+                'top_endpoints': endpoints[:10],
+                'endpoints': endpoints,
+                'period_hours': hours,
+                'rolled_up_until': rolled_up_until.isoformat() if rolled_up_until else None,
+                'generated_at': datetime.now().isoformat()
+            }
                 
         except Exception as e:
             self.logger.error(f"❌ Erro ao gerar resumo de performance: {e}")
             return {}
+    
+    @staticmethod
+    def _endpoint_summary(row) -> Dict[str, Any]:
+        """Linha agregada do rollup -> requisições, tempo médio e quantis do endpoint"""
+        requests = row['requests']
+        return {
+            'endpoint': row['endpoint'],
+            'requests': requests,
+            'success_rate': round(row['successful_requests'] / requests * 100, 2) if requests else None,
+            'avg_time': round(row['total_response_time_ms'] / requests, 2) if requests else None,
+            'max_time': row['max_response_time_ms'],
+            **latency_histogram.quantiles(row['latency_histogram'] or [])
+        }
+    
+    async def refresh_rollups(self) -> int:
+        """Agrega as métricas brutas novas nos rollups de minuto/hora"""
+        async with self.db.pg_pool.acquire() as conn:
+            return await conn.fetchval("SELECT rollup_api_metrics()")
+    
+    async def maintain_partitions(self, retention_days: int = 30, days_ahead: int = 3) -> Dict[str, int]:
+        """
+        Cria as partições diárias dos próximos dias e descarta as brutas fora da retenção.
+        
+        As duas etapas são independentes: uma falha na criação não interrompe a retenção.
+        """
+        created = dropped = 0
+        try:
+            async with self.db.pg_pool.acquire() as conn:
+                created = await conn.fetchval("SELECT ensure_metrics_partitions($1)", days_ahead)
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao criar partições de métricas: {e}")
+        try:
+            async with self.db.pg_pool.acquire() as conn:
+                dropped = await conn.fetchval("SELECT drop_old_metrics_partitions($1)", retention_days)
+        except Exception as e:
+            self.logger.error(f"❌ Erro ao descartar partições de métricas: {e}")
+        if created or dropped:
+            self.logger.info(f"🗂️ Partições de métricas: {created} criadas, {dropped} descartadas")
+        return {'created': created, 'dropped': dropped}
 
 # =============================================================================
 # ALERT MANAGER
@@ -528,20 +624,71 @@ class OmieIntegrationDatabase:
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.db_manager = DatabaseManager(config)
-        self.process_controller = ProcessController(self.db_manager)
-        self.metrics_collector = MetricsCollector(self.db_manager)
+        self.writer = self._create_writer(self.db_manager.config.get('write_buffer', {}))
+        self.process_controller = ProcessController(self.db_manager, self.writer)
+        self.metrics_collector = MetricsCollector(self.db_manager, self.writer)
         self.alert_manager = AlertManager(self.db_manager)
+        self.metrics_config = self.db_manager.config.get('metrics', {})
+        self._maintenance_task: Optional[asyncio.Task] = None
         self.logger = logging.getLogger(__name__)
     
+    def _create_writer(self, buffer_config: Dict[str, Any]) -> Optional[ProcessMetricsWriter]:
+        """Write-behind das execuções e métricas (None grava direto, um INSERT por evento)"""
+        if not buffer_config.get('enabled', True):
+            return None
+        return ProcessMetricsWriter(
+            self.db_manager,
+            max_rows=buffer_config.get('max_rows', 10000),
+            batch_rows=buffer_config.get('batch_rows', 500),
+            flush_interval=buffer_config.get('flush_interval_ms', 200) / 1000,
+            max_wait=buffer_config.get('max_wait_ms', 50) / 1000
+        )
+    
     async def initialize(self) -> bool:
         """Inicializa todo o sistema"""
         success = await self.db_manager.initialize()
         if success:
+            # Partições do dia antes da primeira gravação (senão as linhas caem na DEFAULT)
+            await self.metrics_collector.maintain_partitions(
+                self.metrics_config.get('raw_retention_days', 30),
+                self.metrics_config.get('partitions_ahead_days', 3)
+            )
+            if self.writer:
+                self.writer.start()
+            self._maintenance_task = asyncio.ensure_future(self._metrics_maintenance())
             self.logger.info("🗄️ Sistema de banco de dados Omie MCP inicializado")
         return success
     
+    async def _metrics_maintenance(self):
+        """
+        Rollups a cada intervalo (rollup_interval_seconds=0 desativa só os rollups);
+        partições a cada hora (a primeira passada é feita em initialize)
+        """
+        interval = self.metrics_config.get('rollup_interval_seconds', 60)
+        retention_days = self.metrics_config.get('raw_retention_days', 30)
+        days_ahead = self.metrics_config.get('partitions_ahead_days', 3)
+        last_partition_check = asyncio.get_running_loop().time()
+        
+        while True:
+            try:
+                loop_time = asyncio.get_running_loop().time()
+                if loop_time - last_partition_check >= 3600:
+                    await self.metrics_collector.maintain_partitions(retention_days, days_ahead)
+                    last_partition_check = loop_time
+                if interval > 0:
+                    await self.metrics_collector.refresh_rollups()
+            except Exception as e:
+                self.logger.error(f"❌ Erro na manutenção das métricas: {e}")
+            await asyncio.sleep(interval if interval > 0 else 3600)
+    
     async def close(self):
         """Finaliza sistema"""
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+        if self.writer:
+            # Grava o que restou na fila antes de fechar o pool
+            await self.writer.stop()
         await self.db_manager.close()
         self.logger.info("🔌 Sistema de banco de dados finalizado")
     
@@ -558,13 +705,16 @@ class OmieIntegrationDatabase:
             # Contar processos ativos
             active_count = await self.db_manager.redis.get("active_processes_count") or 0
             
-            return {
+            health = {
                 'postgresql': pg_status == 1,
                 'redis': redis_status,
                 'active_processes': int(active_count),
                 'status': 'healthy',
                 'timestamp': datetime.now().isoformat()
             }
+            if self.writer:
+                health['write_buffer'] = self.writer.get_stats()
+            return health
             
         except Exception as e:
             return {
@@ -588,12 +738,16 @@ def track_process(process_type: str, endpoint: str = None):
         endpoint: Endpoint específico da API Omie
     """
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             # Obter instância do database (assumindo que está disponível globalmente)
             # Em implementação real, seria injetado ou obtido de contexto
             from src.database.database_manager import omie_db
             
-            # Iniciar rastreamento
+            if omie_db is None:
+                return await func(*args, **kwargs)
+            
+            # Iniciar rastreamento (com write-behind só enfileira: sem ida ao banco)
             execution_id = await omie_db.process_controller.start_process(
                 process_type=process_type,
                 input_params=kwargs,
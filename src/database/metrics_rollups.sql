@@ -0,0 +1,194 @@
+-- =============================================================================
+-- ROLLUPS E PARTIÇÕES DE omie_api_metrics
+-- Incluído por schema.sql e migrate_metrics_partitioning.sql (pode ser reexecutado)
+-- Requer PostgreSQL 12+ (CREATE OR REPLACE AGGREGATE, FKs em tabelas particionadas)
+-- =============================================================================
+
+-- Rollups por minuto e por hora (mantidos por rollup_api_metrics)
+-- latency_histogram: contagem por bucket logarítmico de latência (ver latency_bucket),
+-- somável entre linhas para obter p50/p95/p99 de qualquer período
+CREATE TABLE IF NOT EXISTS omie_api_metrics_1m (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    endpoint VARCHAR(200) NOT NULL,
+    requests BIGINT NOT NULL,
+    successful_requests BIGINT NOT NULL,
+    total_response_time_ms BIGINT NOT NULL,
+    max_response_time_ms INTEGER NOT NULL,
+    latency_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket_start, endpoint)
+);
+
+CREATE TABLE IF NOT EXISTS omie_api_metrics_1h (LIKE omie_api_metrics_1m INCLUDING ALL);
+
+-- Sketches de latência por processo, janela de 1 minuto e série (empresa, endpoint, call),
+-- gravados por src/utils/metrics_registry.py; a leitura soma os processos com histogram_sum
+CREATE TABLE IF NOT EXISTS api_latency_sketches (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    process_id VARCHAR(100) NOT NULL,
+    company VARCHAR(64) NOT NULL,
+    endpoint VARCHAR(200) NOT NULL,
+    call VARCHAR(100) NOT NULL,
+    requests BIGINT NOT NULL,
+    errors BIGINT NOT NULL,
+    total_response_time_ms BIGINT NOT NULL,
+    max_response_time_ms INTEGER NOT NULL,
+    latency_histogram BIGINT[] NOT NULL,
+    PRIMARY KEY (bucket_start, process_id, company, endpoint, call)
+);
+
+-- Até onde as linhas brutas já foram agregadas
+CREATE TABLE IF NOT EXISTS metrics_rollup_state (
+    name VARCHAR(100) PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Bucket logarítmico (base 1.2) da latência: mesma escala de src/utils/latency_histogram.py
+CREATE OR REPLACE FUNCTION latency_bucket(p_ms INTEGER)
+RETURNS INTEGER AS $$
+    SELECT LEAST(63, FLOOR(LN(GREATEST(p_ms, 1)) / LN(1.2)))::INTEGER
+$$ LANGUAGE SQL IMMUTABLE;
+
+-- Histograma com p_count no bucket p_bucket (índice 0-based)
+CREATE OR REPLACE FUNCTION histogram_point(p_bucket INTEGER, p_count BIGINT)
+RETURNS BIGINT[] AS $$
+    SELECT array_fill(0::BIGINT, ARRAY[p_bucket]) || p_count
+$$ LANGUAGE SQL IMMUTABLE;
+
+-- Soma elemento a elemento de dois histogramas
+CREATE OR REPLACE FUNCTION histogram_add(a BIGINT[], b BIGINT[])
+RETURNS BIGINT[] AS $$
+    SELECT COALESCE(array_agg(COALESCE(a[i], 0) + COALESCE(b[i], 0) ORDER BY i), '{}')
+    FROM generate_series(1, GREATEST(COALESCE(array_length(a, 1), 0), COALESCE(array_length(b, 1), 0))) AS i
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE AGGREGATE histogram_sum(BIGINT[]) (
+    SFUNC = histogram_add,
+    STYPE = BIGINT[],
+    INITCOND = '{}'
+);
+
+-- Cria as partições diárias de p_from (hoje) até p_days_ahead dias à frente e as dos dias
+-- com linhas na partição DEFAULT (manutenção parada, relógio adiantado). As linhas do dia
+-- são movidas da DEFAULT para a nova partição antes de anexá-la; um dia que falhar é
+-- pulado (aviso) sem impedir os demais
+CREATE OR REPLACE FUNCTION ensure_metrics_partitions(p_days_ahead INTEGER DEFAULT 3,
+                                                     p_from DATE DEFAULT CURRENT_DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    v_day DATE;
+    v_name TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    FOR v_day IN
+        SELECT generate_series(p_from, CURRENT_DATE + p_days_ahead, INTERVAL '1 day')::DATE
+        UNION
+        SELECT DISTINCT timestamp::DATE FROM omie_api_metrics_default
+        ORDER BY 1
+    LOOP
+        v_name := 'omie_api_metrics_p' || to_char(v_day, 'YYYYMMDD');
+        IF to_regclass(v_name) IS NULL THEN
+            BEGIN
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE omie_api_metrics INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    v_name
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM omie_api_metrics_default
+                                    WHERE timestamp >= %L AND timestamp < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    v_day::TIMESTAMPTZ, (v_day + 1)::TIMESTAMPTZ, v_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE omie_api_metrics ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    v_name, v_day::TIMESTAMPTZ, (v_day + 1)::TIMESTAMPTZ
+                );
+                v_created := v_created + 1;
+            EXCEPTION WHEN OTHERS THEN
+                RAISE WARNING 'Partição % não criada: %', v_name, SQLERRM;
+            END;
+        END IF;
+    END LOOP;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Retenção: descarta partições diárias inteiras (sem DELETE nem VACUUM) mais antigas que p_retention_days
+-- e as linhas antigas que ficaram na partição DEFAULT
+CREATE OR REPLACE FUNCTION drop_old_metrics_partitions(p_retention_days INTEGER DEFAULT 30)
+RETURNS INTEGER AS $$
+DECLARE
+    v_partition RECORD;
+    v_dropped INTEGER := 0;
+BEGIN
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'omie_api_metrics'::regclass
+          AND c.relname ~ '^omie_api_metrics_p[0-9]{8}$'
+          AND to_date(substring(c.relname FROM '[0-9]{8}$'), 'YYYYMMDD') < CURRENT_DATE - p_retention_days
+    LOOP
+        EXECUTE format('DROP TABLE %I', v_partition.relname);
+        v_dropped := v_dropped + 1;
+    END LOOP;
+    DELETE FROM omie_api_metrics_default WHERE timestamp < CURRENT_DATE - p_retention_days;
+    RETURN v_dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Agrega incrementalmente as linhas brutas novas nos rollups de minuto e hora.
+-- Recalcula os minutos desde a última marca menos p_grace (linhas que chegam
+-- atrasadas pelo write-behind) e as horas que eles tocam; pode ser repetida
+CREATE OR REPLACE FUNCTION rollup_api_metrics(p_grace INTERVAL DEFAULT INTERVAL '5 minutes')
+RETURNS INTEGER AS $$
+DECLARE
+    v_from TIMESTAMPTZ;
+    v_to TIMESTAMPTZ := date_trunc('minute', NOW());  -- só minutos completos
+    v_rows INTEGER;
+BEGIN
+    SELECT watermark INTO v_from FROM metrics_rollup_state
+    WHERE name = 'omie_api_metrics' FOR UPDATE;
+    
+    IF v_from IS NULL THEN
+        v_from := COALESCE((SELECT date_trunc('minute', MIN(timestamp)) FROM omie_api_metrics), v_to);
+        INSERT INTO metrics_rollup_state (name, watermark) VALUES ('omie_api_metrics', v_from)
+        ON CONFLICT (name) DO NOTHING;
+    ELSE
+        v_from := v_from - p_grace;
+    END IF;
+    
+    DELETE FROM omie_api_metrics_1m WHERE bucket_start >= v_from AND bucket_start < v_to;
+    INSERT INTO omie_api_metrics_1m
+    SELECT bucket_start, endpoint, SUM(requests), SUM(successful), SUM(total_ms), MAX(max_ms),
+           histogram_sum(histogram_point(bucket, requests))
+    FROM (
+        SELECT date_trunc('minute', timestamp) AS bucket_start,
+               endpoint,
+               latency_bucket(response_time_ms) AS bucket,
+               COUNT(*) AS requests,
+               COUNT(*) FILTER (WHERE success) AS successful,
+               SUM(response_time_ms) AS total_ms,
+               MAX(response_time_ms) AS max_ms
+        FROM omie_api_metrics
+        WHERE timestamp >= v_from AND timestamp < v_to
+        GROUP BY 1, 2, 3
+    ) buckets
+    GROUP BY bucket_start, endpoint;
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    
+    -- Horas recalculadas a partir dos minutos (inclui a hora corrente, parcial)
+    DELETE FROM omie_api_metrics_1h
+    WHERE bucket_start >= date_trunc('hour', v_from) AND bucket_start < v_to;
+    INSERT INTO omie_api_metrics_1h
+    SELECT date_trunc('hour', bucket_start), endpoint, SUM(requests), SUM(successful_requests),
+           SUM(total_response_time_ms), MAX(max_response_time_ms), histogram_sum(latency_histogram)
+    FROM omie_api_metrics_1m
+    WHERE bucket_start >= date_trunc('hour', v_from) AND bucket_start < v_to
+    GROUP BY 1, 2;
+    
+    UPDATE metrics_rollup_state SET watermark = v_to, updated_at = NOW()
+    WHERE name = 'omie_api_metrics';
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,45 @@
+-- =============================================================================
+-- MIGRAÇÃO: omie_api_metrics particionada por dia + rollups
+-- Para bancos criados com a versão anterior de schema.sql (tabela única).
+-- Executar com psql a partir deste diretório:
+--     psql -d omie_mcp -f migrate_metrics_partitioning.sql
+-- A tabela antiga fica como omie_api_metrics_legacy (remover após conferir)
+-- =============================================================================
+
+BEGIN;
+
+ALTER TABLE omie_api_metrics RENAME TO omie_api_metrics_legacy;
+ALTER INDEX IF EXISTS idx_omie_metrics_endpoint_timestamp RENAME TO idx_omie_metrics_legacy_endpoint_timestamp;
+ALTER INDEX IF EXISTS idx_omie_metrics_success_timestamp RENAME TO idx_omie_metrics_legacy_success_timestamp;
+ALTER INDEX IF EXISTS idx_omie_metrics_process_id RENAME TO idx_omie_metrics_legacy_process_id;
+
+-- Mesmas colunas (o id continua usando a sequência da tabela antiga)
+CREATE TABLE omie_api_metrics (
+    LIKE omie_api_metrics_legacy INCLUDING DEFAULTS,
+    PRIMARY KEY (id, timestamp),
+    FOREIGN KEY (process_execution_id) REFERENCES process_executions(id)
+) PARTITION BY RANGE (timestamp);
+ALTER SEQUENCE omie_api_metrics_id_seq OWNED BY omie_api_metrics.id;
+
+CREATE TABLE omie_api_metrics_default PARTITION OF omie_api_metrics DEFAULT;
+
+CREATE INDEX idx_omie_metrics_endpoint_timestamp ON omie_api_metrics(endpoint, timestamp DESC);
+CREATE INDEX idx_omie_metrics_success_timestamp ON omie_api_metrics(success, timestamp DESC);
+CREATE INDEX idx_omie_metrics_process_id ON omie_api_metrics(process_execution_id);
+
+\ir metrics_rollups.sql
+
+-- Partições para a janela de retenção (30 dias) e os próximos 3 dias
+SELECT ensure_metrics_partitions(3, CURRENT_DATE - 30);
+
+INSERT INTO omie_api_metrics
+SELECT * FROM omie_api_metrics_legacy
+WHERE timestamp >= CURRENT_DATE - 30;
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO omie_user;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO omie_user;
+
+COMMIT;
+
+-- Rollups do histórico migrado
+SELECT rollup_api_metrics();
@@ -85,9 +85,9 @@ CREATE TABLE process_executions (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- 2. Métricas da API Omie
+-- 2. Métricas da API Omie (particionada por dia; ver ensure_metrics_partitions)
 CREATE TABLE omie_api_metrics (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     endpoint VARCHAR(200) NOT NULL,
     method VARCHAR(10) NOT NULL DEFAULT 'POST',
     
@@ -108,8 +108,14 @@ CREATE TABLE omie_api_metrics (
     process_execution_id UUID REFERENCES process_executions(id),
     
     -- Timestamp
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    
+    -- A chave de partição precisa fazer parte da chave primária
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Linhas fora das partições diárias criadas (relógio adiantado, manutenção atrasada)
+CREATE TABLE omie_api_metrics_default PARTITION OF omie_api_metrics DEFAULT;
 
 -- 3. Configurações do Sistema
 CREATE TABLE system_configurations (
@@ -308,6 +314,15 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- =============================================================================
+-- PARTIÇÕES E ROLLUPS DE MÉTRICAS
+-- =============================================================================
+
+-- Tabelas de rollup e funções de partição/agregação (também usadas pela migração)
+\ir metrics_rollups.sql
+
+SELECT ensure_metrics_partitions(3);
+
 -- =============================================================================
 -- VIEWS PARA RELATÓRIOS
 -- =============================================================================
@@ -398,12 +413,27 @@ BEGIN
     table_name := 'process_executions';
     RETURN NEXT;
     
-    -- Limpar omie_api_metrics > 30 dias
-    DELETE FROM omie_api_metrics WHERE timestamp < NOW() - INTERVAL '30 days';
-    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    -- omie_api_metrics > 30 dias: partições diárias inteiras (contagem = partições)
+    deleted_count := drop_old_metrics_partitions(30);
     table_name := 'omie_api_metrics';
     RETURN NEXT;
     
+    -- Rollups: minutos por 7 dias, horas por 1 ano
+    DELETE FROM omie_api_metrics_1m WHERE bucket_start < NOW() - INTERVAL '7 days';
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    table_name := 'omie_api_metrics_1m';
+    RETURN NEXT;
+    
+    DELETE FROM omie_api_metrics_1h WHERE bucket_start < NOW() - INTERVAL '1 year';
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    table_name := 'omie_api_metrics_1h';
+    RETURN NEXT;
+    
+    DELETE FROM api_latency_sketches WHERE bucket_start < NOW() - INTERVAL '30 days';
+    GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    table_name := 'api_latency_sketches';
+    RETURN NEXT;
+    
     -- Limpar integration_alerts resolvidos > 7 dias
     DELETE FROM integration_alerts 
     WHERE is_resolved = true AND resolved_at < NOW() - INTERVAL '7 days';
@@ -448,6 +478,9 @@ GRANT SELECT ON ALL SEQUENCES IN SCHEMA public TO omie_readonly;
 
 COMMENT ON TABLE process_executions IS 'Log completo de execuções de processos MCP com rastreabilidade total';
 COMMENT ON TABLE omie_api_metrics IS 'Métricas de performance da API Omie para monitoramento';
+COMMENT ON TABLE omie_api_metrics_1m IS 'Rollup por minuto de omie_api_metrics com histograma de latência';
+COMMENT ON TABLE omie_api_metrics_1h IS 'Rollup por hora de omie_api_metrics com histograma de latência';
+COMMENT ON TABLE api_latency_sketches IS 'Sketches de latência por processo/minuto/empresa/endpoint/call (registro em memória)';
 COMMENT ON TABLE system_configurations IS 'Configurações dinâmicas do sistema';
 COMMENT ON TABLE integration_alerts IS 'Sistema de alertas para falhas e problemas';
 COMMENT ON TABLE tool_usage_analytics IS 'Analytics agregadas de uso das tools';
@@ -469,6 +502,6 @@ COMMENT ON COLUMN tool_usage_analytics.success_rate IS 'Taxa de sucesso calculad
 -- 4. Executar este script: \i schema.sql
 
 \echo 'Schema Omie MCP criado com sucesso!'
-\echo 'Tabelas criadas: process_executions, omie_api_metrics, system_configurations, integration_alerts, tool_usage_analytics, audit_log, omie_data_cache'
+\echo 'Tabelas criadas: process_executions, omie_api_metrics (+ rollups 1m/1h), system_configurations, integration_alerts, tool_usage_analytics, audit_log, omie_data_cache'
 \echo 'Views criadas: v_active_processes, v_performance_metrics_1h, v_critical_alerts, v_top_tools_24h'
-\echo 'Funções criadas: update_tool_analytics, cleanup_old_data, cleanup_expired_cache'
\ No newline at end of file
+\echo 'Funções criadas: update_tool_analytics, cleanup_old_data, cleanup_expired_cache, rollup_api_metrics, ensure_metrics_partitions, drop_old_metrics_partitions'
\ No newline at end of file
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+📝 WRITE-BEHIND DAS MÉTRICAS E EXECUÇÕES DE PROCESSOS
+Os eventos (início/fim de processo, métrica de API) entram numa fila em
+memória limitada e um flusher em segundo plano grava em lote no PostgreSQL
+(COPY / executemany) e no Redis (pipeline). A tool não espera o banco: com
+o PostgreSQL lento a fila enche, quem enfileira espera um pouco
+(backpressure) e, passado esse limite, o evento é descartado e contado.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+# Tipos de evento
+PROCESS_START = "process_start"
+PROCESS_COMPLETE = "process_complete"
+API_METRIC = "api_metric"
+
+# Colunas gravadas por COPY em process_executions (início e, se já houver, conclusão)
+PROCESS_COLUMNS = (
+    "execution_id", "process_type", "status", "input_parameters", "omie_endpoint",
+    "user_agent", "ip_address", "fastmcp_session_id", "started_at", "completed_at",
+    "duration_ms", "response_data", "error_message", "error_code", "response_status_code",
+)
+
+# Conclusão de processos cujo início já foi gravado em lote anterior
+COMPLETE_PROCESS_SQL = """
+    UPDATE process_executions
+    SET status = $1,
+        completed_at = $2,
+        response_data = $3,
+        error_message = $4,
+        error_code = $5,
+        response_status_code = $6,
+        duration_ms = EXTRACT(EPOCH FROM ($2 - started_at)) * 1000,
+        updated_at = NOW()
+    WHERE execution_id = $7
+"""
+
+# process_execution_id é o UUID da execução: resolvido a partir do execution_id
+INSERT_API_METRIC_SQL = """
+    INSERT INTO omie_api_metrics
+    (endpoint, response_time_ms, status_code, success,
+     request_size_bytes, response_size_bytes, process_execution_id, timestamp)
+    VALUES ($1, $2, $3, $4, $5, $6,
+            (SELECT id FROM process_executions WHERE execution_id = $7), $8)
+"""
+
+# TTLs do Redis (iguais aos das gravações diretas)
+ACTIVE_PROCESS_TTL = 3600
+COMPLETED_PROCESS_TTL = 86400
+HOURLY_METRICS_TTL = 90000
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class WriteBehindBuffer:
+    """
+    Fila limitada de eventos gravados em lote.
+
+    `put` enfileira sem ir ao banco. O flusher grava a cada
+    `flush_interval` segundos ou assim que a fila junta `batch_rows`
+    eventos, chamando `write(eventos)` na ordem de chegada. Com a fila em
+    `max_rows`, `put` espera até `max_wait` segundos por espaço e depois
+    descarta o evento (contado em `dropped`).
+    """
+
+    def __init__(self, write: Callable[[List[Tuple[str, Dict[str, Any]]]], Awaitable[None]],
+                 max_rows: int = 10000, batch_rows: int = 500,
+                 flush_interval: float = 0.2, max_wait: float = 0.05, name: str = "write_buffer"):
+        self.write = write
+        self.max_rows = max_rows
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_wait = max_wait
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+
+        # Estatísticas
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.waited = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.failed_rows = 0
+        self.max_depth = 0
+        self.flush_seconds = 0.0
+
+    def _events(self):
+        # Criados sob demanda: dependem do loop em execução
+        if self._batch_ready is None:
+            self._batch_ready = asyncio.Event()
+            self._space = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        return self._batch_ready, self._space
+
+    async def put(self, kind: str, data: Dict[str, Any]) -> bool:
+        """Enfileira um evento; False se foi descartado por falta de espaço"""
+        batch_ready, space = self._events()
+        if len(self._queue) >= self.max_rows:
+            # Backpressure: espera o flusher abrir espaço, mas nunca mais que max_wait
+            self.waited += 1
+            batch_ready.set()
+            space.clear()
+            try:
+                await asyncio.wait_for(space.wait(), self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            if len(self._queue) >= self.max_rows:
+                self.dropped += 1
+                return False
+
+        self._queue.append((kind, data))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self._queue))
+        if len(self._queue) >= self.batch_rows:
+            batch_ready.set()
+        return True
+
+    def pending(self, kind: str, predicate: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """Eventos ainda não gravados que atendem ao filtro (mais recentes por último)"""
+        return [data for event_kind, data in self._queue if event_kind == kind and predicate(data)]
+
+    async def flush(self):
+        """Grava tudo que está na fila, em lotes de até batch_rows eventos"""
+        _, space = self._events()
+        async with self._flush_lock:
+            while self._queue:
+                count = min(self.batch_rows, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(count)]
+                space.set()
+                started = time.perf_counter()
+                try:
+                    await self.write(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    # Lote perdido: o banco não pode travar as tools nem acumular memória
+                    self.failed_batches += 1
+                    self.failed_rows += len(batch)
+                    self.logger.error(f"❌ Erro ao gravar lote de {len(batch)} eventos ({self.name}): {e}")
+                self.batches += 1
+                self.flush_seconds += time.perf_counter() - started
+
+    async def _run(self):
+        batch_ready, _ = self._events()
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            batch_ready.clear()
+            await self.flush()
+
+    def start(self) -> asyncio.Task:
+        """Inicia o flusher (requer loop em execução)"""
+        if self._task is None or self._task.done():
+            self._events()
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self):
+        """Para o flusher e grava o que restou na fila"""
+        if self._task is not None:
+            # Sem cancelar: um lote em gravação terminaria perdido
+            self._stopping = True
+            self._events()[0].set()
+            await self._task
+            self._task = None
+            self._stopping = False
+        await self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "capacity": self.max_rows,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "backpressure_waits": self.waited,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "failed_rows": self.failed_rows,
+            "avg_flush_ms": round(self.flush_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+class ProcessMetricsWriter:
+    """
+    Write-behind de process_executions e omie_api_metrics.
+
+    Início e fim do mesmo processo no mesmo lote viram uma única linha no
+    COPY (processos rápidos não passam por UPDATE); conclusões de processos
+    já gravados vão num executemany, e as métricas em outro. Os contadores
+    do Redis (processos ativos, métricas horárias) são agregados por lote e
+    enviados num pipeline. Uma falha do Redis depois do commit no PostgreSQL
+    não perde o lote: só os contadores daquele lote ficam de fora.
+    """
+
+    def __init__(self, db_manager, max_rows: int = 10000, batch_rows: int = 500,
+                 flush_interval: float = 0.2, max_wait: float = 0.05):
+        self.db = db_manager
+        self.buffer = WriteBehindBuffer(
+            self._write, max_rows=max_rows, batch_rows=batch_rows,
+            flush_interval=flush_interval, max_wait=max_wait, name="process_metrics"
+        )
+        self.logger = logging.getLogger(__name__)
+        self.redis_failed_batches = 0
+        self.redis_failed_rows = 0
+
+    async def process_started(self, execution_id: str, process_type: str, status: str,
+                              input_params: Dict[str, Any], omie_endpoint: Optional[str] = None,
+                              user_context: Optional[Dict[str, Any]] = None) -> bool:
+        user_context = user_context or {}
+        return await self.buffer.put(PROCESS_START, {
+            "execution_id": execution_id,
+            "process_type": process_type,
+            "status": status,
+            "input_parameters": json.dumps(input_params, default=str),
+            "input_params": input_params,
+            "omie_endpoint": omie_endpoint,
+            "user_agent": user_context.get("user_agent"),
+            "ip_address": user_context.get("ip_address"),
+            "fastmcp_session_id": user_context.get("session_id"),
+            "started_at": utcnow(),
+        })
+
+    async def process_completed(self, execution_id: str, status: str,
+                                response_data: Optional[Dict[str, Any]] = None,
+                                error_message: Optional[str] = None, error_code: Optional[str] = None,
+                                status_code: Optional[int] = None) -> bool:
+        return await self.buffer.put(PROCESS_COMPLETE, {
+            "execution_id": execution_id,
+            "status": status,
+            "completed_at": utcnow(),
+            "response_data": json.dumps(response_data, default=str) if response_data else None,
+            "error_message": error_message,
+            "error_code": error_code,
+            "response_status_code": status_code,
+        })
+
+    async def api_metric(self, metric) -> bool:
+        return await self.buffer.put(API_METRIC, {
+            "endpoint": metric.endpoint,
+            "response_time_ms": metric.response_time_ms,
+            "status_code": metric.status_code,
+            "success": metric.success,
+            "request_size_bytes": metric.request_size_bytes,
+            "response_size_bytes": metric.response_size_bytes,
+            "process_execution_id": metric.process_execution_id,
+            "timestamp": utcnow(),
+            "hour": datetime.now().hour,
+        })
+
+    def pending_process(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Status de um processo que ainda está na fila (None se já foi gravado)"""
+        match = lambda data: data["execution_id"] == execution_id
+        completed = self.buffer.pending(PROCESS_COMPLETE, match)
+        if completed:
+            return {"status": completed[-1]["status"], "completed_at": completed[-1]["completed_at"].isoformat()}
+        started = self.buffer.pending(PROCESS_START, match)
+        if started:
+            return {"status": started[-1]["status"], "started_at": started[-1]["started_at"].isoformat(),
+                    "process_type": started[-1]["process_type"], "input_params": started[-1]["input_params"]}
+        return None
+
+    @staticmethod
+    def plan_batch(events: List[Tuple[str, Dict[str, Any]]]):
+        """Separa o lote em linhas do COPY, conclusões (UPDATE) e métricas"""
+        starts: Dict[str, Dict[str, Any]] = {}
+        completions: List[Dict[str, Any]] = []
+        metrics: List[Dict[str, Any]] = []
+
+        for kind, data in events:
+            if kind == PROCESS_START:
+                starts[data["execution_id"]] = dict(data)
+            elif kind == PROCESS_COMPLETE:
+                row = starts.get(data["execution_id"])
+                if row is None:
+                    completions.append(data)
+                    continue
+                # Início ainda não gravado: a conclusão entra na mesma linha
+                row.update(data)
+                row["duration_ms"] = int((data["completed_at"] - row["started_at"]).total_seconds() * 1000)
+            elif kind == API_METRIC:
+                metrics.append(data)
+        return list(starts.values()), completions, metrics
+
+    async def _write(self, events: List[Tuple[str, Dict[str, Any]]]):
+        rows, completions, metrics = self.plan_batch(events)
+
+        # Início antes das métricas: a subconsulta do process_execution_id precisa da linha
+        async with self.db.pg_pool.acquire() as conn:
+            async with conn.transaction():
+                if rows:
+                    await conn.copy_records_to_table(
+                        "process_executions",
+                        records=[tuple(row.get(column) for column in PROCESS_COLUMNS) for row in rows],
+                        columns=PROCESS_COLUMNS,
+                    )
+                if completions:
+                    await conn.executemany(COMPLETE_PROCESS_SQL, [
+                        (c["status"], c["completed_at"], c["response_data"], c["error_message"],
+                         c["error_code"], c["response_status_code"], c["execution_id"])
+                        for c in completions
+                    ])
+                if metrics:
+                    await conn.executemany(INSERT_API_METRIC_SQL, [
+                        (m["endpoint"], m["response_time_ms"], m["status_code"], m["success"],
+                         m["request_size_bytes"], m["response_size_bytes"],
+                         m["process_execution_id"], m["timestamp"])
+                        for m in metrics
+                    ])
+
+        if self.db.redis is None:
+            return
+        try:
+            await self._write_redis(rows, completions, metrics)
+        except Exception as e:
+            # Linhas já gravadas no PostgreSQL: o lote não conta como perdido
+            self.redis_failed_batches += 1
+            self.redis_failed_rows += len(events)
+            self.logger.warning(f"⚠️ Contadores do Redis não atualizados para {len(events)} eventos: {e}")
+
+    async def _write_redis(self, rows, completions, metrics):
+        pipe = self.db.redis.pipeline(transaction=False)
+        active_delta = 0
+
+        for row in rows:
+            if row.get("completed_at") is None:
+                active_delta += 1
+                pipe.setex(f"process:{row['execution_id']}", ACTIVE_PROCESS_TTL, json.dumps({
+                    "status": row["status"],
+                    "started_at": row["started_at"].isoformat(),
+                    "process_type": row["process_type"],
+                    "input_params": row["input_params"],
+                }, default=str))
+            else:
+                pipe.setex(f"process:{row['execution_id']}", COMPLETED_PROCESS_TTL,
+                           json.dumps(self._completed_cache(row, row["duration_ms"])))
+        for completion in completions:
+            active_delta -= 1
+            pipe.setex(f"process:{completion['execution_id']}", COMPLETED_PROCESS_TTL,
+                       json.dumps(self._completed_cache(completion, 0)))
+        if active_delta:
+            pipe.incrby("active_processes_count", active_delta)
+
+        hourly: Dict[str, Dict[str, int]] = {}
+        for metric in metrics:
+            counters = hourly.setdefault(f"metrics:hourly:{metric['endpoint']}:{metric['hour']}",
+                                         {"count": 0, "total_time": 0, "success_count": 0})
+            counters["count"] += 1
+            counters["total_time"] += metric["response_time_ms"]
+            counters["success_count"] += 1 if metric["success"] else 0
+        for key, counters in hourly.items():
+            for field, amount in counters.items():
+                if amount:
+                    pipe.hincrby(key, field, amount)
+            pipe.expire(key, HOURLY_METRICS_TTL)
+
+        await pipe.execute()
+
+    @staticmethod
+    def _completed_cache(data: Dict[str, Any], duration_ms: int) -> Dict[str, Any]:
+        return {
+            "status": data["status"],
+            "completed_at": data["completed_at"].isoformat(),
+            "success": data["status"] == "completed",
+            "duration_ms": duration_ms,
+        }
+
+    def start(self):
+        return self.buffer.start()
+
+    async def stop(self):
+        await self.buffer.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.buffer.get_stats(),
+            "redis_failed_batches": self.redis_failed_batches,
+            "redis_failed_rows": self.redis_failed_rows,
+        }
@@ -0,0 +1,271 @@
+"""
+Sincronização incremental de cadastros Omie
+Busca apenas os registros alterados desde o último watermark
+(filtrar_por_data_de/ate) e aplica no snapshot local
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterable, Set, Tuple
+
+from src.client.omie_endpoints import get_call
+from src.client.paginator import OmiePaginator
+from src.sync.snapshot_store import SnapshotStore, only_digits
+from src.utils.logger import logger
+
+# Registros gravados no SQLite por transação
+UPSERT_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class SyncEntity:
+    """Entidade Omie mantida no snapshot"""
+    name: str
+    method: str                       # nome no registro de chamadas
+    id_field: str
+    name_field: str
+    integration_field: Optional[str] = None
+    document_field: Optional[str] = None
+    city_field: Optional[str] = None
+    inactive_field: str = "inativo"
+    supports_delta: bool = True       # aceita filtrar_por_data_de/ate
+    extra_param: Tuple[Tuple[str, Any], ...] = ()
+
+
+SYNC_ENTITIES: Dict[str, SyncEntity] = {
+    "clientes": SyncEntity(
+        name="clientes",
+        method="consultar_clientes",
+        id_field="codigo_cliente_omie",
+        name_field="razao_social",
+        integration_field="codigo_cliente_integracao",
+        document_field="cnpj_cpf",
+        city_field="cidade"
+    ),
+    "fornecedores": SyncEntity(
+        name="fornecedores",
+        method="consultar_clientes",
+        id_field="codigo_cliente_omie",
+        name_field="razao_social",
+        integration_field="codigo_cliente_integracao",
+        document_field="cnpj_cpf",
+        city_field="cidade",
+        extra_param=(("clientesFornecedores", "F"),)
+    ),
+    # Cadastros pequenos sem filtro por data: recarga completa com aplicação de diferenças
+    "categorias": SyncEntity(
+        name="categorias",
+        method="consultar_categorias",
+        id_field="codigo",
+        name_field="descricao",
+        inactive_field="conta_inativa",
+        supports_delta=False
+    ),
+    "contas_correntes": SyncEntity(
+        name="contas_correntes",
+        method="consultar_contas_correntes",
+        id_field="nCodCC",
+        name_field="descricao",
+        integration_field="cCodCCInt",
+        supports_delta=False
+    ),
+}
+
+
+def _to_row(spec: SyncEntity, record: Dict[str, Any]) -> Optional[tuple]:
+    record_id = record.get(spec.id_field)
+    if record_id in (None, ""):
+        return None
+
+    integration = record.get(spec.integration_field) if spec.integration_field else None
+    document = only_digits(record.get(spec.document_field)) if spec.document_field else ""
+    return (
+        str(record_id),
+        str(integration) if integration else None,
+        document,
+        str(record.get(spec.name_field) or "").lower(),
+        str(record.get(spec.city_field) or "").lower() if spec.city_field else "",
+        record.get(spec.inactive_field) == "S",
+        record
+    )
+
+
+class DeltaSyncEngine:
+    """
+    Mantém o snapshot de cadastros atualizado.
+
+    A primeira execução (e uma a cada `full_resync_hours`) é completa e
+    remove do snapshot os registros que sumiram do Omie; as demais pedem ao
+    Omie apenas o que foi incluído/alterado desde o watermark. O filtro do
+    Omie tem granularidade de dia, então o dia do watermark é rebuscado
+    (upserts são idempotentes).
+
+    Registrado no CacheInvalidator como um cache: escritas e webhooks que
+    tocam o endpoint de uma entidade a marcam como obsoleta, e a próxima
+    leitura vai ao Omie e dispara a sincronização incremental.
+    """
+
+    def __init__(self, client, store: SnapshotStore, paginator: Optional[OmiePaginator] = None,
+                 sync_interval: int = 300, full_resync_hours: int = 24,
+                 company: Optional[str] = None):
+        self.client = client
+        # Namespace da empresa do snapshot: invalidações de outras empresas são ignoradas
+        self.company = company
+        self.store = store
+        self.paginator = paginator or OmiePaginator(client)
+        self.sync_interval = sync_interval
+        self.full_resync_seconds = full_resync_hours * 3600
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stale: Set[str] = set()
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+
+    def _needs_full(self, spec: SyncEntity, state: Optional[Dict[str, Any]]) -> bool:
+        if not spec.supports_delta or not state or not state.get("watermark"):
+            return True
+        last_full = state.get("last_full_run") or 0
+        return time.time() - last_full >= self.full_resync_seconds
+
+    async def _run(self, spec: SyncEntity, force_full: bool) -> Dict[str, Any]:
+        # Escritas a partir daqui voltam a marcar a entidade
+        self._stale.discard(spec.name)
+        call = get_call(spec.method)
+        state = self.store.get_state(spec.name)
+        full = force_full or self._needs_full(spec, state)
+
+        started = time.time()
+        today = datetime.now().strftime("%d/%m/%Y")
+
+        param: Dict[str, Any] = {call.page_size_key: 500, **dict(spec.extra_param)}
+        if not full:
+            param["filtrar_por_data_de"] = state["watermark"]
+            param["filtrar_por_data_ate"] = today
+
+        upserted = 0
+        chunk: List[tuple] = []
+        async for record in self.paginator.iter_records(call.endpoint, call.call, param):
+            row = _to_row(spec, record)
+            if row is None:
+                continue
+            chunk.append(row)
+            if len(chunk) >= UPSERT_CHUNK:
+                upserted += self.store.upsert_many(spec.name, chunk)
+                chunk = []
+        upserted += self.store.upsert_many(spec.name, chunk)
+
+        # Só a sincronização completa enxerga exclusões definitivas
+        removed = self.store.delete_not_synced_since(spec.name, started) if full else 0
+
+        self.store.set_state(spec.name, today, started, full=full)
+
+        result = {
+            "entidade": spec.name,
+            "modo": "completa" if full else "incremental",
+            "desde": None if full else state["watermark"],
+            "atualizados": upserted,
+            "removidos": removed,
+            "total_snapshot": self.store.count(spec.name),
+            "tempo_segundos": round(time.time() - started, 2)
+        }
+        self.last_results[spec.name] = result
+        logger.info(
+            f"Sync {spec.name} ({result['modo']}): {upserted} atualizados, {removed} removidos"
+        )
+        return result
+
+    async def sync(self, entity: str, force_full: bool = False) -> Dict[str, Any]:
+        """Sincroniza uma entidade (chamadas simultâneas compartilham a mesma execução)"""
+        spec = SYNC_ENTITIES.get(entity)
+        if spec is None:
+            raise ValueError(f"Entidade não suportada: {entity}. Use: {', '.join(SYNC_ENTITIES)}")
+
+        task = self._running.get(entity)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._run(spec, force_full))
+            self._running[entity] = task
+            task.add_done_callback(lambda t, e=entity: self._finished(e, t))
+        return await asyncio.shield(task)
+
+    def _finished(self, entity: str, task: asyncio.Task):
+        self._running.pop(entity, None)
+        if task.cancelled() or task.exception() is not None:
+            self._stale.add(entity)
+
+    async def sync_all(self, force_full: bool = False) -> Dict[str, Any]:
+        """Sincroniza todas as entidades"""
+        results = {}
+        for entity in SYNC_ENTITIES:
+            try:
+                results[entity] = await self.sync(entity, force_full)
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar {entity}: {e}")
+                results[entity] = {"entidade": entity, "erro": str(e)}
+        return results
+
+    def has_snapshot(self, entity: str) -> bool:
+        """Indica se a entidade já teve ao menos uma sincronização concluída"""
+        return self.store.get_state(entity) is not None
+
+    def is_stale(self, entity: str) -> bool:
+        """Entidade alterada no Omie (escrita ou webhook) depois da última sincronização"""
+        return entity in self._stale
+
+    def is_fresh(self, entity: str) -> bool:
+        if entity in self._stale:
+            return False
+        state = self.store.get_state(entity)
+        return bool(state) and time.time() - (state.get("last_run") or 0) < self.sync_interval
+
+    def invalidate_tags(self, tags: Iterable[str], company: Optional[str] = None) -> int:
+        """Marca como obsoletas as entidades servidas pelos endpoints (tags do cache)"""
+        if company and self.company and company != self.company:
+            return 0
+        tags = set(tags)
+        marked = [name for name, spec in SYNC_ENTITIES.items() if get_call(spec.method).endpoint in tags]
+        self._stale.update(marked)
+        return 0
+
+    def refresh_in_background(self, entity: str):
+        """Dispara sincronização incremental se o snapshot estiver desatualizado"""
+        if self.is_fresh(entity) or entity in self._running:
+            return
+
+        async def _background():
+            try:
+                await self.sync(entity)
+            except Exception as e:
+                logger.warning(f"Sincronização em segundo plano de {entity} falhou: {e}")
+
+        asyncio.ensure_future(_background())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado do snapshot por entidade"""
+        stats = {}
+        for entity in SYNC_ENTITIES:
+            state = self.store.get_state(entity) or {}
+            stats[entity] = {
+                "registros": state.get("records", 0),
+                "watermark": state.get("watermark"),
+                "ultima_execucao": datetime.fromtimestamp(state["last_run"]).isoformat() if state.get("last_run") else None,
+                "atualizado": self.is_fresh(entity),
+                "obsoleto": self.is_stale(entity),
+                "sincronizando": entity in self._running
+            }
+        return stats
+
+
+def create_sync_engine(client, paginator: Optional[OmiePaginator] = None) -> DeltaSyncEngine:
+    """Cria o motor de sincronização a partir da configuração unificada"""
+    from src.config import config
+    from src.cache.shared_tier import company_namespace
+
+    store = SnapshotStore(config.omie_snapshot_path)
+    return DeltaSyncEngine(
+        client,
+        store,
+        paginator=paginator,
+        sync_interval=config.omie_sync_interval,
+        full_resync_hours=config.omie_full_resync_hours,
+        company=company_namespace(config.omie_app_key)
+    )
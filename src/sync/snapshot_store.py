@@ -0,0 +1,196 @@
+"""
+Snapshot local (SQLite) dos cadastros Omie
+Guarda os registros sincronizados e o estado (watermark) de cada entidade
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot_records (
+    entity TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    integration_code TEXT,
+    document TEXT,
+    name TEXT,
+    city TEXT,
+    inactive INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (entity, record_id)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshot_integration ON snapshot_records (entity, integration_code);
+CREATE INDEX IF NOT EXISTS idx_snapshot_document ON snapshot_records (entity, document);
+
+CREATE TABLE IF NOT EXISTS snapshot_state (
+    entity TEXT PRIMARY KEY,
+    watermark TEXT,
+    last_run REAL,
+    last_full_run REAL,
+    records INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def only_digits(value: Any) -> str:
+    """Remove pontuação de CNPJ/CPF para comparação"""
+    return re.sub(r"[^0-9]", "", str(value or ""))
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SnapshotStore:
+    """
+    Armazém SQLite dos registros Omie por entidade.
+
+    As consultas são síncronas e levam poucos milissegundos; uma única
+    conexão é compartilhada e protegida por lock.
+    """
+
+    def __init__(self, path: str = "cache/omie_snapshot.db"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def upsert_many(self, entity: str, rows: Iterable[Tuple[str, Optional[str], str, str, str, bool, Dict[str, Any]]]) -> int:
+        """Insere/atualiza registros: (id, integração, documento, nome, cidade, inativo, dados)"""
+        now = time.time()
+        params = [
+            (entity, record_id, integration, document, name, city, int(inactive),
+             json.dumps(data, ensure_ascii=False), now)
+            for record_id, integration, document, name, city, inactive, data in rows
+        ]
+        if not params:
+            return 0
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                """INSERT INTO snapshot_records
+                   (entity, record_id, integration_code, document, name, city, inactive, data, synced_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (entity, record_id) DO UPDATE SET
+                       integration_code = excluded.integration_code,
+                       document = excluded.document,
+                       name = excluded.name,
+                       city = excluded.city,
+                       inactive = excluded.inactive,
+                       data = excluded.data,
+                       synced_at = excluded.synced_at""",
+                params
+            )
+            self._conn.execute("COMMIT")
+        return len(params)
+
+    def delete_not_synced_since(self, entity: str, since: float) -> int:
+        """Remove registros que não apareceram na última sincronização completa"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM snapshot_records WHERE entity = ? AND synced_at < ?", (entity, since)
+            )
+            return cursor.rowcount
+
+    def set_state(self, entity: str, watermark: Optional[str], last_run: float,
+                  full: bool = False):
+        """Atualiza o watermark e a contagem da entidade"""
+        with self._lock:
+            records = self._conn.execute(
+                "SELECT COUNT(*) FROM snapshot_records WHERE entity = ?", (entity,)
+            ).fetchone()[0]
+            self._conn.execute(
+                """INSERT INTO snapshot_state (entity, watermark, last_run, last_full_run, records)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (entity) DO UPDATE SET
+                       watermark = excluded.watermark,
+                       last_run = excluded.last_run,
+                       last_full_run = COALESCE(excluded.last_full_run, snapshot_state.last_full_run),
+                       records = excluded.records""",
+                (entity, watermark, last_run, last_run if full else None, records)
+            )
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get_state(self, entity: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM snapshot_state WHERE entity = ?", (entity,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, entity: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Busca pelo código Omie"""
+        return self._fetch_one("record_id = ?", (entity, str(record_id)))
+
+    def get_by_integration_code(self, entity: str, code: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one("integration_code = ?", (entity, code))
+
+    def get_by_document(self, entity: str, document: str) -> Optional[Dict[str, Any]]:
+        return self._fetch_one("document = ?", (entity, only_digits(document)))
+
+    def _fetch_one(self, where: str, params: tuple) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM snapshot_records WHERE entity = ? AND {where} LIMIT 1", params
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def query(self, entity: str, name: Optional[str] = None, city: Optional[str] = None,
+              only_active: bool = False, offset: int = 0,
+              limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """Lista registros filtrados; retorna (página, total filtrado)"""
+        where = ["entity = ?"]
+        params: List[Any] = [entity]
+
+        if name:
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(name.lower())}%")
+        if city:
+            where.append("city LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(city.lower())}%")
+        if only_active:
+            where.append("inactive = 0")
+
+        clause = " AND ".join(where)
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM snapshot_records WHERE {clause}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT data FROM snapshot_records WHERE {clause} ORDER BY name LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        return [json.loads(row["data"]) for row in rows], total
+
+    def count(self, entity: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM snapshot_records WHERE entity = ?", (entity,)
+            ).fetchone()[0]
@@ -0,0 +1,346 @@
+"""
+Circuit breaker e requisições hedge por upstream (Omie, Nibo, UCM)
+Cada endpoint de um upstream tem seu próprio circuito: com muitas falhas
+transitórias (ou chamadas lentas) na janela recente ele abre e as chamadas
+falham na hora, em vez de esperar o timeout inteiro; depois de um intervalo
+algumas chamadas de teste (meio-aberto) decidem se ele fecha de novo.
+Leituras podem ser hedge: se a resposta passa do p95 observado do endpoint,
+uma segunda requisição é disparada e vale a primeira que responder.
+Copiado para o Nibo MCP (nibo-mcp/src/utils/shared/)
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import logging
+
+from src.utils.rate_limiter import endpoint_key
+from src.utils.retry import RetryBudget, classify_failure, THROTTLED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Estados do circuito
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem ir ao upstream: o circuito do endpoint está aberto"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuito aberto para {name}; nova tentativa em {math.ceil(retry_in)}s")
+
+
+class CircuitBreaker:
+    """
+    Circuito de um endpoint.
+
+    Fechado: conta os resultados das últimas `window` chamadas e abre quando,
+    com pelo menos `min_calls` resultados, a fração de falhas (incluindo
+    chamadas acima de `slow_call_seconds`) chega a `failure_rate`.
+    Aberto: recusa chamadas por `open_seconds`. Meio-aberto: deixa passar
+    `half_open_probes` chamadas de teste; se todas derem certo fecha, se
+    alguma falhar abre de novo.
+
+    Cada mudança de estado inicia uma nova geração. `allow()` devolve a
+    geração em que a chamada foi admitida e `record()`/`release()` ignoram,
+    para a decisão de estado, resultados de gerações anteriores: uma chamada
+    lenta admitida com o circuito fechado não conta como teste do meio-aberto
+    nem reabre um circuito que já mudou de estado.
+    """
+
+    def __init__(self, name: str, failure_rate: float = 0.5, window: int = 20, min_calls: int = 5,
+                 open_seconds: float = 30.0, half_open_probes: int = 1, slow_call_seconds: float = 0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.slow_call_seconds = slow_call_seconds
+        self.clock = clock
+
+        self.state = CLOSED
+        self.results: Deque[bool] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.generation = 0
+        self._probes_started = 0
+        self._probes_ok = 0
+
+        # Estatísticas
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - self.clock())
+
+    def _transition(self, state: str):
+        self.state = state
+        self.generation += 1
+
+    def allow(self) -> Optional[int]:
+        """Reserva a passagem de uma chamada: a geração atual, ou None para recusar sem chamar o upstream"""
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                self.rejected += 1
+                return None
+            self._transition(HALF_OPEN)
+            self._probes_started = self._probes_ok = 0
+
+        if self.state == HALF_OPEN:
+            if self._probes_started >= self.half_open_probes:
+                self.rejected += 1
+                return None
+            self._probes_started += 1
+        return self.generation
+
+    def record(self, ok: bool, elapsed: float = 0.0, generation: Optional[int] = None):
+        """Resultado de uma chamada que passou por allow() (na geração que ela devolveu)"""
+        self.calls += 1
+        if ok and self.slow_call_seconds and elapsed >= self.slow_call_seconds:
+            self.slow_calls += 1
+            ok = False
+        if not ok:
+            self.failures += 1
+
+        if generation is not None and generation != self.generation:
+            return
+
+        if self.state == HALF_OPEN:
+            if not ok:
+                self._open()
+                return
+            self._probes_ok += 1
+            if self._probes_ok >= self.half_open_probes:
+                logger.info(f"Circuito de {self.name} fechado")
+                self._transition(CLOSED)
+                self.results.clear()
+            return
+
+        self.results.append(ok)
+        if self.state == CLOSED and len(self.results) >= self.min_calls:
+            failed = self.results.count(False)
+            if failed / len(self.results) >= self.failure_rate:
+                self._open()
+
+    def release(self, generation: Optional[int] = None):
+        """Chamada reservada que terminou sem resultado (cancelada, falha determinística)"""
+        if generation is not None and generation != self.generation:
+            return
+        if self.state == HALF_OPEN and self._probes_started > self._probes_ok:
+            self._probes_started -= 1
+
+    def _open(self):
+        self._transition(OPEN)
+        self.opened_at = self.clock()
+        self.opened += 1
+        self.results.clear()
+        logger.warning(f"Circuito de {self.name} aberto por {self.open_seconds:.0f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        # Um circuito aberto cujo intervalo já passou aparece como meio-aberto
+        state = HALF_OPEN if self.state == OPEN and self.retry_in() <= 0 else self.state
+        stats = {
+            "state": state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "opened": self.opened,
+            "window_failures": self.results.count(False),
+            "window_calls": len(self.results),
+        }
+        if state == OPEN:
+            stats["retry_in_seconds"] = round(self.retry_in(), 1)
+        return stats
+
+
+class LatencyWindow:
+    """Latências recentes de um endpoint (segundos) para o atraso do hedge"""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self._sorted: Optional[list] = None
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self._sorted = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+
+class UpstreamGuard:
+    """
+    Circuitos e hedge das chamadas a um upstream.
+
+    `call(endpoint, func)` executa `func()` pelo circuito do endpoint.
+    Falhas transitórias (classify_failure) abrem o circuito; throttling não
+    conta (o limitador adaptativo já reage a ele) e faults determinísticos
+    contam como upstream saudável. Com hedge ligado, leituras que passam do
+    quantil `hedge_quantile` das latências do endpoint ganham uma segunda
+    requisição; o total de hedges é limitado a `hedge_ratio` das chamadas.
+    """
+
+    def __init__(self, upstream: str, hedge_enabled: bool = False, hedge_quantile: float = 0.95,
+                 hedge_min_delay: float = 0.05, hedge_min_samples: int = 20, hedge_ratio: float = 0.1,
+                 classify: Callable[[BaseException], Optional[str]] = classify_failure,
+                 clock: Callable[[], float] = time.monotonic, **breaker_options):
+        self.upstream = upstream
+        self.hedge_enabled = hedge_enabled
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget = RetryBudget(ratio=hedge_ratio, min_per_second=0, capacity=5)
+        self.classify = classify
+        self.clock = clock
+        self.breaker_options = breaker_options
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyWindow] = {}
+
+        # Estatísticas de hedge
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_denied = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        key = endpoint_key(endpoint)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(
+                f"{self.upstream} {key}", clock=self.clock, **self.breaker_options
+            )
+        return breaker
+
+    def hedge_delay(self, endpoint: str) -> Optional[float]:
+        """Atraso do hedge (quantil das latências), ou None sem amostras suficientes"""
+        window = self.latencies.get(endpoint_key(endpoint))
+        if window is None or len(window.samples) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, window.quantile(self.hedge_quantile))
+
+    async def call(self, endpoint: str, func: Callable[[], Awaitable[T]],
+                   idempotent: bool = True, hedge: Optional[bool] = None) -> T:
+        """Executa `func()` pelo circuito do endpoint (levanta CircuitOpenError se aberto)"""
+        breaker = self.breaker(endpoint)
+        generation = breaker.allow()
+        if generation is None:
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+
+        hedge = self.hedge_enabled if hedge is None else hedge
+        delay = self.hedge_delay(endpoint) if hedge and idempotent else None
+        started = self.clock()
+        try:
+            result = await (self._hedged(func, delay) if delay is not None else func())
+        except asyncio.CancelledError:
+            breaker.release(generation)
+            raise
+        except Exception as e:
+            reason = self.classify(e)
+            if reason is None or reason == THROTTLED:
+                breaker.release(generation)
+            else:
+                breaker.record(False, generation=generation)
+            raise
+
+        elapsed = self.clock() - started
+        breaker.record(True, elapsed, generation)
+        window = self.latencies.get(endpoint_key(endpoint))
+        if window is None:
+            window = self.latencies[endpoint_key(endpoint)] = LatencyWindow()
+        window.record(elapsed)
+        return result
+
+    async def _hedged(self, func: Callable[[], Awaitable[T]], delay: float) -> T:
+        """Primeira resposta bem-sucedida entre a requisição e o hedge disparado após `delay`"""
+        self.hedge_budget.record_call()
+        tasks = [asyncio.ensure_future(func())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return tasks[0].result()
+            if not self.hedge_budget.try_spend():
+                self.hedge_denied += 1
+                return await tasks[0]
+
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(func()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is tasks[1]:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        breakers = {key: breaker.get_stats() for key, breaker in sorted(self.breakers.items())}
+        return {
+            "upstream": self.upstream,
+            "open": sorted(key for key, stats in breakers.items() if stats["state"] == OPEN),
+            "hedge": {
+                "enabled": self.hedge_enabled,
+                "quantile": self.hedge_quantile,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "denied": self.hedge_denied,
+            },
+            "endpoints": {
+                key: {**stats, "p95_ms": _ms(self.latencies[key].quantile(0.95)) if key in self.latencies else None}
+                for key, stats in breakers.items()
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def create_upstream_guard(prefix: str, upstream: str, slow_call_seconds: float = 0,
+                          hedge_enabled: bool = False) -> UpstreamGuard:
+    """Circuitos configurados pelas variáveis <PREFIXO>_BREAKER_* e <PREFIXO>_HEDGE_*"""
+    hedge = os.getenv(f"{prefix}_HEDGE_ENABLED", "true" if hedge_enabled else "false").lower() == "true"
+    return UpstreamGuard(
+        upstream,
+        hedge_enabled=hedge,
+        hedge_quantile=float(os.getenv(f"{prefix}_HEDGE_QUANTILE", "0.95")),
+        hedge_min_delay=float(os.getenv(f"{prefix}_HEDGE_MIN_DELAY", "0.05")),
+        hedge_ratio=float(os.getenv(f"{prefix}_HEDGE_RATIO", "0.1")),
+        failure_rate=float(os.getenv(f"{prefix}_BREAKER_FAILURE_RATE", "0.5")),
+        window=int(os.getenv(f"{prefix}_BREAKER_WINDOW", "20")),
+        min_calls=int(os.getenv(f"{prefix}_BREAKER_MIN_CALLS", "5")),
+        open_seconds=float(os.getenv(f"{prefix}_BREAKER_OPEN_SECONDS", "30")),
+        half_open_probes=int(os.getenv(f"{prefix}_BREAKER_HALF_OPEN_PROBES", "1")),
+        slow_call_seconds=float(os.getenv(f"{prefix}_BREAKER_SLOW_CALL_SECONDS", str(slow_call_seconds))),
+    )
+
+
+# Circuitos das chamadas Omie. O Omie acusa "consumo redundante" em requisições
+# idênticas repetidas, por isso o hedge fica desligado por padrão (OMIE_HEDGE_ENABLED)
+omie_guard = create_upstream_guard("OMIE", "omie", slow_call_seconds=20)
+
+# Circuito do Universal Credentials Manager (falha rápido para o credentials.json local)
+ucm_guard = create_upstream_guard("UCM", "ucm", slow_call_seconds=5)
@@ -0,0 +1,162 @@
+"""
+Histograma de latência em buckets logarítmicos
+O bucket i cobre de 1,2^i a 1,2^(i+1) ms, com erro relativo de até ~10% nos
+quantis. Histogramas com os mesmos buckets se somam elemento a elemento, de
+modo que p50/p95/p99 de um período saem da soma dos histogramas de minutos
+ou horas, sem as amostras. Mesma escala das funções latency_bucket() e
+histogram_sum() de src/database/schema.sql
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+HISTOGRAM_BASE = 1.2
+HISTOGRAM_BUCKETS = 64  # último bucket a partir de ~97 s (acima do timeout do Omie)
+
+_LOG_BASE = math.log(HISTOGRAM_BASE)
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def bucket_index(ms: float) -> int:
+    """Bucket da latência (ms)"""
+    if ms <= 1:
+        return 0
+    return min(HISTOGRAM_BUCKETS - 1, int(math.log(ms) / _LOG_BASE))
+
+
+def bucket_value(index: int) -> float:
+    """Valor representativo do bucket: média geométrica dos limites"""
+    if index == 0:
+        return 1.0
+    return HISTOGRAM_BASE ** (index + 0.5)
+
+
+def empty_histogram() -> List[int]:
+    return [0] * HISTOGRAM_BUCKETS
+
+
+def record(histogram: List[int], ms: float, count: int = 1):
+    histogram[bucket_index(ms)] += count
+
+
+def merge(histograms: Iterable[Optional[Sequence[int]]]) -> List[int]:
+    """Soma elemento a elemento (histogramas None ou mais curtos são aceitos)"""
+    total = empty_histogram()
+    for histogram in histograms:
+        for index, count in enumerate(histogram or ()):
+            if count:
+                total[min(index, HISTOGRAM_BUCKETS - 1)] += count
+    return total
+
+
+def quantile(histogram: Sequence[int], q: float) -> Optional[float]:
+    """Latência (ms) do quantil q, ou None se o histograma está vazio"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        cumulative += count
+        if cumulative >= rank:
+            return bucket_value(index)
+    return bucket_value(len(histogram) - 1)
+
+
+def quantiles(histogram: Sequence[int], qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+    """{'p50': ..., 'p95': ..., 'p99': ...} arredondados em ms"""
+    result = {}
+    for q in qs:
+        value = quantile(histogram, q)
+        result[f"p{q * 100:g}"] = round(value, 1) if value is not None else None
+    return result
+
+
+class LatencySketch:
+    """
+    Distribuição de latências de uma série, sem guardar as amostras.
+
+    Mantém só os buckets ocupados (dicionário esparso), além de contagem,
+    soma, máximo e erros. Dois sketches se fundem somando os buckets, então
+    sketches de processos ou minutos diferentes viram o de todo o período.
+    """
+
+    __slots__ = ("buckets", "count", "total_ms", "max_ms", "errors")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def record(self, ms: float, ok: bool = True):
+        index = bucket_index(ms)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if not ok:
+            self.errors += 1
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.errors += other.errors
+        return self
+
+    def histogram(self) -> List[int]:
+        """Histograma denso (formato da coluna latency_histogram)"""
+        dense = empty_histogram()
+        for index, count in self.buckets.items():
+            dense[index] = count
+        return dense
+
+    def quantile(self, q: float) -> Optional[float]:
+        return quantile(self.histogram(), q)
+
+    def summary(self, qs: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        return {
+            "requests": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            **quantiles(self.histogram(), qs),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forma compacta para JSON (Redis)"""
+        return {
+            "n": self.count,
+            "sum": round(self.total_ms, 1),
+            "max": round(self.max_ms, 1),
+            "err": self.errors,
+            "b": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        sketch = cls()
+        sketch.buckets = {int(index): count for index, count in data.get("b", {}).items()}
+        sketch.count = data.get("n", 0)
+        sketch.total_ms = data.get("sum", 0.0)
+        sketch.max_ms = data.get("max", 0.0)
+        sketch.errors = data.get("err", 0)
+        return sketch
+
+    @classmethod
+    def from_histogram(cls, histogram: Optional[Sequence[int]], total_ms: float = 0.0,
+                       max_ms: float = 0.0, errors: int = 0) -> "LatencySketch":
+        """Sketch a partir de uma linha do PostgreSQL (histograma denso)"""
+        sketch = cls()
+        sketch.buckets = {index: count for index, count in enumerate(histogram or ()) if count}
+        sketch.count = sum(sketch.buckets.values())
+        sketch.total_ms = float(total_ms)
+        sketch.max_ms = float(max_ms)
+        sketch.errors = errors
+        return sketch
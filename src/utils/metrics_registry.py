@@ -0,0 +1,404 @@
+"""
+Registro de latências das APIs em sketches mescláveis
+Cada requisição ao Omie entra no sketch da sua série (empresa, endpoint,
+call) da janela corrente (1 minuto). Janelas fechadas são gravadas
+periodicamente no Redis e/ou no PostgreSQL; quem consulta funde os sketches
+de todos os processos e minutos do período e obtém p50/p95/p99 sem ler
+amostras brutas. Mesma escala de buckets dos rollups de omie_api_metrics
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.latency_histogram import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Série: (empresa, endpoint, call)
+SeriesKey = Tuple[str, str, str]
+
+WINDOW_SECONDS = 60
+
+# Janelas fechadas mantidas em memória (consulta local e regravação após falha)
+KEEP_WINDOWS = 60
+
+# Agrupamentos aceitos nos relatórios
+GROUP_FIELDS = {
+    "call": (0, 1, 2),
+    "endpoint": (1,),
+    "company": (0,),
+    "total": (),
+}
+
+
+def _series_field(process_id: str, key: SeriesKey) -> str:
+    return "|".join((process_id,) + key)
+
+
+def _parse_field(field: str) -> SeriesKey:
+    _, company, endpoint, call = field.split("|", 3)
+    return company, endpoint, call
+
+
+def merge_into(target: Dict[SeriesKey, LatencySketch], sketches: Iterable[Tuple[SeriesKey, LatencySketch]]):
+    for key, sketch in sketches:
+        current = target.get(key)
+        if current is None:
+            target[key] = LatencySketch().merge(sketch)
+        else:
+            current.merge(sketch)
+
+
+def summarize(sketches: Dict[SeriesKey, LatencySketch], group_by: str = "call") -> List[Dict[str, Any]]:
+    """Funde as séries pelo agrupamento pedido e devolve requisições e quantis de cada grupo"""
+    fields = GROUP_FIELDS.get(group_by, GROUP_FIELDS["call"])
+    names = ("company", "endpoint", "call")
+    groups: Dict[Tuple[str, ...], LatencySketch] = {}
+    for key, sketch in sketches.items():
+        group = tuple(key[i] for i in fields)
+        groups.setdefault(group, LatencySketch()).merge(sketch)
+
+    rows = [
+        {**{names[i]: value for i, value in zip(fields, group)}, **sketch.summary()}
+        for group, sketch in groups.items()
+    ]
+    rows.sort(key=lambda row: row["requests"], reverse=True)
+    return rows
+
+
+class MemorySketchStore:
+    """
+    Armazenamento em memória com a interface dos demais.
+
+    Registros que compartilham a mesma instância se comportam como
+    processos ligados ao mesmo Redis (testes e execução sem Redis).
+    """
+
+    def __init__(self, retention_seconds: float = 86400):
+        self.retention_seconds = retention_seconds
+        self._windows: Dict[Tuple[str, float], Dict[SeriesKey, LatencySketch]] = {}
+
+    async def save(self, process_id: str, window_start: float, sketches: Dict[SeriesKey, LatencySketch]):
+        self._windows[(process_id, window_start)] = sketches
+        cutoff = window_start - self.retention_seconds
+        for old in [key for key in self._windows if key[1] < cutoff]:
+            del self._windows[old]
+
+    async def load(self, since: float, until: float) -> Dict[SeriesKey, LatencySketch]:
+        merged: Dict[SeriesKey, LatencySketch] = {}
+        for (_, window_start), sketches in self._windows.items():
+            if since <= window_start < until:
+                merge_into(merged, sketches.items())
+        return merged
+
+
+class RedisSketchStore:
+    """
+    Sketches no Redis: um hash por minuto (retido por 2 horas) e um por hora
+    (8 dias), com um campo por processo e série. Cada processo só escreve os
+    próprios campos, então não há disputa; a fusão acontece na leitura.
+    """
+
+    MINUTE_TTL = 2 * 3600
+    HOUR_TTL = 8 * 86400
+
+    def __init__(self, url: str = "redis://localhost:6379", prefix: str = "latency"):
+        if not REDIS_AVAILABLE:
+            raise ImportError("aioredis não instalado - sketches no Redis indisponíveis")
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        # Acumulado das horas recentes deste processo (o hash da hora é sobrescrito a cada
+        # gravação) e as janelas já somadas a cada uma: regravar uma janela não a soma de novo
+        self._hours: Dict[float, Tuple[set, Dict[SeriesKey, LatencySketch]]] = {}
+
+    async def save(self, process_id: str, window_start: float, sketches: Dict[SeriesKey, LatencySketch]):
+        hour_start = window_start - window_start % 3600
+        windows, saved_hour = self._hours.get(hour_start, (set(), {}))
+        hour = {key: LatencySketch().merge(sketch) for key, sketch in saved_hour.items()}
+        windows = set(windows)
+        if window_start not in windows:
+            merge_into(hour, sketches.items())
+            windows.add(window_start)
+
+        minute_key = f"{self.prefix}:1m:{int(window_start)}"
+        hour_key = f"{self.prefix}:1h:{int(hour_start)}"
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(minute_key, mapping={
+            _series_field(process_id, key): json.dumps(sketch.to_dict()) for key, sketch in sketches.items()
+        })
+        pipe.expire(minute_key, self.MINUTE_TTL)
+        pipe.hset(hour_key, mapping={
+            _series_field(process_id, key): json.dumps(sketch.to_dict()) for key, sketch in hour.items()
+        })
+        pipe.expire(hour_key, self.HOUR_TTL)
+        await pipe.execute()
+
+        # Só depois de gravado; janelas pendentes cobrem no máximo KEEP_WINDOWS minutos
+        self._hours[hour_start] = (windows, hour)
+        for old in [start for start in self._hours if start < hour_start - KEEP_WINDOWS * WINDOW_SECONDS]:
+            del self._hours[old]
+
+    async def load(self, since: float, until: float) -> Dict[SeriesKey, LatencySketch]:
+        if until - since <= 2 * 3600:
+            start = since - since % WINDOW_SECONDS
+            keys = [f"{self.prefix}:1m:{int(t)}" for t in range(int(start), int(until), WINDOW_SECONDS)]
+        else:
+            start = since - since % 3600
+            keys = [f"{self.prefix}:1h:{int(t)}" for t in range(int(start), int(until), 3600)]
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        merged: Dict[SeriesKey, LatencySketch] = {}
+        for fields in await pipe.execute():
+            merge_into(merged, (
+                (_parse_field(field), LatencySketch.from_dict(json.loads(value)))
+                for field, value in (fields or {}).items()
+            ))
+        return merged
+
+
+class PostgresSketchStore:
+    """Sketches na tabela api_latency_sketches (ver metrics_rollups.sql)"""
+
+    SAVE_SQL = """
+        INSERT INTO api_latency_sketches
+        (bucket_start, process_id, company, endpoint, call,
+         requests, errors, total_response_time_ms, max_response_time_ms, latency_histogram)
+        VALUES (to_timestamp($1), $2, $3, $4, $5, $6, $7, $8, $9, $10)
+        ON CONFLICT (bucket_start, process_id, company, endpoint, call) DO UPDATE SET
+            requests = EXCLUDED.requests,
+            errors = EXCLUDED.errors,
+            total_response_time_ms = EXCLUDED.total_response_time_ms,
+            max_response_time_ms = EXCLUDED.max_response_time_ms,
+            latency_histogram = EXCLUDED.latency_histogram
+    """
+
+    LOAD_SQL = """
+        SELECT company, endpoint, call,
+               SUM(errors)::BIGINT AS errors,
+               SUM(total_response_time_ms)::BIGINT AS total_response_time_ms,
+               MAX(max_response_time_ms) AS max_response_time_ms,
+               histogram_sum(latency_histogram) AS latency_histogram
+        FROM api_latency_sketches
+        WHERE bucket_start >= to_timestamp($1) AND bucket_start < to_timestamp($2)
+        GROUP BY company, endpoint, call
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def save(self, process_id: str, window_start: float, sketches: Dict[SeriesKey, LatencySketch]):
+        async with self.pool.acquire() as conn:
+            await conn.executemany(self.SAVE_SQL, [
+                (window_start, process_id, *key, sketch.count, sketch.errors,
+                 int(sketch.total_ms), int(sketch.max_ms), sketch.histogram())
+                for key, sketch in sketches.items()
+            ])
+
+    async def load(self, since: float, until: float) -> Dict[SeriesKey, LatencySketch]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(self.LOAD_SQL, since, until)
+        return {
+            (row["company"], row["endpoint"], row["call"]): LatencySketch.from_histogram(
+                row["latency_histogram"], row["total_response_time_ms"],
+                row["max_response_time_ms"], row["errors"]
+            )
+            for row in rows
+        }
+
+
+def create_sketch_store(url: str):
+    """`local` usa memória; `redis://...` o Redis; vazio desativa"""
+    if not url:
+        return None
+    return MemorySketchStore() if url == "local" else RedisSketchStore(url)
+
+
+class MetricsRegistry:
+    """
+    Sketches de latência por (empresa, endpoint, call) deste processo.
+
+    `record` custa um acesso a dicionário; a cada `window_seconds` a janela
+    corrente fecha e fica pendente até `snapshot()` gravá-la nos
+    armazenamentos (Redis, PostgreSQL). `report` funde o que foi gravado
+    por todos os processos com a janela corrente deste.
+    """
+
+    def __init__(self, process_id: Optional[str] = None, window_seconds: int = WINDOW_SECONDS,
+                 keep_windows: int = KEEP_WINDOWS, clock: Callable[[], float] = time.time):
+        self.process_id = process_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self.stores: List[Any] = []
+        self._lock = threading.Lock()
+        self._window_start = self._align(clock())
+        self._current: Dict[SeriesKey, LatencySketch] = {}
+        self._closed: Deque[Tuple[float, Dict[SeriesKey, LatencySketch]]] = deque(maxlen=keep_windows)
+        # Janelas ainda não gravadas em todos os armazenamentos: [início, sketches, armazenamentos já gravados]
+        self._pending: Deque[List[Any]] = deque(maxlen=keep_windows)
+        self._task: Optional[asyncio.Task] = None
+
+        # Estatísticas
+        self.recorded = 0
+        self.snapshots = 0
+        self.snapshot_errors = 0
+
+    def _align(self, timestamp: float) -> float:
+        return timestamp - timestamp % self.window_seconds
+
+    def _rotate(self, now: float):
+        if self._current:
+            window = (self._window_start, self._current)
+            self._closed.append(window)
+            self._pending.append([self._window_start, self._current, set()])
+        self._current = {}
+        self._window_start = self._align(now)
+
+    def record(self, company: str, endpoint: str, call: str, ms: float, ok: bool = True):
+        now = self.clock()
+        with self._lock:
+            if now >= self._window_start + self.window_seconds:
+                self._rotate(now)
+            key = (company, endpoint.strip("/"), call)
+            sketch = self._current.get(key)
+            if sketch is None:
+                sketch = self._current[key] = LatencySketch()
+            sketch.record(ms, ok)
+            self.recorded += 1
+
+    async def snapshot(self, final: bool = False) -> int:
+        """Grava as janelas fechadas (e a corrente, se final) em todos os armazenamentos"""
+        with self._lock:
+            now = self.clock()
+            if final or now >= self._window_start + self.window_seconds:
+                self._rotate(now)
+            pending = list(self._pending)
+
+        saved = 0
+        failed = set()
+        for window in pending:
+            window_start, sketches, done = window
+            for store in self.stores:
+                # Cada armazenamento recebe a janela uma única vez; após uma falha ele
+                # só volta a gravar na próxima chamada, preservando a ordem das janelas
+                if id(store) in done or id(store) in failed:
+                    continue
+                try:
+                    await store.save(self.process_id, window_start, sketches)
+                except Exception as e:
+                    failed.add(id(store))
+                    self.snapshot_errors += 1
+                    logger.warning(f"Falha ao gravar sketches de latência em {type(store).__name__}: {e}")
+                    continue
+                done.add(id(store))
+            if all(id(store) in done for store in self.stores):
+                with self._lock:
+                    if window in self._pending:
+                        self._pending.remove(window)
+                saved += 1
+        self.snapshots += saved
+        return saved
+
+    def _unsaved(self, store: Any, since: float) -> List[Tuple[float, Dict[SeriesKey, LatencySketch]]]:
+        """Janelas deste processo que `store` ainda não tem (pendentes nele e a corrente)"""
+        with self._lock:
+            windows = [(start, sketches) for start, sketches, done in self._pending if id(store) not in done]
+            windows.append((self._window_start, self._current))
+        return [(start, sketches) for start, sketches in windows if start >= since]
+
+    def local_sketches(self, since: float) -> Dict[SeriesKey, LatencySketch]:
+        """Janelas deste processo a partir de `since`, incluindo a corrente"""
+        merged: Dict[SeriesKey, LatencySketch] = {}
+        with self._lock:
+            windows = list(self._closed) + [(self._window_start, self._current)]
+            for window_start, sketches in windows:
+                if window_start >= since:
+                    merge_into(merged, sketches.items())
+        return merged
+
+    async def report(self, minutes: int = 15, group_by: str = "call",
+                     endpoint: Optional[str] = None) -> Dict[str, Any]:
+        """p50/p95/p99 por série (ou agrupadas) dos últimos `minutes` minutos"""
+        now = self.clock()
+        since = self._align(now - minutes * 60)
+        source = "local"
+        sketches: Dict[SeriesKey, LatencySketch] = {}
+
+        store = self.stores[0] if self.stores else None
+        if store is not None:
+            try:
+                # Gravado por todos os processos + o que este ainda não gravou
+                sketches = await store.load(since, now)
+                for _, window in self._unsaved(store, since):
+                    merge_into(sketches, window.items())
+                source = type(store).__name__
+            except Exception as e:
+                logger.warning(f"Falha ao ler sketches de latência: {e}")
+                sketches = {}
+        if not sketches and source == "local":
+            sketches = self.local_sketches(since)
+
+        if endpoint:
+            wanted = endpoint.strip("/")
+            sketches = {key: sketch for key, sketch in sketches.items() if key[1] == wanted}
+
+        overall = LatencySketch()
+        for sketch in sketches.values():
+            overall.merge(sketch)
+        return {
+            "period_minutes": minutes,
+            "group_by": group_by,
+            "source": source,
+            "overall": overall.summary(),
+            "series": summarize(sketches, group_by),
+        }
+
+    async def _run(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            await self.snapshot()
+
+    def start(self, interval: float = WINDOW_SECONDS) -> Optional[asyncio.Task]:
+        """Gravação periódica (requer loop em execução e ao menos um armazenamento)"""
+        if not self.stores or (self._task is not None and not self._task.done()):
+            return None
+        self._task = asyncio.ensure_future(self._run(interval))
+        return self._task
+
+    async def stop(self):
+        """Para a gravação periódica e grava também a janela corrente"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.stores:
+            await self.snapshot(final=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "process_id": self.process_id,
+                "recorded": self.recorded,
+                "series_current_window": len(self._current),
+                "pending_windows": len(self._pending),
+                "snapshots": self.snapshots,
+                "snapshot_errors": self.snapshot_errors,
+                "stores": [type(store).__name__ for store in self.stores],
+            }
+
+
+# Latências das requisições ao Omie (registradas pelo OmieDispatcher)
+omie_latency = MetricsRegistry()
@@ -0,0 +1,285 @@
+"""
+Retentativas das chamadas às APIs Omie e Nibo
+Classifica a falha (timeout, conexão, 5xx, fault SOAP do Omie, throttling),
+repete só chamadas idempotentes com backoff exponencial com jitter
+decorrelacionado e limita o total de retentativas do processo por um
+orçamento, de modo que retentativas não multipliquem a carga de uma API fora
+do ar. Copiado para o Nibo MCP (nibo-mcp/src/utils/shared/)
+"""
+
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import logging
+
+from src.utils.rate_limiter import is_throttle_fault
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Motivos de retentativa
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+SERVER_ERROR = "server_error"
+THROTTLED = "throttled"
+
+# Métodos HTTP seguros para repetir (Nibo); no Omie o registro de chamadas decide
+SAFE_HTTP_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Exceções de transporte reconhecidas pelo nome (httpx, aiohttp) sem importar as bibliotecas
+_TIMEOUT_ERRORS = {"TimeoutError", "TimeoutException", "ServerTimeoutError"}
+_CONNECTION_ERRORS = {
+    "ConnectionError", "ConnectError", "ReadError", "WriteError", "CloseError",
+    "RemoteProtocolError", "ClientConnectionError", "ServerDisconnectedError",
+}
+
+# Mensagens dos clientes (que reembrulham as exceções originais em Exception)
+_TIMEOUT_MARKERS = ("timeout", "timed out")
+_CONNECTION_MARKERS = (
+    "connection reset", "connection refused", "connection aborted", "broken pipe",
+    "all connection attempts failed", "server disconnected", "erro de conexão",
+)
+
+# Omie: "SOAP-ENV:Client-NNN" depende só da entrada; "SOAP-ENV:Server" é falha do Omie
+_SOAP_CLIENT_FAULT = "soap-env:client"
+_SOAP_SERVER_FAULT = "soap-env:server"
+
+# "Erro HTTP 500: ..." (Omie), "Erro na API: 429 - ..." (Nibo), "529 Overloaded"
+_STATUS = re.compile(r"(?:HTTP|API:)\s*(\d{3})\b|^(\d{3})\b")
+
+# Espera pedida pelo Omie em faults de consumo redundante ("aguarde 30 segundos")
+_RETRY_AFTER = re.compile(r"(\d+)\s*segundos")
+
+# APIs sobrecarregadas devolvem 529 (Anthropic) além dos 429/425 de throttling
+_OVERLOADED_STATUS = 529
+
+
+def _status_code(error: BaseException, message: str) -> Optional[int]:
+    # httpx.HTTPStatusError (raise_for_status) traz a resposta
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status
+    match = _STATUS.search(message)
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def _error_chain(error: BaseException):
+    """A exceção e as que ela reembrulhou (raise ... dentro de except)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _type_names(error: BaseException):
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def classify_failure(error: BaseException) -> Optional[str]:
+    """Motivo de retentativa da falha, ou None se repetir não adianta"""
+    message = str(error)
+    lower = message.lower()
+    status = _status_code(error, message)
+
+    if is_throttle_fault(status, message) or status == _OVERLOADED_STATUS or "overloaded" in lower:
+        return THROTTLED
+    # Faults de cliente do Omie (validação, página vazia) se repetiriam iguais
+    if _SOAP_CLIENT_FAULT in lower or "não existem registros" in lower:
+        return None
+    if _SOAP_SERVER_FAULT in lower:
+        return SERVER_ERROR
+    if status is not None:
+        if 500 <= status < 600:
+            return SERVER_ERROR
+        if status == 408:
+            return TIMEOUT
+        return None
+
+    for cause in _error_chain(error):
+        names = _type_names(cause)
+        if names & _TIMEOUT_ERRORS or isinstance(cause, asyncio.TimeoutError):
+            return TIMEOUT
+        if names & _CONNECTION_ERRORS:
+            return CONNECTION
+    if any(marker in lower for marker in _TIMEOUT_MARKERS):
+        return TIMEOUT
+    if any(marker in lower for marker in _CONNECTION_MARKERS):
+        return CONNECTION
+    return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Espera (segundos) indicada na mensagem de throttling, se houver"""
+    match = _RETRY_AFTER.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class RetryBudget:
+    """
+    Orçamento de retentativas do processo.
+
+    Cada chamada deposita `ratio` fichas e o tempo repõe `min_per_second`
+    fichas por segundo (até `capacity`); cada retentativa gasta uma. Com a
+    API fora do ar as retentativas ficam limitadas a `ratio` das chamadas
+    mais o mínimo por segundo, em vez de multiplicar a carga por tentativa.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, capacity: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.min_per_second)
+        self.updated = now
+
+    def record_call(self):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "ratio": self.ratio,
+            "min_per_second": self.min_per_second,
+        }
+
+
+class RetryOrchestrator:
+    """
+    Executa uma chamada com retentativas.
+
+    Só falhas classificadas como transitórias e chamadas idempotentes são
+    repetidas, no máximo `max_attempts` tentativas. O intervalo segue o
+    jitter decorrelacionado: min(max_delay, uniforme(base_delay, 3 x
+    intervalo anterior)). Throttling com espera indicada maior que
+    `max_delay` não é repetido (o limitador adaptativo já desacelera).
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 budget: Optional[RetryBudget] = None,
+                 classify: Callable[[BaseException], Optional[str]] = classify_failure,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.classify = classify
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+        # Estatísticas
+        self.calls = 0
+        self.retries = 0
+        self.retries_by_reason: Dict[str, int] = {}
+        self.recovered = 0
+        self.exhausted = 0
+        self.budget_denied = 0
+        self.not_idempotent = 0
+        self.backoff_seconds = 0.0
+
+    def next_delay(self, previous: float) -> float:
+        """Jitter decorrelacionado a partir do intervalo anterior"""
+        return min(self.max_delay, self.rng.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    async def call(self, func: Callable[[], Awaitable[T]], idempotent: bool = True, name: str = "",
+                   max_attempts: Optional[int] = None) -> T:
+        """Executa `func()` repetindo falhas transitórias (levanta o último erro)"""
+        max_attempts = self.max_attempts if max_attempts is None else max(1, max_attempts)
+        self.calls += 1
+        self.budget.record_call()
+        delay = self.base_delay
+        attempt = 1
+
+        while True:
+            try:
+                result = await func()
+            except Exception as e:
+                reason = self.classify(e)
+                if reason is None:
+                    raise
+                if not idempotent:
+                    self.not_idempotent += 1
+                    raise
+                if attempt >= max_attempts:
+                    self.exhausted += 1
+                    raise
+
+                delay = self.next_delay(delay)
+                hint = retry_after(e) if reason == THROTTLED else None
+                if hint is not None:
+                    if hint > self.max_delay:
+                        self.exhausted += 1
+                        raise
+                    delay = max(delay, hint)
+                if not self.budget.try_spend():
+                    self.budget_denied += 1
+                    raise
+
+                self.retries += 1
+                self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+                self.backoff_seconds += delay
+                logger.warning(f"Retentativa {attempt}/{max_attempts - 1} de {name or 'chamada'} "
+                               f"em {delay:.2f}s ({reason}): {e}")
+                await self.sleep(delay)
+                attempt += 1
+                continue
+
+            if attempt > 1:
+                self.recovered += 1
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "retries_by_reason": dict(self.retries_by_reason),
+            "recovered": self.recovered,
+            "exhausted": self.exhausted,
+            "budget_denied": self.budget_denied,
+            "not_idempotent": self.not_idempotent,
+            "backoff_seconds": round(self.backoff_seconds, 2),
+            "max_attempts": self.max_attempts,
+            "budget": self.budget.get_stats(),
+        }
+
+
+def create_retry_orchestrator(prefix: str) -> RetryOrchestrator:
+    """Orquestrador configurado pelas variáveis <PREFIXO>_RETRY_*"""
+    return RetryOrchestrator(
+        max_attempts=int(os.getenv(f"{prefix}_RETRY_MAX_ATTEMPTS", "3")),
+        base_delay=float(os.getenv(f"{prefix}_RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv(f"{prefix}_RETRY_MAX_DELAY", "8")),
+        budget=RetryBudget(
+            ratio=float(os.getenv(f"{prefix}_RETRY_BUDGET_RATIO", "0.2")),
+            min_per_second=float(os.getenv(f"{prefix}_RETRY_BUDGET_PER_SECOND", "1")),
+            capacity=float(os.getenv(f"{prefix}_RETRY_BUDGET_CAPACITY", "10")),
+        ),
+    )
+
+
+# Orquestrador compartilhado pelos clientes Omie
+omie_retry = create_retry_orchestrator("OMIE")
+
+# Orquestrador de handle_api_request (API Anthropic: 529 Overloaded)
+api_retry = create_retry_orchestrator("API")
@@ -8,6 +8,7 @@ import asyncio
 import json
 import hashlib
 import hmac
+import os
 import uuid
 from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime, timedelta
@@ -18,6 +19,9 @@ import uvicorn
 import aiohttp
 from pydantic import BaseModel
 
+from src.cache.dependencies import omie_cache_invalidator
+from src.cache.shared_tier import SharedCacheTier, company_namespace, create_shared_tier
+
 @dataclass
 class WebhookEvent:
     """Evento de webhook"""
@@ -348,6 +352,15 @@ class WebhookServer:
                 # Processar webhook do Omie
                 event_type = self._determine_omie_event_type(data)
                 
+                # Dados alterados no Omie: invalidar consultas em cache dependentes
+                # (só da empresa que enviou, quando o payload traz a appKey)
+                app_key = data.get("appKey")
+                omie_cache_invalidator.on_webhook(
+                    event_type, data, company_namespace(str(app_key)) if app_key else None
+                )
+                # Publicação no L2 concluída antes de confirmar o recebimento
+                await omie_cache_invalidator.drain()
+                
                 await self.webhook_manager.emit_event(
                     event_type=event_type,
                     data=data,
@@ -410,6 +423,26 @@ class WebhookServer:
         server = uvicorn.Server(config)
         await server.serve()
 
+def connect_shared_cache(url: Optional[str] = None) -> Optional[SharedCacheTier]:
+    """
+    Liga o invalidador à camada L2 dos servidores MCP (CACHE_SHARED_URL).
+
+    Este processo não tem cache próprio: sem o L2 as invalidações por
+    webhook não chegariam a nenhum servidor.
+    """
+    url = os.getenv("CACHE_SHARED_URL", "") if url is None else url
+    try:
+        shared_tier = create_shared_tier(url, company_namespace(os.getenv("OMIE_APP_KEY", "webhooks")))
+    except Exception as e:
+        print(f"⚠️ Cache compartilhado indisponível - webhooks não invalidarão o cache: {e}")
+        return None
+    if shared_tier is None:
+        print("⚠️ CACHE_SHARED_URL não definido - webhooks não invalidarão o cache dos servidores")
+        return None
+    omie_cache_invalidator.register_shared(shared_tier)
+    print(f"✅ Invalidação de cache via L2 ativa ({type(shared_tier.backend).__name__})")
+    return shared_tier
+
 # ============================================================================
 # HANDLERS DE EVENTOS ESPECÍFICOS
 # ============================================================================
@@ -458,6 +491,9 @@ async def main():
     # Iniciar processamento
     await webhook_manager.start_processing()
     
+    # Invalidação do cache dos servidores MCP pela camada L2
+    shared_tier = connect_shared_cache()
+    
     # Criar servidor webhook
     webhook_server = WebhookServer(webhook_manager)
     
@@ -484,6 +520,10 @@ async def main():
     except KeyboardInterrupt:
         await webhook_manager.stop_processing()
         print("🛑 Sistema de webhooks parado")
+    finally:
+        if shared_tier:
+            omie_cache_invalidator.unregister_shared(shared_tier)
+            await shared_tier.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Configuração compartilhada dos testes
+"""
+
+import os
+
+# src.config exige credenciais Omie; os testes unitários não acessam a API real
+os.environ.setdefault("OMIE_APP_KEY", "test_app_key")
+os.environ.setdefault("OMIE_APP_SECRET", "test_app_secret")
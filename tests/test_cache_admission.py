@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes das políticas por ferramenta e da admissão TinyLFU
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.admission import FrequencySketch, MAX_COUNT
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.policy import (
+    CachePolicy, PolicyRegistry, FINANCIAL_MAX_ENTRY_BYTES, REFERENCE_PRIORITY
+)
+from src.client.omie_response import OmieResponse
+from src.cache.sizing import RAW_BYTES_EXPANSION
+
+
+def _value(size_bytes):
+    return OmieResponse({"ok": True}, raw_size=int(size_bytes / RAW_BYTES_EXPANSION))
+
+
+def test_sketch_counts_saturate_and_age():
+    sketch = FrequencySketch(capacity=64)
+    for _ in range(20):
+        sketch.increment("quente")
+    sketch.increment("frio")
+
+    assert sketch.frequency("quente") == MAX_COUNT
+    assert sketch.frequency("frio") >= 1
+    assert sketch.frequency("nunca") == 0
+
+    sketch.reset()
+    assert sketch.frequency("quente") == MAX_COUNT // 2
+
+
+def test_registry_derives_policies_from_endpoints():
+    registry = PolicyRegistry(from_endpoints=True)
+
+    assert registry.get("incluir_cliente").cacheable is False
+    assert registry.get("consultar_categorias").priority == REFERENCE_PRIORITY
+    assert registry.get("consultar_contas_receber").max_entry_bytes == FINANCIAL_MAX_ENTRY_BYTES
+    assert registry.get("ferramenta_qualquer") == CachePolicy()
+
+    registry.register("consultar_categorias", ttl=60)
+    assert registry.get("consultar_categorias").ttl == 60
+    assert registry.get("consultar_categorias").priority == REFERENCE_PRIORITY
+
+
+def test_policy_rejects_uncacheable_and_oversized_entries():
+    registry = PolicyRegistry(from_endpoints=True)
+    registry.register("consultar_contas_receber", max_entry_bytes=10 * 1024)
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, policies=registry)
+
+    async def run():
+        assert not await cache.set("incluir_cliente", {}, {"ok": True})
+        assert not await cache.set("consultar_contas_receber", {"p": 1}, _value(50 * 1024))
+        assert await cache.set("consultar_categorias", {"p": 1}, {"ok": True})
+
+    asyncio.run(run())
+    assert cache.get_stats()["admission"]["policy_rejections"] == 2
+    assert next(iter(cache.cache.values())).ttl == 3600
+
+
+def test_unknown_admission_policy_is_rejected():
+    with pytest.raises(ValueError):
+        IntelligentCache(max_size_mb=1, admission="lfu")
+
+
+def test_cold_dump_does_not_evict_hot_lookups():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600, admission="tinylfu",
+                             policies=PolicyRegistry(from_endpoints=True))
+    cache.record_latency("consultar_categorias", 0.2)
+    cache.record_latency("consultar_contas_receber", 0.5)
+
+    async def run():
+        for code in range(100):
+            for _ in range(3):
+                if await cache.get("consultar_categorias", {"codigo": code}) is None:
+                    await cache.set("consultar_categorias", {"codigo": code}, _value(8 * 1024))
+
+        await cache.get("consultar_contas_receber", {"periodo": 1})
+        return await cache.set("consultar_contas_receber", {"periodo": 1}, _value(600 * 1024))
+
+    assert asyncio.run(run()) is False
+    assert len(cache.cache) == 100
+    assert cache.get_stats()["admission"]["rejected"] == 1
+
+
+def test_hot_candidate_replaces_cold_entries():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600, admission="tinylfu")
+
+    async def run():
+        for code in range(100):
+            await cache.set("consultar_categorias", {"codigo": code}, _value(8 * 1024))
+        for _ in range(10):
+            await cache.get("relatorio", {"mes": 1})
+        return await cache.set("relatorio", {"mes": 1}, _value(400 * 1024))
+
+    assert asyncio.run(run()) is True
+    assert cache.evictions > 0
+    assert cache.get_stats()["admission"]["admitted"] == 1
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes da canonicalização de chaves e do cache de conjuntos de registros
+"""
+
+import asyncio
+
+from src.cache.canonical import canonical_params, RECORD_SET_MARKER
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.record_sets import RecordSetCache
+from src.client.paginator import OmiePaginator
+
+
+class FakeClientesClient:
+    """Cliente falso: 23 clientes servidos em páginas do tamanho pedido"""
+
+    def __init__(self, total: int = 23):
+        self.total = total
+        self.calls = []
+
+    async def _make_request(self, endpoint, call, param):
+        self.calls.append(dict(param))
+        size = param["registros_por_pagina"]
+        pagina = param["pagina"]
+        start = (pagina - 1) * size
+        return {
+            "pagina": pagina,
+            "total_de_paginas": -(-self.total // size),
+            "clientes_cadastro": [{"codigo": i} for i in range(start, min(start + size, self.total))]
+        }
+
+
+def test_dates_documents_and_codes_are_normalized():
+    a = canonical_params("consultar_contas_pagar", {
+        "filtrar_por_data_de": "01/07/2025",
+        "clientesFiltro": {"cnpj_cpf": "12.345.678/0001-90"},
+        "codigo_cliente_omie": "0042",
+        "filtrar_cliente": "7",
+        "texto": " abc ",
+        "vazio": None,
+    })
+    b = canonical_params("consultar_contas_pagar", {
+        "filtrar_por_data_de": "2025-07-01",
+        "clientesFiltro": {"cnpj_cpf": "12345678000190"},
+        "codigo_cliente_omie": 42,
+        "filtrar_cliente": 7,
+        "texto": "abc",
+    })
+    assert a == b
+    assert a["filtrar_por_data_de"] == "2025-07-01"
+
+
+def test_integration_codes_keep_leading_zeros():
+    params = canonical_params("consultar_clientes", {"codigo_cliente_integracao": "001"})
+    assert params["codigo_cliente_integracao"] == "001"
+
+
+def test_record_set_mode_drops_pagination():
+    params = canonical_params("consultar_lancamentos", {"nPagina": 2, "nRegPorPagina": 20, "nCodCC": "10"},
+                              record_set=True)
+    assert params == {"nCodCC": 10, RECORD_SET_MARKER: True}
+    # Consultas por página mantêm a paginação na chave
+    assert canonical_params("consultar_lancamentos", {"nPagina": 2})["nPagina"] == 2
+
+
+def test_equivalent_params_share_cache_entry():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+
+    async def run():
+        await cache.set("consultar_contas_receber", {"data_de": "01/07/2025", "pagina": "1"}, {"ok": True})
+        return await cache.get("consultar_contas_receber", {"data_de": "2025-07-01", "pagina": 1})
+
+    assert asyncio.run(run()) == {"ok": True}
+
+
+def test_page_sizes_are_sliced_from_one_record_set():
+    client = FakeClientesClient(total=23)
+    record_sets = RecordSetCache(IntelligentCache(max_size_mb=1, default_ttl=60), OmiePaginator(client))
+
+    async def run():
+        first, first_origin = await record_sets.get_page("consultar_clientes", {"pagina": 1, "registros_por_pagina": 20})
+        second, _ = await record_sets.get_page("consultar_clientes", {"pagina": 2, "registros_por_pagina": 20})
+        other, other_origin = await record_sets.get_page("consultar_clientes", {"pagina": 3, "registros_por_pagina": 5})
+        return first, first_origin, second, other, other_origin
+
+    first, first_origin, second, other, other_origin = asyncio.run(run())
+
+    assert (first_origin, other_origin) == ("miss", "hit")
+    assert record_sets.record_sets_loaded == 1
+    assert all(call["registros_por_pagina"] == 500 for call in client.calls)
+    assert [r["codigo"] for r in first["clientes_cadastro"]] == list(range(20))
+    assert [r["codigo"] for r in second["clientes_cadastro"]] == [20, 21, 22]
+    assert [r["codigo"] for r in other["clientes_cadastro"]] == list(range(10, 15))
+    assert (first["total_de_paginas"], other["total_de_paginas"]) == (2, 5)
+    assert other["total_de_registros"] == 23 and other["registros"] == 5
+
+
+def test_record_sets_only_for_paginated_cacheable_lists():
+    record_sets = RecordSetCache(IntelligentCache(max_size_mb=1), OmiePaginator(FakeClientesClient()))
+    assert record_sets.supports("consultar_clientes")
+    assert not record_sets.supports("consultar_cliente_por_codigo")
+    assert not record_sets.supports("incluir_cliente")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Testes da representação em colunas das listagens em cache
+"""
+
+import asyncio
+
+from src.cache.compact import CompactRecordSet, compact_payload, expand_payload, is_compact
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.persistence import encode_value, decode_value
+from src.cache.policy import PolicyRegistry
+from src.cache.record_sets import RecordSetCache
+from src.client.paginator import OmiePaginator
+
+
+def _records(count=40):
+    return [
+        {
+            "codigo": 1000 + i,
+            "valor": float(i) + 0.5,
+            "status": ["A VENCER", "RECEBIDO"][i % 2],
+            "flag": [1, 1.0, True][i % 3],
+            "categorias": [{"codigo": "1.01.01", "percentual": 100}],
+            **({"observacao": f"obs {i}"} if i % 4 == 0 else {}),
+        }
+        for i in range(count)
+    ]
+
+
+def test_round_trip_preserves_records_types_and_missing_fields():
+    records = _records()
+    compact = CompactRecordSet(records)
+
+    assert len(compact) == 40
+    assert list(compact) == records
+    assert compact[-1] == records[-1]
+    assert compact[10:13] == records[10:13]
+    # 1, 1.0 e True continuam distintos
+    assert [type(compact[i]["flag"]) for i in range(3)] == [int, float, bool]
+    assert "observacao" not in compact[1]
+
+
+def test_rehydrated_records_are_independent_copies():
+    compact = CompactRecordSet(_records())
+    first = compact[0]
+    first["status"] = "ALTERADO"
+    assert compact[0]["status"] == "A VENCER"
+
+
+def test_small_lists_and_non_record_payloads_are_untouched():
+    small = {"lista": _records(5)}
+    assert compact_payload(small) is small
+    assert compact_payload([1, 2, 3]) == [1, 2, 3]
+
+    payload = {"pagina": 1, "lista": _records()}
+    compact = compact_payload(payload)
+    assert is_compact(compact) and not is_compact(payload)
+    assert expand_payload(compact) == payload
+
+
+def test_compacted_values_are_serialized_as_lists():
+    payload = {"pagina": 1, "lista": _records()}
+    encoding, blob = encode_value(compact_payload(payload))
+    assert decode_value(encoding, blob) == payload
+
+
+def test_cache_stores_columns_and_returns_expanded_payload():
+    registry = PolicyRegistry()
+    registry.register("consultar_contas_receber", compact=True)
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, policies=registry)
+    payload = {"pagina": 1, "conta_receber_cadastro": _records()}
+
+    async def run():
+        await cache.set("consultar_contas_receber", {"pagina": 1}, payload)
+        return await cache.get("consultar_contas_receber", {"pagina": 1})
+
+    assert asyncio.run(run()) == payload
+    entry = next(iter(cache.cache.values()))
+    assert isinstance(entry.data["conta_receber_cadastro"], CompactRecordSet)
+
+
+def test_record_set_pages_are_sliced_from_columns():
+    class Client:
+        async def _make_request(self, endpoint, call, param):
+            return {"pagina": 1, "total_de_paginas": 1,
+                    "clientes_cadastro": [{"codigo": i, "estado": "SP"} for i in range(100)]}
+
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, policies=PolicyRegistry(from_endpoints=True))
+    record_sets = RecordSetCache(cache, OmiePaginator(Client()))
+
+    async def run():
+        await record_sets.get_page("consultar_clientes", {"pagina": 1, "registros_por_pagina": 50})
+        return await record_sets.get_page("consultar_clientes", {"pagina": 4, "registros_por_pagina": 10})
+
+    page, origin = asyncio.run(run())
+    assert origin == "hit"
+    assert page["clientes_cadastro"] == [{"codigo": i, "estado": "SP"} for i in range(30, 40)]
+    assert is_compact(next(iter(cache.cache.values())).data)
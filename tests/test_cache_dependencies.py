@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Testes da invalidação por tags dirigida por escritas e webhooks
+"""
+
+import asyncio
+from dataclasses import replace
+
+from src.cache.dependencies import (
+    CacheInvalidator, read_tags, mutation_tags, webhook_tags
+)
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.shared_tier import LocalSharedBackend, SharedCacheTier
+from src.client.omie_dispatcher import OmieDispatcher, default_services
+
+
+def _filled_cache(**kwargs):
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600, **kwargs)
+
+    async def fill():
+        for tool in ("consultar_clientes", "consultar_fornecedores", "consultar_contas_pagar",
+                     "consultar_categorias", "consultar_movimentos"):
+            await cache.set(tool, {"pagina": 1}, {"tool": tool}, tags=read_tags(tool))
+
+    asyncio.run(fill())
+    return cache
+
+
+def _tools(cache):
+    return sorted(entry.tool_name for entry in cache.cache.values())
+
+
+def test_mutation_tags_follow_registry_and_related_endpoints():
+    assert mutation_tags("geral/clientes/", "IncluirCliente") == ["geral/clientes", "geral/fornecedores"]
+    assert mutation_tags("financas/contapagar", "AlterarContaPagar") == ["financas/contapagar", "financas/mf"]
+    assert mutation_tags("geral/clientes", "ListarClientes") == []
+
+
+def test_webhook_topic_takes_precedence_over_event_type():
+    assert webhook_tags("evento_generico", {"topic": "Financas.ContaReceber.BaixaRealizada"}) == \
+        ["financas/contareceber", "financas/mf"]
+    assert webhook_tags("conta_vencida", {}) == ["financas/contapagar", "financas/mf"]
+    assert webhook_tags("evento_generico", {}) == []
+
+
+def test_write_invalidates_only_dependent_entries():
+    cache = _filled_cache()
+    invalidator = CacheInvalidator()
+    invalidator.register(cache)
+
+    removed = invalidator.on_write("financas/contapagar", "AlterarContaPagar")
+
+    assert removed == 2
+    assert _tools(cache) == ["consultar_categorias", "consultar_clientes", "consultar_fornecedores"]
+    assert invalidator.get_stats()["by_tag"] == {"financas/contapagar": 1, "financas/mf": 1}
+
+
+def test_dispatcher_invalidates_after_successful_write():
+    cache = _filled_cache()
+    invalidator = CacheInvalidator()
+    invalidator.register(cache)
+    services = replace(default_services(), invalidator=invalidator, rate_limit_enabled=False)
+
+    class Client(OmieDispatcher):
+        auth = {"app_key": "APP"}
+
+        async def _send_request(self, endpoint, call, param):
+            return {"codigo_status": "0"}
+
+    client = Client()
+    client.services = services
+    asyncio.run(client.incluir_cliente({"razao_social": "Nova"}))
+    assert _tools(cache) == ["consultar_categorias", "consultar_contas_pagar", "consultar_movimentos"]
+
+
+def test_tag_invalidation_reaches_other_processes():
+    backend = LocalSharedBackend()
+    a = _filled_cache(shared_tier=SharedCacheTier(backend, "empresa"))
+    b = IntelligentCache(max_size_mb=1, default_ttl=3600, shared_tier=SharedCacheTier(backend, "empresa"))
+
+    async def scenario():
+        await a.start_shared_tier()
+        await b.start_shared_tier()
+        await b.get("consultar_clientes", {"pagina": 1})
+        a.invalidate_tags(["geral/clientes"])
+        await asyncio.sleep(0)
+        return await b.get("consultar_clientes", {"pagina": 1})
+
+    assert asyncio.run(scenario()) is None
+    assert len(b.cache) == 0
+    assert not any(":consultar_clientes:" in key for key in backend._data)
+    assert any(":consultar_categorias:" in key for key in backend._data)
+
+
+def test_webhook_process_without_local_cache_evicts_other_processes():
+    backend = LocalSharedBackend()
+    server = _filled_cache(shared_tier=SharedCacheTier(backend, "empresa"))
+    # Processo de webhooks: só a camada L2, nenhum cache registrado
+    invalidator = CacheInvalidator()
+    invalidator.register_shared(SharedCacheTier(backend, "webhooks"))
+
+    async def scenario():
+        await server.start_shared_tier()
+        invalidator.on_webhook("evento_generico", {"topic": "ClienteFornecedor.Alterado"})
+        await invalidator.drain()
+        return await server.get("consultar_clientes", {"pagina": 1})
+
+    assert asyncio.run(scenario()) is None
+    assert _tools(server) == ["consultar_categorias", "consultar_contas_pagar", "consultar_movimentos"]
+    assert not any(":consultar_clientes:" in key for key in backend._data)
+    assert invalidator.get_stats()["invalidations"] == 1
+
+
+def test_tags_survive_persistence(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = _filled_cache(persistence_file=path)
+    cache.close()
+
+    restarted = IntelligentCache(max_size_mb=1, default_ttl=3600, persistence_file=path)
+    assert restarted.invalidate_tags(["geral/categorias"]) == 1
+    restarted.close()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Testes dos índices secundários (ferramenta, empresa, tag) do IntelligentCache
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.dependencies import entity_tags, read_tags
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.shared_tier import LocalSharedBackend, SharedCacheTier
+
+
+def _fill(cache, company, tools=("consultar_clientes", "consultar_contas_pagar", "listar_clientes_resumo")):
+    async def fill():
+        for tool in tools:
+            for page in (1, 2):
+                await cache.set(tool, {"pagina": page}, {"tool": tool, "company": company},
+                                tags=read_tags(tool), company=company)
+
+    asyncio.run(fill())
+
+
+def _entries(cache):
+    return sorted((entry.company, entry.tool_name) for entry in cache.cache.values())
+
+
+def test_entity_tags_accept_names_and_endpoints():
+    assert entity_tags("clientes") == ["geral/clientes"]
+    assert entity_tags("/financas/mf/") == ["financas/mf"]
+    with pytest.raises(ValueError):
+        entity_tags("inexistente")
+
+
+def test_same_params_for_different_companies_do_not_collide():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600)
+    _fill(cache, "empresa_a", tools=("consultar_clientes",))
+    _fill(cache, "empresa_b", tools=("consultar_clientes",))
+
+    assert len(cache.cache) == 4
+    a = asyncio.run(cache.get("consultar_clientes", {"pagina": 1}, company="empresa_a"))
+    assert a["company"] == "empresa_a"
+
+
+def test_invalidate_entity_is_scoped_to_company():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600)
+    _fill(cache, "empresa_a")
+    _fill(cache, "empresa_b")
+
+    removed = cache.invalidate_entity("empresa_a", "clientes")
+
+    assert removed == 2
+    assert ("empresa_a", "consultar_clientes") not in _entries(cache)
+    assert _entries(cache).count(("empresa_b", "consultar_clientes")) == 2
+    assert cache.get_stats()["indexes"]["invalidated_entries"] == 2
+
+
+def test_invalidate_pattern_matches_tool_names_only():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600)
+    _fill(cache, "empresa_a")
+
+    # "empresa_a" aparece nos valores, mas não no nome de nenhuma ferramenta
+    cache.invalidate_pattern("empresa_a")
+    assert len(cache.cache) == 6
+
+    cache.invalidate_pattern("clientes", company="empresa_a")
+    assert _entries(cache) == [("empresa_a", "consultar_contas_pagar")] * 2
+
+
+def test_indexes_follow_eviction_and_expiry():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=3600)
+    _fill(cache, "empresa_a")
+
+    cache.invalidate_tool("consultar_contas_pagar")
+    assert cache.invalidate_tags(["financas/contapagar"], "empresa_a") == 0
+
+    indexes = cache._indexes
+    live = set(cache.cache)
+    for index in indexes.values():
+        for keys in index.values():
+            assert keys <= live
+
+
+def test_shared_invalidation_respects_company():
+    backend = LocalSharedBackend()
+    a = IntelligentCache(max_size_mb=1, default_ttl=3600,
+                         shared_tier=SharedCacheTier(backend, company="empresa_a"))
+    b = IntelligentCache(max_size_mb=1, default_ttl=3600,
+                         shared_tier=SharedCacheTier(backend, company="empresa_a"))
+
+    async def run():
+        await a.start_shared_tier()
+        await b.start_shared_tier()
+        for company in ("empresa_a", "empresa_b"):
+            await b.set("consultar_clientes", {"pagina": 1}, {"c": company},
+                        tags=read_tags("consultar_clientes"), company=company)
+        a.invalidate_entity("empresa_a", "clientes")
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert _entries(b) == [("empresa_b", "consultar_clientes")]
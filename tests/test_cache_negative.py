@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Testes do cache negativo (página vazia, faults de validação)
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.dependencies import read_tags
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.negative import (
+    CachedFault, classify_fault, NEGATIVE_EMPTY, NEGATIVE_INVALID
+)
+
+EMPTY = "Erro HTTP 500: {\"faultstring\": \"ERROR: Não existem registros para a página [1]!\"}"
+INVALID = "Erro HTTP 500: {\"faultcode\": \"SOAP-ENV:Client-103\", \"faultstring\": \"ERROR: Cliente não cadastrado\"}"
+THROTTLE = "Erro HTTP 500: {\"faultstring\": \"Consumo redundante detectado\", \"faultcode\": \"SOAP-ENV:Client-6\"}"
+
+
+class _FailingLoader:
+    def __init__(self, message: str):
+        self.message = message
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        raise Exception(self.message)
+
+
+def _call_repeatedly(cache, loader, times=5, **kwargs):
+    async def run():
+        errors = []
+        for _ in range(times):
+            try:
+                await cache.get_or_refresh("consultar_contas_pagar", {"pagina": 9}, loader, **kwargs)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    return asyncio.run(run())
+
+
+def test_classify_fault():
+    assert classify_fault(Exception(EMPTY)) == NEGATIVE_EMPTY
+    assert classify_fault(Exception(INVALID)) == NEGATIVE_INVALID
+    assert classify_fault(Exception("Erro HTTP 404: Not Found")) == NEGATIVE_INVALID
+    assert classify_fault(Exception(THROTTLE)) is None
+    assert classify_fault(Exception("Erro HTTP 429: Too Many Requests")) is None
+    assert classify_fault(Exception("Timeout na requisição para ListarClientes")) is None
+    assert classify_fault(Exception("Erro HTTP 500: SOAP-ENV:Server")) is None
+
+
+def test_empty_result_is_served_from_negative_cache():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    loader = _FailingLoader(EMPTY)
+
+    errors = _call_repeatedly(cache, loader)
+
+    assert loader.calls == 1
+    assert len(errors) == 5
+    assert all(str(e) == EMPTY for e in errors)
+    assert all(isinstance(e, CachedFault) and e.kind == NEGATIVE_EMPTY for e in errors[1:])
+    stats = cache.get_stats()["negative"]
+    assert stats["hits"] == 4 and stats["stored"] == {NEGATIVE_EMPTY: 1}
+
+
+def test_transient_faults_are_not_cached():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    loader = _FailingLoader("Timeout na requisição para ListarContasPagar")
+
+    _call_repeatedly(cache, loader, times=3)
+
+    assert loader.calls == 3
+    assert len(cache.cache) == 0
+
+
+def test_negative_entry_expires_without_grace():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, stale_grace=300)
+    loader = _FailingLoader(INVALID)
+    _call_repeatedly(cache, loader, times=2)
+
+    for entry in cache.cache.values():
+        entry.created_at -= 121
+
+    _call_repeatedly(cache, loader, times=1)
+    assert loader.calls == 2
+
+
+def test_write_invalidation_clears_negative_entries():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    loader = _FailingLoader(EMPTY)
+    _call_repeatedly(cache, loader, times=2, tags=read_tags("consultar_contas_pagar"))
+
+    assert cache.invalidate_tags(["financas/contapagar"]) == 1
+    _call_repeatedly(cache, loader, times=1)
+    assert loader.calls == 2
+
+
+def test_disabled_kind_is_not_cached_and_get_ignores_negatives():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, negative_ttls={NEGATIVE_INVALID: 0})
+    invalid = _FailingLoader(INVALID)
+    _call_repeatedly(cache, invalid, times=2)
+    assert invalid.calls == 2
+
+    _call_repeatedly(cache, _FailingLoader(EMPTY), times=1)
+    assert asyncio.run(cache.get("consultar_contas_pagar", {"pagina": 9})) is None
+    with pytest.raises(CachedFault):
+        asyncio.run(cache.get_or_refresh("consultar_contas_pagar", {"pagina": 9}, invalid))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Testes da persistência incremental do IntelligentCache
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+from src.cache.intelligent_cache import IntelligentCache, NOT_LOADED
+from src.cache.persistence import CachePersistence, FORMAT_VERSION
+from src.client.omie_response import OmieResponse
+
+
+def test_restart_loads_index_and_values_on_demand(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+
+    async def fill():
+        await cache.set("consultar_clientes", {"p": 1}, OmieResponse({"clientes": [1, 2]}, raw_size=40))
+        await cache.set("consultar_categorias", {"p": 1}, {"categoria": ["a"]})
+
+    asyncio.run(fill())
+    cache.close()
+
+    restarted = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    assert len(restarted.cache) == 2
+    assert all(entry.data is NOT_LOADED for entry in restarted.cache.values())
+
+    clientes = asyncio.run(restarted.get("consultar_clientes", {"p": 1}))
+    assert clientes == {"clientes": [1, 2]}
+    assert isinstance(clientes, OmieResponse) and clientes.raw_size == 40
+    assert asyncio.run(restarted.get("consultar_categorias", {"p": 1})) == {"categoria": ["a"]}
+    restarted.close()
+
+
+def test_lazy_values_are_read_off_the_loop_and_outside_the_lock(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    asyncio.run(cache.set("consultar_clientes", {"p": 1}, {"clientes": [1]}))
+    cache.close()
+
+    restarted = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    load_value = restarted.persistence.load_value
+    reads = []
+
+    def tracked_load(key):
+        lock_free = restarted._lock.acquire(blocking=False)
+        if lock_free:
+            restarted._lock.release()
+        reads.append((threading.current_thread() is threading.main_thread(), lock_free))
+        return load_value(key)
+
+    restarted.persistence.load_value = tracked_load
+
+    async def loader():
+        raise AssertionError("valor persistido não deveria ir ao Omie")
+
+    data, origin = asyncio.run(restarted.get_or_refresh("consultar_clientes", {"p": 1}, loader))
+    assert (data, origin) == ({"clientes": [1]}, "hit")
+    assert asyncio.run(restarted.get("consultar_clientes", {"p": 1})) == {"clientes": [1]}
+    # Uma leitura do disco, em outra thread e sem o lock do cache
+    assert reads == [(False, True)]
+    restarted.close()
+
+
+def test_removed_and_expired_entries_not_restored(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+
+    async def fill():
+        await cache.set("consultar_clientes", {"p": 1}, {"v": 1})
+        await cache.set("consultar_clientes", {"p": 2}, {"v": 2})
+        await cache.set("consultar_categorias", {}, {"v": 3}, ttl=1)
+
+    asyncio.run(fill())
+    cache.invalidate_pattern("clientes")
+    for entry in cache.cache.values():
+        entry.created_at -= 3600
+        cache.persistence.put(entry)
+    cache.close()
+
+    restarted = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    assert len(restarted.cache) == 0
+    restarted.close()
+
+
+def test_other_format_version_is_discarded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    asyncio.run(cache.set("consultar_clientes", {}, {"v": 1}))
+    cache.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE cache_meta SET value = ? WHERE name = 'format_version'", (str(FORMAT_VERSION + 1),))
+    conn.commit()
+    conn.close()
+
+    restarted = IntelligentCache(max_size_mb=1, default_ttl=600, persistence_file=path)
+    assert len(restarted.cache) == 0
+    restarted.close()
+
+
+def test_non_json_values_stay_in_memory_only(tmp_path):
+    store = CachePersistence(str(tmp_path / "cache.db"))
+    cache = IntelligentCache(max_size_mb=1, default_ttl=600)
+    asyncio.run(cache.set("tool", {}, {"valor": object()}))
+    store.put(next(iter(cache.cache.values())))
+    store.flush()
+    assert store.load_index()[0] == []
+    store.close()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Testes do trace de acessos e do plano de pré-carregamento do cache
+"""
+
+import asyncio
+import time
+
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.preload import AccessTrace, CachePreloader, PreloadPlan, plan_preload
+
+NOW = time.mktime((2025, 7, 10, 12, 0, 0, 0, 0, -1))
+
+
+def _at(day: int, hour: int, minute: int = 0) -> int:
+    return round(time.mktime((2025, 7, day, hour, minute, 0, 0, 0, -1)))
+
+
+def _record(tool, params, t, latency_ms=800, origin="miss", **extra):
+    return {"t": t, "tool": tool, "params": params, "latency_ms": latency_ms, "origin": origin, **extra}
+
+
+def test_trace_round_trip_and_trimming(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    trace = AccessTrace(str(path), max_records=5)
+    for i in range(12):
+        trace.record("consultar_clientes", {"pagina": i}, 120.0, "miss", calls=3 if i == 11 else 1)
+    trace.flush()
+
+    reloaded = AccessTrace(str(path), max_records=5)
+    assert [r["params"]["pagina"] for r in reloaded.records] == [7, 8, 9, 10, 11]
+    assert reloaded.records[-1]["calls"] == 3 and "calls" not in reloaded.records[0]
+    # Passou do dobro do limite: o arquivo foi reescrito só com a janela
+    assert len(path.read_text().splitlines()) <= 10
+
+
+def test_plan_groups_canonical_params_and_skips_one_offs():
+    records = [
+        _record("consultar_contas_pagar", {"data_de": "01/07/2025", "pagina": 1}, _at(8, 9)),
+        _record("consultar_contas_pagar", {"pagina": "1", "data_de": "2025-07-01"}, _at(9, 9), origin="hit"),
+        _record("consultar_contas_pagar", {"data_de": "2025-07-01", "pagina": 1, "filtro": None}, _at(9, 10)),
+        _record("consultar_departamentos", {"pagina": 1}, _at(9, 11)),
+        _record("incluir_cliente", {"nome": "x"}, _at(9, 8)),
+        _record("incluir_cliente", {"nome": "x"}, _at(9, 8)),
+    ]
+    plan = plan_preload(records, budget=10, now=NOW)
+
+    assert [item.tool for item in plan.items] == ["consultar_contas_pagar"]
+    item = plan.items[0]
+    # Parâmetros do primeiro acesso (formato aceito pelo Omie); latência só das buscas
+    assert item.params == {"data_de": "01/07/2025", "pagina": 1}
+    assert item.latency_ms == 800
+
+
+def test_plan_respects_budget_value_and_time_of_day():
+    records = []
+    for day in (7, 8, 9):
+        records += [
+            _record("consultar_categorias", {}, _at(day, 8, 5), latency_ms=3000, calls=2, conjunto=True),
+            _record("consultar_clientes", {"pagina": 1}, _at(day, 8, 0), latency_ms=600),
+            _record("consultar_contas_receber", {"pagina": 1}, _at(day, 9, 0), latency_ms=900),
+            _record("consultar_projetos", {"pagina": 1}, _at(day, 7, 0), latency_ms=50),
+        ]
+    plan = plan_preload(records, budget=4, max_concurrency=4, now=NOW, target_seconds=1)
+
+    # Projetos (menor valor por chamada) fica fora do orçamento
+    assert [item.tool for item in plan.items] == [
+        "consultar_clientes", "consultar_categorias", "consultar_contas_receber"
+    ]
+    assert plan.calls == 4
+    assert plan.items[1].record_set
+    assert plan.concurrency == 4
+
+
+def test_preloader_stays_within_budget_and_counts_cached():
+    async def fetch(item):
+        await asyncio.sleep(0)
+        if item.params.get("pagina") == 2:
+            return "hit"
+        if item.params.get("pagina") == 3:
+            raise Exception("Timeout na requisição")
+        return "miss"
+
+    plan = plan_preload(
+        [_record("consultar_clientes", {"pagina": p}, _at(9, 8)) for p in (1, 1, 2, 2, 3, 3, 4, 4)],
+        budget=10, now=NOW
+    )
+    plan = PreloadPlan(items=plan.items, concurrency=2, budget=2)
+    stats = asyncio.run(CachePreloader(fetch).run(plan))
+
+    assert stats["already_cached"] == 1 and stats["failed"] == 1
+    assert stats["loaded"] + stats["skipped_budget"] == 2
+    assert stats["calls_used"] <= 2
+
+
+def test_preload_common_queries_uses_fetch_and_skips_cached_entries():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    calls = []
+
+    async def fetch(tool, params):
+        calls.append((tool, params["pagina"]))
+        return {"pagina": params["pagina"]}
+
+    queries = [{"tool": "consultar_clientes", "params": {"pagina": p}} for p in (1, 2)]
+
+    async def run():
+        first = await cache.preload_common_queries(queries, fetch)
+        second = await cache.preload_common_queries(queries, fetch)
+        return first, second, await cache.get("consultar_clientes", {"pagina": 2})
+
+    first, second, cached = asyncio.run(run())
+    assert first["miss"] == 2 and second["hit"] == 2
+    assert len(calls) == 2 and cached == {"pagina": 2}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Testes de stale-while-revalidate e do aquecedor do IntelligentCache
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.cache.intelligent_cache import IntelligentCache, HIT, STALE, MISS
+
+
+class _Loader:
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {"versao": self.calls}
+
+
+def _expire(cache: IntelligentCache, seconds: float):
+    for entry in cache.cache.values():
+        entry.created_at -= seconds
+
+
+def test_miss_loads_once_for_concurrent_callers():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    loader = _Loader(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*[
+            cache.get_or_refresh("consultar_clientes", {"p": 1}, loader) for _ in range(5)
+        ])
+
+    results = asyncio.run(scenario())
+    assert loader.calls == 1
+    assert all(origem == MISS and data == {"versao": 1} for data, origem in results)
+
+
+def test_serves_stale_entry_and_refreshes_in_background():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, stale_grace=120)
+    loader = _Loader(delay=0.05)
+
+    async def scenario():
+        await cache.get_or_refresh("consultar_clientes", {}, loader)
+        _expire(cache, 90)
+        stale = await asyncio.gather(*[
+            cache.get_or_refresh("consultar_clientes", {}, loader) for _ in range(3)
+        ])
+        await asyncio.sleep(0.1)
+        fresh = await cache.get_or_refresh("consultar_clientes", {}, loader)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert all(result == ({"versao": 1}, STALE) for result in stale)
+    assert fresh == ({"versao": 2}, HIT)
+    assert loader.calls == 2
+    assert cache.stale_hits == 3 and cache.refreshes == 2
+
+
+def test_entry_past_grace_is_a_miss():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, stale_grace=10)
+    loader = _Loader()
+
+    async def scenario():
+        await cache.get_or_refresh("consultar_clientes", {}, loader)
+        _expire(cache, 100)
+        return await cache.get_or_refresh("consultar_clientes", {}, loader)
+
+    assert asyncio.run(scenario()) == ({"versao": 2}, MISS)
+
+
+def test_refresh_ahead_before_expiry():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=100, refresh_ahead=0.5, refresh_jitter=0)
+    loader = _Loader()
+
+    async def scenario():
+        await cache.get_or_refresh("consultar_clientes", {}, loader)
+        _expire(cache, 60)
+        result = await cache.get_or_refresh("consultar_clientes", {}, loader)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == ({"versao": 1}, HIT)
+    assert loader.calls == 2
+
+
+def test_background_failure_is_counted_not_raised():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60, stale_grace=120)
+
+    async def failing():
+        raise RuntimeError("Omie indisponível")
+
+    async def scenario():
+        await cache.get_or_refresh("consultar_clientes", {}, _Loader())
+        _expire(cache, 90)
+        result = await cache.get_or_refresh("consultar_clientes", {}, failing)
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(scenario()) == ({"versao": 1}, STALE)
+    assert cache.refresh_failures == 1
+
+
+def test_miss_propagates_loader_error():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+
+    async def failing():
+        raise RuntimeError("Omie indisponível")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_refresh("consultar_clientes", {}, failing))
+
+
+def test_warmer_refreshes_hot_entries_only():
+    cache = IntelligentCache(max_size_mb=1, default_ttl=60)
+    quente, frio = _Loader(), _Loader()
+
+    async def scenario():
+        await cache.get_or_refresh("consultar_clientes", {"q": "quente"}, quente)
+        for _ in range(5):
+            await cache.get_or_refresh("consultar_clientes", {"q": "quente"}, quente)
+        await cache.get_or_refresh("consultar_clientes", {"q": "frio"}, frio)
+        started = cache.warm_hot_entries(top_n=1, horizon=120)
+        await asyncio.sleep(0.01)
+        return started
+
+    assert asyncio.run(scenario()) == 1
+    assert quente.calls == 2 and frio.calls == 1
+    assert cache.get_stats()["revalidation"]["warmer_refreshes"] == 1
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Testes do lock do IntelligentCache e do cache particionado em shards
+"""
+
+import asyncio
+import threading
+
+from src.cache.dependencies import read_tags
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.sharded import ShardedIntelligentCache, shard_path
+
+
+def _hammer(cache, threads=8, operations=300, keys=50):
+    """Várias threads, cada uma com seu loop, lendo e gravando as mesmas chaves"""
+    errors = []
+
+    def worker(seed):
+        async def run():
+            for i in range(operations):
+                params = {"pagina": (seed * 7 + i) % keys}
+                if i % 3:
+                    await cache.get("consultar_clientes", params)
+                else:
+                    await cache.set("consultar_clientes", params, {"dados": "x" * (200 + i % 50)},
+                                    tags=read_tags("consultar_clientes"))
+        try:
+            asyncio.run(run())
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+def _consistent(cache: IntelligentCache):
+    return cache.current_size == sum(entry.size_bytes for entry in cache.cache.values())
+
+
+def test_size_accounting_survives_concurrent_threads():
+    cache = IntelligentCache(max_size_mb=0.01, default_ttl=60)
+
+    assert _hammer(cache) == []
+    assert _consistent(cache)
+    assert cache.current_size <= cache.max_size_bytes
+    assert cache.evictions > 0
+
+
+def test_sharded_cache_routes_each_key_to_one_shard():
+    cache = ShardedIntelligentCache(shards=4, max_size_mb=1, default_ttl=60)
+
+    async def run():
+        for i in range(40):
+            await cache.set("consultar_clientes", {"pagina": i}, {"pagina": i})
+        return [await cache.get("consultar_clientes", {"pagina": i}) for i in range(40)]
+
+    assert asyncio.run(run()) == [{"pagina": i} for i in range(40)]
+    assert sum(len(shard.cache) for shard in cache.shards) == 40
+    assert all(len(shard.cache) for shard in cache.shards)
+    stats = cache.get_stats()
+    assert stats["cache_size"] == 40 and stats["hits"] == 40
+    assert stats["memory_limit_mb"] == 1
+
+
+def test_sharded_cache_under_threads_and_invalidation():
+    cache = ShardedIntelligentCache(shards=4, max_size_mb=0.04, default_ttl=60)
+
+    assert _hammer(cache) == []
+    assert all(_consistent(shard) for shard in cache.shards)
+    assert all(shard.current_size <= shard.max_size_bytes for shard in cache.shards)
+
+    assert cache.invalidate_entity(None, "clientes") == cache.get_stats()["indexes"]["invalidated_entries"]
+    assert cache.current_size == 0
+
+
+def test_shard_persistence_paths():
+    assert shard_path("cache/omie.db", 2) == "cache/omie.shard2.db"
+    assert shard_path("cache/omie", 0) == "cache/omie.shard0"
+    assert shard_path(None, 1) is None
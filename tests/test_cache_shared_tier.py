@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Testes da camada L2 compartilhada (backend local no lugar do Redis)
+"""
+
+import asyncio
+
+from src.cache.intelligent_cache import IntelligentCache, HIT
+from src.cache.shared_tier import LocalSharedBackend, SharedCacheTier, company_namespace
+from src.client.omie_response import OmieResponse
+
+
+def _processes(backend, company="empresa_a", count=2):
+    return [
+        IntelligentCache(max_size_mb=1, default_ttl=600, shared_tier=SharedCacheTier(backend, company))
+        for _ in range(count)
+    ]
+
+
+def test_second_process_reads_from_shared_tier():
+    a, b = _processes(LocalSharedBackend())
+
+    async def scenario():
+        await a.set("consultar_clientes", {"p": 1}, OmieResponse({"clientes": [1]}, raw_size=20))
+        return await b.get("consultar_clientes", {"p": 1})
+
+    data = asyncio.run(scenario())
+    assert data == {"clientes": [1]} and data.raw_size == 20
+    assert len(b.cache) == 1
+    assert b.shared_tier.hits == 1
+    # Mesmo vencimento do processo que gravou
+    assert next(iter(b.cache.values())).expires_at == next(iter(a.cache.values())).expires_at
+
+
+def test_get_or_refresh_uses_shared_tier_before_loader():
+    a, b = _processes(LocalSharedBackend())
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"v": len(calls)}
+
+    async def scenario():
+        await a.get_or_refresh("consultar_clientes", {}, loader)
+        return await b.get_or_refresh("consultar_clientes", {}, loader)
+
+    assert asyncio.run(scenario()) == ({"v": 1}, HIT)
+    assert len(calls) == 1
+
+
+def test_invalidation_propagates_to_other_processes():
+    a, b = _processes(LocalSharedBackend())
+
+    async def scenario():
+        await a.start_shared_tier()
+        await b.start_shared_tier()
+        await a.set("consultar_clientes", {"p": 1}, {"v": 1})
+        await b.get("consultar_clientes", {"p": 1})
+        a.invalidate_pattern("clientes")
+        await asyncio.sleep(0)
+        return await b.get("consultar_clientes", {"p": 1})
+
+    assert asyncio.run(scenario()) is None
+    assert len(b.cache) == 0
+    assert b.shared_tier.invalidations_received == 1
+    assert a.shared_tier.invalidations_received == 0
+
+
+def test_companies_do_not_share_entries_or_invalidations():
+    backend = LocalSharedBackend()
+    (a,) = _processes(backend, company=company_namespace("APP_A"), count=1)
+    (b,) = _processes(backend, company=company_namespace("APP_B"), count=1)
+
+    async def scenario():
+        await a.start_shared_tier()
+        await b.start_shared_tier()
+        await a.set("consultar_clientes", {}, {"v": "a"})
+        await b.set("consultar_clientes", {}, {"v": "b"})
+        a.clear()
+        await asyncio.sleep(0)
+        return await b.get("consultar_clientes", {})
+
+    assert asyncio.run(scenario()) == {"v": "b"}
+    assert "APP_A" not in "".join(backend._data)
+
+
+def test_company_less_invalidation_reaches_every_company():
+    backend = LocalSharedBackend()
+    (a,) = _processes(backend, company=company_namespace("APP_A"), count=1)
+    (b,) = _processes(backend, company=company_namespace("APP_B"), count=1)
+    (c,) = _processes(backend, company=company_namespace("APP_B"), count=1)
+
+    async def scenario():
+        for cache in (a, b, c):
+            await cache.start_shared_tier()
+        await b.set("consultar_clientes", {}, {"v": "b"}, tags=["clientes"])
+        await c.get("consultar_clientes", {})
+        # Webhook sem appKey recebido pelo processo da empresa A
+        a.invalidate_tags(["clientes"], None)
+        await asyncio.sleep(0)
+        return await c.get("consultar_clientes", {}), len(c.cache)
+
+    assert asyncio.run(scenario()) == (None, 0)
+    assert not [key for key in backend._data if "consultar_clientes" in key]
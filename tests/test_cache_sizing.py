@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testes das estratégias de tamanho do cache
+"""
+
+import asyncio
+
+import pytest
+
+from src.cache.intelligent_cache import IntelligentCache
+from src.cache.sizing import deep_size, sampled_size, auto_size, get_sizer, RAW_BYTES_EXPANSION
+from src.client.omie_response import OmieResponse
+from src.client.single_flight import _detach
+
+
+def _lista(registros):
+    return {
+        "pagina": 1,
+        "clientes_cadastro": [
+            {"codigo_cliente_omie": i, "razao_social": f"Empresa {i}", "inativo": "N"}
+            for i in range(registros)
+        ],
+    }
+
+
+def test_deep_size_counts_shared_objects_once():
+    item = {"nome": "x" * 1000}
+    assert deep_size([item, item]) < deep_size([item, {"nome": "y" * 1000}])
+
+
+def test_sampled_size_close_to_deep_size():
+    valor = _lista(2000)
+    exato = deep_size(valor)
+    assert abs(sampled_size(valor) - exato) / exato < 0.1
+
+
+def test_auto_size_uses_raw_bytes_when_available():
+    resposta = OmieResponse(_lista(10), raw_size=1000)
+    assert auto_size(resposta) == int(1000 * RAW_BYTES_EXPANSION)
+    assert auto_size(dict(resposta)) == sampled_size(dict(resposta))
+
+
+def test_detach_preserves_raw_size():
+    resposta = OmieResponse(_lista(3), raw_size=321)
+    copia = _detach(resposta)
+    assert isinstance(copia, OmieResponse) and copia.raw_size == 321
+    assert copia["clientes_cadastro"] is not resposta["clientes_cadastro"]
+
+
+def test_unknown_strategy_rejected():
+    with pytest.raises(ValueError):
+        get_sizer("inexistente")
+
+
+def test_cache_uses_per_tool_strategy():
+    cache = IntelligentCache(max_size_mb=1, tool_sizing={"consultar_clientes": "pickle"})
+    valor = _lista(100)
+
+    async def scenario():
+        await cache.set("consultar_clientes", {}, valor)
+        await cache.set("consultar_categorias", {}, valor)
+
+    asyncio.run(scenario())
+    sizes = {entry.tool_name: entry.size_bytes for entry in cache.cache.values()}
+    assert sizes["consultar_clientes"] < sizes["consultar_categorias"]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Testes do circuit breaker por endpoint e das requisições hedge
+"""
+
+import asyncio
+
+import pytest
+
+from src.utils.circuit_breaker import (
+    CircuitOpenError, UpstreamGuard, endpoint_key, CLOSED, OPEN, HALF_OPEN
+)
+from src.utils.retry import RetryOrchestrator, RetryBudget
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _guard(**options):
+    clock = _Clock()
+    options.setdefault("min_calls", 4)
+    options.setdefault("window", 10)
+    options.setdefault("open_seconds", 30)
+    return UpstreamGuard("omie", clock=clock, **options), clock
+
+
+async def _fail(message="Timeout na requisição para ListarClientes"):
+    raise Exception(message)
+
+
+async def _ok():
+    return "ok"
+
+
+def _run_calls(guard, endpoint, func, count):
+    async def run():
+        outcomes = []
+        for _ in range(count):
+            try:
+                outcomes.append(await guard.call(endpoint, func))
+            except CircuitOpenError:
+                outcomes.append("rejected")
+            except Exception:
+                outcomes.append("error")
+        return outcomes
+    return asyncio.run(run())
+
+
+def test_breaker_opens_per_endpoint_and_fails_fast():
+    guard, _ = _guard()
+
+    assert _run_calls(guard, "geral/clientes/", _fail, 6) == ["error"] * 4 + ["rejected"] * 2
+    assert guard.breaker("geral/clientes/").state == OPEN
+    # Outros endpoints do mesmo upstream continuam fechados
+    assert _run_calls(guard, "geral/projetos/", _ok, 2) == ["ok", "ok"]
+    stats = guard.get_stats()
+    assert stats["open"] == ["geral/clientes"]
+    assert stats["endpoints"]["geral/clientes"]["rejected"] == 2
+    assert stats["endpoints"]["geral/clientes"]["retry_in_seconds"] == 30
+
+
+def test_half_open_probe_closes_or_reopens():
+    guard, clock = _guard()
+    _run_calls(guard, "geral/clientes/", _fail, 4)
+    breaker = guard.breaker("geral/clientes/")
+
+    clock.now += 31
+    assert guard.get_stats()["endpoints"]["geral/clientes"]["state"] == HALF_OPEN
+    assert _run_calls(guard, "geral/clientes/", _fail, 2) == ["error", "rejected"]
+    assert breaker.state == OPEN and breaker.opened == 2
+
+    clock.now += 31
+    assert _run_calls(guard, "geral/clientes/", _ok, 2) == ["ok", "ok"]
+    assert breaker.state == CLOSED
+
+
+def test_deterministic_and_throttle_faults_do_not_open_the_circuit():
+    guard, _ = _guard()
+    client_fault = 'Erro HTTP 500: {"faultcode": "SOAP-ENV:Client-103"}'
+    throttle = "Consumo redundante detectado. Aguarde 30 segundos"
+
+    _run_calls(guard, "geral/clientes/", lambda: _fail(client_fault), 6)
+    _run_calls(guard, "geral/clientes/", lambda: _fail(throttle), 6)
+    assert guard.breaker("geral/clientes/").state == CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    guard, clock = _guard(slow_call_seconds=5)
+
+    async def slow():
+        clock.now += 6
+        return "ok"
+
+    assert _run_calls(guard, "geral/clientes/", slow, 5) == ["ok"] * 4 + ["rejected"]
+    assert guard.breaker("geral/clientes/").slow_calls == 4
+
+
+def test_retries_stop_once_the_circuit_opens():
+    guard, _ = _guard()
+
+    async def no_sleep(delay):
+        pass
+
+    retry = RetryOrchestrator(max_attempts=10, sleep=no_sleep, budget=RetryBudget(capacity=100))
+    calls = []
+
+    async def send():
+        calls.append(1)
+        raise Exception("Timeout na requisição")
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(retry.call(lambda: guard.call("geral/clientes/", send)))
+    assert len(calls) == 4
+
+
+def test_hedged_request_bounds_tail_latency():
+    guard, _ = _guard(hedge_enabled=True, hedge_min_samples=5, hedge_min_delay=0.01, hedge_ratio=1)
+    started = []
+
+    async def fast():
+        return "rápida"
+
+    async def first_slow():
+        started.append(1)
+        await asyncio.sleep(5 if len(started) == 1 else 0)
+        return f"resposta {len(started)}"
+
+    async def run():
+        for _ in range(5):
+            await guard.call("geral/clientes/", fast)
+        assert guard.hedge_delay("geral/clientes/") == 0.01
+        return await asyncio.wait_for(guard.call("geral/clientes/", first_slow), timeout=1)
+
+    assert asyncio.run(run()) == "resposta 2"
+    assert len(started) == 2
+    assert guard.hedges == 1 and guard.hedge_wins == 1
+
+
+def test_writes_are_never_hedged():
+    guard, _ = _guard(hedge_enabled=True, hedge_min_samples=1, hedge_min_delay=0.01, hedge_ratio=1)
+    started = []
+
+    async def slow_write():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        await guard.call("geral/clientes/", _ok)
+        return await guard.call("geral/clientes/", slow_write, idempotent=False)
+
+    assert asyncio.run(run()) == "ok"
+    assert len(started) == 1 and guard.hedges == 0
+
+
+def test_endpoint_key_groups_rest_ids():
+    assert endpoint_key("/schedules/123/") == endpoint_key("/schedules/456") == "schedules/{id}"
+    assert endpoint_key("/stakeholders/3fa85f64-5717-4562-b3fc-2c963f66afa6/") == "stakeholders/{id}"
+    assert endpoint_key("geral/clientes/") == "geral/clientes"
+
+
+def test_results_from_an_older_state_do_not_drive_the_breaker():
+    guard, clock = _guard(open_seconds=30)
+    breaker = guard.breaker("geral/clientes/")
+
+    # Chamada lenta admitida com o circuito fechado
+    slow = breaker.allow()
+    _run_calls(guard, "geral/clientes/", _fail, 4)
+    assert breaker.state == OPEN
+
+    clock.now += 31
+    probe = breaker.allow()
+    assert breaker.state == HALF_OPEN and probe != slow
+
+    # A chamada antiga termina bem depois: não é o teste do meio-aberto
+    breaker.record(True, 40.0, slow)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is None
+
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+
+    # Falha atrasada de uma chamada admitida antes da abertura não reabre o circuito
+    stale = breaker.allow()
+    _run_calls(guard, "geral/clientes/", _fail, 4)
+    clock.now += 31
+    _run_calls(guard, "geral/clientes/", _ok, 1)
+    assert breaker.state == CLOSED
+    breaker.record(False, generation=stale)
+    breaker.release(stale)
+    assert breaker.state == CLOSED and breaker.opened == 2
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Testes da sincronização incremental e do snapshot local
+"""
+
+import asyncio
+
+from src.sync.delta_sync import DeltaSyncEngine
+from src.sync.snapshot_store import SnapshotStore
+
+
+class FakeClient:
+    """Omie falso: devolve os clientes alterados desde filtrar_por_data_de"""
+
+    def __init__(self, clientes):
+        self.clientes = clientes
+        self.params = []
+
+    async def _make_request(self, endpoint, call, param):
+        self.params.append(param)
+        registros = [
+            c for c in self.clientes
+            if "filtrar_por_data_de" not in param or c.get("alterado")
+        ]
+        return {"pagina": 1, "total_de_paginas": 1, "clientes_cadastro": registros}
+
+
+def _cliente(codigo, nome, **extra):
+    return {"codigo_cliente_omie": codigo, "razao_social": nome,
+            "cnpj_cpf": f"11.222.333/0001-{codigo:02d}", "cidade": "São Paulo", **extra}
+
+
+def test_full_then_incremental_sync():
+    client = FakeClient([_cliente(1, "Alfa Ltda"), _cliente(2, "Beta SA")])
+    store = SnapshotStore(":memory:")
+    engine = DeltaSyncEngine(client, store)
+
+    primeira = asyncio.run(engine.sync("clientes"))
+    assert primeira["modo"] == "completa"
+    assert store.count("clientes") == 2
+
+    client.clientes = [_cliente(2, "Beta SA Renomeada", alterado=True, inativo="S")]
+    segunda = asyncio.run(engine.sync("clientes"))
+
+    assert segunda["modo"] == "incremental"
+    assert "filtrar_por_data_de" in client.params[-1]
+    # Registros fora do delta permanecem no snapshot
+    assert store.count("clientes") == 2
+    assert store.get("clientes", 2)["razao_social"] == "Beta SA Renomeada"
+
+    ativos, total = store.query("clientes", only_active=True)
+    assert total == 1 and ativos[0]["codigo_cliente_omie"] == 1
+
+
+def test_full_sync_removes_deleted_records():
+    client = FakeClient([_cliente(1, "Alfa"), _cliente(2, "Beta")])
+    store = SnapshotStore(":memory:")
+    engine = DeltaSyncEngine(client, store)
+    asyncio.run(engine.sync("clientes"))
+
+    client.clientes = [_cliente(1, "Alfa")]
+    result = asyncio.run(engine.sync("clientes", force_full=True))
+
+    assert result["removidos"] == 1
+    assert store.get("clientes", 2) is None
+
+
+def test_snapshot_lookups():
+    store = SnapshotStore(":memory:")
+    engine = DeltaSyncEngine(FakeClient([
+        _cliente(7, "Gama 100% Digital", codigo_cliente_integracao="INT7")
+    ]), store)
+    asyncio.run(engine.sync("clientes"))
+
+    assert store.get_by_integration_code("clientes", "INT7")["codigo_cliente_omie"] == 7
+    assert store.get_by_document("clientes", "11222333000107")["razao_social"] == "Gama 100% Digital"
+    assert store.query("clientes", name="100%")[1] == 1
+    assert store.query("clientes", name="gama", city="são")[1] == 1
+
+
+def test_write_marks_snapshot_stale_until_next_delta_sync():
+    from src.cache.dependencies import CacheInvalidator
+
+    client = FakeClient([_cliente(1, "Alfa")])
+    store = SnapshotStore(":memory:")
+    engine = DeltaSyncEngine(client, store, sync_interval=300, company="empresa")
+    invalidator = CacheInvalidator()
+    invalidator.register(engine)
+
+    async def scenario():
+        await engine.sync("clientes")
+        assert engine.is_fresh("clientes")
+
+        # IncluirCliente bem-sucedido no Omie
+        client.clientes.append(_cliente(2, "Beta", alterado=True))
+        invalidator.on_write("geral/clientes", "IncluirCliente", "empresa")
+        assert engine.is_stale("clientes") and engine.is_stale("fornecedores")
+        assert not engine.is_fresh("clientes")
+        assert not engine.is_stale("categorias")
+
+        # Próxima leitura: dispara o delta mesmo dentro do intervalo de sincronização
+        engine.refresh_in_background("clientes")
+        await asyncio.sleep(0)
+        while "clientes" in engine._running:
+            await asyncio.sleep(0)
+        return store.query("clientes")[1]
+
+    assert asyncio.run(scenario()) == 2
+    assert "filtrar_por_data_de" in client.params[-1]
+    assert not engine.is_stale("clientes")
+
+    # Webhook de outra empresa não afeta este snapshot
+    invalidator.on_webhook("cliente_cadastrado", {}, "outra_empresa")
+    assert not engine.is_stale("clientes")
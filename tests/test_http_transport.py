@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Testes do transporte HTTP compartilhado (pool por event loop)
+"""
+
+import asyncio
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from src.client.http_transport import OmieTransport, TransportSettings
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"codigo_status": "0"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/geral/clientes/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_each_loop_gets_its_own_pool_and_dead_pools_are_closed(server_url):
+    transport = OmieTransport(TransportSettings())
+    clients = []
+
+    async def request():
+        response = await transport.post(server_url, json={"call": "ListarClientes"})
+        clients.append(await transport.start())
+        return response.status_code, transport.get_pool_metrics()
+
+    status, metrics = asyncio.run(request())
+    assert status == 200
+    assert metrics["open_connections"] == 1 and metrics["idle_connections"] == 1
+
+    # Novo event loop: pool novo, o do loop encerrado é fechado e descartado
+    status, metrics = asyncio.run(request())
+    assert status == 200
+    assert clients[0] is not clients[1]
+    assert clients[0].is_closed and not clients[1].is_closed
+    assert metrics["pools"] == 1
+
+    asyncio.run(transport.close())
+    assert clients[1].is_closed
+
+
+def test_pool_metrics_report_the_effective_protocol(monkeypatch):
+    transport = OmieTransport(TransportSettings(http2=True))
+    monkeypatch.setattr(transport, "_http2_available", lambda: False)
+
+    async def scenario():
+        await transport.start()
+        metrics = transport.get_pool_metrics()
+        await transport.close()
+        return metrics
+
+    metrics = asyncio.run(scenario())
+    assert metrics["http2"] is False and metrics["http2_requested"] is True
+    assert metrics["open_connections"] == 0
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testes do IntelligentCache (LRU O(1) e vencimento por heap)
+"""
+
+import asyncio
+import time
+
+from src.cache.intelligent_cache import IntelligentCache, MISS, Uncached
+
+
+def _cache(**kwargs):
+    cache = IntelligentCache(**kwargs)
+    # Tamanho fixo para controlar o limite de memória nos testes
+    cache._calculate_size = lambda data, tool_name=None: 1024
+    return cache
+
+
+def test_evicts_least_recently_used_entry():
+    cache = _cache(max_size_mb=1, default_ttl=600)
+    cache.max_size_bytes = 3 * 1024
+
+    async def run():
+        for i in range(3):
+            await cache.set("tool", {"i": i}, {"v": i})
+        await cache.get("tool", {"i": 0})          # 0 passa a ser o mais recente
+        await cache.set("tool", {"i": 3}, {"v": 3})  # despeja 1
+        return [await cache.get("tool", {"i": i}) for i in range(4)]
+
+    results = asyncio.run(run())
+
+    assert results == [{"v": 0}, None, {"v": 2}, {"v": 3}]
+    assert cache.evictions == 1
+    assert cache.current_size == 3 * 1024
+
+
+def test_expired_entries_are_reaped_without_full_scan():
+    cache = _cache(max_size_mb=1, default_ttl=600)
+
+    async def run():
+        await cache.set("curto", {}, "a", ttl=0.01)
+        await cache.set("longo", {}, "b", ttl=600)
+        # Regravar com TTL longo: o item antigo do heap não pode removê-la
+        await cache.set("regravado", {}, "c", ttl=0.01)
+        await cache.set("regravado", {}, "c2", ttl=600)
+        time.sleep(0.02)
+        cache._reap_expired()
+
+    asyncio.run(run())
+
+    assert [e.tool_name for e in cache.cache.values()] == ["longo", "regravado"]
+    assert cache.current_size == 2 * 1024
+
+
+def test_hot_entries_and_stats_keep_public_shape():
+    cache = _cache(max_size_mb=1, default_ttl=600)
+
+    async def run():
+        await cache.set("consultar_clientes", {}, 1)
+        await cache.set("consultar_categorias", {}, 2)
+        for _ in range(3):
+            await cache.get("consultar_categorias", {})
+        await cache.get("consultar_projetos", {})
+
+    asyncio.run(run())
+
+    assert cache.get_hot_entries(1)[0]["tool_name"] == "consultar_categorias"
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["cache_size"]) == (3, 1, 2)
+
+    cache.invalidate_pattern("clientes")
+    assert cache.get_stats()["cache_size"] == 1
+
+
+def test_uncached_loader_result_is_returned_without_second_call():
+    cache = _cache(max_size_mb=1, default_ttl=600)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return Uncached({})
+
+    async def run():
+        return await cache.get_or_refresh("listar_clientes", {}, loader)
+
+    assert asyncio.run(run()) == ({}, MISS)
+    assert len(calls) == 1
+    assert not cache.cache
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Testes do histograma logarítmico de latência (rollups de métricas)
+"""
+
+import math
+import random
+
+from src.utils.latency_histogram import (
+    HISTOGRAM_BUCKETS, bucket_index, empty_histogram, merge, quantile, quantiles, record
+)
+
+
+def _exact(samples, q):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def test_quantiles_within_bucket_error():
+    rng = random.Random(3)
+    samples = [rng.lognormvariate(5, 0.8) for _ in range(20000)] + [30000] * 150
+    histogram = empty_histogram()
+    for ms in samples:
+        record(histogram, ms)
+
+    for q in (0.5, 0.95, 0.99, 0.999):
+        assert abs(quantile(histogram, q) / _exact(samples, q) - 1) < 0.1
+
+
+def test_merged_hours_equal_histogram_of_all_samples():
+    rng = random.Random(5)
+    hours = [[rng.expovariate(1 / 200) for _ in range(500)] for _ in range(24)]
+    per_hour = []
+    for samples in hours:
+        histogram = empty_histogram()
+        for ms in samples:
+            record(histogram, ms)
+        per_hour.append(histogram)
+
+    whole = empty_histogram()
+    for ms in (ms for samples in hours for ms in samples):
+        record(whole, ms)
+
+    # Rollups do PostgreSQL podem vir mais curtos (zeros à direita) ou nulos
+    trimmed = [h[:max(i for i, c in enumerate(h) if c) + 1] for h in per_hour] + [None]
+    assert merge(trimmed) == whole
+    assert quantiles(merge(per_hour)) == quantiles(whole)
+
+
+def test_bucket_scale_matches_sql_latency_bucket():
+    # latency_bucket(ms) = LEAST(63, FLOOR(LN(GREATEST(ms, 1)) / LN(1.2)))
+    for ms in (0, 1, 2, 5, 37, 120, 999, 30000, 10 ** 7):
+        assert bucket_index(ms) == min(63, math.floor(math.log(max(ms, 1)) / math.log(1.2)))
+    assert bucket_index(10 ** 9) == HISTOGRAM_BUCKETS - 1
+    assert quantiles(empty_histogram()) == {"p50": None, "p95": None, "p99": None}
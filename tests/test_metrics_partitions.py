@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Testes da manutenção das partições diárias de omie_api_metrics
+"""
+
+import asyncio
+
+import pytest
+
+
+class _Connection:
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = []
+
+    async def fetchval(self, sql, *args):
+        self.calls.append(sql.split("(")[0].split()[-1])
+        if any(name in sql for name in self.failing):
+            raise RuntimeError("default partition would be violated")
+        return 2
+
+
+class _Pool:
+    def __init__(self, connection):
+        self.connection = connection
+        self.pg_pool = self
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.connection
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+def test_partition_retention_runs_when_creation_fails():
+    database_manager = pytest.importorskip("src.database.database_manager")
+    connection = _Connection(failing=["ensure_metrics_partitions"])
+    collector = database_manager.MetricsCollector(_Pool(connection))
+
+    result = asyncio.run(collector.maintain_partitions(retention_days=30, days_ahead=3))
+
+    assert result == {"created": 0, "dropped": 2}
+    assert connection.calls == ["ensure_metrics_partitions", "drop_old_metrics_partitions"]
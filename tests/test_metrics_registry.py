@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Testes do registro de latências em sketches mescláveis
+"""
+
+import asyncio
+import json
+import random
+
+from src.utils.latency_histogram import LatencySketch
+from src.utils.metrics_registry import MemorySketchStore, MetricsRegistry
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sketch_merge_and_round_trip():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(5, 0.7) for _ in range(5000)]
+    whole, first, second = LatencySketch(), LatencySketch(), LatencySketch()
+    for i, ms in enumerate(samples):
+        whole.record(ms, ok=i % 50 != 0)
+        (first if i % 2 else second).record(ms, ok=i % 50 != 0)
+
+    merged = LatencySketch().merge(first).merge(second)
+    assert merged.histogram() == whole.histogram()
+    assert merged.errors == whole.errors == 100
+
+    restored = LatencySketch.from_dict(json.loads(json.dumps(merged.to_dict())))
+    assert restored.summary() == merged.summary()
+    assert LatencySketch.from_histogram(merged.histogram()).quantile(0.99) == whole.quantile(0.99)
+
+
+def test_processes_merge_through_shared_store():
+    async def scenario():
+        clock = FakeClock()
+        store = MemorySketchStore()
+        workers = [MetricsRegistry(process_id=f"p{i}", clock=clock) for i in range(2)]
+        for worker in workers:
+            worker.stores.append(store)
+
+        # p0 rápido, p1 lento no mesmo endpoint
+        for _ in range(90):
+            workers[0].record("empresa", "/geral/clientes/", "ListarClientes", 100)
+        for _ in range(10):
+            workers[1].record("empresa", "geral/clientes", "ListarClientes", 2000, ok=False)
+
+        clock.now += 61
+        assert await workers[0].snapshot() == 1
+        assert await workers[1].snapshot() == 1
+
+        reader = MetricsRegistry(process_id="leitor", clock=clock)
+        reader.stores.append(store)
+        report = await reader.report(minutes=5)
+        (series,) = report["series"]
+        assert series["endpoint"] == "geral/clientes"
+        assert series["requests"] == 100 and series["errors"] == 10
+        assert series["p50"] < 130 and series["p95"] > 1500
+        return report
+
+    assert asyncio.run(scenario())["source"] == "MemorySketchStore"
+
+
+def test_windows_rotate_and_failed_snapshot_is_retried():
+    class FlakyStore(MemorySketchStore):
+        fail = True
+
+        async def save(self, process_id, window_start, sketches):
+            if self.fail:
+                raise ConnectionError("redis indisponível")
+            await super().save(process_id, window_start, sketches)
+
+    async def scenario():
+        clock = FakeClock()
+        store = FlakyStore()
+        registry = MetricsRegistry(process_id="p0", clock=clock)
+        registry.stores.append(store)
+
+        for minute in range(3):
+            registry.record("empresa", "geral/produtos", "ListarProdutos", 50 + minute)
+            clock.now += 60
+
+        assert await registry.snapshot() == 0
+        assert registry.get_stats()["pending_windows"] == 3
+
+        store.fail = False
+        assert await registry.snapshot() == 3
+        assert registry.get_stats()["pending_windows"] == 0
+
+        # Só as janelas do período pedido entram no relatório
+        report = await registry.report(minutes=1, group_by="total")
+        assert report["overall"]["requests"] == 1
+        report = await registry.report(minutes=10, group_by="endpoint")
+        assert report["series"][0]["requests"] == 3
+
+    asyncio.run(scenario())
+
+
+class CountingStore(MemorySketchStore):
+    """Soma cada gravação recebida (acusa janelas gravadas duas vezes)"""
+
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.fail = fail
+        self.saved_requests = 0
+
+    async def save(self, process_id, window_start, sketches):
+        if self.fail:
+            raise ConnectionError("postgres indisponível")
+        self.saved_requests += sum(sketch.count for sketch in sketches.values())
+        await super().save(process_id, window_start, sketches)
+
+
+def test_store_failure_does_not_resave_window_in_other_stores():
+    async def scenario():
+        clock = FakeClock()
+        redis_like, postgres_like = CountingStore(), CountingStore(fail=True)
+        registry = MetricsRegistry(process_id="p0", clock=clock)
+        registry.stores.extend([redis_like, postgres_like])
+
+        for _ in range(10):
+            registry.record("empresa", "geral/clientes", "ListarClientes", 80)
+        clock.now += 60
+
+        assert await registry.snapshot() == 0
+        assert await registry.snapshot() == 0
+        # A janela já está no primeiro armazenamento: o relatório não a conta de novo
+        assert (await registry.report(minutes=5))["overall"]["requests"] == 10
+
+        postgres_like.fail = False
+        assert await registry.snapshot() == 1
+        assert redis_like.saved_requests == postgres_like.saved_requests == 10
+        assert registry.get_stats()["pending_windows"] == 0
+
+    asyncio.run(scenario())
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def hset(self, key, mapping):
+        self.ops.append(("hset", key, mapping))
+
+    def expire(self, key, seconds):
+        pass
+
+    def hgetall(self, key):
+        self.ops.append(("hgetall", key, None))
+
+    async def execute(self):
+        results = []
+        for op, key, mapping in self.ops:
+            if op == "hset":
+                self.redis.hashes.setdefault(key, {}).update(mapping)
+                results.append(len(mapping))
+            else:
+                results.append(dict(self.redis.hashes.get(key, {})))
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+def test_redis_hour_hash_counts_each_window_once():
+    from src.utils.metrics_registry import RedisSketchStore
+
+    store = RedisSketchStore.__new__(RedisSketchStore)
+    store.redis, store.prefix, store._hours = FakeRedis(), "latency", {}
+
+    async def scenario():
+        key = ("empresa", "geral/clientes", "ListarClientes")
+        window = LatencySketch()
+        for _ in range(10):
+            window.record(120)
+        hour_start = 1_699_999_200.0
+        # Regravação da mesma janela (ex.: após falha de outro armazenamento)
+        await store.save("p0", hour_start + 60, {key: window})
+        await store.save("p0", hour_start + 60, {key: window})
+        await store.save("p0", hour_start + 120, {key: window})
+
+        (value,) = store.redis.hashes[f"latency:1h:{int(hour_start)}"].values()
+        assert json.loads(value)["n"] == 20
+        loaded = await store.load(hour_start, hour_start + 180)
+        assert loaded[key].count == 20
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Testes da cópia dos utilitários compartilhados no Nibo MCP
+"""
+
+import importlib.util
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+NIBO_ROOT = Path(__file__).resolve().parents[1] / "nibo-mcp"
+
+
+def _sync_script():
+    spec = importlib.util.spec_from_file_location("sync_shared_utils", NIBO_ROOT / "scripts" / "sync_shared_utils.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_vendored_copies_match_the_root_utilities():
+    assert _sync_script().stale_modules() == []
+
+
+def test_nibo_utilities_import_without_the_omie_checkout(tmp_path):
+    # Só o pacote 'src' do Nibo, como num deploy isolado
+    shutil.copytree(NIBO_ROOT / "src", tmp_path / "src",
+                    ignore=shutil.ignore_patterns("__pycache__", "core", "tools"))
+    code = (
+        "from src.utils.rate_limiter import nibo_rate_limiter\n"
+        "from src.utils.retry import nibo_retry, SAFE_HTTP_METHODS\n"
+        "from src.utils.circuit_breaker import nibo_guard\n"
+        "assert nibo_guard.upstream == 'nibo' and 'GET' in SAFE_HTTP_METHODS\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Testes da escrita em lote
+"""
+
+import asyncio
+
+from src.client.omie_batch import OmieBatchWriter, is_transient_error
+from src.utils.retry import RetryOrchestrator
+
+CNPJ_VALIDO = "11.222.333/0001-81"
+
+
+class FakeClient:
+    """Cliente falso que registra as chamadas e permite injetar falhas"""
+
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = fail or (lambda call, param, attempt: None)
+
+    async def _make_request(self, endpoint, call, param):
+        self.calls.append((call, param))
+        error = self.fail(call, param, len(self.calls))
+        if error:
+            raise Exception(error)
+        return {"codigo_status": "0"}
+
+
+def _clientes(total):
+    return [
+        {"razao_social": f"Cliente {i}", "cnpj_cpf": CNPJ_VALIDO,
+         "codigo_cliente_integracao": f"C{i}"}
+        for i in range(total)
+    ]
+
+
+def test_records_are_sent_in_lots():
+    client = FakeClient()
+    writer = OmieBatchWriter(client)
+
+    result = asyncio.run(writer.write("cliente", _clientes(120), lot_size=50))
+
+    assert [call for call, _ in client.calls] == ["UpsertClientesPorLote"] * 3
+    assert result.succeeded == 120
+    assert result.results["C119"]["mode"] == "lote"
+
+
+def test_invalid_records_are_reported_and_not_sent():
+    client = FakeClient()
+    writer = OmieBatchWriter(client)
+    records = _clientes(2) + [{"razao_social": "Sem documento", "codigo_cliente_integracao": "X"}]
+
+    result = asyncio.run(writer.write("cliente", records))
+
+    assert result.results["X"]["status"] == "invalid"
+    assert len(client.calls[0][1]["clientes_cadastro"]) == 2
+
+
+def test_failed_lot_falls_back_to_single_calls():
+    def fail(call, param, attempt):
+        if call == "UpsertClientesPorLote":
+            return "ERROR: Cliente C1 com dados inconsistentes"
+        if param.get("codigo_cliente_integracao") == "C1":
+            return "ERROR: dados inconsistentes"
+
+    client = FakeClient(fail)
+    writer = OmieBatchWriter(client)
+
+    result = asyncio.run(writer.write("cliente", _clientes(3)))
+
+    assert result.succeeded == 2
+    assert result.results["C1"]["status"] == "error"
+    assert result.results["C0"]["mode"] == "single"
+
+
+def test_transient_failures_are_retried():
+    def fail(call, param, attempt):
+        if attempt == 1:
+            return "Timeout na requisição para IncluirContaPagar"
+
+    client = FakeClient(fail)
+    retry = RetryOrchestrator(base_delay=0.001, max_delay=0.01)
+    writer = OmieBatchWriter(client, retry=retry)
+    conta = {"codigo_cliente_fornecedor": 1, "data_vencimento": "10/01/2026", "valor_documento": 10}
+
+    result = asyncio.run(writer.write("conta_pagar", [conta], use_lots=False))
+
+    key = next(iter(result.results))
+    assert result.results[key] == {**result.results[key], "status": "success", "attempts": 2}
+    assert result.retries == 1
+    assert retry.get_stats()["retries_by_reason"] == {"timeout": 1}
+    assert is_transient_error(Exception("Erro HTTP 500: REDUNDANT"))
+
+
+def test_deterministic_failures_are_not_retried():
+    def fail(call, param, attempt):
+        return "SOAP-ENV:Client-101: Código de integração já cadastrado"
+
+    client = FakeClient(fail)
+    retry = RetryOrchestrator(base_delay=0.001, max_delay=0.01)
+    writer = OmieBatchWriter(client, retry=retry)
+
+    result = asyncio.run(writer.write("cliente", _clientes(1), use_lots=False))
+
+    assert result.results["C0"]["status"] == "error" and result.results["C0"]["attempts"] == 1
+    assert len(client.calls) == 1 and retry.get_stats()["retries"] == 0
+
+
+def test_records_rejected_inside_a_lot_are_resent_individually():
+    class LotClient(FakeClient):
+        async def _make_request(self, endpoint, call, param):
+            self.calls.append((call, param))
+            if call == "UpsertClientesPorLote":
+                return {"lote": param["lote"], "codigo_status": "0", "status_lote": [
+                    {"codigo_cliente_integracao": record["codigo_cliente_integracao"],
+                     "codigo_status": "101" if record["codigo_cliente_integracao"] == "C1" else "0",
+                     "descricao_status": "Cliente já cadastrado" if record["codigo_cliente_integracao"] == "C1" else "OK"}
+                    for record in param["clientes_cadastro"]
+                ]}
+            raise Exception("SOAP-ENV:Client-101: Cliente já cadastrado para o código de integração C1")
+
+    client = LotClient()
+    writer = OmieBatchWriter(client, retry=RetryOrchestrator(base_delay=0.001, max_delay=0.01))
+
+    result = asyncio.run(writer.write("cliente", _clientes(3)))
+
+    assert [call for call, _ in client.calls] == ["UpsertClientesPorLote", "IncluirCliente"]
+    assert result.results["C0"]["status"] == result.results["C2"]["status"] == "success"
+    assert result.results["C1"]["status"] == "error" and result.results["C1"]["mode"] == "single"
+    assert "já cadastrado" in result.results["C1"]["error"]
+
+
+def test_duplicate_fault_after_a_timeout_confirms_the_write():
+    def fail(call, param, attempt):
+        if attempt == 1:
+            return "Timeout na requisição para IncluirCliente"
+        return ("SOAP-ENV:Client-102: Cliente já cadastrado para o Código de Integração "
+                f"[{param['codigo_cliente_integracao']}] !")
+
+    client = FakeClient(fail)
+    writer = OmieBatchWriter(client, retry=RetryOrchestrator(base_delay=0.001, max_delay=0.01))
+
+    result = asyncio.run(writer.write("cliente", _clientes(1), use_lots=False))
+
+    assert result.results["C0"]["status"] == "success"
+    assert result.results["C0"]["ja_cadastrado"] is True and result.results["C0"]["attempts"] == 2
+    assert result.failed == 0
+
+
+def test_results_keep_only_the_status_fields_of_the_response():
+    class VerboseClient(FakeClient):
+        async def _make_request(self, endpoint, call, param):
+            return {"codigo_status": "0", "descricao_status": "Cliente cadastrado",
+                    "codigo_cliente_omie": 42, "dados_completos": {"enderecos": [1, 2, 3]}}
+
+    result = asyncio.run(OmieBatchWriter(VerboseClient()).write("cliente", _clientes(1), use_lots=False))
+
+    assert result.results["C0"] == {"status": "success", "mode": "single", "attempts": 1,
+                                    "codigo_status": "0", "descricao_status": "Cliente cadastrado",
+                                    "codigo_cliente_omie": 42}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Testes do registro de chamadas Omie e do dispatcher
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.client.omie_dispatcher import OmieDispatcher
+from src.client.omie_endpoints import get_call, find_call
+
+
+class FakeClient(OmieDispatcher):
+    """Cliente mínimo: registra o que seria enviado ao Omie"""
+
+    def __init__(self):
+        self.auth = {"app_key": "empresa-teste"}
+        self.sent = []
+
+    async def _send_request(self, endpoint, call, param):
+        self.sent.append((endpoint, call, param))
+        await asyncio.sleep(0.01)
+        return {"call": call}
+
+
+def test_registry_carries_pagination_keys_per_endpoint():
+    clientes = get_call("consultar_clientes")
+    assert (clientes.page_key, clientes.page_size_key) == ("pagina", "registros_por_pagina")
+    assert clientes.idempotent and clientes.cacheable
+
+    lancamentos = get_call("consultar_lancamentos")
+    assert lancamentos.build_param() == {"nPagina": 1, "nRegPorPagina": 50}
+    assert lancamentos.total_pages_key == "nTotPaginas"
+    assert (lancamentos.records_key, lancamentos.total_records_key) == ("nRegistros", "nTotRegistros")
+
+    assert not get_call("incluir_cliente").idempotent
+    assert get_call("criar_conta_pagar").call == "IncluirContaPagar"
+    assert find_call("/geral/clientes/", "ConsultarCliente").name == "consultar_cliente_por_codigo"
+    assert get_call("nao_existe") is None
+
+
+def test_generated_methods_dispatch_through_registry():
+    client = FakeClient()
+
+    async def run():
+        reads = [client.consultar_categorias() for _ in range(3)]
+        writes = [client.incluir_cliente({"razao_social": "A"}) for _ in range(2)]
+        return await asyncio.gather(*reads, *writes)
+
+    results = asyncio.run(run())
+
+    assert results[0] == {"call": "ListarCategorias"}
+    calls = [call for _, call, _ in client.sent]
+    # Leituras idênticas coalescidas, escritas sempre enviadas
+    assert calls.count("ListarCategorias") == 1
+    assert calls.count("IncluirCliente") == 2
+    assert client.sent[0][2] == {"pagina": 1, "registros_por_pagina": 50}
+
+
+def test_unknown_methods_raise_attribute_error():
+    client = FakeClient()
+    assert not hasattr(client, "initialize")
+    with pytest.raises(AttributeError):
+        client.metodo_inexistente
+
+
+def test_client_without_send_request_fails_at_instantiation():
+    class Incompleto(OmieDispatcher):
+        pass
+
+    with pytest.raises(TypeError):
+        Incompleto()
+
+
+def test_importing_a_client_defers_the_shared_services():
+    code = (
+        "import sys\n"
+        "import src.client.omie_dispatcher\n"
+        "loaded = [m for m in ('src.config', 'src.cache.dependencies', 'src.utils.rate_limiter',\n"
+        "                      'src.utils.retry', 'src.utils.circuit_breaker', 'src.utils.metrics_registry')\n"
+        "          if m in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k not in ("OMIE_APP_KEY", "OMIE_APP_SECRET")}
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Testes do paginador concorrente Omie
+"""
+
+import asyncio
+
+from src.client.paginator import OmiePaginator
+
+
+class FakeListClient:
+    """Cliente falso com listagem paginada e contador de concorrência"""
+
+    def __init__(self, total_pages: int = 5, per_page: int = 3, delay: float = 0.01):
+        self.total_pages = total_pages
+        self.per_page = per_page
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _make_request(self, endpoint, call, param):
+        pagina = param["pagina"]
+        self.calls.append(pagina)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        if pagina > self.total_pages:
+            raise Exception("Erro HTTP 500: Não existem registros para a página")
+
+        return {
+            "pagina": pagina,
+            "total_de_paginas": self.total_pages,
+            "clientes_cadastro": [
+                {"codigo": (pagina - 1) * self.per_page + i} for i in range(self.per_page)
+            ]
+        }
+
+
+def test_iter_records_returns_all_pages_in_order():
+    client = FakeListClient(total_pages=5, per_page=3)
+    paginator = OmiePaginator(client, fan_out=3)
+
+    async def run():
+        return [r["codigo"] async for r in paginator.iter_records(
+            "geral/clientes", "ListarClientes", {"pagina": 1, "registros_por_pagina": 3}
+        )]
+
+    codigos = asyncio.run(run())
+
+    assert codigos == list(range(15))
+    assert sorted(client.calls) == [1, 2, 3, 4, 5]
+
+
+def test_endpoint_limit_caps_concurrency():
+    client = FakeListClient(total_pages=12)
+    paginator = OmiePaginator(client, fan_out=10, endpoint_limits={"geral/clientes": 2})
+
+    result = asyncio.run(paginator.collect("geral/clientes", "ListarClientes", {}))
+
+    assert result["total_de_paginas"] == 12
+    assert len(result["clientes_cadastro"]) == 36
+    assert client.max_active <= 2
+
+
+def test_empty_first_page_yields_nothing():
+    client = FakeListClient(total_pages=0)
+    paginator = OmiePaginator(client)
+
+    async def run():
+        return [r async for r in paginator.iter_records("geral/clientes", "ListarClientes", {})]
+
+    assert asyncio.run(run()) == []
+
+
+def test_collect_keeps_the_endpoint_response_shape():
+    class LancamentosClient:
+        async def _make_request(self, endpoint, call, param):
+            if param["nPagina"] > 2:
+                raise Exception("Erro HTTP 500: Não existem registros para a página")
+            return {"nPagina": param["nPagina"], "nTotPaginas": 2, "nRegistros": 1, "nTotRegistros": 2,
+                    "listaLancamentos": [{"nCodLanc": param["nPagina"]}]}
+
+    result = asyncio.run(OmiePaginator(LancamentosClient()).collect(
+        "financas/contacorrentelancamentos", "ListarLancCC", {"nRegPorPagina": 500}
+    ))
+
+    assert result == {"nPagina": 1, "nTotPaginas": 2, "nRegistros": 2, "nTotRegistros": 2,
+                      "listaLancamentos": [{"nCodLanc": 1}, {"nCodLanc": 2}]}
+
+
+def test_collect_without_records_uses_the_registered_list_key():
+    client = FakeListClient(total_pages=0)
+
+    result = asyncio.run(OmiePaginator(client).collect("geral/clientes", "ListarClientes", {}))
+
+    assert result["clientes_cadastro"] == [] and result["total_de_registros"] == 0
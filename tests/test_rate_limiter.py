@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Testes do limitador adaptativo por app_key/método
+"""
+
+import asyncio
+import time
+
+from src.utils.rate_limiter import AdaptiveRateLimiter, TokenBucket, is_throttle_fault
+
+
+def test_throttle_fault_detection():
+    assert is_throttle_fault(429)
+    assert is_throttle_fault(425)
+    assert is_throttle_fault(500, '{"faultstring": "ERROR: Consumo redundante detectado"}')
+    assert is_throttle_fault(500, "REDUNDANT")
+    assert not is_throttle_fault(500, "Cliente não cadastrado")
+
+
+def test_bucket_serves_waiters_in_arrival_order():
+    bucket = TokenBucket(rate=50, burst=1)
+    order = []
+
+    async def worker(i):
+        await bucket.acquire()
+        order.append(i)
+
+    async def run():
+        await asyncio.gather(*(worker(i) for i in range(5)))
+
+    start = time.monotonic()
+    asyncio.run(run())
+
+    assert order == [0, 1, 2, 3, 4]
+    # 1 token de burst + 4 reposições a 50/s
+    assert time.monotonic() - start >= 0.07
+
+
+def test_throttle_fault_tightens_and_quiet_period_recovers():
+    limiter = AdaptiveRateLimiter(tenant_rate=10, call_rate=4, quiet_period=0.05)
+
+    asyncio.run(limiter.acquire("empresa-a", "geral/clientes", "ListarClientes"))
+    assert limiter.observe("empresa-a", "geral/clientes/", "ListarClientes", 429)
+
+    call_bucket = limiter._calls[("empresa-a", "geral/clientes", "ListarClientes")]
+    assert call_bucket.rate == 2
+    assert limiter._tenants["empresa-a"].rate < 10
+
+    time.sleep(0.06)
+    asyncio.run(limiter.acquire("empresa-a", "geral/clientes", "ListarClientes"))
+    assert call_bucket.rate == 3
+
+
+def test_tenants_have_independent_buckets():
+    limiter = AdaptiveRateLimiter(tenant_rate=10, call_rate=10)
+    limiter.observe("empresa-a", "geral/clientes", "ListarClientes", 429)
+
+    asyncio.run(limiter.acquire("empresa-b", "geral/clientes", "ListarClientes"))
+
+    assert limiter._tenants["empresa-b"].rate == 10
+    assert limiter._tenants["empresa-a"].rate < 10
+
+
+def test_id_bearing_paths_share_the_call_bucket():
+    limiter = AdaptiveRateLimiter(tenant_rate=100, tenant_burst=100, call_rate=1, call_burst=2)
+
+    async def run():
+        started = time.perf_counter()
+        for client_id in (101, 202, 303):
+            await limiter.acquire("empresa-a", f"clients/{client_id}", "GET")
+        return time.perf_counter() - started
+
+    # Terceira requisição espera o bucket do método em vez de ganhar um bucket novo por id
+    assert asyncio.run(run()) >= 0.9
+    assert list(limiter._calls) == [("empresa-a", "clients/{id}", "GET")]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Testes das retentativas (classificação, jitter, orçamento e idempotência)
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from src.utils.retry import (
+    RetryBudget, RetryOrchestrator, classify_failure,
+    CONNECTION, SERVER_ERROR, THROTTLED, TIMEOUT
+)
+
+
+class _Flaky:
+    def __init__(self, errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+def _orchestrator(**kwargs):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    kwargs.setdefault("budget", RetryBudget(capacity=100))
+    return RetryOrchestrator(sleep=sleep, rng=random.Random(7), **kwargs), sleeps
+
+
+def _wrapped(message, cause):
+    try:
+        raise cause
+    except Exception:
+        try:
+            raise Exception(message)
+        except Exception as e:
+            return e
+
+
+def test_classify_failure():
+    assert classify_failure(Exception("Timeout na requisição para ListarClientes")) == TIMEOUT
+    assert classify_failure(asyncio.TimeoutError()) == TIMEOUT
+    assert classify_failure(_wrapped("Erro na requisição ListarClientes: x", ConnectionResetError())) == CONNECTION
+    assert classify_failure(Exception("Erro HTTP 502: Bad Gateway")) == SERVER_ERROR
+    assert classify_failure(Exception('Erro HTTP 500: {"faultcode": "SOAP-ENV:Server"}')) == SERVER_ERROR
+    assert classify_failure(Exception("Erro na API: 429 - Too Many Requests")) == THROTTLED
+    assert classify_failure(Exception('Erro HTTP 500: {"faultstring": "Consumo redundante detectado"}')) == THROTTLED
+    assert classify_failure(Exception("529 Overloaded")) == THROTTLED
+    # Falhas determinísticas nunca são repetidas
+    assert classify_failure(Exception('Erro HTTP 500: {"faultcode": "SOAP-ENV:Client-103"}')) is None
+    assert classify_failure(Exception("Erro HTTP 500: Não existem registros para a página [2]")) is None
+    assert classify_failure(Exception("Erro na API: 400 - Bad Request")) is None
+    assert classify_failure(ValueError("Chamada Omie não registrada")) is None
+
+
+def test_transient_failures_are_retried_with_decorrelated_jitter():
+    retry, sleeps = _orchestrator(max_attempts=4, base_delay=0.5, max_delay=8)
+    func = _Flaky([Exception("Erro HTTP 503: x")] * 3)
+
+    assert asyncio.run(retry.call(func)) == "ok"
+    assert func.calls == 4 and len(sleeps) == 3
+    assert all(0.5 <= delay <= 8 for delay in sleeps)
+    stats = retry.get_stats()
+    assert stats["retries_by_reason"] == {SERVER_ERROR: 3} and stats["recovered"] == 1
+    assert stats["backoff_seconds"] == round(sum(sleeps), 2)
+
+
+def test_non_idempotent_and_deterministic_failures_are_not_retried():
+    retry, sleeps = _orchestrator()
+    write = _Flaky([Exception("Timeout na requisição para IncluirCliente")])
+    with pytest.raises(Exception):
+        asyncio.run(retry.call(write, idempotent=False))
+
+    invalid = _Flaky([Exception('Erro HTTP 500: {"faultcode": "SOAP-ENV:Client-103"}')])
+    with pytest.raises(Exception):
+        asyncio.run(retry.call(invalid))
+
+    assert write.calls == invalid.calls == 1 and sleeps == []
+    assert retry.get_stats()["not_idempotent"] == 1
+
+
+def test_attempts_are_bounded_and_long_throttle_waits_give_up():
+    retry, sleeps = _orchestrator(max_attempts=3, max_delay=5)
+    down = _Flaky([Exception("Erro HTTP 500: x")] * 10)
+    with pytest.raises(Exception):
+        asyncio.run(retry.call(down))
+    assert down.calls == 3 and retry.exhausted == 1
+
+    throttled = _Flaky([Exception("Consumo redundante detectado. Aguarde 60 segundos")])
+    with pytest.raises(Exception):
+        asyncio.run(retry.call(throttled))
+    assert throttled.calls == 1
+
+    short = _Flaky([Exception("Consumo redundante detectado. Aguarde 3 segundos")])
+    assert asyncio.run(retry.call(short)) == "ok"
+    assert sleeps[-1] >= 3
+
+
+def test_budget_limits_retry_amplification_during_outage():
+    retry, _ = _orchestrator(max_attempts=5, budget=RetryBudget(ratio=0.1, min_per_second=0, capacity=2))
+
+    async def outage():
+        calls = 0
+        for _ in range(50):
+            func = _Flaky([Exception("Timeout na requisição")] * 10)
+            try:
+                await retry.call(func)
+            except Exception:
+                pass
+            calls += func.calls
+        return calls
+
+    upstream_calls = asyncio.run(outage())
+    # Sem orçamento seriam 250 chamadas; com ele, 50 + 2 de reserva + 10% das chamadas
+    assert upstream_calls <= 50 + 2 + 5
+    assert retry.get_stats()["budget_denied"] > 0
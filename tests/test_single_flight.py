@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Testes da coalescência de requisições (single-flight)
+"""
+
+import asyncio
+
+import pytest
+
+from src.client.single_flight import SingleFlight, is_mutating_call, make_flight_key
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return {"categoria": [{"codigo": "1.01"}]}
+
+    async def run():
+        key = make_flight_key("empresa", "geral/categorias", "ListarCategorias", {"pagina": 1})
+        return await asyncio.gather(*(flight.do(key, fetch) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(executions) == 1
+    assert flight.coalesced == 4
+    assert all(r == {"categoria": [{"codigo": "1.01"}]} for r in results)
+
+    # Cada chamador recebe seu próprio dict de primeiro nível
+    results[1]["categoria"] = []
+    assert results[2]["categoria"] == [{"codigo": "1.01"}]
+
+
+def test_errors_are_shared_with_followers():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Timeout na requisição")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.executed == 1
+    assert flight.in_flight == 0
+
+
+def test_key_normalizes_param_order():
+    a = make_flight_key("c", "/geral/clientes/", "ListarClientes", {"pagina": 1, "registros_por_pagina": 50})
+    b = make_flight_key("c", "geral/clientes", "ListarClientes", {"registros_por_pagina": 50, "pagina": 1})
+    assert a == b
+
+
+@pytest.mark.parametrize("call,expected", [
+    ("IncluirCliente", True),
+    ("AlterarContaPagar", True),
+    ("ExcluirContaReceber", True),
+    ("UpsertClientesPorLote", True),
+    ("ListarCategorias", False),
+    ("ConsultarCliente", False),
+])
+def test_mutating_calls(call, expected):
+    assert is_mutating_call(call) is expected
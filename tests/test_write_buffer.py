@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Testes do write-behind de execuções de processos e métricas
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from src.database.write_buffer import (
+    ProcessMetricsWriter, WriteBehindBuffer, PROCESS_COLUMNS, API_METRIC
+)
+
+
+@dataclass
+class _Metric:
+    endpoint: str
+    response_time_ms: int
+    status_code: int = 200
+    success: bool = True
+    request_size_bytes: Optional[int] = None
+    response_size_bytes: Optional[int] = None
+    process_execution_id: Optional[str] = None
+
+
+class _Connection:
+    """Conexão em memória que registra COPY e executemany"""
+
+    def __init__(self):
+        self.copied = []
+        self.executed = []
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copied.append((table, list(records), columns))
+
+    async def executemany(self, sql, args):
+        self.executed.append((sql.split()[0], list(args)))
+
+    def transaction(self):
+        return _Context(None)
+
+    async def __aenter__(self):
+        return self
+
+
+class _Context:
+    def __init__(self, value):
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Pipeline:
+    def __init__(self, log):
+        self.log = log
+
+    def __getattr__(self, name):
+        return lambda *args: self.log.append((name, *args))
+
+    async def execute(self):
+        self.log.append(("execute",))
+
+
+class _Database:
+    def __init__(self):
+        self.connection = _Connection()
+        self.redis_log = []
+        self.pg_pool = self
+        self.redis = self
+
+    def acquire(self):
+        return _Context(self.connection)
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self.redis_log)
+
+
+class _LoopBoundDatabase(_Database):
+    """Como o pool do asyncpg: só pode ser usado no loop em que foi criado"""
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+
+    def acquire(self):
+        if asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("pool attached to a different loop")
+        return super().acquire()
+
+    async def close(self):
+        self.closed = True
+
+
+def test_start_and_completion_in_one_batch_become_one_copy_row():
+    db = _Database()
+    writer = ProcessMetricsWriter(db)
+
+    async def run():
+        await writer.process_started("p1", "consultar_clientes", "running", {"pagina": 1})
+        await writer.process_started("p2", "consultar_projetos", "running", {})
+        await writer.api_metric(_Metric("consultar_clientes", 120, process_execution_id="p1"))
+        await writer.process_completed("p1", "completed", {"total": 3})
+        assert writer.pending_process("p1")["status"] == "completed"
+        await writer.process_completed("p0", "failed", error_message="Timeout")
+        await writer.buffer.flush()
+
+    asyncio.run(run())
+
+    (table, records, columns), = db.connection.copied
+    assert table == "process_executions" and columns == PROCESS_COLUMNS
+    rows = {record[0]: dict(zip(columns, record)) for record in records}
+    assert rows["p1"]["status"] == "completed" and rows["p1"]["duration_ms"] >= 0
+    assert rows["p1"]["response_data"] == '{"total": 3}'
+    assert rows["p2"]["status"] == "running" and rows["p2"]["completed_at"] is None
+    # Só o processo iniciado em lote anterior precisa de UPDATE; métrica depois do COPY
+    assert [(verb, len(args)) for verb, args in db.connection.executed] == [("UPDATE", 1), ("INSERT", 1)]
+    assert db.connection.executed[0][1][0][-1] == "p0"
+
+    # Um processo ainda ativo (p2) e um concluído de lote anterior (p0): saldo zero
+    assert not [op for op in db.redis_log if op[0] == "incrby"]
+    hincr = [op for op in db.redis_log if op[0] == "hincrby"]
+    assert ("hincrby", hincr[0][1], "count", 1) in hincr
+    assert writer.get_stats()["written"] == 5 and writer.pending_process("p1") is None
+
+
+def test_buffer_flushes_by_size_and_interval():
+    batches = []
+
+    async def write(events):
+        batches.append(len(events))
+
+    async def run():
+        buffer = WriteBehindBuffer(write, batch_rows=10, flush_interval=0.05)
+        buffer.start()
+        for i in range(25):
+            await buffer.put(API_METRIC, {"i": i})
+        await asyncio.sleep(0.01)
+        sized = list(batches)
+        await asyncio.sleep(0.1)
+        await buffer.stop()
+        return sized, buffer.get_stats()
+
+    sized, stats = asyncio.run(run())
+    assert sized and sized[0] == 10
+    assert sum(batches) == 25 and stats["written"] == 25 and stats["queued"] == 0
+
+
+def test_slow_database_applies_backpressure_then_drops():
+    async def slow_write(events):
+        await asyncio.sleep(0.2)
+
+    async def run():
+        buffer = WriteBehindBuffer(slow_write, max_rows=20, batch_rows=10, flush_interval=1, max_wait=0.01)
+        buffer.start()
+        started = asyncio.get_running_loop().time()
+        results = [await buffer.put(API_METRIC, {"i": i}) for i in range(60)]
+        elapsed = asyncio.get_running_loop().time() - started
+        await buffer.stop()
+        return results, elapsed, buffer.get_stats()
+
+    results, elapsed, stats = asyncio.run(run())
+    # Quem enfileira nunca espera o banco: no máximo max_wait por evento
+    assert elapsed < 60 * 0.02
+    assert stats["dropped"] == results.count(False) > 0
+    assert stats["backpressure_waits"] >= stats["dropped"]
+    assert stats["written"] + stats["dropped"] == 60
+
+
+def test_failed_batches_are_counted_and_do_not_stop_the_flusher():
+    calls = []
+
+    async def flaky(events):
+        calls.append(len(events))
+        if len(calls) == 1:
+            raise ConnectionError("PostgreSQL indisponível")
+
+    async def run():
+        buffer = WriteBehindBuffer(flaky, batch_rows=5)
+        for i in range(10):
+            await buffer.put(API_METRIC, {"i": i})
+        await buffer.flush()
+        return buffer.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["failed_batches"] == 1 and stats["failed_rows"] == 5 and stats["written"] == 5
+
+
+def test_stop_drains_only_on_the_loop_that_owns_the_pool():
+    async def serve(drain):
+        db = _LoopBoundDatabase()
+        writer = ProcessMetricsWriter(db, flush_interval=60)
+        writer.start()
+        for i in range(5):
+            await writer.api_metric(_Metric("consultar_clientes", 100 + i))
+        if drain:
+            await writer.stop()
+        return db, writer
+
+    db, writer = asyncio.run(serve(drain=True))
+    assert writer.get_stats()["written"] == 5 and len(db.connection.executed) == 1
+
+    # Encerramento num segundo asyncio.run (antigo caminho do servidor): a fila se perde
+    db, writer = asyncio.run(serve(drain=False))
+    asyncio.run(writer.buffer.flush())
+    stats = writer.get_stats()
+    assert stats["written"] == 0 and stats["failed_rows"] == 5
+
+
+def test_server_shutdown_drains_database_writer():
+    server = pytest.importorskip("omie_fastmcp_unified")
+    database_manager = pytest.importorskip("src.database.database_manager")
+
+    async def serve():
+        db = _LoopBoundDatabase()
+        omie_db = database_manager.OmieIntegrationDatabase()
+        omie_db.db_manager = db
+        omie_db.writer = ProcessMetricsWriter(db, flush_interval=60)
+        async with server.server_lifespan(server.mcp):
+            server.omie_db = omie_db
+            omie_db.writer.start()
+            for i in range(5):
+                await omie_db.writer.api_metric(_Metric("consultar_clientes", 100 + i))
+        return db, omie_db.writer
+
+    db, writer = asyncio.run(serve())
+    assert writer.get_stats()["written"] == 5 and db.closed
+    assert server.omie_db is None
+
+
+def test_redis_failure_after_commit_does_not_count_rows_as_lost():
+    class _FailingPipeline(_Pipeline):
+        async def execute(self):
+            raise ConnectionError("Redis indisponível")
+
+    db = _Database()
+    db.pipeline = lambda transaction=True: _FailingPipeline(db.redis_log)
+    writer = ProcessMetricsWriter(db)
+
+    async def run():
+        await writer.process_started("p1", "consultar_clientes", "running", {})
+        await writer.api_metric(_Metric("consultar_clientes", 80, process_execution_id="p1"))
+        await writer.buffer.flush()
+        return writer.get_stats()
+
+    stats = asyncio.run(run())
+    assert len(db.connection.copied) == 1 and len(db.connection.executed) == 1
+    assert stats["written"] == 2 and stats["failed_batches"] == stats["failed_rows"] == 0
+    assert stats["redis_failed_batches"] == 1 and stats["redis_failed_rows"] == 2